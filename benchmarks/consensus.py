@@ -0,0 +1,121 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+Добавление блоков при доказательстве работы и доказательстве доли (см.
+core.consensus): задержка добавления одного блока и процессорное время
+на блок. При PoS блок добавляет валидатор, выбранный по ставке, и вместо
+перебора nonce подписывает заголовок. Отдельно измеряется выбор
+валидатора из большого количества ставок (дерево Фенвика, O(log n)).
+
+Запуск: python3 benchmarks/consensus.py [количество блоков] [сложность PoW, байтов] [валидаторов]
+"""
+from statistics import mean
+from time import perf_counter, process_time
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blockchain import BlockChain, BlockChainConfig, ConsensusAlgorithm
+from core.consensus import StakePool
+
+WALLETS = 3
+
+
+def produce(algorithm: ConsensusAlgorithm, blocks: int, difficulty: int) -> tuple:
+	"""
+	Добавление блоков по одной транзакции
+
+	:param algorithm: Алгоритм консенсуса
+	:param blocks: Количество блоков
+	:param difficulty: Сложность PoW в байтах
+
+	:return: Кортеж (средняя задержка в мс, максимальная задержка в мс, процессорное время на блок в мс)
+	"""
+	config = BlockChainConfig(coin_name='BENCH', max_supply=10.0 ** 9, difficulty=difficulty,
+							consensus_algorithm=algorithm, log_dir=None)
+	blockchain = BlockChain(config)
+	wallets = [blockchain.create_wallet(f'wallet{i}', 10.0 ** 4) for i in range(WALLETS)]
+
+	for i, wallet in enumerate(wallets):
+		blockchain.stake(wallet, 100 * (i + 1))
+
+	# Ставки вступают в силу с блоком, в который вошли их транзакции
+	blockchain.mine_block(wallets[0])
+
+	latencies = []
+	cpu = 0.0
+
+	for i in range(blocks):
+		blockchain.pending_transaction(wallets[0].send_transaction(wallets[1], 0.01, 0.001))
+		if algorithm == ConsensusAlgorithm.PROOF_OF_STAKE:
+			producer = blockchain.get_wallet(blockchain.next_validator())
+		else:
+			producer = wallets[i % WALLETS]
+
+		start, start_cpu = perf_counter(), process_time()
+		assert blockchain.mine_block(producer)
+		latencies.append(perf_counter() - start)
+		cpu += process_time() - start_cpu
+
+	return mean(latencies) * 1000, max(latencies) * 1000, cpu / blocks * 1000
+
+
+def selection(validators: int, rounds: int=100000) -> float:
+	"""
+	Скорость выбора валидатора
+
+	:param validators: Количество валидаторов
+	:param rounds: Количество выборов
+
+	:return: Выборов в секунду
+	"""
+	rng = random.Random(1)
+	pool = StakePool()
+
+	for _ in range(validators):
+		pool.stake(rng.randbytes(64), rng.randint(1, 10 ** 12))
+
+	pool.select(b'')
+	start = perf_counter()
+
+	for i in range(rounds):
+		pool.select(i.to_bytes(8, 'big'))
+
+	return rounds / (perf_counter() - start)
+
+
+def main(blocks: int, difficulty: int, validators: int) -> None:
+	print(f'{"consensus":>16}{"blocks":>8}{"mean ms":>10}{"max ms":>10}{"cpu ms/block":>14}')
+
+	for algorithm in (ConsensusAlgorithm.PROOF_OF_WORK, ConsensusAlgorithm.PROOF_OF_STAKE):
+		latency, worst, cpu = produce(algorithm, blocks, difficulty)
+		print(f'{algorithm.value:>16}{blocks:>8}{latency:>10.2f}{worst:>10.2f}{cpu:>14.2f}')
+
+	print()
+	print(f'{"validators":>12}{"selections/s":>14}')
+
+	for count in (validators // 100, validators // 10, validators):
+		print(f'{count:>12}{selection(count):>14.0f}')
+
+
+if __name__ == '__main__':
+	main(int(sys.argv[1]) if len(sys.argv) > 1 else 20, int(sys.argv[2]) if len(sys.argv) > 2 else 2,
+		int(sys.argv[3]) if len(sys.argv) > 3 else 100000)
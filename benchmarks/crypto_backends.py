@@ -0,0 +1,79 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+Сравнение скорости криптографических бэкендов: генерация ключей,
+подпись и проверка сигнатур (операций в секунду).
+
+Запуск: python3 benchmarks/crypto_backends.py [количество операций]
+"""
+from time import perf_counter
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.crypto import available_backends, get_backend
+
+
+def rate(count: int, func) -> float:
+	"""
+	Количество вызовов функции в секунду
+
+	:param count: Количество вызовов
+	:param func: Функция без аргументов
+
+	:return: Операций в секунду
+	"""
+	start = perf_counter()
+
+	for _ in range(count):
+		func()
+
+	return count / (perf_counter() - start)
+
+
+def main(count: int) -> None:
+	message = os.urandom(200)
+	backends = [get_backend(name) for name in available_backends()]
+
+	print(f'{"backend":<10}{"keygen/s":>12}{"sign/s":>12}{"verify/s":>12}')
+
+	for backend in backends:
+		private_key, public_key = backend.generate_key_pair()
+		signature = backend.sign(private_key, message)
+
+		keygen = rate(count, backend.generate_key_pair)
+		sign = rate(count, lambda: backend.sign(private_key, message))
+		verify = rate(count, lambda: backend.verify(public_key, signature, message))
+
+		print(f'{backend.name:<10}{keygen:>12.0f}{sign:>12.0f}{verify:>12.0f}')
+
+	# Проверка совместимости: сигнатура любого бэкенда проверяется любым другим
+	for signer in backends:
+		private_key, public_key = signer.generate_key_pair()
+		signature = signer.sign(private_key, message)
+
+		for verifier in backends:
+			assert verifier.verify(public_key, signature, message), f'{signer.name} -> {verifier.name}'
+
+	print('Interoperability: OK')
+
+
+if __name__ == '__main__':
+	main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,131 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+Моделирование времени между блоками: прежний пересчет сложности (+/-1 байт
+после каждого блока по времени его добычи) против пересчета цели по
+скользящему окну меток времени (см. core.difficulty.Retargeter).
+
+Nonce не перебираются: время добычи блока при работе W и вычислительной
+мощности H хешей в секунду распределено экспоненциально со средним W / H.
+Мощность сети меняется по ходу моделирования (x1, x4, x0.5), чтобы было
+видно, как быстро сложность подстраивается. Для каждого способа выводятся
+статистика и гистограмма времени блоков.
+
+Запуск: python3 benchmarks/difficulty.py [количество блоков] [интервал, с] [окно, блоков]
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+from statistics import mean, pstdev
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.difficulty import Retargeter, difficulty_target, target_work
+
+# Блок для пересчета цели: Retargeter использует только эти поля
+SimulatedBlock = namedtuple('SimulatedBlock', 'index timestamp metadata')
+
+# Изменение вычислительной мощности по третям моделирования
+HASHRATE_STEPS = (1.0, 4.0, 0.5)
+INITIAL_DIFFICULTY = 2
+BUCKETS = 16
+BAR_WIDTH = 50
+
+
+def hashrate(height: int, blocks: int, base: float) -> float:
+	return base * HASHRATE_STEPS[min(height * len(HASHRATE_STEPS) // blocks, len(HASHRATE_STEPS) - 1)]
+
+
+def legacy(blocks: int, interval: float, base: float, rng: random.Random) -> list:
+	"""
+	Прежний способ: сложность в целых байтах, +1 после быстрого блока и -1 после медленного
+
+	:return: Время добычи каждого блока в секундах
+	"""
+	difficulty = INITIAL_DIFFICULTY
+	times = []
+
+	for height in range(blocks):
+		elapsed = rng.expovariate(hashrate(height, blocks, base) / 256 ** difficulty)
+		times.append(elapsed)
+
+		if elapsed < interval:
+			difficulty += 1
+		elif elapsed > interval:
+			difficulty = max(difficulty - 1, 1)
+
+	return times
+
+
+def retargeted(blocks: int, interval: float, window: int, base: float, rng: random.Random) -> list:
+	"""
+	Пересчет цели по меткам времени последних window блоков
+
+	:return: Время добычи каждого блока в секундах
+	"""
+	retarget = Retargeter(interval, window, difficulty_target(INITIAL_DIFFICULTY))
+	chain = [SimulatedBlock(0, datetime(2024, 1, 1), {})]
+	times = []
+
+	for height in range(1, blocks + 1):
+		target = retarget.next_target(chain[-(window + 1):])
+		elapsed = rng.expovariate(hashrate(height - 1, blocks, base) / target_work(target))
+		times.append(elapsed)
+		chain.append(SimulatedBlock(height, chain[-1].timestamp + timedelta(seconds=elapsed), {'target': target}))
+
+	return times
+
+
+def report(name: str, times: list, interval: float) -> None:
+	"""
+	Статистика и гистограмма времени блоков (корзины по interval / 4, последняя - все остальное)
+	"""
+	ordered = sorted(times)
+	width = interval / 4
+	counts = [0] * BUCKETS
+
+	for elapsed in times:
+		counts[min(int(elapsed / width), BUCKETS - 1)] += 1
+
+	print(f'{name}: mean {mean(times):.1f} s, stdev {pstdev(times):.1f} s, '
+		f'p50 {ordered[len(ordered) // 2]:.1f} s, p95 {ordered[int(len(ordered) * 0.95)]:.1f} s, max {ordered[-1]:.1f} s')
+
+	for bucket, count in enumerate(counts):
+		label = f'>= {bucket * width:.1f}' if bucket == BUCKETS - 1 else f'{bucket * width:.1f}-{(bucket + 1) * width:.1f}'
+		bar = '#' * round(count / max(counts) * BAR_WIDTH)
+		print(f'  {label:>12} s | {bar:<{BAR_WIDTH}} {count}')
+
+	print()
+
+
+def main(blocks: int, interval: float, window: int) -> None:
+	# Мощность, при которой начальная сложность дает блок в среднем раз в interval секунд
+	base = 256 ** INITIAL_DIFFICULTY / interval
+
+	print(f'blocks: {blocks}, target interval: {interval} s, window: {window} blocks, '
+		f'hashrate steps: {" -> ".join(f"x{step}" for step in HASHRATE_STEPS)}\n')
+	report('legacy +/-1 byte', legacy(blocks, interval, base, random.Random(1)), interval)
+	report(f'retarget, window {window}', retargeted(blocks, interval, window, base, random.Random(1)), interval)
+
+
+if __name__ == '__main__':
+	main(int(sys.argv[1]) if len(sys.argv) > 1 else 3000, float(sys.argv[2]) if len(sys.argv) > 2 else 10.0,
+		int(sys.argv[3]) if len(sys.argv) > 3 else 30)
@@ -0,0 +1,124 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+Выгрузка подтвержденных транзакций цепи на диске: прежний подход (копия
+всей цепи в памяти, затем обработка) против потоковой выгрузки в NDJSON и
+CSV (см. core.export). Пиковый расход памяти измеряется через tracemalloc
+для двух длин цепи: у потоковой выгрузки он не должен расти с длиной цепи.
+
+Запуск: python3 benchmarks/export.py [количество блоков] [транзакций в блоке]
+"""
+from time import perf_counter
+import copy
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blockchain import Block, BlockChain, BlockChainConfig, Transaction
+from core.export import export_transactions, json_default, transaction_to_dict
+from core.serialization import to_base_units
+
+
+def build_chain(directory: str, blocks: int, transactions: int) -> BlockChain:
+	"""
+	Построение цепи в хранилище на диске (блоки добавляются без добычи и подписей)
+
+	:param directory: Директория хранилища
+	:param blocks: Количество блоков
+	:param transactions: Количество транзакций в блоке
+
+	:return: Блокчейн, открытый заново (цепь читается с диска)
+	"""
+	config = BlockChainConfig(coin_name='BENCH', max_supply=10.0 ** 9, difficulty=1, log_dir=None, storage_path=directory)
+	blockchain = BlockChain(config)
+	sender = blockchain.create_wallet('sender', 10.0 ** 6)
+	recipient = blockchain.create_wallet('recipient', 0.0)
+	amount, fee = to_base_units(0.01), to_base_units(0.001)
+
+	for _ in range(blocks):
+		tip = blockchain.chain[-1]
+		block = Block(tip.index + 1, [Transaction(sender.public_key_bytes, recipient.public_key_bytes, amount, fee)
+									for _ in range(transactions)], tip.hash, {'difficulty': 1})
+		assert blockchain.add_block(block)
+
+	blockchain.close()
+
+	return BlockChain(config)
+
+
+def copied(blockchain: BlockChain, file) -> int:
+	"""Прежний подход: копия всей цепи в памяти, затем запись"""
+	chain = copy.deepcopy(list(blockchain.chain))
+	count = 0
+
+	for block in chain:
+		for position, transaction in enumerate(block.transactions):
+			record = dict(transaction_to_dict(transaction), block=block.index, position=position)
+			file.write(json.dumps(record, default=json_default) + '\n')
+			count += 1
+
+	return count
+
+
+def measure(export, blockchain: BlockChain) -> tuple:
+	"""
+	Время и пиковый расход памяти выгрузки
+
+	:param export: Функция выгрузки (блокчейн, файл) -> количество записей
+	:param blockchain: Блокчейн
+
+	:return: Кортеж (количество записей, секунды, пик памяти в КиБ)
+	"""
+	with open(os.devnull, 'w', newline='') as file:
+		tracemalloc.start()
+		start = perf_counter()
+		count = export(blockchain, file)
+		elapsed = perf_counter() - start
+		peak = tracemalloc.get_traced_memory()[1]
+		tracemalloc.stop()
+
+	return count, elapsed, peak / 1024
+
+
+def main(blocks: int, transactions: int) -> None:
+	exports = [
+		('copy + json', copied),
+		('stream ndjson', lambda blockchain, file: export_transactions(blockchain, file)),
+		('stream csv', lambda blockchain, file: export_transactions(blockchain, file, format='csv')),
+	]
+
+	print(f'{"chain":>12}{"export":>16}{"records":>10}{"records/s":>12}{"peak KiB":>12}')
+
+	for length in (blocks, blocks * 4):
+		with tempfile.TemporaryDirectory() as directory:
+			blockchain = build_chain(directory, length, transactions)
+
+			for name, export in exports:
+				count, elapsed, peak = measure(export, blockchain)
+				print(f'{length:>12}{name:>16}{count:>10}{count / elapsed:>12.0f}{peak:>12.0f}')
+
+			blockchain.close()
+
+
+if __name__ == '__main__':
+	main(int(sys.argv[1]) if len(sys.argv) > 1 else 250, int(sys.argv[2]) if len(sys.argv) > 2 else 20)
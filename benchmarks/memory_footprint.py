@@ -0,0 +1,144 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+Память на одну транзакцию и на один кошелек: прежнее представление
+(объекты ecdsa, datetime и __dict__ у каждого экземпляра) против
+текущего (__slots__, ключи в сырых байтах, колоночная таблица).
+
+Запуск: python3 benchmarks/memory_footprint.py [количество транзакций]
+"""
+from datetime import datetime
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blockchain import Transaction, Wallet
+from core.columnar import TransactionTable
+from core.configs import TransactionStatus
+from core.serialization import to_base_units
+import ecdsa
+
+
+class LegacyTransaction:
+	"""Прежнее представление транзакции: ключи ecdsa, datetime и __dict__"""
+	def __init__(self, sender, recipient, amount, fee):
+		self.sender_wallet = sender
+		self.recipient_wallet = recipient
+		self.amount = amount
+		self.fee = fee
+		self.timestamp = datetime.now()
+		self.signature = None
+		self.status = TransactionStatus.PENDING
+
+
+class LegacyWallet:
+	"""Прежнее представление кошелька: объекты ecdsa и __dict__"""
+	def __init__(self, name, balance):
+		self.name = name
+		self.balance = balance
+		self.private_key = ecdsa.SigningKey.generate(curve=ecdsa.NIST256p)
+		self.public_key = self.private_key.get_verifying_key()
+		self.transactions_history = {}
+
+
+def copy(data: bytes) -> bytes:
+	"""
+	Отдельная копия байтов: bytes(data) для bytes возвращает тот же объект,
+	а у каждой транзакции, разобранной из сети или с диска, свои ключи и подпись
+
+	:param data: Байты
+
+	:return: Новый объект с теми же байтами
+	"""
+	return bytes(bytearray(data))
+
+
+def measure(count: int, build) -> float:
+	"""
+	Средний объем памяти на один объект
+
+	:param count: Количество объектов
+	:param build: Функция, создающая список объектов
+
+	:return: Байтов на объект
+	"""
+	tracemalloc.start()
+	before = tracemalloc.take_snapshot()
+	objects = build(count)
+	after = tracemalloc.take_snapshot()
+	tracemalloc.stop()
+	size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+	del objects
+
+	return size / count
+
+
+def main(count: int) -> None:
+	sender, recipient = Wallet('alice', 1.0), Wallet('bob', 0.0)
+	signature = os.urandom(64)
+
+	def legacy_transactions(n):
+		# Каждая транзакция получает свои объекты ключей и подпись, как после разбора из сети или с диска
+		result = []
+
+		for _ in range(n):
+			tx = LegacyTransaction(sender.public_key.from_string(sender.public_key_bytes, curve=ecdsa.NIST256p),
+								recipient.public_key.from_string(recipient.public_key_bytes, curve=ecdsa.NIST256p), 1.5, 0.1)
+			tx.signature = copy(signature)
+			result.append(tx)
+
+		return result
+
+	amount, fee = to_base_units(1.5), to_base_units(0.1)
+
+	def slotted_transactions(n):
+		result = []
+
+		for _ in range(n):
+			tx = Transaction(copy(sender.public_key_bytes), copy(recipient.public_key_bytes), amount, fee)
+			tx.signature = copy(signature)
+			result.append(tx)
+
+		return result
+
+	def table_transactions(n):
+		# Таблица копирует поля строки в свои столбцы, сама транзакция после этого не хранится
+		table = TransactionTable()
+
+		for _ in range(n):
+			tx = Transaction(copy(sender.public_key_bytes), copy(recipient.public_key_bytes), amount, fee)
+			tx.signature = copy(signature)
+			table.append(tx)
+
+		return table
+
+	wallets = max(count // 20, 10)
+
+	print(f'{"representation":<28}{"bytes/object":>14}')
+	print(f'{"transaction (legacy)":<28}{measure(count, legacy_transactions):>14.0f}')
+	print(f'{"transaction (__slots__)":<28}{measure(count, slotted_transactions):>14.0f}')
+	print(f'{"transaction (table row)":<28}{measure(count, table_transactions):>14.0f}')
+	print(f'{"wallet (legacy)":<28}{measure(wallets, lambda n: [LegacyWallet("w", 0.0) for _ in range(n)]):>14.0f}')
+	print(f'{"wallet (__slots__)":<28}{measure(wallets, lambda n: [Wallet("w", 0.0) for _ in range(n)]):>14.0f}')
+
+
+if __name__ == '__main__':
+	main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,137 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+Нагрузка на локальный узел (см. core.node): множество одновременных
+клиентов отправляют подписанные транзакции по HTTP/JSON-RPC, пока узел
+добывает блоки. Измеряются пропускная способность приема транзакций,
+задержки ответов и задержка запросов во время добычи.
+
+Запуск: python3 benchmarks/node.py [клиентов] [транзакций на клиента] [сложность]
+"""
+from contextlib import redirect_stdout
+from time import perf_counter
+import asyncio
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blockchain import BlockChain, BlockChainConfig
+from core.exceptions import RPCException
+from core.node import NodeClient, NodeService
+
+
+def percentile(values, fraction: float) -> float:
+	"""
+	Перцентиль выборки (fraction от 0 до 1)
+	"""
+	ordered = sorted(values)
+	return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] if ordered else 0.0
+
+
+async def client(host: str, port: int, transactions, latencies: list, results: dict) -> None:
+	"""
+	Клиент: отправляет свои транзакции по одной и записывает задержки
+
+	:param transactions: Подписанные транзакции в hex
+	"""
+	async with NodeClient(host, port) as node:
+		for transaction in transactions:
+			start = perf_counter()
+
+			try:
+				accepted = await node.call('submit_transaction', transaction=transaction)
+				key = 'accepted' if accepted else 'rejected'
+			except RPCException:
+				key = 'busy'
+
+			latencies.append(perf_counter() - start)
+			results[key] = results.get(key, 0) + 1
+
+
+async def miner(host: str, port: int, public_key: str, done: asyncio.Event, mined: list) -> None:
+	"""
+	Непрерывная добыча блоков, пока клиенты отправляют транзакции
+	"""
+	async with NodeClient(host, port) as node:
+		while not done.is_set():
+			result = await node.call('mine_block', public_key=public_key)
+
+			if result['mined']:
+				mined.append(result['index'])
+			else:
+				await asyncio.sleep(0.01)
+
+
+async def probe(host: str, port: int, done: asyncio.Event, latencies: list) -> None:
+	"""
+	Запросы сведений о цепи во время нагрузки (отзывчивость цикла событий)
+	"""
+	async with NodeClient(host, port) as node:
+		while not done.is_set():
+			start = perf_counter()
+			await node.call('get_chain_info')
+			latencies.append(perf_counter() - start)
+			await asyncio.sleep(0.005)
+
+
+async def main(clients: int, per_client: int, difficulty: int) -> None:
+	blockchain = BlockChain(BlockChainConfig(coin_name='BENCH', max_supply=10.0 ** 9, difficulty=difficulty,
+											log_dir=None, block_max_transactions=2000))
+	senders = [blockchain.create_wallet(f'sender-{i}', 10 ** 4) for i in range(clients)]
+	recipient = blockchain.create_wallet('recipient', 0)
+	# Транзакции подписываются заранее, чтобы измерять только узел
+	signed = [[sender.send_transaction(recipient, '0.01', '0.01').encode().hex() for _ in range(per_client)]
+			for sender in senders]
+
+	done = asyncio.Event()
+	latencies, probes, mined, results = [], [], [], {}
+
+	# Block.mine печатает сообщения о добыче каждого блока
+	with redirect_stdout(io.StringIO()):
+		async with NodeService(blockchain, queue_size=clients * per_client) as node:
+			host, port = node.address
+			background = [asyncio.create_task(miner(host, port, recipient.public_key_bytes.hex(), done, mined)),
+						asyncio.create_task(probe(host, port, done, probes))]
+
+			start = perf_counter()
+			await asyncio.gather(*(client(host, port, transactions, latencies, results) for transactions in signed))
+			elapsed = perf_counter() - start
+
+			done.set()
+			await asyncio.gather(*background)
+
+	print(f'clients: {clients}, transactions: {clients * per_client}, difficulty: {difficulty}')
+	print(f'throughput: {clients * per_client / elapsed:.0f} tx/s ({elapsed:.2f} s), results: {results}')
+	print(f'submit latency: p50 {percentile(latencies, 0.5) * 1000:.1f} ms, p99 {percentile(latencies, 0.99) * 1000:.1f} ms')
+	print(f'get_chain_info during load: p50 {percentile(probes, 0.5) * 1000:.1f} ms, '
+		f'max {max(probes, default=0.0) * 1000:.1f} ms ({len(probes)} probes)')
+	print(f'blocks mined: {len(mined)}, batches: {node.stats["batches"]}, '
+		f'average batch: {node.stats["submitted"] / max(node.stats["batches"], 1):.1f}')
+
+	blockchain.close()
+
+
+if __name__ == '__main__':
+	arguments = [int(value) for value in sys.argv[1:4]]
+	defaults = [500, 4, 3]
+	arguments += defaults[len(arguments):]
+
+	asyncio.run(main(*arguments))
@@ -0,0 +1,233 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+Сеть из нескольких локальных узлов (см. core.p2p): каждый узел - отдельный
+процесс с NodeService и GossipNode. Узлы соединены в кольцо с
+дополнительными случайными связями, клиенты каждого узла отправляют ему
+транзакции, а майнеры добывают блоки. Измеряются сходимость цепей (у всех
+узлов одинаковый последний блок), задержка распространения блоков,
+количество боковых блоков и смен ветки, а также объем трафика.
+
+Все узлы начинают с одинакового состояния: общий genesis-блок
+(genesis_time) и одинаковые кошельки, созданные в родительском процессе.
+
+Запуск: python3 benchmarks/p2p_network.py [узлов] [транзакций в секунду на узел] [секунд] [майнеров] [сложность]
+"""
+from contextlib import redirect_stdout
+from datetime import datetime
+from multiprocessing.connection import Connection
+from time import time
+import asyncio
+import io
+import multiprocessing
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blockchain import BlockChain, BlockChainConfig, Wallet
+from core.exceptions import RPCException
+from core.node import NodeClient, NodeService
+from core.p2p import GossipNode
+
+GENESIS_TIME = datetime(2024, 1, 1)
+SENDERS_PER_NODE = 8
+EXTRA_LINKS = 1
+
+
+def percentile(values, fraction: float) -> float:
+	"""
+	Перцентиль выборки (fraction от 0 до 1)
+	"""
+	ordered = sorted(values)
+	return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] if ordered else 0.0
+
+
+def build_blockchain(accounts, difficulty: int) -> BlockChain:
+	"""
+	Блокчейн узла с общим genesis-блоком и общими кошельками
+
+	:param accounts: Кошельки: (имя, баланс в базовых единицах, приватный ключ, публичный ключ)
+	"""
+	blockchain = BlockChain(BlockChainConfig(coin_name='BENCH', max_supply=10.0 ** 9, difficulty=difficulty,
+											log_dir=None, block_max_transactions=2000, genesis_time=GENESIS_TIME))
+
+	for name, balance, private_key, public_key in accounts:
+		blockchain.register_wallet(Wallet.restore(name, balance, private_key, public_key))
+
+	return blockchain
+
+
+async def send_transactions(node: NodeService, senders, recipient, rate: int, stop: asyncio.Event) -> None:
+	"""
+	Клиент узла: отправка rate транзакций в секунду пачками раз в 50 мс
+	"""
+	host, port = node.address
+	step, turn = 0.05, 0
+
+	async with NodeClient(host, port) as client:
+		while not stop.is_set():
+			count = max(1, round(rate * step))
+			calls = []
+
+			for _ in range(count):
+				sender = senders[turn % len(senders)]
+				turn += 1
+				calls.append(('submit_transaction',
+							{'transaction': sender.send_transaction(recipient, '0.01', '0.01').encode().hex()}))
+
+			try:
+				await client.batch(calls)
+			except RPCException:
+				pass
+
+			await asyncio.sleep(step)
+
+
+async def mine_blocks(node: NodeService, public_key: str, stop: asyncio.Event) -> None:
+	"""
+	Майнер узла: непрерывная добыча блоков
+	"""
+	while not stop.is_set():
+		result = await node.mine_block(public_key)
+
+		if not result['mined']:
+			await asyncio.sleep(0.01)
+
+
+async def run_node(number: int, accounts, difficulty: int, rate: int, mining: bool,
+				ports: multiprocessing.Queue, control: Connection) -> None:
+	loop = asyncio.get_running_loop()
+	blockchain = build_blockchain(accounts, difficulty)
+	wallets = {wallet.name: wallet for wallet in blockchain.wallets}
+	senders = [wallets[f'sender-{number}-{i}'] for i in range(SENDERS_PER_NODE)]
+	arrivals = {}
+
+	gossip = GossipNode(blockchain)
+	gossip.on_block = lambda block: arrivals.setdefault(block.hash.hex(), time())
+
+	async with NodeService(blockchain, gossip=gossip) as node:
+		ports.put((number, gossip.port))
+
+		for port in await loop.run_in_executor(None, control.recv):
+			await gossip.connect('127.0.0.1', port)
+
+		await loop.run_in_executor(None, control.recv)
+		stop = asyncio.Event()
+		tasks = [asyncio.create_task(send_transactions(node, senders, wallets['recipient'], rate, stop))]
+
+		if mining:
+			tasks.append(asyncio.create_task(mine_blocks(node, wallets[f'miner-{number}'].public_key_bytes.hex(), stop)))
+
+		await loop.run_in_executor(None, control.recv)
+		stop.set()
+		await asyncio.gather(*tasks)
+
+		# Ожидание, пока последние блоки дойдут до всех узлов
+		await loop.run_in_executor(None, control.recv)
+		tip = blockchain.chain[-1]
+		control.send({'height': tip.index, 'tip': tip.hash.hex(), 'arrivals': arrivals, 'stats': gossip.stats,
+					'mempool': len(blockchain.mempool)})
+		await loop.run_in_executor(None, control.recv)
+
+	blockchain.close()
+
+
+def node_process(*args) -> None:
+	# Block.mine печатает сообщения о добыче каждого блока
+	with redirect_stdout(io.StringIO()):
+		asyncio.run(run_node(*args))
+
+
+def main(nodes: int, rate: int, duration: float, miners: int, difficulty: int) -> None:
+	accounts = [(f'sender-{number}-{i}', 10 ** 12, None, None) for number in range(nodes) for i in range(SENDERS_PER_NODE)]
+	accounts += [(f'miner-{number}', 0, None, None) for number in range(nodes)] + [('recipient', 0, None, None)]
+	accounts = [(name, balance, wallet.private_key_bytes, wallet.public_key_bytes)
+				for name, balance, wallet in ((name, balance, Wallet(name)) for name, balance, _, _ in accounts)]
+
+	ports = multiprocessing.Queue()
+	pipes = [multiprocessing.Pipe() for _ in range(nodes)]
+	processes = [multiprocessing.Process(target=node_process, args=(number, accounts, difficulty, rate, number < miners,
+																	ports, pipes[number][1]))
+				for number in range(nodes)]
+
+	for process in processes:
+		process.start()
+
+	addresses = dict(ports.get() for _ in range(nodes))
+	random.seed(0)
+
+	for number in range(nodes):
+		links = {(number + 1) % nodes} if nodes > 1 else set()
+		links |= set(random.sample(range(nodes), min(EXTRA_LINKS, nodes))) - {number}
+		pipes[number][0].send([addresses[peer] for peer in sorted(links)])
+
+	for control, _ in pipes:
+		control.send('go')
+
+	start = time()
+	asyncio.run(asyncio.sleep(duration))
+
+	for control, _ in pipes:
+		control.send('stop')
+
+	asyncio.run(asyncio.sleep(2.0))
+	elapsed = time() - start
+
+	for control, _ in pipes:
+		control.send('report')
+
+	reports = [control.recv() for control, _ in pipes]
+
+	for control, _ in pipes:
+		control.send('exit')
+
+	for process in processes:
+		process.join()
+
+	delays = []
+	blocks = set().union(*(report['arrivals'] for report in reports))
+
+	for block_hash in blocks:
+		times = [report['arrivals'][block_hash] for report in reports if block_hash in report['arrivals']]
+		delays += [moment - min(times) for moment in times if moment != min(times)]
+
+	sent = sum(report['stats']['bytes_sent'] for report in reports)
+	accepted = sum(report['stats']['transactions_accepted'] for report in reports)
+	duplicates = sum(report['stats']['duplicate_transactions'] for report in reports)
+
+	print(f'nodes: {nodes}, rate: {rate} tx/s per node, duration: {duration} s, miners: {miners}, difficulty: {difficulty}')
+	print(f'converged: {len({report["tip"] for report in reports}) == 1}, '
+		f'heights: {sorted({report["height"] for report in reports})}, blocks: {len(blocks)}')
+	print(f'block propagation: p50 {percentile(delays, 0.5) * 1000:.1f} ms, p95 {percentile(delays, 0.95) * 1000:.1f} ms, '
+		f'max {max(delays, default=0.0) * 1000:.1f} ms')
+	print(f'traffic: {sent / 1024:.0f} KiB sent ({sent / 1024 / elapsed / nodes:.1f} KiB/s per node), '
+		f'transactions relayed: {accepted}, duplicate announcements: {duplicates}')
+	print(f'mempool sizes: {[report["mempool"] for report in reports]}, '
+		f'side blocks: {sum(report["stats"]["side_blocks"] for report in reports)}, '
+		f'reorganizations: {sum(report["stats"]["reorganizations"] for report in reports)}')
+
+
+if __name__ == '__main__':
+	arguments = [float(value) if i == 2 else int(value) for i, value in enumerate(sys.argv[1:6])]
+	defaults = [4, 50, 5.0, 2, 2]
+	arguments += defaults[len(arguments):]
+
+	main(*arguments)
@@ -0,0 +1,76 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+Время запуска короткоживущего процесса: импорт модуля blockchain и
+создание BlockChain(config). Каждое измерение выполняется в новом
+интерпретаторе во временной рабочей директории; заодно проверяется,
+что процесс не оставил после себя файлов (директории logs и т.п.).
+
+Запуск: python3 benchmarks/startup.py [количество запусков]
+"""
+from statistics import median
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Код, выполняемый в новом интерпретаторе
+PROBE = '''
+import json, sys
+from time import perf_counter
+sys.path.insert(0, sys.argv[1])
+start = perf_counter()
+from blockchain import BlockChain, BlockChainConfig
+imported = perf_counter()
+blockchain = BlockChain(BlockChainConfig(coin_name='BENCH', max_supply=1000.0))
+created = perf_counter()
+print(json.dumps({'import': imported - start, 'init': created - imported}))
+'''
+
+
+def probe() -> dict:
+	"""
+	Один запуск нового интерпретатора
+
+	:return: Словарь с временем импорта, создания блокчейна и списком созданных файлов
+	"""
+	with tempfile.TemporaryDirectory() as workdir:
+		output = subprocess.run([sys.executable, '-c', PROBE, ROOT], cwd=workdir,
+								capture_output=True, text=True, check=True).stdout
+		result = json.loads(output)
+		result['files'] = os.listdir(workdir)
+
+	return result
+
+
+def main(runs: int) -> None:
+	results = [probe() for _ in range(runs)]
+	leftovers = sorted({name for result in results for name in result['files']})
+
+	print(f'runs: {runs}')
+	print(f'import blockchain: {median(r["import"] for r in results) * 1000:.1f} ms (median)')
+	print(f'BlockChain(config): {median(r["init"] for r in results) * 1000:.2f} ms (median)')
+	print(f'files left in working directory: {", ".join(leftovers) if leftovers else "none"}')
+
+
+if __name__ == '__main__':
+	main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
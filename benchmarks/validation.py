@@ -0,0 +1,86 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+Скорость проверки цепи: полная проверка в одном процессе, в пуле
+процессов и повторная проверка от контрольной точки.
+
+Запуск: python3 benchmarks/validation.py [количество блоков] [транзакций в блоке]
+"""
+from contextlib import redirect_stdout
+from time import perf_counter
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blockchain import BlockChain, BlockChainConfig
+from core.validation import ChainValidator
+
+
+def build_chain(blocks: int, transactions: int) -> BlockChain:
+	"""
+	Построение цепи для измерений
+
+	:param blocks: Количество блоков
+	:param transactions: Количество транзакций в блоке
+
+	:return: Блокчейн
+	"""
+	blockchain = BlockChain(BlockChainConfig(coin_name='BENCH', max_supply=10.0 ** 9, difficulty=1, log_dir=None))
+	sender = blockchain.create_wallet('sender', 10.0 ** 6)
+	recipient = blockchain.create_wallet('recipient', 0.0)
+
+	# Block.mine печатает сообщения о добыче каждого блока
+	with redirect_stdout(io.StringIO()):
+		for _ in range(blocks):
+			blockchain.submit_transactions([sender.send_transaction(recipient, 0.01, 0.01) for _ in range(transactions)])
+			blockchain.mine_block(sender)
+
+	return blockchain
+
+
+def timed(validator: ChainValidator, chain, full: bool) -> float:
+	start = perf_counter()
+	result = validator.validate(chain, full)
+	elapsed = perf_counter() - start
+	assert result, result
+
+	return elapsed
+
+
+def main(blocks: int, transactions: int) -> None:
+	blockchain = build_chain(blocks, transactions)
+	workers = os.cpu_count() or 1
+	chunk_size = max(blocks // (workers * 4), 1)
+
+	serial = ChainValidator(workers=1, chunk_size=chunk_size)
+	parallel = ChainValidator(workers=workers, chunk_size=chunk_size)
+
+	print(f'blocks: {len(blockchain.chain)}, transactions per block: {transactions}')
+	print(f'full, 1 process: {timed(serial, blockchain.chain, True):.3f} s')
+	print(f'full, {workers} processes: {timed(parallel, blockchain.chain, True):.3f} s')
+	print(f'from checkpoint: {timed(serial, blockchain.chain, False) * 1000:.2f} ms')
+
+	parallel.shutdown()
+	blockchain.close()
+
+
+if __name__ == '__main__':
+	main(int(sys.argv[1]) if len(sys.argv) > 1 else 200, int(sys.argv[2]) if len(sys.argv) > 2 else 10)
@@ -18,36 +18,44 @@ License along with this library; if not, write to the Free Software
 Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
 """
 from datetime import datetime
+from decimal import Decimal
 from hashlib import sha256
-from typing import List, Tuple, Optional, Dict
+from typing import List, Tuple, Optional, Dict, Iterator, Union
+from itertools import groupby
 import logging
 import os
-from time import time
 from core.configs import BlockChainConfig, TransactionStatus, ConsensusAlgorithm
+from core.consensus import STAKE_ACCOUNT, UNSTAKE_ACCOUNT, StakePool, get_engine, selection_seed
 from core.economics import EconomicModel
-import ecdsa
+from core.accounting import SupplyAccounting
+from core.exceptions import BlockChainException, InsufficientFundsException, InvalidTransferException
+from core.difficulty import Retargeter, difficulty_target, target_bytes
+from core.forks import BlockStatus, BlockTree, block_work
+from core.indexes import ChainIndex
+from core.mining import ParallelMiner
+from core.mempool import Mempool
+from core.verification import SignatureVerifier
+from core.validation import ChainValidator, ValidationResult, check_block
+from core.crypto import CryptoBackend, get_backend
+from core.storage import BlockStore
+from core.snapshot import SnapshotStore
+from core.wallets import WalletRegistry, key_bytes
+from core.state import AccountState, transfer_debit
+from core import serialization
+from core.columnar import TransactionTable
+from core.merkle import MerkleAccumulator, inclusion_proof, leaf_hash, merkle_levels
+from core.logs import LOGGER_NAME, LazyAmount, LazyHex, ensure_logging
 
 # Настройка логирования #
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-
-# Создание директории для логов
-log_dir = 'logs'
-if not os.path.exists(log_dir):
-	os.makedirs(log_dir)
-
-# Создаем файловый обработчик
-file_handler = logging.FileHandler(os.path.join(log_dir, f'blockchain-{time()}.log'))
-file_handler.setLevel(logging.DEBUG)
-
-# Создаем обработчик форматирования
-formatter = logging.Formatter("[%(asctime)s %(levelname)s] %(message)s")
-file_handler.setFormatter(formatter)
-
-# Применяем настройки
-logger.addHandler(file_handler)
+# Обработчики подключаются при первом создании блокчейна (см. core.logs.ensure_logging),
+# импорт модуля не создает ни директорий, ни файлов
+logger = logging.getLogger(LOGGER_NAME)
+logger.addHandler(logging.NullHandler())
 # Конец настройки логирования #
 
+# Сумма в монетах, принимаемая на границе API (см. serialization.to_base_units)
+Amount = Union[int, float, str, Decimal]
+
 
 class Wallet:
 	"""
@@ -58,19 +66,140 @@ class Wallet:
 	 + Начальный баланс
 	 + Приватный и публичный ключ
 	 + История транзакций
+
+	Ключи создаются и используются через криптографический бэкенд (см.
+	core.crypto) и хранятся в виде сырых байтов. Объекты ecdsa и объект
+	приватного ключа бэкенда создаются только по запросу.
+
+	Баланс зарегистрированного в блокчейне кошелька хранится в состоянии
+	счетов (см. core.state.AccountState), кошелёк его только читает.
+
+	Баланс хранится в целых базовых единицах (balance_units); свойства
+	balance и available_balance возвращают его в монетах (Decimal), а
+	суммы в монетах переводятся в базовые единицы при передаче в кошелёк.
 	"""
-	def __init__(self, name: str, initial_balance: float=0.0) -> None:
+	__slots__ = ('name', '_state', '_balance', 'backend', 'private_key_bytes',
+				'public_key_bytes', '_signing_key', '_public_key', 'transactions_history')
+
+	def __init__(self, name: str, initial_balance: Amount=0, backend: Optional[CryptoBackend]=None) -> None:
 		"""
 		Инициализация кошелька
 
 		:param name: Имя владельца
-		:param initial_balance: Начальный баланс
+		:param initial_balance: Начальный баланс в монетах
+		:param backend: Криптографический бэкенд (по умолчанию - самый быстрый доступный)
 		"""
 		self.name: str = name
-		self.balance: float = initial_balance
-		self.private_key, self.public_key = self.generate_key_pair()
+		self._state: Optional[AccountState] = None
+		self._balance: int = serialization.to_base_units(initial_balance)
+		self.backend: CryptoBackend = backend or get_backend()
+		private_key, self.public_key_bytes = self.generate_key_pair()
+		self.private_key_bytes: bytes = self.backend.private_key_bytes(private_key)
+		self._signing_key = None
+		self._public_key: Optional['ecdsa.VerifyingKey'] = None
 		self.transactions_history: Dict = {}
-		logger.info(f'Created new wallet with public key: {self.public_key.to_string().hex()}; and balance: {self.balance}')
+		logger.info('Created new wallet with public key: %s; and balance: %s', LazyHex(self.public_key_bytes), self.balance)
+
+	@property
+	def public_key(self) -> 'ecdsa.VerifyingKey':
+		"""
+		Публичный ключ кошелька в виде объекта ecdsa (создается при первом обращении)
+
+		:return: Публичный ключ
+		"""
+		if self._public_key is None:
+			import ecdsa
+
+			self._public_key = ecdsa.VerifyingKey.from_string(self.public_key_bytes, curve=ecdsa.NIST256p)
+
+		return self._public_key
+
+	@property
+	def private_key(self) -> 'ecdsa.SigningKey':
+		"""
+		Приватный ключ кошелька в виде объекта ecdsa
+
+		:return: Приватный ключ
+		"""
+		import ecdsa
+
+		return ecdsa.SigningKey.from_string(self.private_key_bytes, curve=ecdsa.NIST256p)
+
+	def attach(self, state: AccountState) -> None:
+		"""
+		Подключение кошелька к состоянию счетов: собственный баланс кошелька
+		зачисляется на его счет, и дальше баланс читается из состояния.
+
+		:param state: Состояние счетов
+		"""
+		if self._state is not state:
+			state.credit(self.public_key_bytes, self._balance)
+			self._balance = 0
+			self._state = state
+
+	@property
+	def balance_units(self) -> int:
+		"""
+		Баланс кошелька в базовых единицах
+
+		:return: Текущий баланс
+		"""
+		if self._state is not None:
+			return self._state.balance(self.public_key_bytes)
+
+		return self._balance
+
+	@balance_units.setter
+	def balance_units(self, value: int) -> None:
+		"""
+		Изменение баланса кошелька вне блоков (не отменяется при откате блоков).
+
+		:param value: Новый баланс в базовых единицах
+		"""
+		if self._state is not None:
+			self._state.set_balance(self.public_key_bytes, value)
+		else:
+			self._balance = value
+
+	@property
+	def balance(self) -> Decimal:
+		"""
+		Баланс кошелька в монетах
+
+		:return: Текущий баланс
+		"""
+		return serialization.from_base_units(self.balance_units)
+
+	@balance.setter
+	def balance(self, value: Amount) -> None:
+		"""
+		Изменение баланса кошелька вне блоков (см. balance_units)
+
+		:param value: Новый баланс в монетах
+		"""
+		self.balance_units = serialization.to_base_units(value)
+
+	@property
+	def available_units(self) -> int:
+		"""
+		Доступный остаток в базовых единицах: баланс без средств транзакций,
+		ожидающих в мемпуле
+
+		:return: Доступный остаток
+		"""
+		if self._state is not None:
+			return self._state.available(self.public_key_bytes)
+
+		return self._balance
+
+	@property
+	def available_balance(self) -> Decimal:
+		"""
+		Доступный остаток в монетах (см. available_units)
+
+		:return: Доступный остаток
+		"""
+		return serialization.from_base_units(self.available_units)
 
 	def generate_key_pair(self) -> Tuple:
 		"""
@@ -78,12 +207,45 @@ class Wallet:
 
 		Данный метод задействует кривую NIST256p
 
-		:return: Возвращает кортеж из приватного и публичного ключей
+		:return: Возвращает кортеж из приватного ключа бэкенда и сырых байтов публичного ключа
+		"""
+		return self.backend.generate_key_pair()
+
+	def sign_data(self, data: bytes) -> bytes:
+		"""
+		Подпись произвольных данных приватным ключем (например, заголовка
+		блока, см. core.consensus.ProofOfStake)
+
+		:param data: Данные
+
+		:return: Подпись
+
+		:raises ValueError: Если приватный ключ кошелька не загружен
 		"""
-		privkey = ecdsa.SigningKey.generate(curve=ecdsa.NIST256p)
-		pubkey = privkey.get_verifying_key()
+		if self.private_key_bytes is None:
+			raise ValueError(f'wallet {self.public_key_bytes.hex()} has no private key')
 
-		return privkey, pubkey
+		if self._signing_key is None:
+			self._signing_key = self.backend.load_private_key(self.private_key_bytes)
+
+		return self.backend.sign(self._signing_key, data)
+
+	def load_private_key(self, private_key_bytes: bytes) -> None:
+		"""
+		Загрузка приватного ключа кошелька, восстановленного без него
+		(например, из снимка состояния без ключей)
+
+		:param private_key_bytes: Сырые байты приватного ключа
+
+		:raises ValueError: Если ключ не соответствует публичному ключу кошелька
+		"""
+		signing_key = self.backend.load_private_key(private_key_bytes)
+
+		if self.backend.public_key_bytes(signing_key) != self.public_key_bytes:
+			raise ValueError('private key does not match the wallet public key')
+
+		self.private_key_bytes = private_key_bytes
+		self._signing_key = signing_key
 
 	def sign_transaction(self, transaction: 'Transaction') -> bytes:
 		"""
@@ -93,40 +255,73 @@ class Wallet:
 
 		:return: Подпись
 		"""
-		return self.private_key.sign(transaction.to_bytes())
+		return self.sign_data(transaction.to_bytes())
 
-	def send_transaction(self, recipient: 'Wallet', amount: float, fee: float) -> 'Transaction':
+	def send_transaction(self, recipient: 'Wallet', amount: Amount, fee: Amount) -> 'Transaction':
 		"""
 		Метод для отправки транзакции до получателя.
 
 		Данный метод проверяет наличие средств на балансе и возвращает подписанную транзакцию.
+		Средства списываются не здесь, а при применении блока с транзакцией.
 
 		:param recipient: Кошелек получателя
-		:param amount: Сумма транзакции
+		:param amount: Сумма транзакции в монетах
+		:param fee: Комиссия в монетах
 
 		:return: Подписанная транзакция
 		"""
-		if self.balance >= amount + fee:
-			self.withdraw(amount + fee)
-			transaction = Transaction(self.public_key, recipient.public_key, amount, fee)
+		balance = self.available_units
+		amount = serialization.to_base_units(amount)
+		fee = serialization.to_base_units(fee)
+
+		if balance >= amount + fee:
+			transaction = Transaction(self.public_key_bytes, recipient.public_key_bytes, amount, fee)
 			transaction.sign(self)
-			logger.info(f'Send transaction: {transaction}')
+			logger.info('Send transaction: %s', transaction)
 			return transaction
-		elif self.balance >= amount and self.balance < amount + fee:
-			logger.warning(f'Insufficient funds to pay comission to send transaction from wallet: {self.public_key.to_string().hex()}')
+		elif balance >= amount and balance < amount + fee:
+			logger.warning('Insufficient funds to pay comission to send transaction from wallet: %s', LazyHex(self.public_key_bytes))
 			return None
 		else:
-			logger.warning(f'Insufficient funds to send transaction from wallet: {self.public_key.to_string().hex()}')
+			logger.warning('Insufficient funds to send transaction from wallet: %s', LazyHex(self.public_key_bytes))
 			return None
 
-	def withdraw(self, amount: float) -> None:
+	@classmethod
+	def restore(cls, name: str, balance: int, private_key_bytes: Optional[bytes], public_key_bytes: bytes,
+				backend: Optional[CryptoBackend]=None) -> 'Wallet':
+		"""
+		Восстановление кошелька с известными ключами (например, из снимка состояния)
+
+		:param name: Имя владельца
+		:param balance: Баланс в базовых единицах
+		:param private_key_bytes: Сырые байты приватного ключа (None - кошелёк без
+			ключа, см. load_private_key)
+		:param public_key_bytes: Сырые байты публичного ключа
+		:param backend: Криптографический бэкенд
+
+		:return: Кошелёк
+		"""
+		wallet = cls.__new__(cls)
+		wallet.name = name
+		wallet._state = None
+		wallet._balance = balance
+		wallet.backend = backend or get_backend()
+		wallet.private_key_bytes = private_key_bytes
+		wallet.public_key_bytes = public_key_bytes
+		wallet._signing_key = None
+		wallet._public_key = None
+		wallet.transactions_history = {}
+
+		return wallet
+
+	def withdraw(self, amount: Amount) -> None:
 		"""
 		Вспомогательный метод для снятия денег с баланса
 
-		:param amount: Сумма средств для снятия
+		:param amount: Сумма средств для снятия в монетах
 		"""
-		logger.debug(f'Withdraw amount {amount} from wallet {self.public_key.to_string().hex()}')
-		self.balance -= amount
+		logger.debug('Withdraw amount %s from wallet %s', amount, LazyHex(self.public_key_bytes))
+		self.balance_units -= serialization.to_base_units(amount)
 
 	def receive_transaction(self, transaction: 'Transaction') -> None:
 		"""
@@ -134,8 +329,8 @@ class Wallet:
 
 		:param transaction: Транзакция
 		"""
-		logger.debug(f'Receive amount {transaction.amount} from wallet {self.public_key.to_string().hex()}')
-		self.balance += transaction.amount
+		logger.debug('Receive amount %s from wallet %s', LazyAmount(transaction.amount), LazyHex(self.public_key_bytes))
+		self.balance_units += transaction.amount
 
 
 class Transaction:
@@ -150,26 +345,76 @@ class Transaction:
 	 + Комиссия за перевод внутри сети
 	 + Статус транзакции
 	 + Комиссия за транзакцию
+
+	Публичные ключи хранятся в виде сырых байтов (объекты ecdsa доступны
+	через sender_key и recipient_key), метка времени - в микросекундах,
+	а сумма и комиссия - в целых базовых единицах (см. core.serialization).
 	"""
+	__slots__ = ('sender_wallet', 'recipient_wallet', 'amount', 'fee', '_timestamp', 'signature', 'status')
+
 	def __init__(self, sender_wallet: bytes, recipient_wallet: bytes, 
-				amount: float, fee: float, timestamp: Optional[datetime]=None) -> None:
+				amount: int, fee: int, timestamp: Optional[datetime]=None) -> None:
 		"""
 		Инициализация транзакции
 
-		:param sender_wallet: Публичный ключ кошелька отправителя
-		:param recipient_wallet: Публичный ключ кошелька получателя
-		:param amount: Сумма средств
-		:param fee: Комиссия
+		:param sender_wallet: Публичный ключ кошелька отправителя (байты или ecdsa.VerifyingKey)
+		:param recipient_wallet: Публичный ключ кошелька получателя (байты или ecdsa.VerifyingKey)
+		:param amount: Сумма средств в базовых единицах
+		:param fee: Комиссия в базовых единицах
 		:param timestamp: Метка времени
+
+		:raises TypeError: Если сумма или комиссия - не целое число базовых единиц
+		:raises ValueError: Если сумма не положительна или комиссия отрицательна
 		"""
-		self.sender_wallet: bytes = sender_wallet
-		self.recipient_wallet: bytes = recipient_wallet
-		self.amount: float = amount
-		self.fee: float = fee
-		self.timestamp: datetime = timestamp or datetime.now()
+		if not isinstance(amount, int) or not isinstance(fee, int):
+			raise TypeError('transaction amount and fee must be integer base units, see serialization.to_base_units')
+
+		if amount <= 0 or fee < 0:
+			raise ValueError('transaction amount must be positive and fee must not be negative')
+
+		self.sender_wallet: bytes = key_bytes(sender_wallet)
+		self.recipient_wallet: bytes = key_bytes(recipient_wallet)
+		self.amount: int = amount
+		self.fee: int = fee
+		self.timestamp = timestamp or datetime.now()
 		self.signature: Optional[bytes] = None
 		self.status = TransactionStatus.PENDING
-		logger.debug(f'Create new transaction: {self.sender_wallet.to_string().hex()} -> {self.recipient_wallet.to_string().hex()}')
+		logger.debug('Create new transaction: %s -> %s', LazyHex(self.sender_wallet), LazyHex(self.recipient_wallet))
+
+	@property
+	def timestamp(self) -> datetime:
+		"""
+		Метка времени транзакции
+
+		:return: Метка времени
+		"""
+		return serialization.micros_to_datetime(self._timestamp)
+
+	@timestamp.setter
+	def timestamp(self, value: datetime) -> None:
+		self._timestamp: int = serialization.datetime_to_micros(value)
+
+	@property
+	def sender_key(self) -> 'ecdsa.VerifyingKey':
+		"""
+		Публичный ключ отправителя в виде объекта ecdsa (создается при каждом обращении)
+
+		:return: Публичный ключ
+		"""
+		import ecdsa
+
+		return ecdsa.VerifyingKey.from_string(self.sender_wallet, curve=ecdsa.NIST256p)
+
+	@property
+	def recipient_key(self) -> 'ecdsa.VerifyingKey':
+		"""
+		Публичный ключ получателя в виде объекта ecdsa (создается при каждом обращении)
+
+		:return: Публичный ключ
+		"""
+		import ecdsa
+
+		return ecdsa.VerifyingKey.from_string(self.recipient_wallet, curve=ecdsa.NIST256p)
 
 	def sign(self, wallet: Wallet) -> None:
 		"""
@@ -177,20 +422,129 @@ class Transaction:
 
 		:param wallet: Кошелёк пользователя
 		"""
-		logger.info(f'Sign transaction by {wallet.public_key.to_string().hex()}')
+		logger.info('Sign transaction by %s', LazyHex(wallet.public_key_bytes))
 		self.signature = wallet.sign_transaction(self)
 
 	def to_bytes(self) -> bytes:
 		"""
-		Метод для перевода транзакции в байты
+		Метод для перевода транзакции в байты для подписи.
+
+		Подписываются все поля транзакции, кроме сигнатуры и статуса
+		(см. формат в core.serialization).
+
+		:return: Байты
+		"""
+		return serialization.encode_transaction_payload(self.sender_wallet, self.recipient_wallet,
+														self.amount, self.fee, self._timestamp)
+
+	def encode(self) -> bytes:
+		"""
+		Сериализация транзакции в компактный двоичный формат (вместе с сигнатурой)
 
 		:return: Байты
 		"""
-		return f'{self.sender_wallet},{self.recipient_wallet},{self.amount},{self.timestamp.isoformat()}'.encode()
+		return serialization.encode_transaction(self.to_bytes(), self.signature)
+
+	@classmethod
+	def from_fields(cls, fields: serialization.TransactionFields) -> 'Transaction':
+		"""
+		Создание транзакции из разобранных полей двоичного формата
+
+		:param fields: Поля транзакции (см. serialization.decode_transaction)
+
+		:return: Транзакция
+		"""
+		sender, recipient, amount, fee, timestamp, signature = fields
+		transaction = cls(sender, recipient, amount, fee, serialization.micros_to_datetime(timestamp))
+		transaction.signature = signature
+
+		return transaction
+
+	@classmethod
+	def decode(cls, data: bytes) -> 'Transaction':
+		"""
+		Десериализация транзакции из двоичного формата
+
+		:param data: Байты, полученные через encode
+
+		:return: Транзакция
+		"""
+		return cls.from_fields(serialization.decode_transaction(data))
 
 	def __str__(self) -> str:
 		"""Строковое представление транзакции"""
-		return f'Transaction(sender={self.sender_wallet.to_string().hex()}, recipient={self.recipient_wallet.to_string().hex()},amount={self.amount},timestamp={self.timestamp})'
+		return f'Transaction(sender={self.sender_wallet.hex()}, recipient={self.recipient_wallet.hex()},amount={serialization.format_amount(self.amount)},timestamp={self.timestamp})'
+
+
+def _changed(method):
+	"""
+	Обертка метода контейнера, вызывающая обработчик изменения после него.
+
+	:param method: Изменяющий метод list или dict
+
+	:return: Обернутый метод
+	"""
+	def wrapper(self, *args, **kwargs):
+		result = method(self, *args, **kwargs)
+		self._on_change()
+		return result
+
+	wrapper.__name__ = method.__name__
+	return wrapper
+
+
+class _ObservedList(list):
+	"""
+	Список, сообщающий владельцу о любом своем изменении.
+
+	Используется блоком, чтобы сбрасывать кеш хеша при изменении списка
+	транзакций. О добавлении в конец списка сообщается отдельно (on_append):
+	блок дописывает транзакцию в дерево Меркла, не перестраивая его.
+	"""
+	def __init__(self, iterable, on_change, on_append=None) -> None:
+		super().__init__(iterable)
+		self._on_change = on_change
+		self._on_append = on_append
+
+	def append(self, item) -> None:
+		list.append(self, item)
+
+		if self._on_append is not None:
+			self._on_append(item)
+		else:
+			self._on_change()
+
+	extend = _changed(list.extend)
+	insert = _changed(list.insert)
+	pop = _changed(list.pop)
+	remove = _changed(list.remove)
+	clear = _changed(list.clear)
+	sort = _changed(list.sort)
+	reverse = _changed(list.reverse)
+	__setitem__ = _changed(list.__setitem__)
+	__delitem__ = _changed(list.__delitem__)
+	__iadd__ = _changed(list.__iadd__)
+	__imul__ = _changed(list.__imul__)
+
+
+class _ObservedDict(dict):
+	"""
+	Словарь, сообщающий владельцу о любом своем изменении.
+
+	Используется блоком, чтобы сбрасывать кеш хеша при изменении мета-данных.
+	"""
+	def __init__(self, mapping, on_change) -> None:
+		super().__init__(mapping)
+		self._on_change = on_change
+
+	__setitem__ = _changed(dict.__setitem__)
+	__delitem__ = _changed(dict.__delitem__)
+	__ior__ = _changed(dict.__ior__)
+	pop = _changed(dict.pop)
+	popitem = _changed(dict.popitem)
+	clear = _changed(dict.clear)
+	update = _changed(dict.update)
+	setdefault = _changed(dict.setdefault)
 
 
 class Block:
@@ -204,7 +558,25 @@ class Block:
 	 + Мета-данные
 	 + Метка времени
 	 + Специальное число nonce (для PoW)
+
+	Хеш блока - хеш заголовка, в который транзакции входят через корень
+	дерева Меркла (см. core.merkle): размер хешируемых данных не зависит от
+	количества транзакций, а включение транзакции доказывается O(log n)
+	хешами (см. transaction_proof). Корень строится инкрементально: при
+	добавлении транзакции в конец списка пересчитываются только O(log n) узлов.
+
+	Хеш блока кешируется и автоматически сбрасывается при изменении любого
+	из хешируемых полей (в том числе при изменении списка транзакций или
+	словаря мета-данных на месте). Изменения полей самих транзакций
+	кеш не отслеживает.
 	"""
+	# Поля, входящие в данные для хеширования
+	_HASHED_FIELDS = frozenset(('index', 'transactions', 'previous_hash', 'metadata', 'timestamp', 'nonce'))
+
+	# Статистика кеша хешей по всем блокам
+	hash_cache_hits: int = 0
+	hash_cache_misses: int = 0
+
 	def __init__(self, index: int, transactions: List[Transaction], previous_hash: bytes, 
 				metadata: Dict=None, timestamp: Optional[datetime]=None, nonce: int=0) -> None:
 		"""
@@ -223,271 +595,1498 @@ class Block:
 		self.timestamp: datetime = timestamp or datetime.now()
 		self.nonce: int = nonce
 		self.metadata: Dict = metadata
-		logger.debug(f'Created new block with timestamp {self.timestamp} and index {self.index}')
+		logger.debug('Created new block with timestamp %s and index %s', self.timestamp, self.index)
 
-	@property
-	def hash(self) -> bytes:
+	def __setattr__(self, name: str, value) -> None:
 		"""
-		Свойство класса для генерации хеша.
+		Установка атрибута блока со сбросом кеша хеша.
 
-		:return: Хеш блока в виде байтов
+		Список транзакций и мета-данные оборачиваются в отслеживаемые
+		контейнеры (копии), чтобы их изменение на месте тоже сбрасывало кеш.
 		"""
-		block_data = f'{self.index},{[t.to_bytes().decode() for t in self.transactions]},{self.previous_hash.hex()},{self.metadata},{self.timestamp.isoformat()},{self.nonce}'.encode()
-		return sha256(block_data).digest()
+		if name == 'transactions':
+			value = _ObservedList(value, self._invalidate_transactions, self._transaction_appended)
+		elif name == 'metadata' and isinstance(value, dict):
+			value = _ObservedDict(value, self._invalidate_prefix)
 
-	def mine(self, difficulty: int) -> None:
-		"""
-		Метод добычи блока.
+		object.__setattr__(self, name, value)
 
-		Генерирует бесконечно хеши, пока в начале не будет кол-во нулей,
-		равной сложности добычи
+		if name == 'nonce':
+			object.__setattr__(self, '_hash_cache', None)
+		elif name == 'transactions':
+			self._invalidate_transactions()
+		elif name in self._HASHED_FIELDS:
+			self._invalidate_prefix()
 
-		:param difficulty: Сложность добычи, т.е кол-во нулей в начале хеша
+	def _invalidate_transactions(self) -> None:
 		"""
-		target: bytes = b"0" * difficulty
+		Сброс дерева Меркла, префикса заголовка и хеша после изменения списка транзакций.
+		"""
+		object.__setattr__(self, '_merkle', None)
+		object.__setattr__(self, '_merkle_levels', None)
+		self._invalidate_prefix()
 
-		logger.info(f'Mine block{self.index} with difficulty {difficulty}')
-		print(f'Mine block with difficulty {difficulty}...')
+	def _transaction_appended(self, transaction: Transaction) -> None:
+		"""
+		Добавление транзакции, дописанной в конец списка, в дерево Меркла.
 
-		while self.hash[:difficulty] != target:
-			self.nonce += 1
+		:param transaction: Транзакция
+		"""
+		merkle = self.__dict__.get('_merkle')
 
-		logger.info(f'End of mining block{self.index}!')
-		print('End of mining block!')
+		if merkle is None or len(merkle) != len(self.transactions) - 1:
+			self._invalidate_transactions()
+			return
 
+		merkle.append(transaction.encode())
+		object.__setattr__(self, '_merkle_levels', None)
+		self._invalidate_prefix()
 
-class BlockChain:
-	"""
-	Класс, представляющий собой блокчейн.
+	def _invalidate_prefix(self) -> None:
+		"""
+		Сброс закешированных префикса данных блока и хеша.
+		"""
+		object.__setattr__(self, '_prefix_cache', None)
+		object.__setattr__(self, '_hash_cache', None)
 
-	Каждый блокчейн имеет следующие параметры:
-	 + Конфигурация блокчейна
-	 + Список блоков (цепь)
-	 + Список неподтвержденных транзакций
-	 + Список кошельков, участвующих в сети
-	 + Остаток монет в сети
-	 + Максимальное количество монет
-	 + Количество намайненных монет
-	 + Рост инфляции
-	 + Комиссия за транзакцию
-	 + Последнее время добычи блока
-	"""
-	def __init__(self, config: BlockChainConfig) -> None:
+	@classmethod
+	def hash_cache_info(cls) -> dict:
 		"""
-		Инициализация блокчейна
+		Статистика кеша хешей блоков.
 
-		:param config: Конфигурация блокчейна
+		:return: Словарь с количеством попаданий и промахов кеша
 		"""
-		self.config: BlockChainConfig = config
-		self.chain: list = [self.create_genesis_block()]
-		self.pending_transactions: List[Transaction] = []
-		self.wallets: list = list()
-		self.remaining_supply: float = self.config.max_supply
-		self.max_supply: float = self.config.max_supply
-		self.transaction_fee: float = self.config.transaction_fee
-		self.inflation_rate: float = self.config.inflation_rate
-		self.difficulty: int = self.config.difficulty
-		self.mining_reward: float = self.config.mining_reward
-		self.total_mined_coins: int = 0
-		self.last_update_time = datetime.now()
-		self.economic_model = EconomicModel(self)
+		return {
+			'hits': cls.hash_cache_hits,
+			'misses': cls.hash_cache_misses,
+		}
 
-	def create_genesis_block(self) -> Block:
+	@classmethod
+	def reset_hash_cache_info(cls) -> None:
 		"""
-		Создание начально, genesis-блока в блокчейне.
+		Сброс статистики кеша хешей блоков.
+		"""
+		cls.hash_cache_hits = 0
+		cls.hash_cache_misses = 0
 
-		:return: Блок с хешем из 64 нуля
+	@property
+	def merkle_root(self) -> bytes:
 		"""
-		logger.debug('Create genesis block for blockchain')
-		return Block(0, [], str("0" * 64).encode(), datetime.now())
+		Корень дерева Меркла транзакций блока
 
-	def add_block(self, block: Block) -> bool:
+		:return: 32 байта
 		"""
-		Метод, отвечающий за добавление блока в блокчейн
+		merkle = self.__dict__.get('_merkle')
 
-		:param block: Новый блок
+		if merkle is None:
+			merkle = MerkleAccumulator(t.encode() for t in self.transactions)
+			object.__setattr__(self, '_merkle', merkle)
 
-		:return: True в случае успеха, в противном случае False
+		return merkle.root()
+
+	def transaction_proof(self, position: int) -> List[bytes]:
 		"""
-		try:
-			logger.info(f'New block added: {block.hash.hex()}')
-			self.chain.append(block)
-			return True
-		except Exception as e:
-			logger.error(f'New block {block.hash} was not added: {e}')
-			return False
+		Доказательство включения транзакции в блок: O(log n) хешей дерева
+		Меркла. Проверяется по корню из заголовка блока, без остальных
+		транзакций (см. core.merkle.verify_inclusion).
 
-	def mine_block(self, wallet: Wallet) -> bool:
+		:param position: Номер транзакции в блоке
+
+		:return: Список хешей
 		"""
-		Добыча блока пользователем на определенный кошелёк.
+		levels = self.__dict__.get('_merkle_levels')
 
-		:param wallet: Кошелёк майнера (или для получения вознаграждения)
+		if levels is None:
+			levels = merkle_levels([leaf_hash(t.encode()) for t in self.transactions])
+			object.__setattr__(self, '_merkle_levels', levels)
 
-		:return: True в случае успешной добычи, False в противном случае
+		return inclusion_proof(levels, position)
+
+	def header_prefix(self) -> bytes:
 		"""
-		if self.config.consensus_algorithm == ConsensusAlgorithm.PROOF_OF_WORK:
-			# Если механизм консенсуса - PoW
-			if self.remaining_supply <= self.config.mining_reward:
-				print('Error: no enough coins for pay mining reward')
-				logger.error('No enough coins for pay mining_reward')
-				return False
-
-			if self.pending_transactions:
-				block = Block(len(self.chain), self.pending_transactions, 
-							self.chain[-1].hash, metadata={
-								'account': wallet.public_key.to_string().hex(),
-								'action': 'mine'
-							}
-				)
-				
-				block.mine(self.config.difficulty)
-				
-				self.add_block(block)
-
-				logger.info(f'Wallet {wallet.public_key.to_string().hex()} mined a new block: {block.hash.hex()}')
-
-				self.total_mined_coins += self.mining_reward
-				wallet.balance += self.mining_reward
-				self.inflation_rate += 0.001
-				self.remaining_supply -= self.mining_reward
+		Неизменяемая при добыче часть заголовка блока - все, кроме nonce.
 
-				self.economic_influence()
-				self.update_mining_settings()
-			else:
-				logger.debug('No pending transactions to mine')
-		else:
-			# Если механизм консенсуса какой-то другой
-			logger.warning(f'Consensus algorithm {self.config.consensus_algorithm.value} is not implemented yet.')
-			return None
+		Результат кешируется до изменения любого поля блока, кроме nonce.
 
-	def update_mining_settings(self) -> None:
+		:return: Байты заголовка без nonce
 		"""
-		Обновление настроек майнинга - награды и сложности.
+		prefix = self.__dict__.get('_prefix_cache')
 
-		Вознаграждение майнера меняется по следующему алгоритму:
-		 1. Вычисляется влияние инфляции на награду
-		 2. Из награждения минусуется влияние деленное на общее количество добытых монет
+		if prefix is None:
+			prefix = serialization.encode_header_prefix(self.index, self.previous_hash,
+														serialization.datetime_to_micros(self.timestamp),
+														self.merkle_root, self.metadata)
+			object.__setattr__(self, '_prefix_cache', prefix)
+
+		return prefix
 
-		Сложность меняется по следующему алгоритму:
-		 1. Вычисляется прошедшее время - из текущего времени отнимается время 
-		 	последнего обновления. Переводится в секунды.
-		 2. Если прошедшее время меньше чем заданное время для обновления сложности,
-		 	то сложность увеличивается на 1.
-		 3. Если сложность заняла больше времени, чем положено, то сложность,
-		 	наоборот, уменьшается
+	def header(self) -> bytes:
 		"""
-		tokens = self.mining_reward * self.inflation_rate
-		self.mining_reward -= tokens / self.total_mined_coins
+		Заголовок блока - данные, по которым вычисляется хеш
 
-		logger.debug(f'Update miner reward. Current mining reward = {self.mining_reward}')
+		:return: Байты
+		"""
+		return self.header_prefix() + serialization.encode_nonce(self.nonce)
 
-		elapsed_time = (datetime.now() - self.last_update_time).total_seconds()
-		self.last_update_time = datetime.now()
+	def midstate(self) -> 'sha256':
+		"""
+		Состояние SHA-256, в которое уже загружена неизменяемая часть заголовка.
 
-		if elapsed_time < self.config.difficulty_update_time:
-			self.difficulty += 1
-			logger.debug(f'Update difficulty (+1). Current difficulty = {self.difficulty}')
-		elif elapsed_time > self.config.difficulty_update_time:
-			self.difficulty = max(self.difficulty - 1, 1)
-			logger.debug(f'Update difficulty. Current difficulty = {self.difficulty}')
+		Для проверки очередного nonce достаточно скопировать это состояние
+		и дописать в него только nonce, не сериализуя блок заново.
 
-	def create_wallet(self, name: str, initial_balance: float) -> Wallet:
+		:return: Объект hashlib с загруженным префиксом заголовка
 		"""
-		Создание кошелька и его регистрация в блокчейне.
+		return sha256(self.header_prefix())
 
-		:param name: Имя носителя кошелька
-		:initial_balance: Начальный баланс на кошельке
+	@property
+	def hash(self) -> bytes:
+		"""
+		Свойство класса для генерации хеша.
 
-		:return: Новый зарегистрированный кошелёк
+		Хеш вычисляется один раз и берется из кеша до изменения блока.
+
+		:return: Хеш заголовка блока в виде байтов
 		"""
-		wallet: Wallet = Wallet(name, initial_balance)
+		block_hash = self.__dict__.get('_hash_cache')
 
-		if wallet.balance > self.remaining_supply:
-			logger.critical('Impossible to register a wallet: the initial balance exceeds remaining tokens in network.')
-			return None
-		else:
-			self.remaining_supply -= wallet.balance
-			self.economic_influence()
+		if block_hash is not None:
+			Block.hash_cache_hits += 1
+			return block_hash
 
-		self.wallets.append(wallet)
+		Block.hash_cache_misses += 1
+		block_hash = sha256(self.header()).digest()
+		object.__setattr__(self, '_hash_cache', block_hash)
 
-		logger.info(f'New wallet has been registered: {wallet.public_key.to_string().hex()}')
+		return block_hash
 
-		return wallet
+	def encode(self) -> bytes:
+		"""
+		Сериализация блока в компактный двоичный формат (см. core.serialization):
+		заголовок и транзакции.
 
-	def pending_transaction(self, transaction: Transaction) -> bool:
+		:return: Байты
 		"""
-		Метод для завершения транзакций.
+		return self.header() + serialization.encode_block_body([t.encode() for t in self.transactions])
 
-		Мы получаем публичные ключи отправителя и получателя, после 
-		отправляем сумму на баланс получателю
+	@classmethod
+	def decode(cls, data: bytes) -> 'Block':
+		"""
+		Десериализация блока из двоичного формата
 
-		После мы добавляем транзакцию в список ожидающих завершения транзакций
-		и добавляем новый блок в блокчейн.
+		:param data: Байты, полученные через encode
 
-		:param transaction: Транзакция
+		:return: Блок
 
-		:return: True в случае существования отправителя и получателя, иначе False
+		:raises ValueError: Если корень дерева Меркла в заголовке не совпадает с транзакциями
 		"""
-		sender_wallet = next((w for w in self.wallets if w.public_key == transaction.sender_wallet), None)
-		recipient_wallet = next((w for w in self.wallets if w.public_key == transaction.recipient_wallet), None)
-		
-		if sender_wallet and recipient_wallet:
-			logger.info(f'Transfer transaction: {transaction.amount} {self.config.coin_name} from {transaction.sender_wallet.to_string().hex()} -> {transaction.recipient_wallet.to_string().hex()}')
-			recipient_wallet.receive_transaction(transaction)
-			self.remaining_supply += transaction.fee
+		index, previous_hash, timestamp, merkle_root, metadata, transactions, nonce = serialization.decode_block(data)
+		block = cls(index, [Transaction.from_fields(fields) for fields in transactions], previous_hash,
+					metadata, serialization.micros_to_datetime(timestamp), nonce)
+		merkle = MerkleAccumulator(serialization.block_transactions(data))
 
-			self.pending_transactions.append(transaction)
-			self.add_block(Block(len(self.chain), 
-							self.pending_transactions, 
-							self.chain[-1].hash,
-							metadata={
-								'account': sender_wallet.public_key.to_string().hex(),
-								'action': 'transfer',
-								'recipient': recipient_wallet.public_key.to_string().hex()
-							}))
-			transaction.status = TransactionStatus.CONFIRMED
-			self.get_wallet(sender_wallet.public_key).transactions_history[f'{transaction.signature.hex()}'] = {
-				'recipient': recipient_wallet.public_key,
-				'status': transaction.status
-			}
-			self.economic_influence()
-			return True
-		else:
-			logger.warning(f'FAILED | Transfer transaction is failed: {transaction.amount} {self.config.coin_name} from {transaction.sender_wallet.to_string().hex()} -> {transaction.recipient_wallet.to_string().hex()}')
-			transaction.status = TransactionStatus.FAILED
-			self.get_wallet(sender_wallet.public_key).transactions_history[f'{transaction.signature.hex()}'] = {
-				'recipient': recipient_wallet.public_key,
-				'status': transaction.status
-			}
-			return False
+		if merkle.root() != merkle_root:
+			raise ValueError('merkle root does not match the block transactions')
 
-	def validate_chain(self) -> bool:
-		"""
-		Метод проверки цепи блоков.
+		object.__setattr__(block, '_merkle', merkle)
 
-		Сверяется предыдущий хеш текущего блока и хеш предыдущего блока.
+		return block
 
-		:return: True если цепь валидна, False в противном случае
+	def transaction_table(self) -> TransactionTable:
 		"""
-		try:
-			for i in range(1, len(self.chain)):
-				current_block = self.chain[i]
-				previous_block = self.chain[i - 1]
+		Транзакции блока в виде компактной колоночной таблицы
 
-				if current_block.previous_hash != previous_block.hash:
-					return False
+		:return: Таблица транзакций
+		"""
+		return TransactionTable.from_transactions(self.transactions, Transaction.from_fields)
 
-			logger.debug('Validating chain: no errors')
+	def mine(self, target: int, miner: Optional[ParallelMiner]=None) -> None:
+		"""
+		Метод добычи блока.
 
-			return True
-		except Exception as ex:
-			logger.error(f'Error when validate chain: {ex}')
-			return False
+		Генерирует бесконечно хеши, пока хеш (как 256-битное число) не станет
+		не больше цели (см. core.difficulty). Если передан многопроцессный
+		движок добычи, то перебор nonce распределяется между его процессами.
 
-	def economic_influence(self) -> None:
+		:param target: Цель доказательства работы
+		:param miner: Многопроцессный движок добычи
 		"""
-		Метод для поддержки влияния экономических моделей на блокчейн.
+		limit: bytes = target_bytes(target)
+
+		logger.info('Mine block%s with target %s', self.index, LazyHex(limit))
+		print(f'Mine block with target {limit.hex()}...')
+
+		if self.hash > limit:
+			if miner is not None:
+				self.nonce = miner.search(self.header_prefix(), target, self.nonce + 1)
+			else:
+				midstate = self.midstate()
+				nonce = self.nonce
+
+				while True:
+					nonce += 1
+					attempt = midstate.copy()
+					attempt.update(serialization.encode_nonce(nonce))
+
+					if attempt.digest() <= limit:
+						break
+
+				self.nonce = nonce
+
+		logger.info('End of mining block%s!', self.index)
+		print('End of mining block!')
+
+
+class BlockChain:
+	"""
+	Класс, представляющий собой блокчейн.
+
+	Каждый блокчейн имеет следующие параметры:
+	 + Конфигурация блокчейна
+	 + Список блоков (цепь)
+	 + Мемпул - пул неподтвержденных транзакций
+	 + Список кошельков, участвующих в сети
+	 + Остаток монет в сети
+	 + Максимальное количество монет
+	 + Количество намайненных монет
+	 + Рост инфляции
+	 + Комиссия за транзакцию
+	 + Последнее время добычи блока
+
+	Остаток, максимальное количество и количество намайненных монет,
+	награда и комиссия хранятся в целых базовых единицах (см.
+	core.serialization). Суммы из конфигурации задаются в монетах и
+	переводятся в базовые единицы при создании блокчейна.
+	"""
+	def __init__(self, config: BlockChainConfig) -> None:
+		"""
+		Инициализация блокчейна
+
+		:param config: Конфигурация блокчейна
+		"""
+		ensure_logging(config.log_dir)
+		self.config: BlockChainConfig = config
+		self.accounting: SupplyAccounting = SupplyAccounting()
+		# Цепь в памяти создается при первом обращении; хранилище на диске
+		# открывается сразу, так как по нему восстанавливается учет монет
+		self._chain = self._open_chain() if config.storage_path is not None else None
+		self.mempool: Mempool = Mempool(self.config.mempool_max_size, on_evict=self._on_mempool_evict)
+		self.state: AccountState = AccountState(self.config.state_journal_depth)
+		self.wallets: WalletRegistry = WalletRegistry(self.state)
+		self.remaining_supply: int = serialization.to_base_units(self.config.max_supply)
+		self.max_supply: int = self.remaining_supply
+		self.transaction_fee: int = serialization.to_base_units(self.config.transaction_fee)
+		self.inflation_rate: float = self.config.inflation_rate
+		self.retarget: Retargeter = Retargeter(self.config.difficulty_update_time, self.config.difficulty_window,
+												difficulty_target(self.config.difficulty))
+		self.mining_reward: int = serialization.to_base_units(self.config.mining_reward)
+		self.total_mined_coins: int = 0
+		self.last_update_time = datetime.now()
+		self.economic_model = EconomicModel(self)
+		self.consensus = get_engine(self)
+		self.miner: Optional[ParallelMiner] = ParallelMiner(self.config.mining_workers) if self.config.mining_workers > 1 else None
+		self.verifier: SignatureVerifier = SignatureVerifier(self.config.verification_workers, backend=self.config.crypto_backend)
+		checkpoint_path = os.path.join(self.config.storage_path, 'checkpoint.json') if self.config.storage_path is not None else None
+		self.validator: ChainValidator = ChainValidator(self.config.validation_workers, backend=self.config.crypto_backend,
+														checkpoint_path=checkpoint_path,
+														max_reward=self.economic_model.base_mining_reward)
+		self.snapshots: Optional[SnapshotStore] = self._open_snapshots()
+		self._tree: Optional[BlockTree] = None
+		self._indexes: Optional[ChainIndex] = None
+		# Ставки на высоте последнего блока, проверенного validate_chain (высота, хеш, ставки)
+		self._validated_stakes: Optional[Tuple[int, bytes, StakePool]] = None
+
+		if self._chain is not None and len(self._chain) > 1 and not self._restore_snapshot():
+			self.accounting = SupplyAccounting.recompute(self._chain)
+
+			# Без снимка балансы не восстанавливаются, но ставки записаны в цепи:
+			# по ним выбирается валидатор следующего блока
+			for block in self._chain:
+				self.state.stakes.apply(self._transfers(block))
+
+	@property
+	def chain(self):
+		"""
+		Цепь блоков. Открывается (и получает genesis-блок) при первом
+		обращении, а не при создании блокчейна.
+
+		:return: Цепь блоков (список или BlockStore)
+		"""
+		if self._chain is None:
+			self._chain = self._open_chain()
+
+		return self._chain
+
+	@property
+	def tree(self) -> BlockTree:
+		"""
+		Дерево блоков с боковыми ветвями (см. core.forks). Строится по
+		последним блокам цепи при первом обращении.
+
+		:return: Дерево блоков
+		"""
+		if self._tree is None:
+			self._tree = BlockTree.from_chain(self.chain, min(self.config.fork_depth, self.config.state_journal_depth))
+
+		return self._tree
+
+	@property
+	def indexes(self) -> ChainIndex:
+		"""
+		Вторичные индексы активной цепи: блоки по хешу, транзакции по
+		сигнатуре и по адресу (см. core.indexes). Открываются при первом
+		обращении; при хранении цепи на диске индексы сохраняются в файл
+		index.bin хранилища и при следующем открытии дополняются только
+		новыми блоками.
+
+		:return: Индексы
+		"""
+		if self._indexes is None:
+			path = os.path.join(self.config.storage_path, 'index.bin') if self.config.storage_path is not None else None
+			self._indexes = ChainIndex.open(self.chain, path)
+
+		return self._indexes
+
+	def _open_chain(self):
+		"""
+		Открытие цепи блоков.
+
+		Если в конфигурации задан путь хранилища, цепь хранится на диске
+		(см. core.storage.BlockStore) и при повторном открытии читается из
+		него лениво, иначе цепь - обычный список в памяти.
+
+		:return: Цепь блоков (список или BlockStore)
+		"""
+		if self.config.storage_path is None:
+			return [self.create_genesis_block()]
+
+		store = BlockStore(self.config.storage_path, encode=Block.encode, decode=self._decode_stored_block)
+
+		if len(store) == 0:
+			store.append(self.create_genesis_block())
+		else:
+			logger.info('Opened block store %s with %s blocks', self.config.storage_path, len(store))
+
+		return store
+
+	def _open_snapshots(self) -> Optional[SnapshotStore]:
+		"""
+		Открытие хранилища снимков состояния (если снимки включены в конфигурации)
+
+		:return: Хранилище снимков, либо None
+		"""
+		if self.config.snapshot_interval <= 0:
+			return None
+
+		directory = self.config.snapshot_dir
+
+		if directory is None:
+			if self.config.storage_path is None:
+				return None
+
+			directory = os.path.join(self.config.storage_path, 'snapshots')
+
+		return SnapshotStore(directory, keep=self.config.snapshot_keep)
+
+	def state_image(self) -> dict:
+		"""
+		Состояние блокчейна для снимка: параметры эмиссии и экономической
+		модели, накопительные итоги, кошельки и мемпул на высоте последнего блока.
+
+		Приватные ключи кошельков попадают в снимок, только если это включено
+		в конфигурации (BlockChainConfig.snapshot_private_keys): файлы снимков
+		не шифруются.
+
+		:return: Словарь из простых значений (см. core.serialization.encode_metadata)
+		"""
+		tip = self.chain[-1]
+
+		return {
+			'height': tip.index,
+			'tip': tip.hash,
+			'supply': {
+				'remaining_supply': self.remaining_supply,
+				'max_supply': self.max_supply,
+				'transaction_fee': self.transaction_fee,
+				'inflation_rate': self.inflation_rate,
+				'mining_reward': self.mining_reward,
+				'total_mined_coins': self.total_mined_coins,
+				'last_update_time': serialization.datetime_to_micros(self.last_update_time),
+			},
+			'economics': {
+				'target_inflation_rate': self.economic_model.target_inflation_rate,
+				'target_transaction_fee': self.economic_model.target_transaction_fee,
+			},
+			'accounting': self.accounting.as_dict(),
+			'accounts': [[key, balance] for key, balance in self.state.accounts()],
+			'stakes': [[key, stake] for key, stake in self.stakes.validators()],
+			'wallets': [self._wallet_image(wallet) for wallet in self.wallets],
+			'mempool': [transaction.encode() for transaction in self.mempool.transactions()],
+		}
+
+	def _wallet_image(self, wallet: Wallet) -> dict:
+		"""
+		Кошелёк для снимка состояния (см. state_image)
+
+		:param wallet: Кошелёк
+
+		:return: Словарь из простых значений
+		"""
+		image = {
+			'name': wallet.name,
+			'public_key': wallet.public_key_bytes,
+			'history': [[bytes.fromhex(signature), entry['recipient'], entry['status'].value]
+						for signature, entry in wallet.transactions_history.items()],
+		}
+
+		if self.config.snapshot_private_keys and wallet.private_key_bytes is not None:
+			image['private_key'] = wallet.private_key_bytes
+
+		return image
+
+	def _load_state(self, state: dict) -> None:
+		"""
+		Загрузка состояния из снимка
+
+		:param state: Состояние (см. state_image)
+		"""
+		for name, value in state['supply'].items():
+			# Сложность из снимков, сохраненных до пересчета цели по окну, не используется
+			if name != 'difficulty':
+				setattr(self, name, value)
+
+		self.last_update_time = serialization.micros_to_datetime(state['supply']['last_update_time'])
+		self.economic_model.target_inflation_rate = state['economics']['target_inflation_rate']
+		self.economic_model.target_transaction_fee = state['economics']['target_transaction_fee']
+
+		self.accounting = SupplyAccounting()
+
+		for name, value in state['accounting'].items():
+			setattr(self.accounting, name, value)
+
+		self.state = AccountState(self.config.state_journal_depth)
+
+		for key, balance in state['accounts']:
+			self.state.set_balance(key, balance)
+
+		for key, stake in state.get('stakes', []):
+			self.state.lock(key, stake)
+
+		self.wallets = WalletRegistry(self.state)
+		backend = get_backend(self.config.crypto_backend)
+
+		for entry in state['wallets']:
+			wallet = Wallet.restore(entry['name'], 0, entry.get('private_key'), entry['public_key'], backend)
+
+			for signature, recipient, status in entry['history']:
+				wallet.transactions_history[signature.hex()] = {'recipient': recipient, 'status': TransactionStatus(status)}
+
+			self.wallets.add(wallet)
+
+		self.mempool = Mempool(self.config.mempool_max_size, on_evict=self._on_mempool_evict)
+
+		for data in state['mempool']:
+			transaction = Transaction.decode(data)
+
+			if self.mempool.add(transaction):
+				self._reserve(transaction)
+
+	def save_snapshot(self) -> bytes:
+		"""
+		Сохранение снимка состояния на высоте последнего блока
+
+		:return: Хеш состояния
+		"""
+		if self.snapshots is None:
+			raise BlockChainException('State snapshots are disabled in the blockchain config')
+
+		height = len(self.chain) - 1
+		digest = self.snapshots.save(height, self.state_image())
+		logger.info('Saved state snapshot at block %s: %s', height, LazyHex(digest))
+
+		if self._indexes is not None and self._indexes.path is not None:
+			self._indexes.save()
+
+		return digest
+
+	def _restore_snapshot(self) -> bool:
+		"""
+		Восстановление состояния из последнего целого снимка, совпадающего с
+		цепью, и применение блоков, добавленных после него.
+
+		:return: True, если состояние восстановлено из снимка
+		"""
+		if self.snapshots is None:
+			return False
+
+		for height, state in self.snapshots.snapshots():
+			if height >= len(self.chain) or self.chain[height].hash != state['tip']:
+				logger.warning('State snapshot at block %s does not match the chain, skipped', height)
+				continue
+
+			self._load_state(state)
+
+			for index in range(height + 1, len(self.chain)):
+				self._replay_block(self.chain[index])
+
+			logger.info('Restored state snapshot at block %s, replayed %s blocks', height, len(self.chain) - height - 1)
+
+			return True
+
+		return False
+
+	def _replay_block(self, block: Block) -> None:
+		"""
+		Применение к состоянию блока, добавленного после снимка.
+
+		Для транзакций, которых не было в мемпуле снимка, применяется
+		экономическая модель, как при их приеме в pending_transaction.
+		Переводы и награда майнеру применяются к состоянию счетов так же,
+		как при добавлении блока. Изменения сложности по времени добычи не
+		воспроизводятся.
+
+		:param block: Блок
+		"""
+		for transaction in block.transactions:
+			if transaction not in self.mempool:
+				self.economic_influence()
+
+		miner, reward = self._block_reward(block)
+		self.state.apply_block(block.index, self._transfers(block), miner, reward)
+		self._record_block(block)
+
+		if miner is not None:
+			self._reward_miner(reward)
+			self.economic_influence()
+			self._update_mining_reward()
+
+	@staticmethod
+	def _transfers(block: Block) -> List[Tuple[bytes, bytes, int, int]]:
+		"""
+		Переводы блока для состояния счетов
+
+		:param block: Блок
+
+		:return: Список кортежей (отправитель, получатель, сумма, комиссия)
+		"""
+		return [(tx.sender_wallet, tx.recipient_wallet, tx.amount, tx.fee) for tx in block.transactions]
+
+	@staticmethod
+	def _block_reward(block: Block) -> Tuple[Optional[bytes], int]:
+		"""
+		Получатель и размер награды за блок (из мета-данных блока).
+
+		Награда записывается в базовых единицах; дробная награда в блоках,
+		добытых до перехода на базовые единицы, считается суммой в монетах.
+
+		:param block: Блок
+
+		:return: Кортеж (публичный ключ майнера или None, награда в базовых единицах)
+		"""
+		metadata = block.metadata if isinstance(block.metadata, dict) else {}
+
+		if 'account' not in metadata or 'reward' not in metadata:
+			return None, 0
+
+		reward = metadata['reward']
+
+		if isinstance(reward, float):
+			reward = serialization.to_base_units(reward)
+
+		return bytes.fromhex(metadata['account']), reward
+
+	def _reward_miner(self, reward: int) -> None:
+		"""
+		Учет выпуска награды за добытый блок (сама награда зачисляется
+		майнеру при применении блока к состоянию счетов)
+
+		:param reward: Награда в базовых единицах
+		"""
+		self.total_mined_coins += reward
+		self.inflation_rate += 0.001
+		self.remaining_supply -= reward
+
+	@staticmethod
+	def _decode_stored_block(data: bytes) -> Block:
+		"""
+		Десериализация блока из хранилища.
+
+		Статус транзакций не входит в двоичный формат: транзакции блока,
+		записанного в цепь, считаются подтвержденными.
+
+		:param data: Байты блока
+
+		:return: Блок
+		"""
+		block = Block.decode(data)
+
+		for transaction in block.transactions:
+			transaction.status = TransactionStatus.CONFIRMED
+
+		return block
+
+	def create_genesis_block(self) -> Block:
+		"""
+		Создание начально, genesis-блока в блокчейне.
+
+		:return: Блок с хешем из 64 нуля
+		"""
+		logger.debug('Create genesis block for blockchain')
+		return Block(0, [], bytes(32), timestamp=self.config.genesis_time or datetime.now())
+
+	def add_block(self, block: Block) -> bool:
+		"""
+		Метод, отвечающий за добавление блока в блокчейн
+
+		Переводы блока и награда майнеру атомарно применяются к состоянию
+		счетов: если хотя бы одному отправителю не хватает средств, блок не
+		добавляется и состояние не меняется.
+
+		:param block: Новый блок
+
+		:return: True в случае успеха, в противном случае False
+		"""
+		try:
+			self.state.apply_block(block.index, self._transfers(block), *self._block_reward(block))
+		except (InsufficientFundsException, InvalidTransferException) as e:
+			logger.error('New block %s was not added: %s', LazyHex(block.hash), e)
+			return False
+
+		try:
+			logger.info('New block added: %s', LazyHex(block.hash), extra={'height': block.index})
+			self.chain.append(block)
+		except Exception as e:
+			self.state.revert_block()
+			logger.error('New block %s was not added: %s', LazyHex(block.hash), e)
+			return False
+
+		self._record_block(block)
+
+		if self._tree is not None:
+			self._tree.connect(block)
+
+		if self._indexes is not None:
+			self._indexes.add_block(block)
+
+		return True
+
+	def accept_block(self, block: Block) -> BlockStatus:
+		"""
+		Прием блока, добытого другим узлом сети.
+
+		Проверяются индекс, связь с предыдущим блоком, цель и доказательство работы
+		и сигнатуры транзакций (уже проверенные при приеме в мемпул берутся
+		из кеша). Блок, продолжающий активную цепь, добавляется, как добытый
+		локально. Блок, продолжающий другой блок (из последних fork_depth
+		блоков цепи или из боковой ветви), сохраняется в боковой ветви; если
+		суммарная работа его ветви от точки ветвления больше работы активной
+		цепи на том же участке, цепь переключается на эту ветвь.
+
+		:param block: Блок
+
+		:return: Результат приема (см. core.forks.BlockStatus)
+		"""
+		if block.hash in self.tree:
+			return BlockStatus.DUPLICATE
+
+		tip = self.chain[-1]
+
+		if block.previous_hash == tip.hash:
+			if (not self._check_received(block, tip.index + 1, tip.hash) or not self._check_connectable(block)
+					or not self._apply_received(block)):
+				return BlockStatus.INVALID
+
+			return BlockStatus.EXTENDED
+
+		branch = self.tree.branch(block)
+
+		if branch is None:
+			return BlockStatus.ORPHAN
+
+		fork_height, blocks = branch
+		height = blocks[-2].index + 1 if len(blocks) > 1 else fork_height + 1
+		previous = self.chain[max(fork_height - self.retarget.window, 0):fork_height + 1] + blocks[:-1]
+
+		if not self._check_received(block, height, block.previous_hash, previous):
+			return BlockStatus.INVALID
+
+		self.tree.add(block)
+
+		if sum(block_work(item) for item in blocks) <= self.tree.main_work(fork_height):
+			logger.info('Block %s is stored in a side branch from block %s', LazyHex(block.hash), fork_height,
+						extra={'height': block.index})
+			return BlockStatus.SIDE
+
+		return BlockStatus.REORGANIZED if self._reorganize(fork_height, blocks) else BlockStatus.INVALID
+
+	def _check_received(self, block: Block, height: int, previous_hash: bytes,
+						previous: Optional[List[Block]]=None) -> bool:
+		"""
+		Проверка полученного блока: индекс, связь с предыдущим блоком,
+		доказательство работы, правила консенсуса (см. core.consensus) и
+		сигнатуры транзакций
+
+		:param block: Блок
+		:param height: Ожидаемый индекс блока
+		:param previous_hash: Хеш предыдущего блока
+		:param previous: Блоки его ветви перед ним по возрастанию высоты (None - конец цепи)
+
+		:return: True, если блок прошел проверку
+		"""
+		reason = check_block(block.encode(), height, previous_hash, self.economic_model.base_mining_reward)
+
+		if reason is None:
+			reason = self.consensus.check(block, previous)
+
+		if reason is None and not all(self.verifier.verify_batch(block.transactions)):
+			reason = 'invalid transaction signature'
+
+		if reason is not None:
+			logger.warning('Rejected block %s: %s', LazyHex(block.hash), reason)
+			return False
+
+		return True
+
+	def _check_connectable(self, block: Block) -> bool:
+		"""
+		Проверка полученного блока по состоянию цепи, к концу которой он
+		присоединяется: производитель блока выбран по ставкам этой цепи (см.
+		core.consensus), награда равна награде за следующий блок этой цепи
+		(см. next_reward) и не превышает остаток монет, а транзакции блока
+		еще не подтверждены в цепи.
+
+		Блоки боковой ветви проверяются при смене цепи, когда цепь уже
+		отмотана до точки ветвления (см. _reorganize).
+
+		:param block: Блок
+
+		:return: True, если блок можно присоединить к концу цепи
+		"""
+		reason = self.consensus.check_producer(block, self.stakes)
+		miner, reward = self._block_reward(block)
+
+		expected = self.next_reward()
+
+		if reason is None and miner is not None and reward != expected:
+			reason = f'unexpected block reward {reward}, expected {expected}'
+		elif reason is None and reward > self.remaining_supply:
+			reason = 'block reward exceeds the remaining supply'
+
+		for position, transaction in enumerate(block.transactions if reason is None else ()):
+			if self.indexes.transaction_location(transaction.signature) is not None:
+				reason = f'transaction {position} is already confirmed'
+				break
+
+		if reason is not None:
+			logger.warning('Rejected block %s: %s', LazyHex(block.hash), reason)
+			return False
+
+		return True
+
+	def _apply_received(self, block: Block, economics: bool=True) -> bool:
+		"""
+		Добавление проверенного блока от другого узла в конец цепи:
+		экономическая модель учитывает транзакции, которых не было в
+		мемпуле, и выпуск награды майнеру.
+
+		:param block: Блок
+		:param economics: Применять ли экономическую модель (False - при
+			возврате блоков, уже учтенных ранее)
+
+		:return: True, если блок добавлен в цепь
+		"""
+		unseen = sum(1 for transaction in block.transactions if transaction not in self.mempool)
+
+		if not self.add_block(block):
+			return False
+
+		miner, reward = self._block_reward(block)
+
+		if miner is not None:
+			self._reward_miner(reward)
+
+		if economics:
+			for _ in range(unseen + (miner is not None)):
+				self.economic_influence()
+
+		if miner is not None:
+			self._update_mining_reward()
+
+		if self.snapshots is not None and block.index % self.config.snapshot_interval == 0:
+			self.save_snapshot()
+
+		return True
+
+	def _disconnect_block(self) -> Block:
+		"""
+		Отмена последнего блока цепи при смене ветки.
+
+		Переводы и награда отменяются в состоянии счетов по журналу,
+		накопительные итоги и выпуск монет уменьшаются, а блок переходит в
+		боковую ветвь. Награда за следующий блок пересчитывается по новой
+		вершине цепи; остальные изменения параметров экономической модели
+		(комиссия, инфляция от приема транзакций) не отменяются.
+
+		:return: Отмененный блок
+		"""
+		block = self.chain[-1]
+		self.state.revert_block()
+		self.accounting.revert_block(block)
+
+		for transaction in block.transactions:
+			self.remaining_supply -= transaction.fee
+			transaction.status = TransactionStatus.PENDING
+
+		miner, reward = self._block_reward(block)
+
+		if miner is not None:
+			self.total_mined_coins -= reward
+			self.inflation_rate -= 0.001
+			self.remaining_supply += reward
+
+		if isinstance(self.chain, BlockStore):
+			self.chain.truncate(len(self.chain) - 1)
+		else:
+			self.chain.pop()
+
+		self.tree.disconnect(block)
+		self._update_mining_reward()
+
+		if self._indexes is not None:
+			self._indexes.remove_block(block)
+
+		return block
+
+	def _reorganize(self, fork_height: int, blocks: List[Block]) -> bool:
+		"""
+		Переключение цепи на боковую ветвь.
+
+		Блоки активной цепи выше точки ветвления отменяются, блоки ветви
+		применяются по одному. Если блок ветви не проходит проверку по
+		состоянию цепи (см. _check_connectable) или не применяется к
+		состоянию счетов (не хватает средств), он и его потомки удаляются из
+		дерева, а прежняя цепь восстанавливается. Транзакции отмененных блоков, не
+		вошедшие в новую цепь, возвращаются в мемпул.
+
+		:param fork_height: Высота точки ветвления
+		:param blocks: Блоки ветви по возрастанию высоты
+
+		:return: True, если цепь переключена на ветвь
+		"""
+		depth = len(self.chain) - 1 - fork_height
+
+		if depth > self.state.revertible:
+			logger.warning('Cannot switch to a branch from block %s: the state journal keeps only %s blocks',
+							fork_height, self.state.revertible)
+			return False
+
+		logger.info('Chain reorganization from block %s: %s blocks replaced with %s', fork_height, depth, len(blocks))
+
+		detached = [self._disconnect_block() for _ in range(depth)]
+		detached.reverse()
+		connected: List[Block] = []
+
+		for block in blocks:
+			if self._check_connectable(block) and self._apply_received(block):
+				connected.append(block)
+				continue
+
+			logger.warning('Branch block %s cannot be applied, the previous chain is restored', LazyHex(block.hash))
+			self.tree.remove(block.hash)
+
+			for _ in connected:
+				self._disconnect_block()
+
+			for previous in detached:
+				self._apply_received(previous, economics=False)
+
+			self._return_transactions(connected, detached)
+			return False
+
+		self._return_transactions(detached, connected)
+		return True
+
+	def _return_transactions(self, removed: List[Block], added: List[Block]) -> None:
+		"""
+		Возврат в мемпул транзакций из блоков, удаленных из цепи, и повторное
+		резервирование средств под весь мемпул: транзакции, на которые у
+		отправителя больше не хватает средств, удаляются из мемпула.
+
+		:param removed: Блоки, удаленные из цепи
+		:param added: Блоки, добавленные в цепь вместо них
+		"""
+		included = {transaction.signature for block in added for transaction in block.transactions}
+
+		for block in removed:
+			for transaction in block.transactions:
+				if transaction.signature not in included:
+					self.mempool.add(transaction)
+
+		self.state.release_all()
+
+		for transaction in self.mempool.transactions():
+			if self._reserve(transaction):
+				continue
+
+			logger.warning('FAILED | Transaction is no longer funded after chain reorganization: %s', transaction)
+			self.mempool.remove([transaction])
+			transaction.status = TransactionStatus.FAILED
+			self._record_history(transaction)
+
+	def _record_block(self, block: Block) -> None:
+		"""
+		Учет блока, примененного к состоянию счетов: накопительные итоги и
+		подтверждение транзакций.
+
+		:param block: Блок
+		"""
+		self.accounting.apply_block(block)
+		self._confirm_transactions(block)
+
+	@property
+	def pending_transactions(self) -> List[Transaction]:
+		"""
+		Неподтвержденные транзакции из мемпула в порядке поступления
+
+		:return: Список транзакций
+		"""
+		return self.mempool.transactions()
+
+	def _confirm_transactions(self, block: Block) -> None:
+		"""
+		Подтверждение транзакций блока, добавленного в цепь.
+
+		Комиссии возвращаются в сеть, резерв средств отправителя снимается,
+		а сами транзакции удаляются из мемпула. Балансы к этому моменту уже
+		изменены в состоянии счетов.
+
+		:param block: Добавленный блок
+		"""
+		for transaction in block.transactions:
+			if transaction in self.mempool:
+				self._release(transaction)
+
+			self.remaining_supply += transaction.fee
+			transaction.status = TransactionStatus.CONFIRMED
+			self._record_history(transaction)
+
+		self.mempool.remove(block.transactions)
+
+	def _on_mempool_evict(self, transaction: Transaction) -> None:
+		"""
+		Обработка транзакции, вытесненной из переполненного мемпула.
+
+		Зарезервированные под нее средства отправителя снова становятся доступны.
+
+		:param transaction: Вытесненная транзакция
+		"""
+		logger.warning('Transaction evicted from mempool: %s', transaction)
+		self._release(transaction)
+
+		transaction.status = TransactionStatus.FAILED
+		self._record_history(transaction)
+
+	def _reserve(self, transaction: Transaction) -> bool:
+		"""
+		Резервирование средств отправителя под транзакцию мемпула (см.
+		core.state.transfer_debit)
+
+		:param transaction: Транзакция
+
+		:return: True, если средств отправителя хватило
+		"""
+		return self.state.reserve(transaction.sender_wallet,
+								*transfer_debit(transaction.recipient_wallet, transaction.amount, transaction.fee))
+
+	def _release(self, transaction: Transaction) -> None:
+		"""
+		Снятие резерва средств отправителя под транзакцию мемпула
+
+		:param transaction: Транзакция
+		"""
+		self.state.release(transaction.sender_wallet,
+							*transfer_debit(transaction.recipient_wallet, transaction.amount, transaction.fee))
+
+	def _record_history(self, transaction: Transaction) -> None:
+		"""
+		Запись статуса транзакции в историю кошелька отправителя.
+
+		:param transaction: Транзакция
+		"""
+		sender_wallet = self.wallets.get(transaction.sender_wallet)
+
+		if sender_wallet and transaction.signature is not None:
+			sender_wallet.transactions_history[f'{transaction.signature.hex()}'] = {
+				'recipient': transaction.recipient_wallet,
+				'status': transaction.status
+			}
+
+	def mine_block(self, wallet: Wallet) -> bool:
+		"""
+		Добыча блока пользователем на определенный кошелёк.
+
+		В блок попадает пакет транзакций из мемпула с наибольшей комиссией,
+		ограниченный по количеству и суммарному размеру. Добыча состоит из
+		трех шагов, которые можно выполнять и по отдельности (например,
+		перебирать nonce вне потока, изменяющего блокчейн): prepare_block,
+		seal_block и commit_block. Как запечатывается блок, определяет
+		алгоритм консенсуса из конфигурации (см. core.consensus): при PoS
+		блок добавляет только выбранный валидатор, и вместо перебора nonce
+		он подписывает заголовок.
+
+		:param wallet: Кошелёк майнера (или для получения вознаграждения)
+
+		:return: True в случае успешной добычи, False в противном случае
+		"""
+		block = self.prepare_block(wallet)
+
+		if block is None:
+			return False
+
+		self.seal_block(block, wallet=wallet)
+
+		return self.commit_block(block, wallet)
+
+	def prepare_block(self, wallet: Wallet) -> Optional[Block]:
+		"""
+		Подготовка нового блока к добыче: пакет транзакций из мемпула и
+		мета-данные с наградой майнеру.
+
+		:param wallet: Кошелёк майнера
+
+		:return: Блок с nonce 0, либо None, если награду нечем выплатить,
+			в мемпуле нет транзакций или кошелёк не может добавить блок
+			(например, при PoS не выбран валидатором)
+		"""
+		if self.remaining_supply <= self.economic_model.base_mining_reward:
+			print('Error: no enough coins for pay mining reward')
+			logger.error('No enough coins for pay mining_reward')
+			return None
+
+		transactions = self.mempool.select(self.config.block_max_transactions, self.config.block_max_bytes)
+
+		if not transactions:
+			logger.debug('No pending transactions to mine')
+			return None
+
+		metadata = self.consensus.metadata(wallet)
+
+		if metadata is None:
+			logger.debug('Wallet %s can not produce the next block', LazyHex(wallet.public_key_bytes))
+			return None
+
+		metadata.update({
+			'account': wallet.public_key_bytes.hex(),
+			'reward': self.next_reward()
+		})
+
+		return Block(len(self.chain), transactions, self.chain[-1].hash, metadata=metadata)
+
+	def seal_block(self, block: Block, miner: Optional[ParallelMiner]=None, wallet: Optional[Wallet]=None) -> None:
+		"""
+		Запечатывание подготовленного блока: перебор nonce при PoW или
+		подпись заголовка валидатором при PoS (см. core.consensus).
+
+		Не обращается к изменяемому состоянию блокчейна, поэтому может
+		выполняться в отдельном потоке, пока блокчейн принимает транзакции.
+
+		:param block: Подготовленный блок (см. prepare_block)
+		:param miner: Многопроцессный движок добычи (по умолчанию - движок блокчейна)
+		:param wallet: Кошелёк производителя блока (по умолчанию - по ключу из мета-данных)
+		"""
+		self.consensus.seal(block, wallet, miner or self.miner)
+
+	def next_target(self, previous: Optional[List[Block]]=None) -> int:
+		"""
+		Цель доказательства работы для следующего блока (см. core.difficulty.Retargeter)
+
+		:param previous: Блоки перед ним по возрастанию высоты (по умолчанию - конец цепи)
+
+		:return: Цель
+		"""
+		if previous is None:
+			previous = self.chain[-(self.retarget.window + 1):]
+
+		return self.retarget.next_target(previous)
+
+	@property
+	def stakes(self) -> StakePool:
+		"""
+		Ставки валидаторов на высоте последнего блока цепи (см. core.state.AccountState)
+
+		:return: Ставки
+		"""
+		return self.state.stakes
+
+	def next_validator(self) -> Optional[bytes]:
+		"""
+		Валидатор, который добавляет следующий блок при PoS: выбирается по
+		высоте блока пропорционально ставке (см. core.consensus.selection_seed)
+
+		:return: Публичный ключ валидатора, либо None, если ставок нет
+		"""
+		return self.stakes.select(selection_seed(self.chain[0].hash, len(self.chain)))
+
+	def stake_transaction(self, wallet: Wallet, amount: Amount, fee: Optional[Amount]=None,
+						unstake: bool=False) -> Optional[Transaction]:
+		"""
+		Подписанная транзакция ставки: перевод на служебный адрес (см.
+		core.consensus.STAKE_ACCOUNT), который при применении блока
+		блокирует сумму в ставке отправителя или снимает ее оттуда
+
+		:param wallet: Кошелёк
+		:param amount: Сумма в монетах
+		:param fee: Комиссия в монетах (по умолчанию - текущая комиссия сети)
+		:param unstake: Снятие ставки вместо блокировки
+
+		:return: Транзакция, либо None, если сумма не положительна
+		"""
+		units = serialization.to_base_units(amount)
+		fee = self.transaction_fee if fee is None else serialization.to_base_units(fee)
+
+		if units <= 0:
+			logger.warning('Wallet %s can not change the stake by %s', LazyHex(wallet.public_key_bytes), LazyAmount(units))
+			return None
+
+		transaction = Transaction(wallet.public_key_bytes, UNSTAKE_ACCOUNT if unstake else STAKE_ACCOUNT, units, fee)
+		transaction.sign(wallet)
+
+		return transaction
+
+	def stake(self, wallet: Wallet, amount: Amount, fee: Optional[Amount]=None) -> bool:
+		"""
+		Блокировка средств кошелька в ставке валидатора: транзакция ставки
+		принимается в мемпул, а ставка меняется, когда транзакция войдет в
+		блок. Заблокированные средства остаются на балансе, но не входят в
+		доступный остаток.
+
+		:param wallet: Кошелёк
+		:param amount: Сумма в монетах
+		:param fee: Комиссия в монетах (по умолчанию - текущая комиссия сети)
+
+		:return: True, если транзакция принята в мемпул
+		"""
+		transaction = self.stake_transaction(wallet, amount, fee)
+
+		return transaction is not None and self.pending_transaction(transaction)
+
+	def unstake(self, wallet: Wallet, amount: Amount, fee: Optional[Amount]=None) -> bool:
+		"""
+		Снятие средств кошелька из ставки валидатора (см. stake)
+
+		:param wallet: Кошелёк
+		:param amount: Сумма в монетах
+		:param fee: Комиссия в монетах (по умолчанию - текущая комиссия сети)
+
+		:return: True, если транзакция принята в мемпул
+		"""
+		transaction = self.stake_transaction(wallet, amount, fee, unstake=True)
+
+		return transaction is not None and self.pending_transaction(transaction)
+
+	def commit_block(self, block: Block, wallet: Wallet) -> bool:
+		"""
+		Добавление добытого блока в цепь и выплата награды майнеру.
+
+		:param block: Добытый блок (см. seal_block)
+		:param wallet: Кошелёк майнера
+
+		:return: True, если блок добавлен в цепь
+		"""
+		if block.previous_hash != self.chain[-1].hash:
+			logger.warning('Mined block %s is stale: the chain tip has changed', block.index)
+			return False
+
+		if not self.add_block(block):
+			return False
+
+		logger.info('Wallet %s mined a new block: %s', LazyHex(wallet.public_key_bytes), LazyHex(block.hash), extra={'height': block.index})
+
+		self._reward_miner(self._block_reward(block)[1])
+
+		self.economic_influence()
+		self.update_mining_settings()
+
+		if self.snapshots is not None and block.index % self.config.snapshot_interval == 0:
+			self.save_snapshot()
+
+		return True
+
+	def update_mining_settings(self) -> None:
+		"""
+		Обновление настроек майнинга после добычи блока.
+
+		Вознаграждение майнера меняется по следующему алгоритму (см. next_reward):
+		 1. Вычисляется влияние целевой инфляции на награду последнего блока
+		 2. Из награждения минусуется влияние деленное на общее количество добытых монет
+
+		Сложность здесь не меняется: цель следующего блока вычисляется по
+		меткам времени последних блоков цепи (см. next_target), одинаково у
+		всех узлов.
+		"""
+		self._update_mining_reward()
+		self.last_update_time = datetime.now()
+
+	def next_reward(self) -> int:
+		"""
+		Награда за следующий блок цепи.
+
+		Вычисляется только по цепи: по награде последнего блока и выпуску
+		монет наградами, с целевой (а не текущей) инфляцией экономической
+		модели. Поэтому у всех узлов с одной цепью она одинакова, и награда
+		из мета-данных полученного блока сверяется с ней (см. _check_connectable).
+		За первый добытый блок награда базовая.
+
+		:return: Награда в базовых единицах
+		"""
+		miner, reward = self._block_reward(self.chain[-1])
+
+		if miner is None or self.total_mined_coins <= 0:
+			return self.economic_model.base_mining_reward
+
+		tokens = reward * self.economic_model.target_inflation_rate
+
+		return reward - round(tokens * serialization.BASE_UNITS / self.total_mined_coins)
+
+	def _update_mining_reward(self) -> None:
+		"""
+		Обновление награды майнера после блока (см. update_mining_settings)
+		"""
+		self.mining_reward = self.next_reward()
+
+		logger.debug('Update miner reward. Current mining reward = %s', LazyAmount(self.mining_reward))
+
+	def create_wallet(self, name: str, initial_balance: Amount) -> Wallet:
+		"""
+		Создание кошелька и его регистрация в блокчейне.
+
+		:param name: Имя носителя кошелька
+		:param initial_balance: Начальный баланс на кошельке в монетах
+
+		:return: Новый зарегистрированный кошелёк
+		"""
+		return self.register_wallet(Wallet(name, initial_balance, get_backend(self.config.crypto_backend)))
+
+	def register_wallet(self, wallet: Wallet) -> Optional[Wallet]:
+		"""
+		Регистрация готового кошелька (например, восстановленного по ключам
+		через Wallet.restore). Баланс кошелька выпускается из остатка монет сети.
+
+		:param wallet: Кошелёк
+
+		:return: Зарегистрированный кошелёк, либо None, если не хватает монет в сети
+		"""
+		if wallet.balance_units > self.remaining_supply:
+			logger.critical('Impossible to register a wallet: the initial balance exceeds remaining tokens in network.')
+			return None
+		else:
+			self.remaining_supply -= wallet.balance_units
+			self.economic_influence()
+
+		self.wallets.add(wallet)
+
+		logger.info('New wallet has been registered: %s', LazyHex(wallet.public_key_bytes))
+
+		return wallet
+
+	def pending_transaction(self, transaction: Transaction) -> bool:
+		"""
+		Метод для приема транзакций в мемпул.
+
+		Мы получаем кошельки отправителя и получателя, после чего добавляем
+		транзакцию в мемпул. Получатель получит средства, когда транзакция
+		войдет в добытый блок (см. mine_block). Получателем транзакции ставки
+		служит служебный адрес (см. stake_transaction).
+
+		:param transaction: Транзакция
+
+		:return: True в случае существования отправителя и получателя и
+			принятия транзакции в мемпул, иначе False
+		"""
+		sender_wallet = self.wallets.get(transaction.sender_wallet)
+		recipient_wallet = (transaction.recipient_wallet in (STAKE_ACCOUNT, UNSTAKE_ACCOUNT)
+							or self.wallets.get(transaction.recipient_wallet))
+
+		if sender_wallet and recipient_wallet:
+			return self.receive_transaction(transaction)
+		else:
+			logger.warning('FAILED | Transfer transaction is failed: %s %s from %s -> %s', LazyAmount(transaction.amount), self.config.coin_name,
+							LazyHex(transaction.sender_wallet), LazyHex(transaction.recipient_wallet))
+			transaction.status = TransactionStatus.FAILED
+			self._record_history(transaction)
+			return False
+
+	def receive_transaction(self, transaction: Transaction) -> bool:
+		"""
+		Прием транзакции в мемпул без проверки регистрации кошельков
+		(например, транзакции, полученной от другого узла сети).
+
+		Проверяются сумма и комиссия, сигнатура, доступный остаток
+		отправителя (для снятия ставки - и сама ставка) и то, что транзакция
+		еще не подтверждена в цепи (повтор); средства резервируются до
+		подтверждения транзакции в блоке.
+
+		:param transaction: Транзакция
+
+		:return: True, если транзакция принята в мемпул
+		"""
+		if transaction.amount <= 0 or transaction.fee < 0:
+			logger.warning('FAILED | Transaction amount must be positive and fee must not be negative: %s', transaction)
+			transaction.status = TransactionStatus.FAILED
+			return False
+
+		if not self.verifier.verify(transaction):
+			logger.warning('FAILED | Transaction signature is invalid: %s', transaction)
+			transaction.status = TransactionStatus.FAILED
+			return False
+
+		if self.indexes.transaction_location(transaction.signature) is not None:
+			logger.warning('FAILED | Transaction is already confirmed: %s', transaction)
+			transaction.status = TransactionStatus.FAILED
+			self._record_history(transaction)
+			return False
+
+		if not self._reserve(transaction):
+			logger.warning('FAILED | Insufficient funds for transaction: %s', transaction)
+			transaction.status = TransactionStatus.FAILED
+			self._record_history(transaction)
+			return False
+
+		if not self.mempool.add(transaction):
+			self._release(transaction)
+			logger.warning('Transaction was not accepted to mempool (duplicate, unsigned or low fee): %s', transaction)
+			return False
+
+		logger.info('Transfer transaction: %s %s from %s -> %s', LazyAmount(transaction.amount), self.config.coin_name,
+					LazyHex(transaction.sender_wallet), LazyHex(transaction.recipient_wallet))
+		self._record_history(transaction)
+		self.economic_influence()
+		return True
+
+	def submit_transactions(self, transactions: List[Transaction]) -> List[bool]:
+		"""
+		Пакетный прием транзакций.
+
+		Сигнатуры всех транзакций сначала проверяются одной пачкой (параллельно,
+		если задано несколько процессов для проверки), после чего каждая
+		транзакция проходит через pending_transaction без повторной проверки.
+
+		:param transactions: Список транзакций
+
+		:return: Список результатов pending_transaction для каждой транзакции
+		"""
+		return self._accept_batch(transactions, self.pending_transaction)
+
+	def receive_transactions(self, transactions: List[Transaction]) -> List[bool]:
+		"""
+		Пакетный прием транзакций от других узлов сети: как submit_transactions,
+		но каждая транзакция проходит через receive_transaction.
+
+		:param transactions: Список транзакций
+
+		:return: Список результатов receive_transaction для каждой транзакции
+		"""
+		return self._accept_batch(transactions, self.receive_transaction)
+
+	def _accept_batch(self, transactions: List[Transaction], accept) -> List[bool]:
+		"""
+		Пакетная проверка сигнатур и прием каждой транзакции с верной сигнатурой
+
+		:param transactions: Список транзакций
+		:param accept: Метод приема одной транзакции
+
+		:return: Список результатов
+		"""
+		verdicts = self.verifier.verify_batch(transactions)
+		results = []
+
+		for transaction, verdict in zip(transactions, verdicts):
+			if verdict:
+				results.append(accept(transaction))
+			else:
+				logger.warning('FAILED | Transaction signature is invalid: %s', transaction)
+				transaction.status = TransactionStatus.FAILED
+				results.append(False)
+
+		return results
+
+	def validate_chain(self, full: bool=False) -> bool:
+		"""
+		Метод проверки цепи блоков.
+
+		Для каждого блока сверяется предыдущий хеш с хешем предыдущего блока,
+		проверяется доказательство работы и сигнатуры транзакций (см.
+		core.validation.ChainValidator), а также правила консенсуса: при PoW
+		цель блока должна совпадать с целью, пересчитанной по предыдущим
+		блокам, при PoS блок должен быть подписан выбранным валидатором.
+		Проверка начинается с последней контрольной точки и останавливается
+		на первом невалидном блоке.
+
+		:param full: Проверить всю цепь, не используя контрольную точку
+
+		:return: True если цепь валидна, False в противном случае
+		"""
+		try:
+			result: ValidationResult = self.validator.validate(self.chain, full, self._check_consensus)
+		except Exception as ex:
+			logger.error('Error when validate chain: %s', ex)
+			return False
+
+		if not result:
+			logger.error('Invalid block %s: %s', result.failed_index, result.reason)
+			return False
+
+		logger.debug('Validating chain: no errors (%s blocks checked)', result.checked)
+
+		return True
+
+	def _check_consensus(self, height: int) -> Optional[str]:
+		"""
+		Проверка правил консенсуса блока цепи (см. core.consensus)
+
+		:param height: Высота блока
+
+		:return: Причина ошибки, либо None
+		"""
+		block = self.chain[height]
+		previous = self.chain[max(height - self.retarget.window - 1, 0):height]
+		reason = self.consensus.check(block, previous)
+
+		if reason is None:
+			reason = self.consensus.check_producer(block, self._stakes_before(height))
+
+		return reason
+
+	def _stakes_before(self, height: int) -> StakePool:
+		"""
+		Ставки на высоте предыдущего блока цепи, восстановленные по
+		транзакциям ставки в цепи.
+
+		Ставки последнего запрошенного блока запоминаются, поэтому при
+		проверке цепи по возрастанию высоты каждый блок применяется один раз.
+
+		:param height: Высота блока
+
+		:return: Ставки после применения блоков до height (не включая)
+		"""
+		if self._validated_stakes is not None:
+			applied, digest, stakes = self._validated_stakes
+
+			if applied >= height or self.chain[applied].hash != digest:
+				applied, stakes = 0, StakePool()
+		else:
+			applied, stakes = 0, StakePool()
+
+		for index in range(applied + 1, height):
+			stakes.apply(self._transfers(self.chain[index]))
+
+		self._validated_stakes = (height - 1, self.chain[height - 1].hash, stakes)
+
+		return stakes
+
+	def economic_influence(self) -> None:
+		"""
+		Метод для поддержки влияния экономических моделей на блокчейн.
 
 		1. Инфляция влияет на максимальное количество монет
 		2. Инфляция влияет на количество монет в сети
@@ -497,11 +2096,13 @@ class BlockChain:
 			+ Сжигание, если монет слишком много (больше максимального предела)
 		5. Авторегулирование инфляции:
 			Приближает значение инфляции к заданному, если оно отходит от оригинального
+
+		Выпуск монет и рост комиссии округляются до целой базовой единицы.
 		"""
-		transaction_supply = sum(tx.amount for block in self.chain for tx in block.transactions)
+		transaction_supply = self.accounting.transferred_amount
 		total_supply = self.max_supply - transaction_supply
-		new_tokens = total_supply * self.inflation_rate
-		inflation_fee = self.transaction_fee * self.inflation_rate
+		new_tokens = round(total_supply * self.inflation_rate)
+		inflation_fee = round(self.transaction_fee * self.inflation_rate)
 
 		self.max_supply += new_tokens
 		self.remaining_supply += new_tokens
@@ -512,6 +2113,34 @@ class BlockChain:
 
 		self.inflation_rate = self.economic_model.adjust_inflantion_rate(self.inflation_rate)
 
+		if self.config.debug_accounting:
+			self.check_accounting()
+
+	def check_accounting(self) -> None:
+		"""
+		Сверка накопительных итогов с полным пересчетом (режим отладки).
+
+		Сравниваются итоги по транзакциям в цепи и общий баланс кошельков.
+		Суммы хранятся в базовых единицах, поэтому сравнение точное.
+
+		:raises BlockChainException: Если итоги расходятся с пересчетом
+		"""
+		expected = SupplyAccounting.recompute(self.chain)
+
+		for name, value in expected.as_dict().items():
+			actual = getattr(self.accounting, name)
+
+			if actual != value:
+				logger.critical('Accounting mismatch for %s: running=%s, recomputed=%s', name, actual, value)
+				raise BlockChainException(f'accounting mismatch for {name}: running={actual}, recomputed={value}')
+
+		total_wallets_balance = self.state.recompute_total()
+
+		if self.state.total != total_wallets_balance:
+			logger.critical('Accounting mismatch for total wallets balance: running=%s, recomputed=%s',
+							self.state.total, total_wallets_balance)
+			raise BlockChainException(f'accounting mismatch for total wallets balance: running={self.state.total}, recomputed={total_wallets_balance}')
+
 	def get_full_info(self) -> dict:
 		"""
 		Получение некоторой информации о блокчейне.
@@ -519,22 +2148,37 @@ class BlockChain:
 		Возвращает список из текущего максимального числа монет, текущего
 		остатка монет в сети, общий баланс всех кошельков и процент
 		соотношения остатка монет в сети к общему балансу всех кошельков.
+		Суммы возвращаются в монетах.
 		"""
-		total_wallets_balance: int = 0
-
-		for wallet in self.wallets:
-			total_wallets_balance += wallet.balance
-
+		total_wallets_balance: int = self.state.total
 		remaining_supply = self.max_supply - total_wallets_balance
 		remaining_supply_percentage = (remaining_supply / self.max_supply) * 100
 
 		return {
-			'current_max_supply': self.max_supply,
-			'current_remaining_supply': self.remaining_supply,
-			'total_wallets_balance': total_wallets_balance,
+			'current_max_supply': serialization.from_base_units(self.max_supply),
+			'current_remaining_supply': serialization.from_base_units(self.remaining_supply),
+			'total_wallets_balance': serialization.from_base_units(total_wallets_balance),
 			'remaining_supply_percentage': remaining_supply_percentage,
 		}
 
+	def close(self) -> None:
+		"""
+		Освобождение ресурсов блокчейна (пулы процессов для добычи и проверки
+		сигнатур, файлы хранилища блоков). Открытые индексы цепи сохраняются
+		рядом с хранилищем.
+		"""
+		if self.miner is not None:
+			self.miner.shutdown()
+
+		self.verifier.shutdown()
+		self.validator.shutdown()
+
+		if self._indexes is not None and self._indexes.path is not None:
+			self._indexes.save()
+
+		if isinstance(self._chain, BlockStore):
+			self._chain.close()
+
 	def get_wallet(self, public_key: bytes) -> Wallet:
 		"""
 		Получение кошелька в блокчейне по его публичному ключу.
@@ -543,8 +2187,148 @@ class BlockChain:
 
 		:return: Кошелёк, либо None
 		"""
-		for wallet in self.wallets:
-			if wallet.public_key == public_key:
-				return wallet
+		return self.wallets.get(public_key)
+
+	def get_wallet_by_name(self, name: str) -> Wallet:
+		"""
+		Получение кошелька в блокчейне по имени владельца.
+
+		Если у владельца несколько кошельков, возвращается первый зарегистрированный.
+
+		:param name: Имя владельца
+
+		:return: Кошелёк, либо None
+		"""
+		return self.wallets.get_by_name(name)
+
+	def get_block_by_hash(self, block_hash: bytes) -> Optional[Block]:
+		"""
+		Получение блока активной цепи по хешу (через индекс, без просмотра цепи).
+
+		:param block_hash: Хеш блока
+
+		:return: Блок, либо None
+		"""
+		height = self.indexes.block_height(block_hash)
+
+		return self.chain[height] if height is not None else None
+
+	def get_transaction(self, signature: bytes) -> Optional[Tuple[Block, int]]:
+		"""
+		Поиск подтвержденной транзакции по сигнатуре.
+
+		:param signature: Сигнатура транзакции
+
+		:return: Кортеж (блок, номер транзакции в блоке), либо None
+		"""
+		location = self.indexes.transaction_location(signature)
+
+		if location is None:
+			return None
+
+		height, position = location
+
+		return self.chain[height], position
+
+	def get_address_transactions(self, public_key: bytes, offset: int=0,
+								limit: Optional[int]=None) -> List[Tuple[int, Transaction]]:
+		"""
+		Подтвержденные транзакции адреса (отправленные и полученные) по
+		возрастанию высоты блока.
+
+		:param public_key: Публичный ключ
+		:param offset: Количество пропускаемых первых транзакций
+		:param limit: Максимальное количество транзакций (None - все)
+
+		:return: Список кортежей (высота блока, транзакция)
+		"""
+		locations = self.indexes.address_locations(public_key)
+		end = None if limit is None else offset + limit
+
+		return [(height, self.chain[height].transactions[position]) for height, position in locations[offset:end]]
+
+	def _read_block(self, height: int, since: Optional[datetime]=None,
+					until: Optional[datetime]=None) -> Optional[Block]:
+		"""
+		Чтение блока цепи для потоковой обработки.
+
+		Блок из хранилища разбирается заново, минуя кеш прочитанных блоков:
+		проход по всей цепи не вытесняет из кеша последние блоки. Метка
+		времени проверяется по заголовку до разбора транзакций.
+
+		:param height: Высота блока
+		:param since: Начало периода (включительно)
+		:param until: Конец периода (не включительно)
+
+		:return: Блок, либо None, если он вне периода
+		"""
+		def in_period(timestamp: datetime) -> bool:
+			return (since is None or timestamp >= since) and (until is None or timestamp < until)
+
+		if not isinstance(self.chain, BlockStore):
+			block = self.chain[height]
+
+			return block if in_period(block.timestamp) else None
+
+		data = self.chain.read_raw(height)
+
+		if not in_period(serialization.micros_to_datetime(serialization.decode_header(data)[2])):
+			return None
+
+		return self._decode_stored_block(data)
+
+	def iter_blocks(self, start: int=0, stop: Optional[int]=None, since: Optional[datetime]=None,
+					until: Optional[datetime]=None) -> Iterator[Block]:
+		"""
+		Потоковый обход блоков цепи по диапазону высот и периоду времени.
+
+		Блоки читаются по одному, поэтому расход памяти не зависит от длины
+		цепи (в том числе для цепи в хранилище на диске).
+
+		:param start: Первая высота
+		:param stop: Высота, на которой обход останавливается (None - до конца цепи)
+		:param since: Начало периода (включительно)
+		:param until: Конец периода (не включительно)
+
+		:return: Генератор блоков по возрастанию высоты
+		"""
+		stop = len(self.chain) if stop is None else min(stop, len(self.chain))
+
+		for height in range(max(start, 0), stop):
+			block = self._read_block(height, since, until)
+
+			if block is not None:
+				yield block
+
+	def iter_transactions(self, start: int=0, stop: Optional[int]=None, since: Optional[datetime]=None,
+						until: Optional[datetime]=None, address: Optional[bytes]=None) -> Iterator[Tuple[int, int, Transaction]]:
+		"""
+		Потоковый обход подтвержденных транзакций цепи.
+
+		С отбором по адресу читаются только блоки, в которых есть транзакции
+		адреса (по индексу адресов, см. indexes).
+
+		:param start: Первая высота
+		:param stop: Высота, на которой обход останавливается (None - до конца цепи)
+		:param since: Начало периода (включительно)
+		:param until: Конец периода (не включительно)
+		:param address: Публичный ключ отправителя или получателя
+
+		:return: Генератор кортежей (высота блока, номер в блоке, транзакция)
+		"""
+		if address is None:
+			for block in self.iter_blocks(start, stop, since, until):
+				for position, transaction in enumerate(block.transactions):
+					yield block.index, position, transaction
+
+			return
+
+		stop = len(self.chain) if stop is None else min(stop, len(self.chain))
+		locations = [location for location in self.indexes.address_locations(address) if start <= location[0] < stop]
+
+		for height, group in groupby(locations, key=lambda location: location[0]):
+			block = self._read_block(height, since, until)
 
-		return None
+			if block is not None:
+				for _, position in group:
+					yield height, position, block.transactions[position]
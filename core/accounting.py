@@ -0,0 +1,95 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+from typing import Iterable
+
+
+class SupplyAccounting:
+	"""
+	Накопительные итоги по транзакциям в цепи блоков.
+
+	Итоги обновляются при добавлении каждого блока, поэтому экономической
+	модели не нужно каждый раз обходить всю цепь.
+
+	Хранит:
+	 + Сумму переведенных средств
+	 + Сумму комиссий
+	 + Количество транзакций
+
+	Суммы хранятся в базовых единицах (см. core.serialization).
+	"""
+	def __init__(self) -> None:
+		"""
+		Инициализация нулевых итогов
+		"""
+		self.transferred_amount: int = 0
+		self.transaction_fees: int = 0
+		self.transactions_count: int = 0
+
+	def apply_block(self, block: 'Block') -> None:
+		"""
+		Учет транзакций нового блока.
+
+		:param block: Блок, добавленный в цепь
+		"""
+		for tx in block.transactions:
+			self.transferred_amount += tx.amount
+			self.transaction_fees += tx.fee
+
+		self.transactions_count += len(block.transactions)
+
+	def revert_block(self, block: 'Block') -> None:
+		"""
+		Отмена учета транзакций блока, удаленного из цепи (при смене ветки).
+
+		:param block: Блок, удаленный из цепи
+		"""
+		for tx in block.transactions:
+			self.transferred_amount -= tx.amount
+			self.transaction_fees -= tx.fee
+
+		self.transactions_count -= len(block.transactions)
+
+	@classmethod
+	def recompute(cls, chain: Iterable['Block']) -> 'SupplyAccounting':
+		"""
+		Полный пересчет итогов обходом всей цепи.
+
+		:param chain: Цепь блоков
+
+		:return: Итоги, посчитанные с нуля
+		"""
+		accounting = cls()
+
+		for block in chain:
+			accounting.apply_block(block)
+
+		return accounting
+
+	def as_dict(self) -> dict:
+		"""
+		Итоги в виде словаря
+
+		:return: Словарь с итогами
+		"""
+		return {
+			'transferred_amount': self.transferred_amount,
+			'transaction_fees': self.transaction_fees,
+			'transactions_count': self.transactions_count,
+		}
@@ -0,0 +1,166 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+from array import array
+from typing import Callable, Iterable, Iterator, Optional
+from core import serialization
+
+# Размеры ключа и сигнатуры в таблице
+_KEY_SIZE = 64
+_SIGNATURE_SIZE = 64
+
+
+class TransactionTable:
+	"""
+	Колоночная таблица транзакций.
+
+	Вместо отдельного объекта на каждую транзакцию таблица хранит столбцы:
+	суммы, комиссии и метки времени - в массивах array (8 байт на значение),
+	ключи и сигнатуры - в общих bytearray. Это самое компактное
+	представление транзакций блока в памяти; объекты Transaction создаются
+	только при обращении к строке таблицы.
+
+	Суммы и комиссии хранятся в базовых единицах (см. core.serialization).
+	"""
+	def __init__(self, factory: Optional[Callable[[serialization.TransactionFields], 'Transaction']]=None) -> None:
+		"""
+		Инициализация пустой таблицы
+
+		:param factory: Функция создания транзакции из полей (например, Transaction.from_fields)
+		"""
+		self.factory = factory
+		self.senders = bytearray()
+		self.recipients = bytearray()
+		self.amounts = array('q')
+		self.fees = array('q')
+		self.timestamps = array('q')
+		self.signatures = bytearray()
+		self.signed = bytearray()
+
+	def append_fields(self, fields: serialization.TransactionFields) -> None:
+		"""
+		Добавление строки из полей транзакции
+
+		:param fields: Поля (отправитель, получатель, сумма, комиссия, метка времени, сигнатура)
+		"""
+		sender, recipient, amount, fee, timestamp, signature = fields
+		self.senders += sender
+		self.recipients += recipient
+		self.amounts.append(amount)
+		self.fees.append(fee)
+		self.timestamps.append(timestamp)
+		self.signatures += signature if signature is not None else bytes(_SIGNATURE_SIZE)
+		self.signed.append(signature is not None)
+
+	def append(self, transaction: 'Transaction') -> None:
+		"""
+		Добавление транзакции
+
+		:param transaction: Транзакция
+		"""
+		self.append_fields(serialization.decode_transaction(transaction.encode()))
+
+	@classmethod
+	def from_transactions(cls, transactions: Iterable['Transaction'], factory=None) -> 'TransactionTable':
+		"""
+		Построение таблицы из объектов транзакций
+
+		:param transactions: Транзакции
+		:param factory: Функция создания транзакции из полей
+
+		:return: Таблица
+		"""
+		table = cls(factory)
+
+		for transaction in transactions:
+			table.append(transaction)
+
+		return table
+
+	@classmethod
+	def from_block_bytes(cls, data: bytes, factory=None) -> 'TransactionTable':
+		"""
+		Построение таблицы прямо из сериализованного блока, без создания объектов транзакций
+
+		:param data: Байты блока (см. Block.encode)
+		:param factory: Функция создания транзакции из полей
+
+		:return: Таблица
+		"""
+		table = cls(factory)
+
+		for fields in serialization.decode_block(data)[5]:
+			table.append_fields(fields)
+
+		return table
+
+	def fields(self, index: int) -> serialization.TransactionFields:
+		"""
+		Поля транзакции в строке таблицы
+
+		:param index: Номер строки
+
+		:return: Поля транзакции
+		"""
+		if index < 0:
+			index += len(self)
+
+		key = slice(index * _KEY_SIZE, (index + 1) * _KEY_SIZE)
+		signature = bytes(self.signatures[index * _SIGNATURE_SIZE:(index + 1) * _SIGNATURE_SIZE])
+
+		return (bytes(self.senders[key]), bytes(self.recipients[key]), self.amounts[index],
+				self.fees[index], self.timestamps[index], signature if self.signed[index] else None)
+
+	def total_amount(self) -> int:
+		"""
+		Сумма переводов в таблице (в базовых единицах)
+
+		:return: Сумма
+		"""
+		return sum(self.amounts)
+
+	def total_fees(self) -> int:
+		"""
+		Сумма комиссий в таблице (в базовых единицах)
+
+		:return: Сумма
+		"""
+		return sum(self.fees)
+
+	def nbytes(self) -> int:
+		"""
+		Объем данных таблицы в байтах (без учета служебных заголовков объектов)
+
+		:return: Количество байтов
+		"""
+		return (len(self.senders) + len(self.recipients) + len(self.signatures) + len(self.signed)
+				+ (len(self.amounts) + len(self.fees) + len(self.timestamps)) * self.amounts.itemsize)
+
+	def __getitem__(self, index: int) -> 'Transaction':
+		if self.factory is None:
+			raise TypeError('TransactionTable needs a factory to build Transaction objects')
+
+		return self.factory(self.fields(index))
+
+	def __iter__(self) -> Iterator['Transaction']:
+		for index in range(len(self)):
+			yield self[index]
+
+	def __len__(self) -> int:
+		return len(self.amounts)
@@ -18,7 +18,9 @@ License along with this library; if not, write to the Free Software
 Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
 """
 from dataclasses import dataclass
+from datetime import datetime
 from enum import Enum
+from typing import Optional
 
 
 class ConsensusAlgorithm(Enum):
@@ -64,10 +66,33 @@ class BlockChainConfig:
 	 + Общее количество выпущенных монет
 	 + Награда для майнеров
 	 + Сложность добычи блоков
-	 + Алгоритм консенсуса
+	 + Алгоритм консенсуса (см. core.consensus)
 	 + Комиссия за транзакцию
 	 + Рост инфляции
-	 + Максимальное время добычи блока для обновления сложности (в секундах)
+	 + Целевой интервал между блоками для пересчета сложности (в секундах)
+	 + Количество процессов для добычи блоков (1 - добыча в текущем процессе)
+	 + Режим отладки учета: сверка накопительных итогов с полным пересчетом
+	 + Максимальное количество транзакций в мемпуле
+	 + Максимальное количество транзакций в блоке
+	 + Максимальный суммарный размер транзакций в блоке (в байтах)
+	 + Количество процессов для пакетной проверки сигнатур (1 - в текущем процессе)
+	 + Криптографический бэкенд: 'auto' (OpenSSL, если доступен), 'ecdsa' или 'openssl'
+	 + Директория хранилища блоков на диске (None - цепь хранится только в памяти)
+	 + Директория файлов лога (None - без записи лога в файл)
+	 + Количество процессов для проверки цепи (1 - в текущем процессе)
+	 + Интервал снимков состояния в блоках (0 - снимки не сохраняются)
+	 + Директория снимков состояния (None - поддиректория snapshots хранилища блоков)
+	 + Количество хранимых снимков состояния
+	 + Сохранять ли в снимках приватные ключи кошельков (в открытом виде); без
+	 	них восстановленный кошелёк не подписывает транзакции, пока его ключ
+	 	не загружен через Wallet.load_private_key
+	 + Количество последних блоков, применение которых к состоянию счетов можно отменить
+	 + Максимальная глубина ветвления: боковые ветви глубже удаляются, а
+	 	смена активной цепи глубже невозможна (не больше журнала состояния)
+	 + Метка времени genesis-блока (None - время создания цепи); у всех узлов
+	 	одной сети она должна совпадать
+	 + Количество последних блоков, по меткам времени которых пересчитывается
+	 	цель доказательства работы (0 - цель постоянна и задается сложностью)
 	"""
 	coin_name: str
 	max_supply: float
@@ -77,3 +102,21 @@ class BlockChainConfig:
 	transaction_fee: float = 1.0
 	inflation_rate: float = 0.02
 	difficulty_update_time: int = 60
+	mining_workers: int = 1
+	debug_accounting: bool = False
+	mempool_max_size: int = 10000
+	block_max_transactions: int = 1000
+	block_max_bytes: int = 1000000
+	verification_workers: int = 1
+	crypto_backend: str = 'auto'
+	storage_path: Optional[str] = None
+	log_dir: Optional[str] = 'logs'
+	validation_workers: int = 1
+	snapshot_interval: int = 0
+	snapshot_dir: Optional[str] = None
+	snapshot_keep: int = 2
+	snapshot_private_keys: bool = False
+	state_journal_depth: int = 100
+	fork_depth: int = 100
+	genesis_time: Optional[datetime] = None
+	difficulty_window: int = 0
@@ -0,0 +1,486 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+Алгоритмы консенсуса: кто и как добавляет следующий блок.
+
+Движок консенсуса выбирается в BlockChainConfig.consensus_algorithm (см.
+get_engine) и отвечает за три вещи: мета-данные нового блока, его
+запечатывание и проверку блока, полученного от другого узла.
+
+ + ProofOfWork - перебор nonce, пока хеш не станет не больше цели (см.
+ 	core.difficulty)
+ + ProofOfStake - производитель блока выбирается по высоте блока
+ 	случайно, пропорционально заблокированной ставке (см. StakePool), и
+ 	подписывает заголовок блока своим ключом; nonce не перебираются
+
+Ставки записываются в цепь обычными подписанными транзакциями: перевод на
+STAKE_ACCOUNT блокирует сумму в ставке отправителя, перевод на
+UNSTAKE_ACCOUNT снимает ее (см. core.state.AccountState.apply_block).
+Поэтому набор ставок на любой высоте восстанавливается по самой цепи.
+"""
+from hashlib import sha256
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from core.configs import ConsensusAlgorithm
+from core.crypto import get_backend
+from core.difficulty import block_target
+from core import serialization
+
+# Поле мета-данных блока с подписью производителя
+SIGNATURE_FIELD = 'signature'
+
+# Служебные получатели транзакций ставки: ни один ключ кривой не совпадает с ними
+STAKE_ACCOUNT = bytes(63) + b'\x01'
+UNSTAKE_ACCOUNT = bytes(63) + b'\x02'
+
+
+def stake_change(recipient: bytes, amount: int) -> int:
+	"""
+	Изменение ставки отправителя транзакцией
+
+	:param recipient: Получатель транзакции
+	:param amount: Сумма транзакции
+
+	:return: Сумма, на которую растет (больше нуля) или уменьшается (меньше
+		нуля) ставка, либо 0 для обычного перевода
+	"""
+	if recipient == STAKE_ACCOUNT:
+		return amount
+
+	if recipient == UNSTAKE_ACCOUNT:
+		return -amount
+
+	return 0
+
+
+def selection_seed(genesis_hash: bytes, height: int) -> bytes:
+	"""
+	Зерно выбора валидатора блока.
+
+	Зерно зависит только от цепи (genesis-блок) и высоты, поэтому
+	производитель блока не может перебрать его, меняя подпись или метку
+	времени, как хеш предыдущего блока. Платой за это служит
+	предсказуемость: очередь валидаторов известна заранее при неизменных
+	ставках.
+
+	:param genesis_hash: Хеш genesis-блока
+	:param height: Высота блока
+
+	:return: Байты зерна (см. StakePool.select)
+	"""
+	return genesis_hash + height.to_bytes(8, 'big')
+
+
+class FenwickTree:
+	"""
+	Дерево Фенвика (двоичное индексированное дерево) над весами.
+
+	Изменение веса, префиксная сумма и поиск позиции по накопленному весу
+	выполняются за O(log n).
+	"""
+	def __init__(self, weights: Sequence[int]=()) -> None:
+		"""
+		Построение дерева за O(n)
+
+		:param weights: Начальные веса
+		"""
+		self._tree: List[int] = [0] + list(weights)
+
+		for i in range(1, len(self._tree)):
+			parent = i + (i & -i)
+
+			if parent < len(self._tree):
+				self._tree[parent] += self._tree[i]
+
+	def add(self, index: int, delta: int) -> None:
+		"""
+		Изменение веса позиции
+
+		:param index: Позиция (с нуля)
+		:param delta: Изменение веса
+		"""
+		i = index + 1
+
+		while i < len(self._tree):
+			self._tree[i] += delta
+			i += i & -i
+
+	def prefix(self, index: int) -> int:
+		"""
+		Сумма весов позиций до index (не включая)
+
+		:param index: Позиция
+
+		:return: Сумма
+		"""
+		total = 0
+		i = index
+
+		while i > 0:
+			total += self._tree[i]
+			i -= i & -i
+
+		return total
+
+	def find(self, value: int) -> int:
+		"""
+		Позиция, на отрезок которой приходится накопленный вес value:
+		наименьшая позиция i, для которой prefix(i + 1) > value
+
+		:param value: Накопленный вес (0 <= value < total)
+
+		:return: Позиция
+		"""
+		position = 0
+		step = 1 << (len(self._tree) - 1).bit_length()
+
+		while step:
+			following = position + step
+
+			if following < len(self._tree) and self._tree[following] <= value:
+				position = following
+				value -= self._tree[following]
+
+			step >>= 1
+
+		return position
+
+	@property
+	def total(self) -> int:
+		"""
+		Сумма всех весов
+
+		:return: Сумма
+		"""
+		return self.prefix(len(self))
+
+	def __len__(self) -> int:
+		return len(self._tree) - 1
+
+
+class StakePool:
+	"""
+	Ставки валидаторов.
+
+	Ставки хранятся в дереве Фенвика, поэтому изменение ставки и выбор
+	валидатора пропорционально ставке занимают O(log n). Позиции ключей в
+	дереве упорядочены по ключу, а не по порядку ставок: выбор зависит
+	только от самих ставок и одинаков у всех узлов. Дерево перестраивается
+	(за O(n)) только при появлении нового валидатора.
+	"""
+	def __init__(self) -> None:
+		self._stakes: Dict[bytes, int] = {}
+		self._keys: List[bytes] = []
+		self._slots: Dict[bytes, int] = {}
+		self._tree: Optional[FenwickTree] = None
+
+	def _rebuild(self) -> FenwickTree:
+		"""
+		Перестроение дерева по упорядоченным ключам
+
+		:return: Дерево
+		"""
+		self._keys = sorted(self._stakes)
+		self._slots = {key: slot for slot, key in enumerate(self._keys)}
+		self._tree = FenwickTree([self._stakes[key] for key in self._keys])
+
+		return self._tree
+
+	def stake(self, key: bytes, amount: int) -> None:
+		"""
+		Увеличение ставки валидатора
+
+		:param key: Публичный ключ
+		:param amount: Сумма в базовых единицах
+		"""
+		if amount <= 0:
+			raise ValueError('stake amount must be positive')
+
+		if key in self._slots and self._tree is not None:
+			self._tree.add(self._slots[key], amount)
+		else:
+			self._tree = None
+
+		self._stakes[key] = self._stakes.get(key, 0) + amount
+
+	def unstake(self, key: bytes, amount: int) -> None:
+		"""
+		Уменьшение ставки валидатора. Ключ с нулевой ставкой остается в
+		дереве с нулевым весом и никогда не выбирается.
+
+		:param key: Публичный ключ
+		:param amount: Сумма в базовых единицах
+
+		:raises ValueError: Если ставка меньше суммы
+		"""
+		if amount <= 0 or self._stakes.get(key, 0) < amount:
+			raise ValueError('unstake amount exceeds the stake')
+
+		self._stakes[key] -= amount
+
+		if self._tree is not None:
+			self._tree.add(self._slots[key], -amount)
+
+	def apply(self, transfers: Iterable[Tuple[bytes, bytes, int, int]]) -> None:
+		"""
+		Применение транзакций ставки из переводов блока (см. stake_change)
+
+		:param transfers: Переводы блока (отправитель, получатель, сумма, комиссия)
+
+		:raises ValueError: Если транзакция снимает больше ставки
+		"""
+		for sender, recipient, amount, _ in transfers:
+			change = stake_change(recipient, amount)
+
+			if change > 0:
+				self.stake(sender, change)
+			elif change < 0:
+				self.unstake(sender, -change)
+
+	def stake_of(self, key: bytes) -> int:
+		"""
+		Ставка валидатора
+
+		:param key: Публичный ключ
+
+		:return: Сумма в базовых единицах
+		"""
+		return self._stakes.get(key, 0)
+
+	@property
+	def total(self) -> int:
+		"""
+		Сумма всех ставок
+
+		:return: Сумма в базовых единицах
+		"""
+		return sum(self._stakes.values()) if self._tree is None else self._tree.total
+
+	def validators(self) -> Iterator[Tuple[bytes, int]]:
+		"""
+		Валидаторы с ненулевой ставкой, упорядоченные по ключу
+
+		:return: Итератор пар (публичный ключ, ставка)
+		"""
+		for key in sorted(self._stakes):
+			if self._stakes[key] > 0:
+				yield key, self._stakes[key]
+
+	def select(self, seed: bytes) -> Optional[bytes]:
+		"""
+		Выбор валидатора с вероятностью, пропорциональной его ставке
+
+		:param seed: Зерно выбора (см. selection_seed)
+
+		:return: Публичный ключ валидатора, либо None, если ставок нет
+		"""
+		tree = self._tree if self._tree is not None else self._rebuild()
+		total = tree.total
+
+		if total <= 0:
+			return None
+
+		return self._keys[tree.find(int.from_bytes(sha256(seed).digest(), 'big') % total)]
+
+	def __len__(self) -> int:
+		return sum(1 for stake in self._stakes.values() if stake > 0)
+
+
+class ProofOfWork:
+	"""
+	Доказательство работы: цель блока вычисляется по меткам времени
+	предыдущих блоков (см. BlockChain.next_target), а блок запечатывается
+	перебором nonce.
+	"""
+	def __init__(self, blockchain: 'BlockChain') -> None:
+		self.blockchain = blockchain
+
+	def metadata(self, wallet: 'Wallet') -> Optional[dict]:
+		"""
+		Мета-данные консенсуса для нового блока
+
+		:param wallet: Кошелёк производителя блока
+
+		:return: Мета-данные, либо None, если кошелёк не может добавить блок
+		"""
+		return {'action': 'mine', 'target': self.blockchain.next_target()}
+
+	def seal(self, block: 'Block', wallet: Optional['Wallet']=None, miner: Optional['ParallelMiner']=None) -> None:
+		"""
+		Запечатывание подготовленного блока
+
+		:param block: Блок
+		:param wallet: Кошелёк производителя блока
+		:param miner: Многопроцессный движок добычи
+		"""
+		block.mine(block_target(block.metadata), miner)
+
+	def check(self, block: 'Block', previous: Optional[List['Block']]=None) -> Optional[str]:
+		"""
+		Проверка консенсуса для полученного блока
+
+		:param block: Блок
+		:param previous: Блоки его ветви перед ним по возрастанию высоты
+			(None - конец активной цепи)
+
+		:return: Причина отказа, либо None
+		"""
+		if not isinstance(block.metadata, dict) or 'target' not in block.metadata:
+			return 'missing proof of work target'
+
+		if block_target(block.metadata) != self.blockchain.next_target(previous):
+			return 'unexpected proof of work target'
+
+		return None
+
+	def check_producer(self, block: 'Block', stakes: StakePool) -> Optional[str]:
+		"""
+		Проверка производителя блока: при PoW блок может добыть любой кошелёк
+
+		:param block: Блок
+		:param stakes: Ставки на высоте предыдущего блока
+
+		:return: Причина отказа, либо None
+		"""
+		return None
+
+
+class ProofOfStake:
+	"""
+	Доказательство доли: следующий блок добавляет валидатор, выбранный по
+	высоте блока пропорционально ставке (см. StakePool.select и
+	selection_seed). Выбранный валидатор подписывает заголовок блока без
+	подписи, и блок добавляется сразу - без перебора nonce.
+
+	Валидатор выбирается по ставкам на высоте предыдущего блока. Пока ставок
+	в цепи нет, блок может добавить любой кошелёк: так в цепь попадают
+	первые транзакции ставки.
+	"""
+	def __init__(self, blockchain: 'BlockChain') -> None:
+		self.blockchain = blockchain
+
+	@staticmethod
+	def signed_data(block: 'Block') -> bytes:
+		"""
+		Подписываемые данные: заголовок блока без nonce и без подписи в мета-данных
+
+		:param block: Блок
+
+		:return: Байты
+		"""
+		metadata = {name: value for name, value in block.metadata.items() if name != SIGNATURE_FIELD}
+
+		return serialization.encode_header_prefix(block.index, block.previous_hash,
+												serialization.datetime_to_micros(block.timestamp),
+												block.merkle_root, metadata)
+
+	def metadata(self, wallet: 'Wallet') -> Optional[dict]:
+		"""
+		Мета-данные консенсуса для нового блока
+
+		:param wallet: Кошелёк производителя блока
+
+		:return: Мета-данные, либо None, если кошелёк не выбран валидатором
+		"""
+		validator = self.blockchain.next_validator()
+
+		if validator is not None and validator != wallet.public_key_bytes:
+			return None
+
+		return {'action': 'stake'}
+
+	def seal(self, block: 'Block', wallet: Optional['Wallet']=None, miner: Optional['ParallelMiner']=None) -> None:
+		"""
+		Подпись подготовленного блока ключом валидатора
+
+		:param block: Блок
+		:param wallet: Кошелёк валидатора (по умолчанию - по ключу из мета-данных)
+		:param miner: Не используется
+		"""
+		if wallet is None:
+			wallet = self.blockchain.get_wallet(bytes.fromhex(block.metadata['account']))
+
+		block.metadata[SIGNATURE_FIELD] = wallet.sign_data(self.signed_data(block))
+
+	def check(self, block: 'Block', previous: Optional[List['Block']]=None) -> Optional[str]:
+		"""
+		Проверка консенсуса для полученного блока: подпись заголовка верна
+		для производителя из мета-данных. Был ли он выбран валидатором,
+		проверяет check_producer по ставкам на высоте предыдущего блока.
+
+		:param block: Блок
+		:param previous: Не используется
+
+		:return: Причина отказа, либо None
+		"""
+		metadata = block.metadata if isinstance(block.metadata, dict) else {}
+
+		try:
+			producer = bytes.fromhex(metadata['account'])
+		except (KeyError, TypeError, ValueError):
+			return 'missing block producer'
+
+		signature = metadata.get(SIGNATURE_FIELD)
+		crypto = get_backend(self.blockchain.config.crypto_backend)
+
+		if not isinstance(signature, bytes) or not crypto.verify(producer, signature, self.signed_data(block)):
+			return 'invalid block signature'
+
+		return None
+
+	def check_producer(self, block: 'Block', stakes: StakePool) -> Optional[str]:
+		"""
+		Проверка производителя блока: им должен быть валидатор, выбранный по
+		ставкам на высоте предыдущего блока (пока ставок нет - любой кошелёк)
+
+		:param block: Блок
+		:param stakes: Ставки на высоте предыдущего блока
+
+		:return: Причина отказа, либо None
+		"""
+		validator = stakes.select(selection_seed(self.blockchain.chain[0].hash, block.index))
+		metadata = block.metadata if isinstance(block.metadata, dict) else {}
+
+		if validator is not None and metadata.get('account') != validator.hex():
+			return 'unexpected block producer'
+
+		return None
+
+
+_ENGINES = {
+	ConsensusAlgorithm.PROOF_OF_WORK: ProofOfWork,
+	ConsensusAlgorithm.PROOF_OF_STAKE: ProofOfStake,
+}
+
+
+def get_engine(blockchain: 'BlockChain') -> Union[ProofOfWork, ProofOfStake]:
+	"""
+	Движок консенсуса по конфигурации блокчейна
+
+	:param blockchain: Блокчейн
+
+	:return: Движок консенсуса
+
+	:raises ValueError: Если алгоритм консенсуса неизвестен
+	"""
+	algorithm = blockchain.config.consensus_algorithm
+
+	if algorithm not in _ENGINES:
+		raise ValueError(f'unknown consensus algorithm: {algorithm}')
+
+	return _ENGINES[algorithm](blockchain)
@@ -17,8 +17,301 @@ You should have received a copy of the GNU Lesser General Public
 License along with this library; if not, write to the Free Software
 Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
 """
+from functools import lru_cache
+from hashlib import sha256
+from importlib.util import find_spec
+from typing import Dict, List, Tuple
 import os
 
+# Размеры сырых ключей и сигнатуры на кривой NIST256p (secp256r1)
+PRIVATE_KEY_SIZE = 32
+PUBLIC_KEY_SIZE = 64
+SIGNATURE_SIZE = 64
+
+# Порядок группы точек кривой NIST256p
+CURVE_ORDER = 0xFFFFFFFF00000000FFFFFFFFFFFFFFFFBCE6FAADA7179E84F3B9CAC2FC632551
+
 
 def generate_salt(text: str) -> str:
 	return f'{os.urandom(16)}'
+
+
+def normalize_signature(signature: bytes) -> bytes:
+	"""
+	Каноническая форма сигнатуры с s не больше половины порядка кривой.
+
+	Вместе с (r, s) верна и сигнатура (r, n - s): без приведения к одной
+	форме подписанную транзакцию можно переподписать без ключа и получить
+	другую сигнатуру, а значит и другой ключ повтора (см. is_canonical).
+
+	:param signature: Сигнатура (64 байта)
+
+	:return: Сигнатура с малым s
+	"""
+	s = int.from_bytes(signature[32:], 'big')
+
+	if s > CURVE_ORDER // 2:
+		return signature[:32] + (CURVE_ORDER - s).to_bytes(32, 'big')
+
+	return signature
+
+
+def is_canonical(signature: bytes) -> bool:
+	"""
+	Проверка, что сигнатура в канонической форме (см. normalize_signature)
+
+	:param signature: Сигнатура
+
+	:return: True, если длина сигнатуры верна, а s не больше половины порядка кривой
+	"""
+	return len(signature) == SIGNATURE_SIZE and int.from_bytes(signature[32:], 'big') <= CURVE_ORDER // 2
+
+
+class CryptoBackend:
+	"""
+	Интерфейс криптографического бэкенда.
+
+	Все бэкенды работают на кривой NIST256p с хеш-функцией SHA-256 и
+	обмениваются ключами и сигнатурами в одном сыром формате:
+	 + Приватный ключ - 32 байта (скаляр big-endian)
+	 + Публичный ключ - 64 байта (координаты x и y)
+	 + Сигнатура - 64 байта (r и s)
+
+	Поэтому ключи и сигнатуры разных бэкендов взаимозаменяемы. Объект
+	приватного ключа - внутренний объект бэкенда. Сигнатуры создаются и
+	принимаются только в канонической форме (см. normalize_signature).
+	"""
+	name: str = 'base'
+
+	def generate_private_key(self):
+		"""
+		Генерация нового приватного ключа
+
+		:return: Приватный ключ бэкенда
+		"""
+		raise NotImplementedError
+
+	def load_private_key(self, data: bytes):
+		"""
+		Загрузка приватного ключа из сырых байтов
+
+		:param data: Сырые байты приватного ключа
+
+		:return: Приватный ключ бэкенда
+		"""
+		raise NotImplementedError
+
+	def private_key_bytes(self, private_key) -> bytes:
+		"""
+		Сырые байты приватного ключа
+
+		:param private_key: Приватный ключ бэкенда
+
+		:return: 32 байта
+		"""
+		raise NotImplementedError
+
+	def public_key_bytes(self, private_key) -> bytes:
+		"""
+		Сырые байты публичного ключа, соответствующего приватному
+
+		:param private_key: Приватный ключ бэкенда
+
+		:return: 64 байта
+		"""
+		raise NotImplementedError
+
+	def sign(self, private_key, data: bytes) -> bytes:
+		"""
+		Подпись данных
+
+		:param private_key: Приватный ключ бэкенда
+		:param data: Данные
+
+		:return: Сигнатура (64 байта) в канонической форме
+		"""
+		raise NotImplementedError
+
+	def verify(self, public_key: bytes, signature: bytes, data: bytes) -> bool:
+		"""
+		Проверка сигнатуры
+
+		:param public_key: Сырые байты публичного ключа
+		:param signature: Сигнатура
+		:param data: Подписанные данные
+
+		:return: True, если сигнатура верна и в канонической форме
+		"""
+		raise NotImplementedError
+
+	def generate_key_pair(self) -> Tuple[object, bytes]:
+		"""
+		Генерация пары ключей
+
+		:return: Кортеж из приватного ключа бэкенда и сырых байтов публичного ключа
+		"""
+		private_key = self.generate_private_key()
+
+		return private_key, self.public_key_bytes(private_key)
+
+
+@lru_cache(maxsize=4096)
+def _ecdsa_verifying_key(public_key: bytes) -> 'ecdsa.VerifyingKey':
+	"""
+	Объект публичного ключа python-ecdsa (кешируется, разбор точки дорогой)
+
+	:param public_key: Сырые байты публичного ключа
+
+	:return: ecdsa.VerifyingKey
+	"""
+	import ecdsa
+
+	return ecdsa.VerifyingKey.from_string(public_key, curve=ecdsa.NIST256p, hashfunc=sha256)
+
+
+class EcdsaBackend(CryptoBackend):
+	"""
+	Бэкенд на чистом Python (библиотека ecdsa). Используется по умолчанию,
+	если ускоренный бэкенд недоступен.
+
+	Библиотека импортируется при создании бэкенда, а не при импорте модуля.
+	"""
+	name: str = 'ecdsa'
+
+	def __init__(self) -> None:
+		import ecdsa
+
+		self._ecdsa = ecdsa
+		self._errors = (ecdsa.BadSignatureError, ecdsa.MalformedPointError, ValueError)
+
+	def generate_private_key(self) -> 'ecdsa.SigningKey':
+		return self._ecdsa.SigningKey.generate(curve=self._ecdsa.NIST256p, hashfunc=sha256)
+
+	def load_private_key(self, data: bytes) -> 'ecdsa.SigningKey':
+		return self._ecdsa.SigningKey.from_string(data, curve=self._ecdsa.NIST256p, hashfunc=sha256)
+
+	def private_key_bytes(self, private_key: 'ecdsa.SigningKey') -> bytes:
+		return private_key.to_string()
+
+	def public_key_bytes(self, private_key: 'ecdsa.SigningKey') -> bytes:
+		return private_key.get_verifying_key().to_string()
+
+	def sign(self, private_key: 'ecdsa.SigningKey', data: bytes) -> bytes:
+		return normalize_signature(private_key.sign(data, hashfunc=sha256))
+
+	def verify(self, public_key: bytes, signature: bytes, data: bytes) -> bool:
+		if not is_canonical(signature):
+			return False
+
+		try:
+			return _ecdsa_verifying_key(public_key).verify(signature, data, hashfunc=sha256)
+		except self._errors:
+			return False
+
+
+class OpenSSLBackend(CryptoBackend):
+	"""
+	Ускоренный бэкенд на OpenSSL (библиотека cryptography).
+
+	Доступен, только если установлен пакет cryptography. Библиотека
+	импортируется при создании бэкенда, а не при импорте модуля.
+	"""
+	name: str = 'openssl'
+
+	def __init__(self) -> None:
+		try:
+			from cryptography.exceptions import InvalidSignature
+			from cryptography.hazmat.primitives import hashes
+			from cryptography.hazmat.primitives.asymmetric import ec, utils
+		except ImportError as e:
+			raise ImportError('OpenSSL backend requires the "cryptography" package') from e
+
+		self._ec = ec
+		self._utils = utils
+		self._errors = (InvalidSignature, ValueError)
+		self._curve = ec.SECP256R1()
+		self._algorithm = ec.ECDSA(hashes.SHA256())
+
+	def generate_private_key(self) -> 'ec.EllipticCurvePrivateKey':
+		return self._ec.generate_private_key(self._curve)
+
+	def load_private_key(self, data: bytes) -> 'ec.EllipticCurvePrivateKey':
+		return self._ec.derive_private_key(int.from_bytes(data, 'big'), self._curve)
+
+	def private_key_bytes(self, private_key: 'ec.EllipticCurvePrivateKey') -> bytes:
+		return private_key.private_numbers().private_value.to_bytes(PRIVATE_KEY_SIZE, 'big')
+
+	def public_key_bytes(self, private_key: 'ec.EllipticCurvePrivateKey') -> bytes:
+		numbers = private_key.public_key().public_numbers()
+
+		return numbers.x.to_bytes(32, 'big') + numbers.y.to_bytes(32, 'big')
+
+	def sign(self, private_key: 'ec.EllipticCurvePrivateKey', data: bytes) -> bytes:
+		r, s = self._utils.decode_dss_signature(private_key.sign(data, self._algorithm))
+
+		return normalize_signature(r.to_bytes(32, 'big') + s.to_bytes(32, 'big'))
+
+	def verify(self, public_key: bytes, signature: bytes, data: bytes) -> bool:
+		if not is_canonical(signature):
+			return False
+
+		try:
+			key = self._ec.EllipticCurvePublicKey.from_encoded_point(self._curve, b'\x04' + public_key)
+			der = self._utils.encode_dss_signature(int.from_bytes(signature[:32], 'big'), int.from_bytes(signature[32:], 'big'))
+			key.verify(der, data, self._algorithm)
+			return True
+		except self._errors:
+			return False
+
+
+_BACKENDS = {
+	EcdsaBackend.name: EcdsaBackend,
+	OpenSSLBackend.name: OpenSSLBackend,
+}
+_instances: Dict[str, CryptoBackend] = {}
+
+
+@lru_cache(maxsize=None)
+def _has_cryptography() -> bool:
+	"""
+	Проверка наличия пакета cryptography без его импорта
+
+	:return: True, если пакет установлен
+	"""
+	return find_spec('cryptography') is not None
+
+
+def available_backends() -> List[str]:
+	"""
+	Список доступных в текущем окружении бэкендов
+
+	:return: Имена бэкендов
+	"""
+	names = [EcdsaBackend.name]
+
+	if _has_cryptography():
+		names.append(OpenSSLBackend.name)
+
+	return names
+
+
+def get_backend(name: str='auto') -> CryptoBackend:
+	"""
+	Получение криптографического бэкенда по имени.
+
+	Имя 'auto' выбирает OpenSSL, если он доступен, иначе ecdsa.
+
+	:param name: Имя бэкенда ('auto', 'ecdsa' или 'openssl')
+
+	:return: Экземпляр бэкенда (один на все вызовы)
+	"""
+	if name == 'auto':
+		name = OpenSSLBackend.name if _has_cryptography() else EcdsaBackend.name
+
+	if name not in _instances:
+		if name not in _BACKENDS:
+			raise ValueError(f'Unknown crypto backend: {name}')
+
+		_instances[name] = _BACKENDS[name]()
+
+	return _instances[name]
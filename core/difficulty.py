@@ -0,0 +1,175 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+from datetime import timedelta
+from typing import Sequence
+
+# Наибольшая цель: хеш блока (как 256-битное число) должен быть не больше цели
+MAX_TARGET = (1 << 256) - 1
+
+# Во сколько раз может отличаться фактическая длительность окна от ожидаемой
+# при пересчете цели: ограничивает шаг изменения сложности и влияние
+# неверных меток времени
+MAX_ADJUSTMENT = 4
+
+_MICROSECONDS = 1000000
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def difficulty_target(difficulty: int) -> int:
+	"""
+	Цель, равная по работе прежней сложности: хеш, начинающийся с difficulty
+	заданных байтов, встречается в среднем раз в 256 ** difficulty попыток.
+
+	:param difficulty: Сложность в байтах
+
+	:return: Цель
+	"""
+	return (MAX_TARGET + 1 >> 8 * difficulty) - 1
+
+
+def target_work(target: int) -> int:
+	"""
+	Работа блока с этой целью: ожидаемое количество перебранных nonce
+
+	:param target: Цель
+
+	:return: Работа
+	"""
+	return (MAX_TARGET + 1) // (target + 1)
+
+
+def work_target(work: int) -> int:
+	"""
+	Цель, при которой работа блока равна work (обратное к target_work)
+
+	:param work: Ожидаемое количество перебранных nonce
+
+	:return: Цель
+	"""
+	return max((MAX_TARGET + 1) // max(work, 1) - 1, 0)
+
+
+def block_target(metadata) -> int:
+	"""
+	Цель доказательства работы блока по его мета-данным.
+
+	Блоки, добытые до перехода на цели, хранят сложность в байтах; для них
+	возвращается цель с той же работой (см. difficulty_target).
+
+	:param metadata: Мета-данные блока
+
+	:return: Цель
+	"""
+	if not isinstance(metadata, dict):
+		return MAX_TARGET
+
+	if 'target' in metadata:
+		return metadata['target']
+
+	return difficulty_target(metadata.get('difficulty', 0))
+
+
+def target_bytes(target: int) -> bytes:
+	"""
+	Цель в виде 32 байтов: хеш подходит, если он не больше этих байтов
+	(сравнение байтов одной длины совпадает со сравнением чисел)
+
+	:param target: Цель
+
+	:return: 32 байта
+	"""
+	return min(max(target, 0), MAX_TARGET).to_bytes(32, 'big')
+
+
+def check_proof(digest: bytes, metadata) -> bool:
+	"""
+	Проверка доказательства работы блока
+
+	:param digest: Хеш заголовка блока
+	:param metadata: Мета-данные блока
+
+	:return: True, если хеш удовлетворяет цели блока
+	"""
+	if isinstance(metadata, dict) and 'target' not in metadata:
+		# Прежний формат: хеш начинается с difficulty байтов b'0'
+		difficulty = metadata.get('difficulty', 0)
+
+		return digest[:difficulty] == b"0" * difficulty
+
+	return digest <= target_bytes(block_target(metadata))
+
+
+class Retargeter:
+	"""
+	Пересчет цели доказательства работы по меткам времени блоков.
+
+	Цель следующего блока вычисляется по скользящему окну из последних
+	window блоков: суммарная работа окна делится на его фактическую
+	длительность, и новая цель дает такую работу на один блок, чтобы блоки
+	добывались в среднем раз в interval секунд при той же вычислительной
+	мощности сети:
+
+		работа = работа окна * interval / длительность окна
+
+	Окно сдвигается на каждый блок, поэтому цель меняется плавно, а не
+	скачками в 256 раз, как при сложности в целых байтах. Длительность окна
+	ограничивается MAX_ADJUSTMENT: выбросы в метках времени не могут
+	изменить сложность больше чем в MAX_ADJUSTMENT раз за один блок.
+
+	Все вычисления целочисленные (метки времени - в микросекундах), поэтому
+	у всех узлов получается одна и та же цель.
+	"""
+	def __init__(self, interval: float, window: int, initial_target: int) -> None:
+		"""
+		Инициализация
+
+		:param interval: Целевой интервал между блоками в секундах
+		:param window: Количество блоков в окне (0 - цель не меняется)
+		:param initial_target: Цель, пока в цепи меньше двух блоков после genesis
+		"""
+		self.interval: float = interval
+		self.window: int = window
+		self.initial_target: int = initial_target
+
+	def next_target(self, previous: Sequence['Block']) -> int:
+		"""
+		Цель для следующего блока
+
+		:param previous: Последние блоки перед ним по возрастанию высоты
+			(достаточно window + 1 блоков)
+
+		:return: Цель
+		"""
+		if self.window <= 0 or self.interval <= 0:
+			return self.initial_target
+
+		# Метка времени genesis-блока задается конфигурацией, а не добычей
+		blocks = [block for block in previous[-(self.window + 1):] if block.index > 0]
+
+		if len(blocks) < 2:
+			return self.initial_target
+
+		interval = round(self.interval * _MICROSECONDS)
+		expected = (len(blocks) - 1) * interval
+		timespan = (blocks[-1].timestamp - blocks[0].timestamp) // _MICROSECOND
+		timespan = min(max(timespan, expected // MAX_ADJUSTMENT, 1), expected * MAX_ADJUSTMENT)
+		work = sum(target_work(block_target(block.metadata)) for block in blocks[1:])
+
+		return work_target(work * interval // timespan)
@@ -18,22 +18,31 @@ License along with this library; if not, write to the Free Software
 Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
 """
 import math
+from core.serialization import BASE_UNITS, to_base_units
 
 
 class EconomicModel:
+	"""
+	Экономическая модель блокчейна.
+
+	Все суммы (пороги, выпуск и сжигание монет) считаются в базовых
+	единицах; количество создаваемых в manage_tokens монет, как и прежде,
+	округляется вниз до целой монеты.
+	"""
 	def __init__(self, blockchain: 'BlockChain'):
 		self.blockchain = blockchain
 		self.target_inflation_rate = self.blockchain.config.inflation_rate
-		self.target_transaction_fee = self.blockchain.config.transaction_fee
+		self.target_transaction_fee = to_base_units(self.blockchain.config.transaction_fee)
+		self.base_mining_reward = to_base_units(self.blockchain.config.mining_reward)
 
 	def get_min_threshold(self) -> float:
-		min_threshold = self.blockchain.transaction_fee / (1 - self.blockchain.inflation_rate) * self.blockchain.max_supply / self.blockchain.config.mining_reward
+		min_threshold = self.blockchain.transaction_fee / (1 - self.blockchain.inflation_rate) * self.blockchain.max_supply / self.base_mining_reward
 		min_threshold = min(0.15 * self.blockchain.max_supply, min(0.5 * self.blockchain.max_supply, min_threshold))
 
 		return min_threshold
 
 	def get_max_threshold(self) -> float:
-		max_threshold = self.blockchain.transaction_fee / (1 - self.blockchain.inflation_rate) * self.blockchain.max_supply / self.blockchain.config.mining_reward
+		max_threshold = self.blockchain.transaction_fee / (1 - self.blockchain.inflation_rate) * self.blockchain.max_supply / self.base_mining_reward
 		max_threshold = max(0.85 * self.blockchain.max_supply, min(0.95 * self.blockchain.max_supply, max_threshold))
 
 		return max_threshold
@@ -66,7 +75,7 @@ class EconomicModel:
 			else:
 				new_tokens = self.get_max_threshold() - self.blockchain.remaining_supply
 
-		new_tokens = math.floor(new_tokens)
+		new_tokens = math.floor(new_tokens / BASE_UNITS) * BASE_UNITS
 
 		self.blockchain.remaining_supply += new_tokens
 
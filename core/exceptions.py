@@ -15,3 +15,26 @@ class BlockChainException(Exception):
 			return f'BlockChainException: {self.message}'
 		else:
 			return 'BlockChainException'
+
+
+class InsufficientFundsException(BlockChainException):
+	"""
+	Исключение при недостатке средств на счете для применения блока.
+	"""
+	pass
+
+
+class InvalidTransferException(BlockChainException):
+	"""
+	Исключение при переводе с неположительной суммой или отрицательной комиссией.
+	"""
+	pass
+
+
+class RPCException(BlockChainException):
+	"""
+	Ошибка обработки запроса к узлу (см. core.node) с кодом ошибки JSON-RPC.
+	"""
+	def __init__(self, code: int, message: str):
+		super().__init__(message)
+		self.code = code
@@ -0,0 +1,239 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+from decimal import Decimal
+from typing import Iterable, Iterator, Sequence, TextIO
+import csv
+import io
+import json
+from core import serialization
+
+# Столбцы CSV
+BLOCK_FIELDS = ('index', 'hash', 'previous_hash', 'merkle_root', 'timestamp', 'nonce', 'transactions', 'metadata')
+TRANSACTION_FIELDS = ('block', 'position', 'signature', 'sender', 'recipient', 'amount', 'fee', 'timestamp', 'status')
+
+# Форматы выгрузки
+FORMATS = ('ndjson', 'csv')
+
+
+def json_default(value):
+	"""
+	Значения, которых нет в JSON: суммы (Decimal) - строками, байты - в hex
+	"""
+	if isinstance(value, Decimal):
+		return f'{value:f}'
+	if isinstance(value, (bytes, bytearray)):
+		return value.hex()
+
+	raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def transaction_to_dict(transaction: 'Transaction') -> dict:
+	"""
+	Транзакция в виде словаря для JSON (суммы в монетах)
+
+	:param transaction: Транзакция
+
+	:return: Словарь
+	"""
+	return {
+		'sender': transaction.sender_wallet.hex(),
+		'recipient': transaction.recipient_wallet.hex(),
+		'amount': serialization.from_base_units(transaction.amount),
+		'fee': serialization.from_base_units(transaction.fee),
+		'timestamp': transaction.timestamp.isoformat(),
+		'signature': transaction.signature.hex() if transaction.signature is not None else None,
+		'status': transaction.status.name,
+	}
+
+
+def block_summary(block: 'Block') -> dict:
+	"""
+	Заголовок блока в виде словаря для JSON: вместо транзакций - их количество
+
+	:param block: Блок
+
+	:return: Словарь
+	"""
+	return {
+		'index': block.index,
+		'hash': block.hash.hex(),
+		'previous_hash': block.previous_hash.hex(),
+		'merkle_root': block.merkle_root.hex(),
+		'timestamp': block.timestamp.isoformat(),
+		'nonce': block.nonce,
+		'metadata': block.metadata,
+		'transactions': len(block.transactions),
+	}
+
+
+def block_to_dict(block: 'Block') -> dict:
+	"""
+	Блок в виде словаря для JSON
+
+	:param block: Блок
+
+	:return: Словарь
+	"""
+	return dict(block_summary(block), transactions=[transaction_to_dict(transaction) for transaction in block.transactions])
+
+
+def transaction_records(transactions: Iterable) -> Iterator[dict]:
+	"""
+	Записи транзакций для выгрузки: поля транзакции, высота блока и номер в блоке
+
+	:param transactions: Кортежи (высота блока, номер в блоке, транзакция),
+		например, из BlockChain.iter_transactions
+
+	:return: Генератор словарей
+	"""
+	for height, position, transaction in transactions:
+		yield dict(transaction_to_dict(transaction), block=height, position=position)
+
+
+def write_ndjson(records: Iterable[dict], file: TextIO, chunk_size: int=1000) -> int:
+	"""
+	Потоковая запись в формате JSON Lines (одна запись - одна строка).
+
+	Строки копятся в буфере и пишутся в файл пачками по chunk_size записей,
+	поэтому в памяти одновременно находится не больше одной пачки.
+
+	:param records: Записи
+	:param file: Текстовый файл для записи
+	:param chunk_size: Количество записей в пачке
+
+	:return: Количество записанных записей
+	"""
+	encoder = json.JSONEncoder(default=json_default, ensure_ascii=False, separators=(',', ':'))
+	lines = []
+	count = 0
+
+	for record in records:
+		lines.append(encoder.encode(record))
+		count += 1
+
+		if len(lines) >= chunk_size:
+			file.write('\n'.join(lines) + '\n')
+			lines.clear()
+
+	if lines:
+		file.write('\n'.join(lines) + '\n')
+
+	return count
+
+
+def write_csv(records: Iterable[dict], file: TextIO, fields: Sequence[str], chunk_size: int=1000) -> int:
+	"""
+	Потоковая запись в формате CSV с заголовком.
+
+	Вложенные значения (мета-данные, списки) записываются в ячейку как JSON.
+	Как и в write_ndjson, строки пишутся в файл пачками по chunk_size записей.
+
+	:param records: Записи
+	:param file: Текстовый файл для записи (открытый с newline='')
+	:param fields: Столбцы
+	:param chunk_size: Количество записей в пачке
+
+	:return: Количество записанных записей
+	"""
+	buffer = io.StringIO()
+	writer = csv.writer(buffer)
+	writer.writerow(fields)
+	count = 0
+
+	for record in records:
+		writer.writerow([_cell(record.get(field)) for field in fields])
+		count += 1
+
+		if count % chunk_size == 0:
+			file.write(buffer.getvalue())
+			buffer.seek(0)
+			buffer.truncate()
+
+	file.write(buffer.getvalue())
+
+	return count
+
+
+def _cell(value) -> object:
+	"""
+	Значение ячейки CSV
+
+	:param value: Значение поля записи
+
+	:return: Значение для csv.writer
+	"""
+	if isinstance(value, (dict, list)):
+		return json.dumps(value, default=json_default, ensure_ascii=False, separators=(',', ':'))
+	if isinstance(value, Decimal):
+		return f'{value:f}'
+
+	return value
+
+
+def _write(records: Iterable[dict], file: TextIO, format: str, fields: Sequence[str], chunk_size: int) -> int:
+	if format == 'ndjson':
+		return write_ndjson(records, file, chunk_size)
+	if format == 'csv':
+		return write_csv(records, file, fields, chunk_size)
+
+	raise ValueError(f'unknown export format: {format}, expected one of {", ".join(FORMATS)}')
+
+
+def export_blocks(blockchain: 'BlockChain', file: TextIO, format: str='ndjson', chunk_size: int=1000,
+				transactions: bool=True, **filters) -> int:
+	"""
+	Выгрузка блоков цепи.
+
+	Блоки читаются по одному (см. BlockChain.iter_blocks), поэтому расход
+	памяти не зависит от длины цепи. В CSV блок занимает одну строку, а
+	вместо транзакций записывается их количество.
+
+	:param blockchain: Блокчейн
+	:param file: Текстовый файл для записи
+	:param format: Формат: 'ndjson' или 'csv'
+	:param chunk_size: Количество записей в пачке записи
+	:param transactions: Включать ли транзакции в записи NDJSON (False - только их количество)
+	:param filters: Диапазон блоков: start, stop, since, until (см. BlockChain.iter_blocks)
+
+	:return: Количество выгруженных блоков
+	"""
+	blocks = blockchain.iter_blocks(**filters)
+	convert = block_to_dict if transactions and format == 'ndjson' else block_summary
+
+	return _write((convert(block) for block in blocks), file, format, BLOCK_FIELDS, chunk_size)
+
+
+def export_transactions(blockchain: 'BlockChain', file: TextIO, format: str='ndjson', chunk_size: int=1000,
+						**filters) -> int:
+	"""
+	Выгрузка подтвержденных транзакций цепи с высотой блока и номером в блоке.
+
+	Транзакции читаются по одному блоку (см. BlockChain.iter_transactions).
+
+	:param blockchain: Блокчейн
+	:param file: Текстовый файл для записи
+	:param format: Формат: 'ndjson' или 'csv'
+	:param chunk_size: Количество записей в пачке записи
+	:param filters: Диапазон и отбор: start, stop, since, until, address (см. BlockChain.iter_transactions)
+
+	:return: Количество выгруженных транзакций
+	"""
+	return _write(transaction_records(blockchain.iter_transactions(**filters)), file, format,
+				TRANSACTION_FIELDS, chunk_size)
@@ -0,0 +1,253 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+Дерево блоков: выбор лучшей цепи по суммарной работе.
+
+Кроме активной цепи узел хранит боковые ветви - блоки, которые
+продолжают не последний блок цепи. Если суммарная работа ветви от
+точки ветвления превышает работу активной цепи на том же участке,
+BlockChain переключается на ветвь: блоки активной цепи отменяются в
+состоянии счетов по журналу, а блоки ветви применяются (см.
+BlockChain.accept_block). Ветви, отставшие от вершины цепи больше чем на
+depth блоков, удаляются.
+"""
+from collections import deque
+from enum import Enum
+from typing import Deque, Dict, List, Optional, Tuple
+from core.difficulty import block_target, target_work
+
+
+class BlockStatus(Enum):
+	"""
+	Результат приема блока от другого узла.
+
+	 + EXTENDED - блок продолжил активную цепь
+	 + REORGANIZED - блок сделал свою ветвь лучшей, активная цепь сменилась
+	 + SIDE - блок сохранен в боковой ветви
+	 + ORPHAN - предыдущий блок неизвестен (или ветвление глубже depth)
+	 + DUPLICATE - блок уже известен
+	 + INVALID - блок не прошел проверку
+	"""
+	EXTENDED = 'extended'
+	REORGANIZED = 'reorganized'
+	SIDE = 'side'
+	ORPHAN = 'orphan'
+	DUPLICATE = 'duplicate'
+	INVALID = 'invalid'
+
+
+def block_work(block: 'Block') -> int:
+	"""
+	Работа, затраченная на блок: ожидаемое количество перебранных nonce
+	для цели блока (см. core.difficulty).
+
+	:param block: Блок
+
+	:return: Работа
+	"""
+	return target_work(block_target(block.metadata))
+
+
+class BlockTree:
+	"""
+	Боковые ветви и последние блоки активной цепи.
+
+	Для блоков активной цепи хранятся только хеш и работа последних depth+1
+	блоков: глубже точка ветвления не ищется, поэтому сравнение ветвей не
+	требует ни суммарной работы всей цепи, ни чтения старых блоков.
+	Блоки боковых ветвей хранятся целиком по хешу.
+	"""
+	def __init__(self, depth: int=100) -> None:
+		"""
+		Инициализация пустого дерева
+
+		:param depth: Максимальная глубина ветвления (и смены активной цепи) в блоках
+		"""
+		self.depth: int = depth
+		self._main: Deque[Tuple[bytes, int]] = deque()
+		self._heights: Dict[bytes, int] = {}
+		self._side: Dict[bytes, 'Block'] = {}
+
+	@classmethod
+	def from_chain(cls, chain, depth: int=100) -> 'BlockTree':
+		"""
+		Построение дерева по последним блокам цепи
+
+		:param chain: Цепь блоков (список или BlockStore)
+		:param depth: Максимальная глубина ветвления
+
+		:return: Дерево без боковых ветвей
+		"""
+		tree = cls(depth)
+
+		for height in range(max(len(chain) - depth - 1, 0), len(chain)):
+			tree.connect(chain[height])
+
+		return tree
+
+	@property
+	def tip_height(self) -> int:
+		"""
+		Высота последнего блока активной цепи
+		"""
+		return self._heights[self._main[-1][0]]
+
+	def main_height(self, block_hash: bytes) -> Optional[int]:
+		"""
+		Высота блока активной цепи (только среди последних depth+1 блоков)
+
+		:param block_hash: Хеш блока
+
+		:return: Высота, либо None
+		"""
+		return self._heights.get(block_hash)
+
+	def __contains__(self, block_hash: bytes) -> bool:
+		return block_hash in self._heights or block_hash in self._side
+
+	def get(self, block_hash: bytes) -> Optional['Block']:
+		"""
+		Блок боковой ветви по хешу
+
+		:param block_hash: Хеш блока
+
+		:return: Блок, либо None
+		"""
+		return self._side.get(block_hash)
+
+	def side_blocks(self) -> List['Block']:
+		"""
+		Блоки боковых ветвей
+
+		:return: Список блоков
+		"""
+		return list(self._side.values())
+
+	def connect(self, block: 'Block') -> None:
+		"""
+		Учет блока, добавленного в конец активной цепи; ветви, отставшие
+		больше чем на depth блоков, удаляются
+
+		:param block: Блок
+		"""
+		block_hash = block.hash
+		self._side.pop(block_hash, None)
+		self._main.append((block_hash, block_work(block)))
+		self._heights[block_hash] = block.index
+
+		while len(self._main) > self.depth + 1:
+			self._heights.pop(self._main.popleft()[0], None)
+
+		self.prune()
+
+	def disconnect(self, block: 'Block') -> None:
+		"""
+		Учет отмены последнего блока активной цепи: блок переходит в боковую ветвь
+
+		:param block: Отмененный блок
+		"""
+		block_hash, _ = self._main.pop()
+		self._heights.pop(block_hash, None)
+		self._side[block_hash] = block
+
+	def add(self, block: 'Block') -> None:
+		"""
+		Сохранение блока в боковой ветви
+
+		:param block: Блок
+		"""
+		self._side[block.hash] = block
+
+	def remove(self, block_hash: bytes) -> int:
+		"""
+		Удаление блока боковой ветви вместе с его потомками (например, невалидного)
+
+		:param block_hash: Хеш блока
+
+		:return: Количество удаленных блоков
+		"""
+		removed, parents = 0, {block_hash}
+
+		if self._side.pop(block_hash, None) is not None:
+			removed += 1
+
+		while True:
+			children = [key for key, block in self._side.items() if block.previous_hash in parents]
+
+			if not children:
+				return removed
+
+			for key in children:
+				del self._side[key]
+
+			removed += len(children)
+			parents = set(children)
+
+	def prune(self) -> int:
+		"""
+		Удаление боковых блоков, которые глубже depth от вершины активной цепи
+
+		:return: Количество удаленных блоков
+		"""
+		if not self._main:
+			return 0
+
+		limit = self.tip_height - self.depth
+		stale = [key for key, block in self._side.items() if block.index <= limit]
+
+		for key in stale:
+			del self._side[key]
+
+		return len(stale)
+
+	def branch(self, block: 'Block') -> Optional[Tuple[int, List['Block']]]:
+		"""
+		Ветвь, которую завершает блок: блоки от точки ветвления с активной цепью
+
+		:param block: Последний блок ветви (может еще не храниться в дереве)
+
+		:return: Кортеж (высота точки ветвления, блоки ветви по возрастанию
+			высоты), либо None, если ветвь не доходит до последних depth+1
+			блоков активной цепи
+		"""
+		blocks = [block]
+
+		while blocks[-1].previous_hash not in self._heights:
+			parent = self._side.get(blocks[-1].previous_hash)
+
+			if parent is None or len(blocks) > self.depth:
+				return None
+
+			blocks.append(parent)
+
+		blocks.reverse()
+
+		return self._heights[blocks[0].previous_hash], blocks
+
+	def main_work(self, fork_height: int) -> int:
+		"""
+		Работа блоков активной цепи выше точки ветвления
+
+		:param fork_height: Высота точки ветвления
+
+		:return: Суммарная работа
+		"""
+		count = self.tip_height - fork_height
+
+		return sum(work for _, work in list(self._main)[len(self._main) - count:]) if count > 0 else 0
@@ -0,0 +1,378 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+from array import array
+from hashlib import sha256
+from typing import Dict, Iterable, List, Optional, Tuple
+import os
+import struct
+import sys
+import zlib
+from core import serialization
+
+INDEX_FORMAT_VERSION = 1
+
+# Заголовок файла индексов: сигнатура формата, версия, высота и хеш последнего
+# проиндексированного блока, контрольная сумма CRC32 данных
+INDEX_HEADER = struct.Struct('>4sBQ32sI')
+_MAGIC = b'CPNX'
+_ENTRY = struct.Struct('<Q')
+_KEY = struct.Struct('<64sI')
+
+# Место транзакции в цепи упаковывается в одно число: высота блока в старших
+# битах, номер транзакции в блоке - в младших
+_POSITION_BITS = 32
+_POSITION_MASK = (1 << _POSITION_BITS) - 1
+
+# Транзакция для индексов: сигнатура (или None), отправитель, получатель
+IndexedTransaction = Tuple[Optional[bytes], bytes, bytes]
+
+
+def _pack(height: int, position: int) -> int:
+	return (height << _POSITION_BITS) | position
+
+
+def _unpack(location: int) -> Tuple[int, int]:
+	return location >> _POSITION_BITS, location & _POSITION_MASK
+
+
+class ChainIndex:
+	"""
+	Вторичные индексы активной цепи блоков:
+	 + хеш блока -> высота
+	 + сигнатура транзакции -> (высота блока, номер транзакции в блоке)
+	 + адрес (публичный ключ) -> места всех транзакций, где он отправитель
+	 	или получатель, по возрастанию высоты
+
+	Индексы обновляются по одному блоку: add_block при добавлении блока в
+	конец цепи и remove_block при его отмене (смена ветки). Места
+	транзакций хранятся упакованными числами в массивах array, поэтому
+	индекс адресов не создает объектов на каждую транзакцию.
+
+	Индексы можно сохранить в файл рядом с хранилищем блоков (save) и
+	открыть вместе с цепью (open): сохраненные индексы сверяются с цепью по
+	хешу последнего проиндексированного блока и дополняются блоками,
+	добавленными после сохранения. Если файл поврежден или цепь сменила
+	ветку ниже сохраненной высоты, индексы строятся заново.
+	"""
+	def __init__(self, path: Optional[str]=None) -> None:
+		"""
+		Инициализация пустых индексов
+
+		:param path: Файл для сохранения индексов (None - только в памяти)
+		"""
+		self.path: Optional[str] = path
+		self._hashes: List[bytes] = []
+		self._heights: Dict[bytes, int] = {}
+		self._transactions: Dict[bytes, int] = {}
+		self._addresses: Dict[bytes, array] = {}
+
+	@classmethod
+	def open(cls, chain, path: Optional[str]=None) -> 'ChainIndex':
+		"""
+		Открытие индексов цепи: загрузка сохраненных индексов (если они
+		совпадают с цепью) и индексация недостающих блоков.
+
+		Блоки из хранилища индексируются по сериализованным данным, без
+		создания объектов блоков и транзакций.
+
+		:param chain: Цепь блоков (список или BlockStore)
+		:param path: Файл индексов
+
+		:return: Индексы
+		"""
+		index = cls.load(path) if path is not None else None
+
+		if index is None or len(index) > len(chain) or (len(index) and index.tip_hash != cls._block_hash(chain, len(index) - 1)):
+			index = cls(path)
+
+		for height in range(len(index), len(chain)):
+			if hasattr(chain, 'read_raw'):
+				index.add_raw(chain.read_raw(height))
+			else:
+				index.add_block(chain[height])
+
+		return index
+
+	@staticmethod
+	def _block_hash(chain, height: int) -> bytes:
+		"""
+		Хеш блока цепи (из хранилища - без десериализации)
+
+		:param chain: Цепь блоков (список или BlockStore)
+		:param height: Высота блока
+
+		:return: Хеш блока
+		"""
+		if hasattr(chain, 'read_raw'):
+			return sha256(serialization.block_header(chain.read_raw(height))).digest()
+
+		return chain[height].hash
+
+	@property
+	def tip_hash(self) -> Optional[bytes]:
+		"""
+		Хеш последнего проиндексированного блока
+
+		:return: Хеш, либо None для пустых индексов
+		"""
+		return self._hashes[-1] if self._hashes else None
+
+	def __len__(self) -> int:
+		return len(self._hashes)
+
+	def _add(self, block_hash: bytes, transactions: Iterable[IndexedTransaction]) -> None:
+		"""
+		Индексация блока, добавленного в конец цепи
+
+		:param block_hash: Хеш блока
+		:param transactions: Транзакции блока (сигнатура, отправитель, получатель)
+		"""
+		height = len(self._hashes)
+		self._hashes.append(block_hash)
+		self._heights[block_hash] = height
+
+		for position, (signature, sender, recipient) in enumerate(transactions):
+			location = _pack(height, position)
+
+			if signature is not None:
+				self._transactions[signature] = location
+
+			for address in {sender, recipient}:
+				locations = self._addresses.get(address)
+
+				if locations is None:
+					locations = self._addresses[address] = array('Q')
+
+				locations.append(location)
+
+	def add_block(self, block: 'Block') -> None:
+		"""
+		Индексация блока, добавленного в конец цепи
+
+		:param block: Блок
+		"""
+		if block.index != len(self._hashes):
+			raise ValueError(f'block {block.index} does not follow the indexed chain of {len(self._hashes)} blocks')
+
+		self._add(block.hash, ((tx.signature, tx.sender_wallet, tx.recipient_wallet) for tx in block.transactions))
+
+	def add_raw(self, data: bytes) -> None:
+		"""
+		Индексация сериализованного блока, добавленного в конец цепи
+
+		:param data: Байты блока (см. Block.encode)
+		"""
+		index, *_ = serialization.decode_header(data)
+
+		if index != len(self._hashes):
+			raise ValueError(f'block {index} does not follow the indexed chain of {len(self._hashes)} blocks')
+
+		transactions = [serialization.decode_transaction(raw) for raw in serialization.block_transactions(data)]
+		self._add(sha256(serialization.block_header(data)).digest(),
+				((fields[5], fields[0], fields[1]) for fields in transactions))
+
+	def remove_block(self, block: 'Block') -> None:
+		"""
+		Удаление из индексов последнего блока цепи (при смене ветки)
+
+		:param block: Блок
+		"""
+		if self.tip_hash != block.hash:
+			raise ValueError(f'block {block.index} is not the last indexed block')
+
+		height = len(self._hashes) - 1
+		del self._heights[self._hashes.pop()]
+
+		for transaction in block.transactions:
+			if transaction.signature is not None:
+				self._transactions.pop(transaction.signature, None)
+
+			for address in {transaction.sender_wallet, transaction.recipient_wallet}:
+				locations = self._addresses.get(address)
+
+				while locations and _unpack(locations[-1])[0] == height:
+					locations.pop()
+
+				if locations is not None and not locations:
+					del self._addresses[address]
+
+	def block_height(self, block_hash: bytes) -> Optional[int]:
+		"""
+		Высота блока активной цепи по хешу
+
+		:param block_hash: Хеш блока
+
+		:return: Высота, либо None
+		"""
+		return self._heights.get(block_hash)
+
+	def transaction_location(self, signature: bytes) -> Optional[Tuple[int, int]]:
+		"""
+		Место транзакции в цепи по сигнатуре
+
+		:param signature: Сигнатура транзакции
+
+		:return: Кортеж (высота блока, номер транзакции в блоке), либо None
+		"""
+		location = self._transactions.get(signature)
+
+		return _unpack(location) if location is not None else None
+
+	def address_locations(self, address: bytes) -> List[Tuple[int, int]]:
+		"""
+		Места транзакций адреса (отправленных и полученных) по возрастанию высоты
+
+		:param address: Публичный ключ
+
+		:return: Список кортежей (высота блока, номер транзакции в блоке)
+		"""
+		return [_unpack(location) for location in self._addresses.get(address, ())]
+
+	def address_count(self, address: bytes) -> int:
+		"""
+		Количество транзакций адреса в цепи
+
+		:param address: Публичный ключ
+
+		:return: Количество
+		"""
+		return len(self._addresses.get(address, ()))
+
+	def stats(self) -> dict:
+		"""
+		Размеры индексов
+
+		:return: Словарь с количеством блоков, транзакций и адресов
+		"""
+		return {
+			'blocks': len(self._hashes),
+			'transactions': len(self._transactions),
+			'addresses': len(self._addresses),
+		}
+
+	def encode(self) -> bytes:
+		"""
+		Сериализация индексов: хеши блоков по высоте, места транзакций по
+		сигнатурам и места транзакций адресов
+
+		:return: Байты
+		"""
+		out = bytearray(b''.join(self._hashes))
+		out += serialization.COUNT.pack(len(self._transactions))
+
+		for signature, location in self._transactions.items():
+			out += signature
+			out += _ENTRY.pack(location)
+
+		out += serialization.COUNT.pack(len(self._addresses))
+
+		for address, locations in self._addresses.items():
+			out += _KEY.pack(address, len(locations))
+
+			if sys.byteorder == 'big':
+				locations = array('Q', locations)
+				locations.byteswap()
+
+			out += locations.tobytes()
+
+		return bytes(out)
+
+	def save(self, path: Optional[str]=None) -> None:
+		"""
+		Сохранение индексов в файл. Файл сначала пишется во временный и
+		затем атомарно переименовывается.
+
+		:param path: Файл индексов (по умолчанию - файл, с которым открыты индексы)
+		"""
+		path = path or self.path
+
+		if path is None:
+			raise ValueError('index file path is not set')
+
+		body = self.encode()
+		temporary = path + '.tmp'
+
+		with open(temporary, 'wb') as file:
+			file.write(INDEX_HEADER.pack(_MAGIC, INDEX_FORMAT_VERSION, len(self._hashes),
+										self.tip_hash or bytes(32), zlib.crc32(body)))
+			file.write(body)
+			file.flush()
+			os.fsync(file.fileno())
+
+		os.replace(temporary, path)
+
+	@classmethod
+	def load(cls, path: str) -> Optional['ChainIndex']:
+		"""
+		Загрузка индексов из файла с проверкой контрольной суммы
+
+		:param path: Файл индексов
+
+		:return: Индексы, либо None, если файл отсутствует или поврежден
+		"""
+		try:
+			with open(path, 'rb') as file:
+				data = file.read()
+
+			magic, version, count, tip_hash, checksum = INDEX_HEADER.unpack_from(data)
+		except (OSError, struct.error):
+			return None
+
+		body = memoryview(data)[INDEX_HEADER.size:]
+
+		if magic != _MAGIC or version != INDEX_FORMAT_VERSION or zlib.crc32(body) != checksum:
+			return None
+
+		index = cls(path)
+
+		try:
+			offset = count * 32
+			index._hashes = [bytes(body[i:i + 32]) for i in range(0, offset, 32)]
+			(transactions,) = serialization.COUNT.unpack_from(body, offset)
+			offset += serialization.COUNT.size
+
+			for _ in range(transactions):
+				(location,) = _ENTRY.unpack_from(body, offset + 64)
+				index._transactions[bytes(body[offset:offset + 64])] = location
+				offset += 64 + _ENTRY.size
+
+			(addresses,) = serialization.COUNT.unpack_from(body, offset)
+			offset += serialization.COUNT.size
+
+			for _ in range(addresses):
+				address, size = _KEY.unpack_from(body, offset)
+				offset += _KEY.size
+				locations = array('Q')
+				locations.frombytes(body[offset:offset + size * _ENTRY.size])
+
+				if sys.byteorder == 'big':
+					locations.byteswap()
+
+				index._addresses[address] = locations
+				offset += size * _ENTRY.size
+		except (struct.error, ValueError):
+			return None
+
+		if len(index._hashes) != count or (count and index.tip_hash != tip_hash):
+			return None
+
+		index._heights = {block_hash: height for height, block_hash in enumerate(index._hashes)}
+
+		return index
@@ -0,0 +1,227 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+from logging.handlers import QueueHandler, QueueListener
+from typing import Iterable, Optional
+from time import time
+import atexit
+import json
+import logging
+import os
+import queue
+from core.serialization import format_amount
+
+# Имя логгера блокчейна
+LOGGER_NAME = 'blockchain'
+
+# Атрибуты, которые есть у любой записи лога; все остальные попали в запись через extra
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_logger: Optional[logging.Logger] = None
+
+
+class LazyHex:
+	"""
+	Отложенное представление байтов в hex.
+
+	Передается в логгер как аргумент: hex-строка строится только тогда,
+	когда запись действительно выводится.
+	"""
+	__slots__ = ('data',)
+
+	def __init__(self, data: bytes) -> None:
+		self.data = data
+
+	def __str__(self) -> str:
+		return self.data.hex()
+
+	__repr__ = __str__
+
+
+class LazyAmount:
+	"""
+	Отложенное представление суммы в базовых единицах в монетах.
+
+	Как и LazyHex, перевод в монеты выполняется только тогда, когда
+	запись действительно выводится.
+	"""
+	__slots__ = ('units',)
+
+	def __init__(self, units: int) -> None:
+		self.units = units
+
+	def __str__(self) -> str:
+		return format_amount(self.units)
+
+	__repr__ = __str__
+
+
+class StructuredFormatter(logging.Formatter):
+	"""
+	Форматирование записей лога в JSON (одна запись - одна строка).
+
+	Помимо времени, уровня, имени логгера и сообщения в запись попадают
+	поля, переданные через extra (например, extra={'block': 5}).
+	"""
+	def format(self, record: logging.LogRecord) -> str:
+		entry = {
+			'time': record.created,
+			'level': record.levelname,
+			'logger': record.name,
+			'message': record.getMessage(),
+		}
+
+		for key, value in record.__dict__.items():
+			if key not in _RECORD_ATTRIBUTES:
+				entry[key] = value
+
+		if record.exc_info:
+			entry['exception'] = self.formatException(record.exc_info)
+
+		return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _LazyFileHandler(logging.FileHandler):
+	"""
+	Файловый обработчик, который создает директорию и файл лога только при
+	первой записи: процессы, которые ничего не записали в лог, не оставляют
+	после себя пустых файлов.
+	"""
+	def __init__(self, filename: str) -> None:
+		super().__init__(filename, delay=True)
+
+	def _open(self):
+		os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+
+		return super()._open()
+
+
+# Аргументы, которые можно форматировать позже в потоке QueueListener: они не меняются после вызова логгера
+_DEFERRED_ARGUMENTS = (LazyHex, LazyAmount, str, bytes, int, float, type(None))
+
+
+class _PreparedQueueHandler(QueueHandler):
+	"""
+	Обработчик, передающий записи в очередь.
+
+	В отличие от QueueHandler не форматирует сообщение целиком в вызывающем
+	потоке: если все аргументы неизменяемы (LazyHex, LazyAmount, строки и
+	числа), запись уходит в очередь как есть, и строки строит поток
+	QueueListener. Сообщение с другими аргументами (например, транзакцией,
+	статус которой меняется) форматируется сразу, чтобы в лог попало
+	состояние на момент вызова.
+	"""
+	def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+		if record.args and not (isinstance(record.args, tuple)
+								and all(isinstance(arg, _DEFERRED_ARGUMENTS) for arg in record.args)):
+			record.msg = record.getMessage()
+			record.args = None
+
+		return record
+
+
+def configure_logging(level: int=logging.DEBUG, directory: Optional[str]='logs', structured: bool=False,
+					handlers: Optional[Iterable[logging.Handler]]=None,
+					name: str=LOGGER_NAME) -> logging.Logger:
+	"""
+	Настройка асинхронного логирования.
+
+	Вызывающий поток только кладет записи в очередь; запись в файл
+	(и любые другие обработчики) выполняется фоновым потоком QueueListener.
+	Повторный вызов заменяет предыдущую настройку.
+
+	:param level: Уровень логирования
+	:param directory: Директория для файла лога (None - без файла)
+	:param structured: Записывать ли записи в формате JSON
+	:param handlers: Дополнительные обработчики записей
+	:param name: Имя настраиваемого логгера
+
+	:return: Настроенный логгер
+	"""
+	global _listener, _queue_handler, _logger
+
+	shutdown_logging()
+
+	formatter = StructuredFormatter() if structured else logging.Formatter("[%(asctime)s %(levelname)s] %(message)s")
+	sinks = list(handlers or [])
+
+	if directory is not None:
+		sinks.append(_LazyFileHandler(os.path.join(directory, f'blockchain-{time()}.log')))
+
+	for sink in sinks:
+		if sink.formatter is None:
+			sink.setFormatter(formatter)
+
+	records: queue.SimpleQueue = queue.SimpleQueue()
+	_queue_handler = _PreparedQueueHandler(records)
+	_listener = QueueListener(records, *sinks, respect_handler_level=True)
+	_listener.start()
+
+	_logger = logging.getLogger(name)
+	_logger.setLevel(level)
+	_logger.addHandler(_queue_handler)
+
+	return _logger
+
+
+def ensure_logging(directory: Optional[str]='logs') -> None:
+	"""
+	Настройка логирования по умолчанию при первом использовании блокчейна.
+
+	Ничего не делает, если логирование уже настроено через
+	configure_logging() или если к логгеру блокчейна приложение само
+	добавило обработчики.
+
+	:param directory: Директория для файла лога (None - без файла)
+	"""
+	if _listener is not None:
+		return
+
+	logger = logging.getLogger(LOGGER_NAME)
+
+	if any(not isinstance(handler, logging.NullHandler) for handler in logger.handlers):
+		return
+
+	configure_logging(directory=directory)
+
+
+def shutdown_logging() -> None:
+	"""
+	Остановка фонового потока логирования: оставшиеся в очереди записи
+	дописываются, обработчики закрываются.
+	"""
+	global _listener, _queue_handler, _logger
+
+	if _queue_handler is not None:
+		_logger.removeHandler(_queue_handler)
+		_queue_handler = None
+		_logger = None
+
+	if _listener is not None:
+		_listener.stop()
+
+		for handler in _listener.handlers:
+			handler.close()
+
+		_listener = None
+
+
+atexit.register(shutdown_logging)
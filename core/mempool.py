@@ -0,0 +1,208 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+from itertools import count
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+import heapq
+
+
+class _Entry:
+	"""
+	Запись мемпула: транзакция, порядковый номер и размер в байтах.
+	"""
+	__slots__ = ('transaction', 'seq', 'size')
+
+	def __init__(self, transaction: 'Transaction', seq: int, size: int) -> None:
+		self.transaction = transaction
+		self.seq = seq
+		self.size = size
+
+
+class Mempool:
+	"""
+	Пул неподтвержденных транзакций (мемпул).
+
+	Транзакции хранятся в очереди с приоритетом по комиссии: при формировании
+	блока первыми берутся транзакции с наибольшей комиссией, при равной
+	комиссии - более ранние. Повторы отбрасываются по сигнатуре.
+
+	Размер пула ограничен. При переполнении вытесняется транзакция с
+	наименьшей комиссией (если новая транзакция платит больше), а владельцу
+	пула сообщается о вытеснении через обработчик on_evict.
+	"""
+	def __init__(self, max_size: int=10000,
+				on_evict: Optional[Callable[['Transaction'], None]]=None) -> None:
+		"""
+		Инициализация мемпула
+
+		:param max_size: Максимальное количество транзакций в пуле
+		:param on_evict: Обработчик вытесненных транзакций
+		"""
+		self.max_size: int = max_size
+		self.on_evict: Optional[Callable[['Transaction'], None]] = on_evict
+		self._entries: Dict[bytes, _Entry] = {}
+		# Куча для выбора транзакций с наибольшей комиссией
+		self._best: list = []
+		# Куча для вытеснения транзакций с наименьшей комиссией
+		self._worst: list = []
+		self._counter = count()
+
+	def add(self, transaction: 'Transaction') -> bool:
+		"""
+		Добавление транзакции в мемпул.
+
+		:param transaction: Подписанная транзакция
+
+		:return: True, если транзакция принята, False для повторов, неподписанных
+			транзакций и транзакций, не прошедших по комиссии в переполненный пул
+		"""
+		signature = transaction.signature
+
+		if signature is None or signature in self._entries:
+			return False
+
+		if len(self._entries) >= self.max_size:
+			worst = self._peek_worst()
+
+			if worst is None or worst.transaction.fee >= transaction.fee:
+				return False
+
+			self._discard(worst.transaction.signature)
+
+			if self.on_evict is not None:
+				self.on_evict(worst.transaction)
+
+		entry = _Entry(transaction, next(self._counter), len(transaction.to_bytes()))
+		self._entries[signature] = entry
+		heapq.heappush(self._best, (-transaction.fee, entry.seq, signature))
+		heapq.heappush(self._worst, (transaction.fee, -entry.seq, signature))
+
+		return True
+
+	def select(self, max_count: Optional[int]=None, max_bytes: Optional[int]=None) -> List['Transaction']:
+		"""
+		Выбор пакета транзакций для нового блока.
+
+		Транзакции не удаляются из пула: это происходит только после
+		добавления блока в цепь (см. remove).
+
+		:param max_count: Максимальное количество транзакций
+		:param max_bytes: Максимальный суммарный размер транзакций в байтах
+
+		:return: Список транзакций в порядке убывания комиссии
+		"""
+		selected: List['Transaction'] = []
+		taken: list = []
+		total_bytes = 0
+
+		while self._best and (max_count is None or len(selected) < max_count):
+			item = heapq.heappop(self._best)
+			entry = self._entries.get(item[2])
+
+			if entry is None or entry.seq != item[1]:
+				# Устаревшая запись удаленной транзакции
+				continue
+
+			taken.append(item)
+
+			if max_bytes is not None and total_bytes + entry.size > max_bytes:
+				break
+
+			total_bytes += entry.size
+			selected.append(entry.transaction)
+
+		for item in taken:
+			heapq.heappush(self._best, item)
+
+		return selected
+
+	def remove(self, transactions: Iterable['Transaction']) -> int:
+		"""
+		Удаление транзакций, вошедших в блок.
+
+		:param transactions: Транзакции
+
+		:return: Количество удаленных транзакций
+		"""
+		removed = 0
+
+		for transaction in transactions:
+			if transaction.signature is not None and self._discard(transaction.signature):
+				removed += 1
+
+		return removed
+
+	def transactions(self) -> List['Transaction']:
+		"""
+		Все транзакции пула в порядке поступления
+
+		:return: Список транзакций
+		"""
+		return [entry.transaction for entry in self._entries.values()]
+
+	def _discard(self, signature: bytes) -> bool:
+		"""
+		Удаление записи из пула. Записи в кучах удаляются лениво.
+
+		:param signature: Сигнатура транзакции
+
+		:return: True, если запись была в пуле
+		"""
+		if self._entries.pop(signature, None) is None:
+			return False
+
+		if len(self._best) > 2 * len(self._entries) + 64:
+			self._compact()
+
+		return True
+
+	def _peek_worst(self) -> Optional[_Entry]:
+		"""
+		Запись с наименьшей комиссией (при равной комиссии - самая новая).
+
+		:return: Запись, либо None для пустого пула
+		"""
+		while self._worst:
+			fee, neg_seq, signature = self._worst[0]
+			entry = self._entries.get(signature)
+
+			if entry is not None and entry.seq == -neg_seq:
+				return entry
+
+			heapq.heappop(self._worst)
+
+		return None
+
+	def _compact(self) -> None:
+		"""
+		Перестроение куч без устаревших записей.
+		"""
+		self._best = [(-e.transaction.fee, e.seq, s) for s, e in self._entries.items()]
+		self._worst = [(e.transaction.fee, -e.seq, s) for s, e in self._entries.items()]
+		heapq.heapify(self._best)
+		heapq.heapify(self._worst)
+
+	def __contains__(self, transaction: 'Transaction') -> bool:
+		return transaction.signature in self._entries
+
+	def __iter__(self) -> Iterator['Transaction']:
+		return iter(self.transactions())
+
+	def __len__(self) -> int:
+		return len(self._entries)
@@ -0,0 +1,216 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+Дерево Меркла транзакций блока.
+
+Листья - хеши сериализованных транзакций, узлы - хеши пар дочерних
+узлов; листья и узлы хешируются с разными префиксами, чтобы узел нельзя
+было выдать за транзакцию. Если на уровне нечетное количество узлов,
+последний переходит на следующий уровень без изменений (как в RFC 6962),
+а не дублируется.
+
+Корень строится инкрементально (MerkleAccumulator): при добавлении
+транзакции пересчитываются только O(log n) узлов. Доказательство
+включения транзакции - O(log n) хешей соседних узлов на пути к корню.
+"""
+from hashlib import sha256
+from typing import Iterable, List
+
+_LEAF_PREFIX = b'\x00'
+_NODE_PREFIX = b'\x01'
+
+# Корень дерева без транзакций
+EMPTY_ROOT = sha256(b'').digest()
+
+
+def leaf_hash(data: bytes) -> bytes:
+	"""
+	Хеш листа
+
+	:param data: Сериализованная транзакция
+
+	:return: 32 байта
+	"""
+	return sha256(_LEAF_PREFIX + data).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+	"""
+	Хеш узла
+
+	:param left: Хеш левого дочернего узла
+	:param right: Хеш правого дочернего узла
+
+	:return: 32 байта
+	"""
+	return sha256(_NODE_PREFIX + left + right).digest()
+
+
+class MerkleAccumulator:
+	"""
+	Инкрементальное построение корня дерева Меркла.
+
+	Хранит корни полных поддеревьев (по одному на каждый единичный бит
+	количества листьев), поэтому добавление листа - O(log n) хешей, а
+	корень собирается из O(log n) поддеревьев.
+	"""
+	__slots__ = ('_peaks', '_count')
+
+	def __init__(self, leaves: Iterable[bytes]=()) -> None:
+		"""
+		Инициализация
+
+		:param leaves: Начальные сериализованные транзакции
+		"""
+		self._peaks: List[bytes] = []
+		self._count: int = 0
+
+		for data in leaves:
+			self.append(data)
+
+	def append(self, data: bytes) -> None:
+		"""
+		Добавление транзакции
+
+		:param data: Сериализованная транзакция
+		"""
+		self.append_hash(leaf_hash(data))
+
+	def append_hash(self, leaf: bytes) -> None:
+		"""
+		Добавление готового хеша листа
+
+		:param leaf: Хеш листа
+		"""
+		count = self._count
+
+		# Каждый единичный младший бит - полное поддерево, которое сливается с новым
+		while count & 1:
+			leaf = node_hash(self._peaks.pop(), leaf)
+			count >>= 1
+
+		self._peaks.append(leaf)
+		self._count += 1
+
+	def root(self) -> bytes:
+		"""
+		Корень дерева
+
+		:return: 32 байта (EMPTY_ROOT без транзакций)
+		"""
+		if not self._peaks:
+			return EMPTY_ROOT
+
+		root = self._peaks[-1]
+
+		for peak in reversed(self._peaks[:-1]):
+			root = node_hash(peak, root)
+
+		return root
+
+	def __len__(self) -> int:
+		return self._count
+
+
+def merkle_levels(leaves: List[bytes]) -> List[List[bytes]]:
+	"""
+	Все уровни дерева (для построения доказательств)
+
+	:param leaves: Хеши листьев
+
+	:return: Уровни от листьев к корню
+	"""
+	levels = [leaves]
+
+	while len(levels[-1]) > 1:
+		level = levels[-1]
+		parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+
+		if len(level) % 2:
+			parents.append(level[-1])
+
+		levels.append(parents)
+
+	return levels
+
+
+def merkle_root(leaves: Iterable[bytes]) -> bytes:
+	"""
+	Корень дерева по сериализованным транзакциям
+
+	:param leaves: Сериализованные транзакции
+
+	:return: 32 байта
+	"""
+	return MerkleAccumulator(leaves).root()
+
+
+def inclusion_proof(levels: List[List[bytes]], position: int) -> List[bytes]:
+	"""
+	Доказательство включения листа: хеши соседних узлов на пути к корню
+
+	:param levels: Уровни дерева (см. merkle_levels)
+	:param position: Номер листа
+
+	:return: Список хешей (не длиннее log2(n) + 1)
+	"""
+	if not 0 <= position < len(levels[0]):
+		raise IndexError('transaction position out of range')
+
+	proof = []
+
+	for level in levels[:-1]:
+		sibling = position ^ 1
+
+		if sibling < len(level):
+			proof.append(level[sibling])
+
+		position //= 2
+
+	return proof
+
+
+def verify_inclusion(data: bytes, position: int, count: int, proof: List[bytes], root: bytes) -> bool:
+	"""
+	Проверка доказательства включения транзакции
+
+	:param data: Сериализованная транзакция
+	:param position: Номер транзакции в блоке
+	:param count: Количество транзакций в блоке
+	:param proof: Доказательство (см. inclusion_proof)
+	:param root: Корень дерева из заголовка блока
+
+	:return: True, если транзакция входит в дерево с этим корнем
+	"""
+	if not 0 <= position < count:
+		return False
+
+	digest = leaf_hash(data)
+	siblings = iter(proof)
+
+	while count > 1:
+		if position % 2:
+			digest = node_hash(next(siblings, b''), digest)
+		elif position + 1 < count:
+			digest = node_hash(digest, next(siblings, b''))
+
+		position //= 2
+		count = (count + 1) // 2
+
+	return digest == root and next(siblings, None) is None
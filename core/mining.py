@@ -0,0 +1,162 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+from concurrent.futures import as_completed, wait
+from hashlib import sha256
+from typing import Optional
+import os
+from core.difficulty import target_bytes
+from core.serialization import NONCE
+
+# Событие остановки, общее для всех процессов-воркеров пула
+_stop_event = None
+
+
+def _init_worker(stop_event) -> None:
+	"""
+	Инициализация процесса-воркера: сохраняем общее событие остановки.
+
+	:param stop_event: Событие, по которому воркеры прекращают перебор
+	"""
+	global _stop_event
+	_stop_event = stop_event
+
+
+def _search_nonce(prefix: bytes, target: bytes, start: int, step: int, check_interval: int) -> Optional[int]:
+	"""
+	Перебор nonce в одном процессе.
+
+	Воркер проверяет числа start, start + step, start + 2 * step и т.д.,
+	поэтому воркеры никогда не проверяют один и тот же nonce дважды.
+	Каждые check_interval попыток воркер проверяет событие остановки.
+	Префикс блока загружается в SHA-256 один раз, а для каждой попытки
+	копируется готовое состояние и дописывается только nonce.
+
+	:param prefix: Неизменяемая часть данных блока (все, кроме nonce)
+	:param target: Цель в виде 32 байтов: хеш должен быть не больше нее
+	:param start: Первый проверяемый nonce
+	:param step: Шаг перебора (количество воркеров)
+	:param check_interval: Количество попыток между проверками события остановки
+
+	:return: Найденный nonce, либо None, если перебор был остановлен
+	"""
+	midstate = sha256(prefix)
+	nonce = start
+
+	while not _stop_event.is_set():
+		for _ in range(check_interval):
+			attempt = midstate.copy()
+			attempt.update(NONCE.pack(nonce))
+
+			if attempt.digest() <= target:
+				_stop_event.set()
+				return nonce
+			nonce += step
+
+	return None
+
+
+class ParallelMiner:
+	"""
+	Многопроцессный движок добычи блоков.
+
+	Пространство nonce делится между процессами пула. Как только один из
+	воркеров находит подходящий nonce, все остальные останавливаются.
+	Пул процессов создается при первой добыче и переиспользуется.
+	"""
+	def __init__(self, workers: Optional[int]=None, check_interval: int=10000) -> None:
+		"""
+		Инициализация движка добычи
+
+		:param workers: Количество процессов (по умолчанию - количество ядер)
+		:param check_interval: Количество попыток между проверками события остановки
+		"""
+		self.workers: int = workers or os.cpu_count() or 1
+		self.check_interval: int = check_interval
+		self._executor: Optional['ProcessPoolExecutor'] = None
+		self._stop_event = None
+
+	def _get_executor(self) -> 'ProcessPoolExecutor':
+		"""
+		Получение пула процессов (создается при первом обращении).
+
+		multiprocessing импортируется здесь же, чтобы не замедлять импорт
+		модуля там, где параллельная добыча не используется.
+
+		:return: Пул процессов
+		"""
+		if self._executor is None:
+			from concurrent.futures import ProcessPoolExecutor
+			import multiprocessing
+
+			self._stop_event = multiprocessing.Event()
+			self._executor = ProcessPoolExecutor(max_workers=self.workers,
+												initializer=_init_worker,
+												initargs=(self._stop_event,))
+
+		return self._executor
+
+	def search(self, prefix: bytes, target: int, start_nonce: int=0) -> int:
+		"""
+		Поиск nonce, при котором хеш блока не больше цели (см. core.difficulty).
+
+		:param prefix: Неизменяемая часть данных блока (все, кроме nonce)
+		:param target: Цель доказательства работы
+		:param start_nonce: Nonce, с которого начинается перебор
+
+		:return: Найденный nonce
+		"""
+		target: bytes = target_bytes(target)
+		executor = self._get_executor()
+		self._stop_event.clear()
+
+		futures = [executor.submit(_search_nonce, prefix, target, start_nonce + i,
+									self.workers, self.check_interval)
+					for i in range(self.workers)]
+		nonce = None
+
+		try:
+			for future in as_completed(futures):
+				result = future.result()
+
+				if result is not None:
+					nonce = result
+					break
+		finally:
+			# Останавливаем остальных воркеров и дожидаемся их завершения,
+			# чтобы следующая добыча не пересеклась с текущей
+			self._stop_event.set()
+			wait(futures)
+
+		return nonce
+
+	def shutdown(self) -> None:
+		"""
+		Остановка пула процессов
+		"""
+		if self._executor is not None:
+			self._executor.shutdown(wait=True)
+			self._executor = None
+			self._stop_event = None
+
+	def __enter__(self) -> 'ParallelMiner':
+		return self
+
+	def __exit__(self, *args) -> None:
+		self.shutdown()
@@ -0,0 +1,1041 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+Локальный узел блокчейна: asyncio-сервис с API JSON-RPC 2.0.
+
+Запросы принимаются по HTTP/1.1 (POST, тело - запрос или пакет запросов
+JSON-RPC) через TCP на localhost или через Unix-сокет. Методы:
+ + submit_transaction(transaction) - прием подписанной транзакции (hex от Transaction.encode)
+ + send_transaction(sender, recipient, amount, fee=None) - перевод с кошелька, зарегистрированного в узле
+ + create_wallet(name, initial_balance=0) - создание кошелька
+ + get_wallet(public_key=None, name=None) - кошелёк по ключу или имени
+ + get_block(index=None, hash=None) - блок по индексу или хешу
+ + get_transaction_proof(index, position) - заголовок блока и доказательство включения транзакции
+ + get_transaction(signature) - подтвержденная транзакция по сигнатуре
+ + get_address_transactions(public_key, offset=0, limit=100) - транзакции адреса
+ + get_chain_info() - сведения о блокчейне (см. BlockChain.get_full_info)
+ + mine_block(public_key) - добыча блока на кошелёк (при PoS - если кошелёк выбран валидатором)
+ + stake(public_key, amount) - блокировка средств кошелька в ставке валидатора
+ + unstake(public_key, amount) - снятие средств из ставки
+ + get_next_validator() - валидатор, который добавляет следующий блок при PoS
+
+Если узлу передан gossip (core.p2p.GossipNode), принятые транзакции и
+добытые блоки анонсируются соседям, а блоки и транзакции от соседей
+обрабатываются в том же потоке блокчейна, что и запросы клиентов.
+
+Доказательство включения проверяется по одному заголовку блока, без
+остальных транзакций (см. check_transaction_proof).
+
+Суммы передаются в монетах: в ответах - строками, чтобы не терять точность.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from hashlib import sha256
+from inspect import signature
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+import struct
+from blockchain import Block, BlockChain, Transaction, Wallet
+from core.exceptions import RPCException
+from core.export import block_to_dict, json_default, transaction_to_dict
+from core.logs import LOGGER_NAME
+from core.merkle import verify_inclusion
+from core.mining import ParallelMiner
+from core import serialization
+
+logger = logging.getLogger(LOGGER_NAME)
+
+# Коды ошибок JSON-RPC
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+NODE_BUSY = -32000
+
+_REASONS = {200: 'OK', 204: 'No Content', 400: 'Bad Request', 405: 'Method Not Allowed',
+			413: 'Payload Too Large', 503: 'Service Unavailable'}
+_MAX_HEADERS = 100
+
+
+def dumps(value) -> bytes:
+	"""
+	Сериализация ответа узла в JSON
+
+	:param value: Ответ
+
+	:return: Байты JSON
+	"""
+	return json.dumps(value, default=json_default, separators=(',', ':')).encode()
+
+
+def _from_hex(value: str, name: str) -> bytes:
+	"""
+	Разбор параметра запроса в hex
+
+	:param value: Значение параметра
+	:param name: Название параметра для сообщения об ошибке
+
+	:return: Байты
+
+	:raises RPCException: Если значение - не hex-строка
+	"""
+	try:
+		return bytes.fromhex(value)
+	except (TypeError, ValueError):
+		raise RPCException(INVALID_PARAMS, f'{name} must be a hex string')
+
+
+def check_transaction_proof(proof: dict) -> bool:
+	"""
+	Проверка ответа get_transaction_proof: хеш заголовка совпадает с хешем
+	блока, а транзакция входит в дерево Меркла с корнем из заголовка.
+
+	:param proof: Ответ get_transaction_proof
+
+	:return: True, если доказательство верно
+	"""
+	try:
+		header = bytes.fromhex(proof['header'])
+		merkle_root = serialization.decode_header(header)[3]
+
+		return (sha256(header).digest() == bytes.fromhex(proof['hash'])
+				and verify_inclusion(bytes.fromhex(proof['transaction']), proof['position'], proof['count'],
+									[bytes.fromhex(node) for node in proof['proof']], merkle_root))
+	except (KeyError, TypeError, ValueError, struct.error):
+		return False
+
+
+def wallet_to_dict(wallet: Wallet) -> dict:
+	"""
+	Открытые сведения о кошельке в виде словаря для JSON
+
+	:param wallet: Кошелёк
+
+	:return: Словарь
+	"""
+	return {
+		'name': wallet.name,
+		'public_key': wallet.public_key_bytes.hex(),
+		'balance': wallet.balance,
+		'available_balance': wallet.available_balance,
+	}
+
+
+def _error(request_id, code: int, message: str) -> dict:
+	return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}}
+
+
+def _http_response(status: int, body: bytes=b'', keep_alive: bool=True) -> bytes:
+	"""
+	HTTP-ответ с телом JSON
+
+	:param status: Код ответа
+	:param body: Тело
+	:param keep_alive: Оставить ли соединение открытым
+
+	:return: Байты ответа
+	"""
+	head = (f'HTTP/1.1 {status} {_REASONS[status]}\r\n'
+			f'Content-Type: application/json\r\n'
+			f'Content-Length: {len(body)}\r\n'
+			f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+
+	return head.encode('ascii') + body
+
+
+async def _read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+	"""
+	Чтение заголовков HTTP до пустой строки
+
+	:param reader: Поток чтения
+
+	:return: Заголовки (имена в нижнем регистре)
+	"""
+	headers = {}
+
+	for _ in range(_MAX_HEADERS):
+		line = await reader.readline()
+
+		if line in (b'\r\n', b'\n'):
+			return headers
+		if not line:
+			raise asyncio.IncompleteReadError(line, None)
+
+		name, _, value = line.decode('latin-1').partition(':')
+		headers[name.strip().lower()] = value.strip()
+
+	raise ValueError('too many HTTP headers')
+
+
+class NodeService:
+	"""
+	Асинхронный узел блокчейна.
+
+	Цикл событий только принимает соединения, разбирает запросы и
+	раскладывает работу по исполнителям:
+	 + все обращения к BlockChain выполняются по очереди в одном выделенном
+	 	потоке (блокчейн не рассчитан на одновременные изменения);
+	 + перебор nonce выполняется процессами ParallelMiner, которых ждет
+	 	отдельный поток, поэтому добыча не останавливает ни цикл событий,
+	 	ни прием транзакций;
+	 + сигнатуры проверяются пачками в BlockChain.submit_transactions (в пуле
+	 	процессов, если задано verification_workers > 1).
+
+	Транзакции от всех клиентов собираются в очередь и передаются блокчейну
+	пачками до batch_size штук: пока обрабатывается одна пачка, в очереди
+	копится следующая. Очередь ограничена: когда она заполнена, запрос
+	сразу получает ошибку NODE_BUSY, а не ждет. Количество одновременных
+	соединений тоже ограничено (сверх лимита - HTTP 503), а ответы
+	медленным клиентам отправляются с учетом их скорости чтения (drain).
+	"""
+	def __init__(self, blockchain: BlockChain, host: str='127.0.0.1', port: int=0, unix_path: Optional[str]=None,
+				batch_size: int=256, queue_size: int=10000, max_connections: int=10000, max_body: int=1 << 20,
+				mining_workers: int=1, backlog: int=1024, gossip: Optional['GossipNode']=None) -> None:
+		"""
+		Инициализация узла
+
+		:param blockchain: Блокчейн
+		:param host: Адрес для TCP (по умолчанию - только localhost)
+		:param port: Порт для TCP (0 - любой свободный)
+		:param unix_path: Путь Unix-сокета (если задан, TCP не используется)
+		:param batch_size: Максимальное количество транзакций в одной пачке
+		:param queue_size: Максимальное количество транзакций, ожидающих обработки
+		:param max_connections: Максимальное количество одновременных соединений
+		:param max_body: Максимальный размер тела запроса в байтах
+		:param mining_workers: Количество процессов добычи, если у блокчейна нет своего движка
+		:param backlog: Длина очереди входящих соединений сокета
+		:param gossip: Узел gossip-сети для обмена блоками и транзакциями с соседями
+		"""
+		self.blockchain: BlockChain = blockchain
+		self.host: str = host
+		self.port: int = port
+		self.unix_path: Optional[str] = unix_path
+		self.batch_size: int = batch_size
+		self.queue_size: int = queue_size
+		self.max_connections: int = max_connections
+		self.max_body: int = max_body
+		self.backlog: int = backlog
+		self.gossip: Optional['GossipNode'] = gossip
+		self.connections: int = 0
+		self._writers: Set[asyncio.StreamWriter] = set()
+		self.stats: Dict[str, int] = {'requests': 0, 'busy': 0, 'batches': 0, 'submitted': 0, 'refused_connections': 0}
+
+		self._own_miner: bool = blockchain.miner is None
+		self._miner: ParallelMiner = blockchain.miner or ParallelMiner(mining_workers)
+		self._chain_executor: Optional[ThreadPoolExecutor] = None
+		self._mining_executor: Optional[ThreadPoolExecutor] = None
+		self._server: Optional[asyncio.AbstractServer] = None
+		self._submissions: Optional[asyncio.Queue] = None
+		self._batcher: Optional[asyncio.Task] = None
+		self._mining_lock: Optional[asyncio.Lock] = None
+		self._methods: Dict[str, Callable[..., Awaitable]] = {
+			'submit_transaction': self.submit_transaction,
+			'send_transaction': self.send_transaction,
+			'create_wallet': self.create_wallet,
+			'get_wallet': self.get_wallet,
+			'get_block': self.get_block,
+			'get_transaction_proof': self.get_transaction_proof,
+			'get_transaction': self.get_transaction,
+			'get_address_transactions': self.get_address_transactions,
+			'get_chain_info': self.get_chain_info,
+			'mine_block': self.mine_block,
+			'stake': self.stake,
+			'unstake': self.unstake,
+			'get_next_validator': self.get_next_validator,
+		}
+
+	async def start(self) -> None:
+		"""
+		Запуск узла: исполнители, обработчик пачек транзакций и сервер
+		"""
+		self._chain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='node-chain')
+		self._mining_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='node-mining')
+		self._submissions = asyncio.Queue(self.queue_size)
+		self._mining_lock = asyncio.Lock()
+		self._batcher = asyncio.create_task(self._process_batches())
+
+		if self.gossip is not None:
+			await self.gossip.start(self._chain_executor)
+
+		if self.unix_path is not None:
+			self._server = await asyncio.start_unix_server(self._serve_connection, path=self.unix_path,
+															backlog=self.backlog)
+		else:
+			self._server = await asyncio.start_server(self._serve_connection, self.host, self.port,
+													backlog=self.backlog)
+			self.port = self._server.sockets[0].getsockname()[1]
+
+		logger.info('Node is listening on %s', self.address)
+
+	@property
+	def address(self):
+		"""
+		Адрес узла
+
+		:return: Путь Unix-сокета, либо кортеж (адрес, порт)
+		"""
+		return self.unix_path if self.unix_path is not None else (self.host, self.port)
+
+	async def serve_forever(self) -> None:
+		"""
+		Обслуживание запросов до отмены задачи
+		"""
+		if self._server is None:
+			await self.start()
+
+		await self._server.serve_forever()
+
+	async def stop(self) -> None:
+		"""
+		Остановка узла: новые соединения не принимаются, открытые
+		соединения закрываются, ожидающие транзакции получают ошибку,
+		исполнители завершаются.
+		"""
+		if self.gossip is not None:
+			await self.gossip.stop()
+
+		if self._server is not None:
+			self._server.close()
+
+			for writer in list(self._writers):
+				writer.close()
+
+			await self._server.wait_closed()
+			self._server = None
+
+		if self._batcher is not None:
+			self._batcher.cancel()
+
+			with suppress(asyncio.CancelledError):
+				await self._batcher
+
+			self._batcher = None
+
+		while self._submissions is not None and not self._submissions.empty():
+			_, future = self._submissions.get_nowait()
+
+			if not future.done():
+				future.set_exception(RPCException(NODE_BUSY, 'node is shutting down'))
+
+		for executor in (self._mining_executor, self._chain_executor):
+			if executor is not None:
+				await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+		self._chain_executor = self._mining_executor = None
+
+		if self._own_miner:
+			self._miner.shutdown()
+
+	async def __aenter__(self) -> 'NodeService':
+		await self.start()
+		return self
+
+	async def __aexit__(self, *args) -> None:
+		await self.stop()
+
+	async def _chain(self, function: Callable, *args):
+		"""
+		Выполнение функции в потоке блокчейна
+
+		:param function: Функция, обращающаяся к блокчейну
+		:param args: Аргументы
+
+		:return: Результат функции
+		"""
+		return await asyncio.get_running_loop().run_in_executor(self._chain_executor, function, *args)
+
+	async def _process_batches(self) -> None:
+		"""
+		Передача транзакций из очереди в блокчейн пачками
+		"""
+		queue = self._submissions
+
+		while True:
+			batch = [await queue.get()]
+
+			while len(batch) < self.batch_size and not queue.empty():
+				batch.append(queue.get_nowait())
+
+			try:
+				results = await self._chain(self.blockchain.submit_transactions, [transaction for transaction, _ in batch])
+			except Exception as e:
+				logger.error('Transaction batch failed: %s', e)
+				results = [e] * len(batch)
+
+			self.stats['batches'] += 1
+			self.stats['submitted'] += len(batch)
+
+			if self.gossip is not None:
+				self.gossip.announce_transactions([transaction for (transaction, _), result in zip(batch, results)
+												if result is True])
+
+			for (_, future), result in zip(batch, results):
+				if future.done():
+					continue
+
+				if isinstance(result, Exception):
+					future.set_exception(RPCException(INTERNAL_ERROR, str(result)))
+				else:
+					future.set_result(result)
+
+	async def _submit(self, transaction: Transaction) -> bool:
+		"""
+		Постановка транзакции в очередь на прием блокчейном
+
+		:param transaction: Транзакция
+
+		:return: Результат BlockChain.pending_transaction
+
+		:raises RPCException: Если очередь заполнена (NODE_BUSY)
+		"""
+		future = asyncio.get_running_loop().create_future()
+
+		try:
+			self._submissions.put_nowait((transaction, future))
+		except asyncio.QueueFull:
+			self.stats['busy'] += 1
+			raise RPCException(NODE_BUSY, 'node is busy: transaction queue is full')
+
+		return await future
+
+	def _wallet(self, public_key: str) -> Wallet:
+		"""
+		Кошелёк, зарегистрированный в блокчейне (вызывается в потоке блокчейна)
+
+		:param public_key: Публичный ключ в hex
+
+		:return: Кошелёк
+
+		:raises RPCException: Если ключ неверен или кошелёк не найден
+		"""
+		try:
+			wallet = self.blockchain.get_wallet(bytes.fromhex(public_key))
+		except (TypeError, ValueError):
+			raise RPCException(INVALID_PARAMS, 'public key must be a hex string')
+
+		if wallet is None:
+			raise RPCException(INVALID_PARAMS, f'unknown wallet: {public_key}')
+
+		return wallet
+
+	async def submit_transaction(self, transaction: str) -> bool:
+		"""
+		Прием подписанной транзакции
+
+		:param transaction: Транзакция в hex (см. Transaction.encode)
+
+		:return: True, если транзакция принята в мемпул
+		"""
+		try:
+			decoded = Transaction.decode(bytes.fromhex(transaction))
+		except (TypeError, ValueError, struct.error):
+			raise RPCException(INVALID_PARAMS, 'transaction must be a hex-encoded binary transaction')
+
+		return await self._submit(decoded)
+
+	async def send_transaction(self, sender: str, recipient: str, amount, fee=None) -> dict:
+		"""
+		Перевод с кошелька, зарегистрированного в узле (узел подписывает
+		транзакцию ключом этого кошелька)
+
+		:param sender: Публичный ключ отправителя в hex
+		:param recipient: Публичный ключ получателя в hex
+		:param amount: Сумма в монетах (строка или число)
+		:param fee: Комиссия в монетах (по умолчанию - текущая комиссия сети)
+
+		:return: Словарь с признаком приема и сигнатурой транзакции
+		"""
+		def build() -> Optional[Transaction]:
+			wallet = self._wallet(sender)
+			commission = fee if fee is not None else serialization.from_base_units(self.blockchain.transaction_fee)
+
+			try:
+				return wallet.send_transaction(self._wallet(recipient), amount, commission)
+			except (ArithmeticError, TypeError, ValueError):
+				raise RPCException(INVALID_PARAMS, 'amount and fee must be numbers of coins')
+
+		transaction = await self._chain(build)
+
+		if transaction is None:
+			return {'accepted': False, 'signature': None}
+
+		return {'accepted': await self._submit(transaction), 'signature': transaction.signature.hex()}
+
+	async def create_wallet(self, name: str, initial_balance='0') -> Optional[dict]:
+		"""
+		Создание кошелька
+
+		:param name: Имя владельца
+		:param initial_balance: Начальный баланс в монетах
+
+		:return: Сведения о кошельке, либо None, если не хватает монет в сети
+		"""
+		def create() -> Optional[dict]:
+			try:
+				wallet = self.blockchain.create_wallet(name, initial_balance)
+			except (ArithmeticError, TypeError, ValueError):
+				raise RPCException(INVALID_PARAMS, 'initial balance must be a number of coins')
+
+			return wallet_to_dict(wallet) if wallet is not None else None
+
+		return await self._chain(create)
+
+	async def get_wallet(self, public_key: Optional[str]=None, name: Optional[str]=None) -> Optional[dict]:
+		"""
+		Кошелёк по публичному ключу или имени владельца
+
+		:param public_key: Публичный ключ в hex
+		:param name: Имя владельца
+
+		:return: Сведения о кошельке, либо None
+		"""
+		def find() -> Optional[dict]:
+			if public_key is not None:
+				wallet = self._wallet(public_key)
+			elif name is not None:
+				wallet = self.blockchain.get_wallet_by_name(name)
+			else:
+				raise RPCException(INVALID_PARAMS, 'public_key or name is required')
+
+			return wallet_to_dict(wallet) if wallet is not None else None
+
+		return await self._chain(find)
+
+	async def get_block(self, index: Optional[int]=None, hash: Optional[str]=None) -> Optional[dict]:
+		"""
+		Блок по индексу или хешу
+
+		:param index: Индекс блока
+		:param hash: Хеш блока в hex
+
+		:return: Блок, либо None
+		"""
+		def find() -> Optional[dict]:
+			chain = self.blockchain.chain
+
+			if index is not None:
+				if not isinstance(index, int) or isinstance(index, bool):
+					raise RPCException(INVALID_PARAMS, 'index must be an integer')
+
+				return block_to_dict(chain[index]) if 0 <= index < len(chain) else None
+
+			if hash is None:
+				raise RPCException(INVALID_PARAMS, 'index or hash is required')
+
+			block = self.blockchain.get_block_by_hash(_from_hex(hash, 'hash'))
+
+			return block_to_dict(block) if block is not None else None
+
+		return await self._chain(find)
+
+	async def get_transaction(self, signature: str) -> Optional[dict]:
+		"""
+		Подтвержденная транзакция по сигнатуре
+
+		:param signature: Сигнатура транзакции в hex
+
+		:return: Транзакция с высотой блока и номером в блоке, либо None
+		"""
+		def find() -> Optional[dict]:
+			found = self.blockchain.get_transaction(_from_hex(signature, 'signature'))
+
+			if found is None:
+				return None
+
+			block, position = found
+
+			return dict(transaction_to_dict(block.transactions[position]), block=block.index, position=position)
+
+		return await self._chain(find)
+
+	async def get_address_transactions(self, public_key: str, offset: int=0, limit: int=100) -> dict:
+		"""
+		Подтвержденные транзакции адреса (отправленные и полученные) по
+		возрастанию высоты блока
+
+		:param public_key: Публичный ключ в hex
+		:param offset: Количество пропускаемых первых транзакций
+		:param limit: Максимальное количество транзакций в ответе
+
+		:return: Словарь с общим количеством транзакций адреса и страницей транзакций
+		"""
+		for name, value in (('offset', offset), ('limit', limit)):
+			if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+				raise RPCException(INVALID_PARAMS, f'{name} must be a non-negative integer')
+
+		def find() -> dict:
+			address = _from_hex(public_key, 'public key')
+
+			return {
+				'total': self.blockchain.indexes.address_count(address),
+				'transactions': [dict(transaction_to_dict(transaction), block=height)
+								for height, transaction in self.blockchain.get_address_transactions(address, offset, limit)],
+			}
+
+		return await self._chain(find)
+
+	async def get_transaction_proof(self, index: int, position: int) -> dict:
+		"""
+		Доказательство включения транзакции в блок: заголовок блока и хеши
+		дерева Меркла от транзакции до корня (см. check_transaction_proof)
+
+		:param index: Индекс блока
+		:param position: Номер транзакции в блоке
+
+		:return: Словарь с транзакцией, заголовком и доказательством в hex
+		"""
+		for name, value in (('index', index), ('position', position)):
+			if not isinstance(value, int) or isinstance(value, bool):
+				raise RPCException(INVALID_PARAMS, f'{name} must be an integer')
+
+		def prove() -> dict:
+			chain = self.blockchain.chain
+
+			if not 0 <= index < len(chain):
+				raise RPCException(INVALID_PARAMS, f'no block {index}')
+
+			block = chain[index]
+
+			if not 0 <= position < len(block.transactions):
+				raise RPCException(INVALID_PARAMS, f'no transaction {position} in block {index}')
+
+			return {
+				'block': index,
+				'hash': block.hash.hex(),
+				'header': block.header().hex(),
+				'merkle_root': block.merkle_root.hex(),
+				'transaction': block.transactions[position].encode().hex(),
+				'position': position,
+				'count': len(block.transactions),
+				'proof': [node.hex() for node in block.transaction_proof(position)],
+			}
+
+		return await self._chain(prove)
+
+	async def get_chain_info(self) -> dict:
+		"""
+		Сведения о блокчейне: BlockChain.get_full_info, высота, хеш последнего
+		блока, размер мемпула и параметры сети
+
+		:return: Словарь
+		"""
+		def info() -> dict:
+			blockchain = self.blockchain
+			result = blockchain.get_full_info()
+			result.update({
+				'coin_name': blockchain.config.coin_name,
+				'height': len(blockchain.chain) - 1,
+				'tip': blockchain.chain[-1].hash.hex(),
+				'mempool_size': len(blockchain.mempool),
+				'transaction_fee': serialization.from_base_units(blockchain.transaction_fee),
+				'mining_reward': serialization.from_base_units(blockchain.mining_reward),
+				'inflation_rate': blockchain.inflation_rate,
+			})
+
+			return result
+
+		return await self._chain(info)
+
+	async def mine_block(self, public_key: str) -> dict:
+		"""
+		Добыча блока на кошелёк.
+
+		Блок готовится и добавляется в цепь в потоке блокчейна, а
+		запечатывается (перебор nonce процессами добычи или подпись
+		валидатора, см. core.consensus) вне его; в это время узел продолжает
+		принимать транзакции и отвечать на запросы. Одновременно добывается
+		только один блок.
+
+		:param public_key: Публичный ключ кошелька майнера в hex
+
+		:return: Словарь с признаком успеха, индексом и хешем блока
+		"""
+		async with self._mining_lock:
+			def prepare() -> Tuple[Wallet, Optional[Block]]:
+				wallet = self._wallet(public_key)
+				return wallet, self.blockchain.prepare_block(wallet)
+
+			wallet, block = await self._chain(prepare)
+
+			if block is None:
+				return {'mined': False, 'index': None, 'hash': None}
+
+			await asyncio.get_running_loop().run_in_executor(self._mining_executor, self.blockchain.seal_block,
+															block, self._miner, wallet)
+			mined = await self._chain(self.blockchain.commit_block, block, wallet)
+
+			if mined and self.gossip is not None:
+				await self.gossip.announce_block(block)
+
+			return {'mined': mined, 'index': block.index, 'hash': block.hash.hex()}
+
+	async def _change_stake(self, public_key: str, amount, unstake: bool) -> dict:
+		"""
+		Изменение ставки кошелька (см. stake и unstake): транзакция ставки
+		принимается в мемпул и анонсируется соседям, как обычный перевод
+
+		:param public_key: Публичный ключ кошелька в hex
+		:param amount: Сумма в монетах
+		:param unstake: Снятие ставки вместо блокировки
+
+		:return: Словарь с признаком приема транзакции, ее сигнатурой и
+			текущей (подтвержденной в цепи) ставкой кошелька
+		"""
+		def build() -> Tuple[Wallet, Optional[Transaction]]:
+			wallet = self._wallet(public_key)
+
+			try:
+				return wallet, self.blockchain.stake_transaction(wallet, amount, unstake=unstake)
+			except (ArithmeticError, TypeError, ValueError):
+				raise RPCException(INVALID_PARAMS, 'amount must be a number of coins')
+
+		wallet, transaction = await self._chain(build)
+		accepted = transaction is not None and await self._submit(transaction)
+		stake = await self._chain(self.blockchain.stakes.stake_of, wallet.public_key_bytes)
+
+		return {'changed': accepted, 'signature': transaction.signature.hex() if transaction is not None else None,
+				'stake': serialization.from_base_units(stake)}
+
+	async def stake(self, public_key: str, amount) -> dict:
+		"""
+		Блокировка средств кошелька в ставке валидатора
+
+		:param public_key: Публичный ключ кошелька в hex
+		:param amount: Сумма в монетах (строка или число)
+
+		:return: Словарь с признаком приема транзакции ставки и текущей ставкой кошелька
+		"""
+		return await self._change_stake(public_key, amount, unstake=False)
+
+	async def unstake(self, public_key: str, amount) -> dict:
+		"""
+		Снятие средств кошелька из ставки валидатора
+
+		:param public_key: Публичный ключ кошелька в hex
+		:param amount: Сумма в монетах (строка или число)
+
+		:return: Словарь с признаком приема транзакции ставки и текущей ставкой кошелька
+		"""
+		return await self._change_stake(public_key, amount, unstake=True)
+
+	async def get_next_validator(self) -> dict:
+		"""
+		Валидатор, который добавляет следующий блок при PoS
+
+		:return: Словарь с публичным ключом валидатора (или None), его ставкой
+			и суммой всех ставок
+		"""
+		def find() -> dict:
+			validator = self.blockchain.next_validator()
+			stakes = self.blockchain.stakes
+
+			return {
+				'public_key': validator.hex() if validator is not None else None,
+				'stake': serialization.from_base_units(stakes.stake_of(validator) if validator is not None else 0),
+				'total_stake': serialization.from_base_units(stakes.total),
+			}
+
+		return await self._chain(find)
+
+	async def _dispatch(self, request) -> Optional[dict]:
+		"""
+		Выполнение одного запроса JSON-RPC
+
+		:param request: Разобранный запрос
+
+		:return: Ответ, либо None для уведомления (запроса без id)
+		"""
+		if not isinstance(request, dict):
+			return _error(None, INVALID_REQUEST, 'request must be an object')
+
+		request_id = request.get('id')
+
+		if request.get('jsonrpc') != '2.0' or not isinstance(request.get('method'), str):
+			return _error(request_id, INVALID_REQUEST, 'invalid JSON-RPC 2.0 request')
+
+		self.stats['requests'] += 1
+		method = self._methods.get(request['method'])
+		params = request.get('params', {})
+
+		try:
+			if method is None:
+				raise RPCException(METHOD_NOT_FOUND, f'method not found: {request["method"]}')
+
+			try:
+				if isinstance(params, dict):
+					signature(method).bind(**params)
+				elif isinstance(params, list):
+					signature(method).bind(*params)
+				else:
+					raise TypeError('params must be an object or an array')
+			except TypeError as e:
+				raise RPCException(INVALID_PARAMS, str(e))
+
+			result = await (method(**params) if isinstance(params, dict) else method(*params))
+		except RPCException as e:
+			response = _error(request_id, e.code, e.message)
+		except Exception as e:
+			logger.error('RPC method %s failed: %s', request['method'], e)
+			response = _error(request_id, INTERNAL_ERROR, 'internal error')
+		else:
+			response = {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+
+		return response if 'id' in request else None
+
+	async def handle(self, payload: bytes) -> Optional[bytes]:
+		"""
+		Обработка тела запроса JSON-RPC (одиночного или пакета).
+
+		Запросы пакета выполняются одновременно, поэтому транзакции из
+		одного пакета попадают в общую пачку для блокчейна.
+
+		:param payload: Тело запроса
+
+		:return: Тело ответа, либо None, если отвечать не нужно (только уведомления)
+		"""
+		try:
+			request = json.loads(payload)
+		except ValueError:
+			return dumps(_error(None, PARSE_ERROR, 'parse error'))
+
+		if isinstance(request, list):
+			if not request:
+				return dumps(_error(None, INVALID_REQUEST, 'empty batch'))
+
+			responses = [response for response in await asyncio.gather(*map(self._dispatch, request))
+						if response is not None]
+
+			return dumps(responses) if responses else None
+
+		response = await self._dispatch(request)
+
+		return dumps(response) if response is not None else None
+
+	async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+		"""
+		Обслуживание соединения: запросы HTTP/1.1 с постоянным соединением
+
+		:param reader: Поток чтения
+		:param writer: Поток записи
+		"""
+		if self.connections >= self.max_connections:
+			self.stats['refused_connections'] += 1
+			writer.write(_http_response(503, dumps(_error(None, NODE_BUSY, 'too many connections')), keep_alive=False))
+
+			with suppress(ConnectionError):
+				await writer.drain()
+
+			writer.close()
+			return
+
+		self.connections += 1
+		self._writers.add(writer)
+
+		try:
+			while True:
+				line = await reader.readline()
+
+				if not line:
+					break
+
+				try:
+					method, _, version = line.decode('latin-1').split()
+				except ValueError:
+					writer.write(_http_response(400, keep_alive=False))
+					break
+
+				headers = await _read_headers(reader)
+				connection = headers.get('connection', '').lower()
+				keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+				length = int(headers.get('content-length', '0') or 0)
+
+				if length > self.max_body:
+					writer.write(_http_response(413, keep_alive=False))
+					break
+
+				body = await reader.readexactly(length) if length else b''
+
+				if method != 'POST':
+					writer.write(_http_response(405, keep_alive=keep_alive))
+				else:
+					response = await self.handle(body)
+					writer.write(_http_response(200 if response is not None else 204, response or b'', keep_alive))
+
+				await writer.drain()
+
+				if not keep_alive:
+					break
+		except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+			pass
+		finally:
+			self.connections -= 1
+			self._writers.discard(writer)
+			writer.close()
+
+			with suppress(ConnectionError):
+				await writer.wait_closed()
+
+
+class NodeClient:
+	"""
+	Клиент JSON-RPC узла с постоянным HTTP-соединением.
+
+	Запросы одного клиента выполняются по очереди; для одновременных
+	запросов нужно несколько клиентов либо пакеты (batch).
+	"""
+	def __init__(self, host: str='127.0.0.1', port: Optional[int]=None, unix_path: Optional[str]=None) -> None:
+		"""
+		Инициализация клиента
+
+		:param host: Адрес узла
+		:param port: Порт узла
+		:param unix_path: Путь Unix-сокета узла (вместо адреса и порта)
+		"""
+		self.host: str = host
+		self.port: Optional[int] = port
+		self.unix_path: Optional[str] = unix_path
+		self._reader: Optional[asyncio.StreamReader] = None
+		self._writer: Optional[asyncio.StreamWriter] = None
+		self._lock = asyncio.Lock()
+		self._next_id: int = 0
+
+	async def connect(self) -> None:
+		"""
+		Открытие соединения с узлом
+		"""
+		if self.unix_path is not None:
+			self._reader, self._writer = await asyncio.open_unix_connection(self.unix_path)
+		else:
+			self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+	async def close(self) -> None:
+		"""
+		Закрытие соединения
+		"""
+		if self._writer is not None:
+			self._writer.close()
+
+			with suppress(ConnectionError):
+				await self._writer.wait_closed()
+
+			self._writer = self._reader = None
+
+	async def __aenter__(self) -> 'NodeClient':
+		await self.connect()
+		return self
+
+	async def __aexit__(self, *args) -> None:
+		await self.close()
+
+	async def _post(self, payload) -> Any:
+		"""
+		Отправка тела запроса и чтение ответа
+
+		:param payload: Запрос или пакет запросов
+
+		:return: Разобранный ответ (None для ответа без тела)
+		"""
+		body = dumps(payload)
+
+		async with self._lock:
+			if self._writer is None:
+				await self.connect()
+
+			self._writer.write(b'POST / HTTP/1.1\r\nHost: node\r\nContent-Type: application/json\r\n'
+								+ f'Content-Length: {len(body)}\r\n\r\n'.encode('ascii') + body)
+			await self._writer.drain()
+
+			status_line = await self._reader.readline()
+
+			if not status_line:
+				raise ConnectionError('node closed the connection')
+
+			status = int(status_line.split()[1])
+			headers = await _read_headers(self._reader)
+			length = int(headers.get('content-length', '0'))
+			data = await self._reader.readexactly(length) if length else b''
+
+			if headers.get('connection', '').lower() == 'close':
+				await self.close()
+
+		if status not in (200, 204) and not data:
+			raise RPCException(INTERNAL_ERROR, f'HTTP {status}')
+
+		return json.loads(data) if data else None
+
+	def _request(self, method: str, params: dict) -> dict:
+		self._next_id += 1
+		return {'jsonrpc': '2.0', 'id': self._next_id, 'method': method, 'params': params}
+
+	@staticmethod
+	def _result(response: dict) -> Any:
+		if 'error' in response:
+			raise RPCException(response['error']['code'], response['error']['message'])
+
+		return response['result']
+
+	async def call(self, method: str, **params) -> Any:
+		"""
+		Вызов метода узла
+
+		:param method: Имя метода
+		:param params: Именованные параметры
+
+		:return: Результат метода
+
+		:raises RPCException: Если узел вернул ошибку
+		"""
+		response = await self._post(self._request(method, params))
+
+		if isinstance(response, list):
+			response = response[0]
+
+		return self._result(response)
+
+	async def batch(self, calls: Iterable[Tuple[str, dict]]) -> List[Any]:
+		"""
+		Пакетный вызов методов одним запросом
+
+		:param calls: Пары (имя метода, параметры)
+
+		:return: Результаты в том же порядке; ошибки возвращаются как RPCException
+		"""
+		requests = [self._request(method, params) for method, params in calls]
+
+		if not requests:
+			return []
+
+		responses = await self._post(requests)
+
+		if isinstance(responses, dict):
+			responses = [responses]
+
+		by_id = {response.get('id'): response for response in responses}
+		results = []
+
+		for request in requests:
+			try:
+				results.append(self._result(by_id[request['id']]))
+			except RPCException as e:
+				results.append(e)
+
+		return results
@@ -0,0 +1,778 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+Распространение блоков и транзакций между узлами сети (gossip).
+
+Узлы связаны постоянными TCP-соединениями. Каждое сообщение - кадр:
+ + длина данных (4 байта)
+ + тип сообщения (1 байт)
+ + данные
+
+Сообщения:
+ + HELLO - версия протокола, высота и хеш последнего блока (при подключении)
+ + HEADERS - заголовки блоков: индекс, хеш предыдущего блока и хеш блока
+ 	(72 байта на блок). Новый блок анонсируется одним заголовком
+ + GET_HEADERS - локатор цепи (хеши от последнего блока с удваивающимся шагом);
+ 	в ответ - заголовки после первого общего блока
+ + GET_BLOCKS - хеши недостающих блоков; в ответ - BLOCK на каждый
+ + BLOCK - блок (см. core.serialization)
+ + INV_TX - хеши новых транзакций
+ + GET_TX - хеши недостающих транзакций; в ответ - TX
+ + TX - транзакции подряд (см. core.serialization)
+
+Блоки и транзакции распознаются по хешу (SHA-256 сериализованных данных):
+уже полученные не запрашиваются и не обрабатываются повторно, а соседу
+не анонсируется то, что он уже знает.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from hashlib import sha256
+from time import monotonic
+from typing import Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import struct
+from blockchain import Block, BlockChain, Transaction
+from core.forks import BlockStatus
+from core.logs import LOGGER_NAME, LazyHex
+from core import serialization
+
+logger = logging.getLogger(LOGGER_NAME)
+
+PROTOCOL_VERSION = 1
+
+MSG_HELLO = 0
+MSG_HEADERS = 1
+MSG_GET_HEADERS = 2
+MSG_GET_BLOCKS = 3
+MSG_BLOCK = 4
+MSG_INV_TX = 5
+MSG_GET_TX = 6
+MSG_TX = 7
+
+FRAME = struct.Struct('>IB')
+HELLO = struct.Struct('>BQ32s')
+HEADER = struct.Struct('>Q32s32s')
+HASH_SIZE = 32
+
+# Ограничения протокола
+MAX_FRAME = 32 << 20
+MAX_HEADERS = 2000
+MAX_BLOCKS_PER_REQUEST = 64
+MAX_ORPHANS = 1024
+
+
+def transaction_id(data: bytes) -> bytes:
+	"""
+	Идентификатор транзакции в сети
+
+	:param data: Сериализованная транзакция (см. Transaction.encode)
+
+	:return: SHA-256 (32 байта)
+	"""
+	return sha256(data).digest()
+
+
+def _split_hashes(payload: bytes) -> List[bytes]:
+	if len(payload) % HASH_SIZE:
+		raise ValueError('malformed hash list')
+
+	return [payload[i:i + HASH_SIZE] for i in range(0, len(payload), HASH_SIZE)]
+
+
+class _BoundedSet:
+	"""
+	Множество хешей ограниченного размера: самые старые вытесняются
+	"""
+	__slots__ = ('size', '_items')
+
+	def __init__(self, size: int) -> None:
+		self.size = size
+		self._items: Dict[bytes, None] = {}
+
+	def add(self, key: bytes) -> None:
+		if key in self._items:
+			return
+
+		if len(self._items) >= self.size:
+			self._items.pop(next(iter(self._items)))
+
+		self._items[key] = None
+
+	def discard(self, key: bytes) -> None:
+		self._items.pop(key, None)
+
+	def __contains__(self, key: bytes) -> bool:
+		return key in self._items
+
+	def __len__(self) -> int:
+		return len(self._items)
+
+
+class _Requests:
+	"""
+	Хеши, запрошенные у соседей, со временем запроса. Запрос старше timeout
+	считается потерянным и удаляется: хеш можно запросить снова, а записи
+	о неполученных ответах не копятся.
+	"""
+	__slots__ = ('timeout', '_items')
+
+	def __init__(self, timeout: float) -> None:
+		self.timeout = timeout
+		# Упорядочен по времени запроса: самые старые запросы в начале
+		self._items: Dict[bytes, float] = {}
+
+	def expire(self, now: float) -> None:
+		while self._items:
+			key = next(iter(self._items))
+
+			if now - self._items[key] < self.timeout:
+				break
+
+			del self._items[key]
+
+	def request(self, key: bytes, now: float) -> bool:
+		"""
+		Отметка запроса хеша
+
+		:return: True, если хеш еще не запрошен (или запрос устарел)
+		"""
+		self.expire(now)
+
+		if key in self._items:
+			return False
+
+		self._items[key] = now
+
+		return True
+
+	def pop(self, key: bytes) -> None:
+		self._items.pop(key, None)
+
+	def __contains__(self, key: bytes) -> bool:
+		return key in self._items and monotonic() - self._items[key] < self.timeout
+
+	def __len__(self) -> int:
+		return len(self._items)
+
+
+class Peer:
+	"""
+	Соединение с соседним узлом.
+
+	Исходящие сообщения складываются в очередь и отправляются отдельной
+	задачей, поэтому обработка входящих сообщений никогда не ждет
+	медленного соседа (и два узла не блокируют друг друга записью).
+	"""
+	def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, outbound: bool,
+				known_size: int=100000) -> None:
+		"""
+		Инициализация соединения
+
+		:param reader: Поток чтения
+		:param writer: Поток записи
+		:param outbound: Соединение установлено этим узлом
+		:param known_size: Сколько хешей, известных соседу, запоминать
+		"""
+		self.reader = reader
+		self.writer = writer
+		self.outbound: bool = outbound
+		self.address = writer.get_extra_info('peername')
+		self.height: int = 0
+		self.tip: Optional[bytes] = None
+		self.syncing: bool = False
+		self.known_blocks = _BoundedSet(known_size)
+		self.known_transactions = _BoundedSet(known_size)
+		self.outgoing: asyncio.Queue = asyncio.Queue()
+		self.tasks: List[asyncio.Task] = []
+
+	def __repr__(self) -> str:
+		return f'Peer({self.address}, height={self.height})'
+
+
+class GossipNode:
+	"""
+	Узел gossip-сети поверх BlockChain.
+
+	Новые блоки анонсируются соседям заголовком. Получив заголовок,
+	продолжающий известную цепь, узел запрашивает только недостающие блоки;
+	если связь с цепью неизвестна, он сначала синхронизирует заголовки по
+	локатору (header-first). Блоки, пришедшие раньше предыдущего, ждут его
+	среди сирот. Транзакции анонсируются пачками хешей раз в
+	announce_interval секунд.
+
+	Блоки боковых ветвей тоже принимаются и анонсируются: выбор лучшей
+	цепи и смену ветки выполняет BlockChain.accept_block (см. core.forks).
+
+	Все обращения к BlockChain выполняются в одном потоке (общем с
+	core.node.NodeService, если узел подключен к нему).
+	"""
+	def __init__(self, blockchain: BlockChain, host: str='127.0.0.1', port: int=0,
+				executor: Optional[ThreadPoolExecutor]=None, announce_interval: float=0.01,
+				seen_size: int=100000, request_timeout: float=5.0, max_queue: int=100000) -> None:
+		"""
+		Инициализация узла
+
+		:param blockchain: Блокчейн
+		:param host: Адрес для входящих соединений
+		:param port: Порт для входящих соединений (0 - любой свободный)
+		:param executor: Однопоточный исполнитель для обращений к блокчейну (по умолчанию - свой)
+		:param announce_interval: Период отправки анонсов транзакций в секундах
+		:param seen_size: Сколько хешей полученных блоков и транзакций запоминать
+		:param request_timeout: Через сколько секунд неполученный блок можно запросить снова
+		:param max_queue: Максимальная очередь исходящих сообщений соседа (сверх нее сосед отключается)
+		"""
+		self.blockchain: BlockChain = blockchain
+		self.host: str = host
+		self.port: int = port
+		self.executor: Optional[ThreadPoolExecutor] = executor
+		self.announce_interval: float = announce_interval
+		self.request_timeout: float = request_timeout
+		self.max_queue: int = max_queue
+		self.peers: List[Peer] = []
+		self.on_block: Optional[Callable[[Block], None]] = None
+		self.stats: Dict[str, int] = {
+			'bytes_sent': 0, 'bytes_received': 0, 'messages_sent': 0, 'messages_received': 0,
+			'blocks_accepted': 0, 'transactions_accepted': 0, 'duplicate_blocks': 0,
+			'duplicate_transactions': 0, 'orphans': 0, 'side_blocks': 0, 'reorganizations': 0,
+			'invalid_blocks': 0,
+		}
+
+		self._own_executor: bool = executor is None
+		self._server: Optional[asyncio.AbstractServer] = None
+		self._announcer: Optional[asyncio.Task] = None
+		self._seen_blocks = _BoundedSet(seen_size)
+		self._seen_transactions = _BoundedSet(seen_size)
+		self._requested_blocks = _Requests(request_timeout)
+		self._requested_transactions = _Requests(request_timeout)
+		self._transactions: Dict[bytes, bytes] = {}
+		self._transactions_size: int = seen_size
+		self._orphans: Dict[bytes, List[Block]] = {}
+		self._orphan_count: int = 0
+		self._hashes: Dict[bytes, int] = {}
+		self._chain_hashes: List[bytes] = []
+		self._announcements: List[bytes] = []
+
+	async def start(self, executor: Optional[ThreadPoolExecutor]=None) -> None:
+		"""
+		Запуск узла: прием входящих соединений и отправка анонсов
+
+		:param executor: Однопоточный исполнитель для обращений к блокчейну
+		"""
+		if executor is not None:
+			self.executor, self._own_executor = executor, False
+		elif self.executor is None:
+			self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='gossip-chain')
+
+		await self._chain(self._index_chain)
+		self._server = await asyncio.start_server(self._accept_peer, self.host, self.port)
+		self.port = self._server.sockets[0].getsockname()[1]
+		self._announcer = asyncio.create_task(self._announce_loop())
+
+		logger.info('Gossip node is listening on %s:%s', self.host, self.port)
+
+	async def stop(self) -> None:
+		"""
+		Остановка узла: все соединения закрываются
+		"""
+		if self._server is not None:
+			self._server.close()
+
+		for peer in list(self.peers):
+			self._drop(peer)
+
+		if self._announcer is not None:
+			self._announcer.cancel()
+
+			with suppress(asyncio.CancelledError):
+				await self._announcer
+
+			self._announcer = None
+
+		if self._server is not None:
+			await self._server.wait_closed()
+			self._server = None
+
+		if self._own_executor and self.executor is not None:
+			await asyncio.get_running_loop().run_in_executor(None, self.executor.shutdown)
+			self.executor = None
+
+	async def connect(self, host: str, port: int) -> Peer:
+		"""
+		Подключение к соседнему узлу
+
+		:param host: Адрес
+		:param port: Порт
+
+		:return: Соединение
+		"""
+		reader, writer = await asyncio.open_connection(host, port)
+
+		return await self._add_peer(reader, writer, outbound=True)
+
+	async def _chain(self, function: Callable, *args):
+		return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+	# Работа с цепью (в потоке блокчейна)
+
+	def _index_chain(self) -> None:
+		"""
+		Обновление индекса хешей блоков цепи: хеши блоков, отмененных при
+		смене ветки, удаляются, а хеши новых блоков добавляются
+		"""
+		chain = self.blockchain.chain
+		hashes = self._chain_hashes
+
+		while hashes and (len(hashes) > len(chain) or chain[len(hashes) - 1].hash != hashes[-1]):
+			del self._hashes[hashes.pop()]
+
+		for height in range(len(hashes), len(chain)):
+			block_hash = chain[height].hash
+			hashes.append(block_hash)
+			self._hashes[block_hash] = height
+
+	def _hello(self) -> bytes:
+		self._index_chain()
+		tip = self.blockchain.chain[-1]
+
+		return HELLO.pack(PROTOCOL_VERSION, tip.index, tip.hash)
+
+	def _locator(self) -> bytes:
+		"""
+		Локатор цепи: хеши 10 последних блоков, затем с удваивающимся шагом, и genesis-блока
+
+		:return: Хеши подряд
+		"""
+		self._index_chain()
+		chain = self.blockchain.chain
+		height, step, heights = len(chain) - 1, 1, []
+
+		while height > 0:
+			heights.append(height)
+
+			if len(heights) >= 10:
+				step *= 2
+
+			height -= step
+
+		heights.append(0)
+
+		return b''.join(chain[height].hash for height in heights)
+
+	def _headers_after(self, locator: List[bytes]) -> bytes:
+		"""
+		Заголовки блоков после первого общего блока из локатора
+
+		:param locator: Хеши локатора
+
+		:return: Заголовки подряд (не больше MAX_HEADERS)
+		"""
+		self._index_chain()
+		chain = self.blockchain.chain
+		start = next((self._hashes[block_hash] for block_hash in locator if block_hash in self._hashes), 0)
+		blocks = (chain[height] for height in range(start + 1, min(len(chain), start + 1 + MAX_HEADERS)))
+
+		return b''.join(HEADER.pack(block.index, block.previous_hash, block.hash) for block in blocks)
+
+	def _read_blocks(self, hashes: List[bytes]) -> List[bytes]:
+		"""
+		Сериализованные блоки цепи и боковых ветвей по хешам (неизвестные
+		хеши пропускаются)
+
+		:param hashes: Хеши блоков
+
+		:return: Блоки
+		"""
+		self._index_chain()
+		chain = self.blockchain.chain
+		read_raw = getattr(chain, 'read_raw', None)
+		result = []
+
+		for block_hash in hashes:
+			height = self._hashes.get(block_hash)
+
+			if height is not None:
+				result.append(read_raw(height) if read_raw is not None else chain[height].encode())
+			else:
+				block = self.blockchain.tree.get(block_hash)
+
+				if block is not None:
+					result.append(block.encode())
+
+		return result
+
+	def _attach(self, block: Block) -> BlockStatus:
+		"""
+		Прием полученного блока блокчейном
+
+		:param block: Блок
+
+		:return: Результат приема
+		"""
+		status = self.blockchain.accept_block(block)
+		self._index_chain()
+
+		return status
+
+	# Соединения
+
+	async def _accept_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+		peer = await self._add_peer(reader, writer, outbound=False)
+
+		with suppress(asyncio.CancelledError):
+			await asyncio.gather(*peer.tasks)
+
+	async def _add_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, outbound: bool) -> Peer:
+		peer = Peer(reader, writer, outbound)
+		self.peers.append(peer)
+		peer.tasks = [asyncio.create_task(self._write_loop(peer)), asyncio.create_task(self._read_loop(peer))]
+		self._send(peer, MSG_HELLO, await self._chain(self._hello))
+		logger.debug('Connected to peer %s', peer.address)
+
+		return peer
+
+	def _drop(self, peer: Peer) -> None:
+		"""
+		Отключение соседа
+		"""
+		if peer not in self.peers:
+			return
+
+		self.peers.remove(peer)
+		peer.writer.close()
+
+		for task in peer.tasks:
+			if task is not asyncio.current_task():
+				task.cancel()
+
+		logger.debug('Disconnected from peer %s', peer.address)
+
+	def _send(self, peer: Peer, kind: int, payload: bytes=b'') -> None:
+		"""
+		Постановка сообщения в очередь отправки соседу
+
+		:param peer: Сосед
+		:param kind: Тип сообщения
+		:param payload: Данные
+		"""
+		if peer.outgoing.qsize() >= self.max_queue:
+			logger.warning('Peer %s is too slow, disconnected', peer.address)
+			self._drop(peer)
+			return
+
+		peer.outgoing.put_nowait(FRAME.pack(len(payload), kind) + payload)
+
+	async def _write_loop(self, peer: Peer) -> None:
+		try:
+			while True:
+				frame = await peer.outgoing.get()
+				peer.writer.write(frame)
+				self.stats['bytes_sent'] += len(frame)
+				self.stats['messages_sent'] += 1
+
+				if peer.outgoing.empty():
+					await peer.writer.drain()
+		except (ConnectionError, RuntimeError):
+			self._drop(peer)
+
+	async def _read_loop(self, peer: Peer) -> None:
+		try:
+			while True:
+				length, kind = FRAME.unpack(await peer.reader.readexactly(FRAME.size))
+
+				if length > MAX_FRAME:
+					raise ValueError(f'frame of {length} bytes is too large')
+
+				payload = await peer.reader.readexactly(length)
+				self.stats['bytes_received'] += FRAME.size + length
+				self.stats['messages_received'] += 1
+
+				await self._handle(peer, kind, payload)
+		except (asyncio.IncompleteReadError, ConnectionError, ValueError, struct.error) as e:
+			logger.debug('Peer %s: %s', peer.address, e)
+		finally:
+			self._drop(peer)
+
+	# Обработка сообщений
+
+	async def _handle(self, peer: Peer, kind: int, payload: bytes) -> None:
+		if kind == MSG_HELLO:
+			version, peer.height, peer.tip = HELLO.unpack(payload)
+
+			if version != PROTOCOL_VERSION:
+				raise ValueError(f'unsupported protocol version {version}')
+
+			if peer.tip not in self._hashes and peer.height >= len(self._hashes):
+				await self._request_headers(peer)
+		elif kind == MSG_HEADERS:
+			await self._on_headers(peer, payload)
+		elif kind == MSG_GET_HEADERS:
+			self._send(peer, MSG_HEADERS, await self._chain(self._headers_after, _split_hashes(payload)))
+		elif kind == MSG_GET_BLOCKS:
+			for data in await self._chain(self._read_blocks, _split_hashes(payload)[:MAX_BLOCKS_PER_REQUEST]):
+				self._send(peer, MSG_BLOCK, data)
+		elif kind == MSG_BLOCK:
+			await self._on_block(peer, payload)
+		elif kind == MSG_INV_TX:
+			self._on_transaction_inventory(peer, _split_hashes(payload))
+		elif kind == MSG_GET_TX:
+			found = [self._transactions[key] for key in _split_hashes(payload) if key in self._transactions]
+
+			if found:
+				self._send(peer, MSG_TX, b''.join(found))
+		elif kind == MSG_TX:
+			await self._on_transactions(peer, payload)
+		else:
+			raise ValueError(f'unknown message type {kind}')
+
+	async def _request_headers(self, peer: Peer) -> None:
+		peer.syncing = True
+		self._send(peer, MSG_GET_HEADERS, await self._chain(self._locator))
+
+	def _request_blocks(self, peer: Peer, hashes: List[bytes]) -> None:
+		"""
+		Запрос блоков, которые еще не запрошены у других соседей
+		"""
+		now = monotonic()
+		wanted = [block_hash for block_hash in hashes if self._requested_blocks.request(block_hash, now)]
+
+		for i in range(0, len(wanted), MAX_BLOCKS_PER_REQUEST):
+			self._send(peer, MSG_GET_BLOCKS, b''.join(wanted[i:i + MAX_BLOCKS_PER_REQUEST]))
+
+	def _is_pending(self, block_hash: bytes) -> bool:
+		"""
+		Блок уже получен (в цепи, в боковой ветви или среди сирот) или ожидается от соседа
+		"""
+		return block_hash in self._hashes or block_hash in self._seen_blocks or block_hash in self._requested_blocks
+
+	async def _on_headers(self, peer: Peer, payload: bytes) -> None:
+		if len(payload) % HEADER.size:
+			raise ValueError('malformed headers')
+
+		syncing, peer.syncing = peer.syncing, False
+		headers = [HEADER.unpack_from(payload, offset) for offset in range(0, len(payload), HEADER.size)]
+
+		if not headers:
+			return
+
+		for _, _, block_hash in headers:
+			peer.known_blocks.add(block_hash)
+
+		peer.height = max(peer.height, headers[-1][0])
+		missing = [header for header in headers if header[2] not in self._hashes]
+
+		if missing:
+			_, previous_hash, _ = missing[0]
+			height = self._hashes.get(previous_hash)
+
+			if height is not None and height < len(self._hashes) - 1 - self.blockchain.config.fork_depth:
+				logger.info('Peer %s is on a branch from block %s, deeper than the fork depth', peer.address, height)
+				return
+
+			if height is None and not self._is_pending(previous_hash):
+				if syncing:
+					logger.warning('Peer %s has an incompatible chain, disconnected', peer.address)
+					self._drop(peer)
+				else:
+					await self._request_headers(peer)
+
+				return
+
+			self._request_blocks(peer, [block_hash for _, _, block_hash in missing])
+
+		if len(headers) == MAX_HEADERS:
+			peer.syncing = True
+			self._send(peer, MSG_GET_HEADERS, headers[-1][2])
+
+	async def _on_block(self, peer: Peer, payload: bytes) -> None:
+		block = Block.decode(payload)
+		block_hash = block.hash
+		self._requested_blocks.pop(block_hash)
+		peer.known_blocks.add(block_hash)
+
+		if block_hash in self._seen_blocks:
+			self.stats['duplicate_blocks'] += 1
+			return
+
+		self._seen_blocks.add(block_hash)
+		blocks = [block]
+
+		while blocks:
+			block = blocks.pop()
+			status = await self._chain(self._attach, block)
+
+			if status == BlockStatus.ORPHAN:
+				self.stats['orphans'] += 1
+
+				self._add_orphan(block)
+				await self._request_headers(peer)
+			elif status == BlockStatus.INVALID:
+				self.stats['invalid_blocks'] += 1
+			elif status != BlockStatus.DUPLICATE:
+				if status == BlockStatus.SIDE:
+					self.stats['side_blocks'] += 1
+				elif status == BlockStatus.REORGANIZED:
+					self.stats['reorganizations'] += 1
+					logger.info('Switched to the branch of block %s from %s', LazyHex(block.hash), peer.address)
+
+				self._accepted(block)
+				children = self._orphans.pop(block.hash, [])
+				self._orphan_count -= len(children)
+				blocks.extend(children)
+
+	def _add_orphan(self, block: Block) -> None:
+		"""
+		Сохранение блока, предок которого еще не получен. Если сирот больше
+		MAX_ORPHANS, самая старая вытесняется и забывается: ее можно получить
+		снова при синхронизации заголовков.
+		"""
+		if self._orphan_count >= MAX_ORPHANS:
+			parent = next(iter(self._orphans))
+			siblings = self._orphans[parent]
+			self._seen_blocks.discard(siblings.pop(0).hash)
+			self._orphan_count -= 1
+
+			if not siblings:
+				del self._orphans[parent]
+
+		self._orphans.setdefault(block.previous_hash, []).append(block)
+		self._orphan_count += 1
+
+	def _accepted(self, block: Block) -> None:
+		"""
+		Учет блока, принятого блокчейном (в цепь или в боковую ветвь):
+		транзакции блока больше не запрашиваются, соседям уходит анонс
+		"""
+		self.stats['blocks_accepted'] += 1
+
+		for transaction in block.transactions:
+			self._seen_transactions.add(transaction_id(transaction.encode()))
+
+		if self.on_block is not None:
+			self.on_block(block)
+
+		self._announce_header(block)
+
+	def _announce_header(self, block: Block) -> None:
+		block_hash = block.hash
+		self._seen_blocks.add(block_hash)
+		header = HEADER.pack(block.index, block.previous_hash, block_hash)
+
+		for peer in list(self.peers):
+			if block_hash not in peer.known_blocks:
+				peer.known_blocks.add(block_hash)
+				self._send(peer, MSG_HEADERS, header)
+
+	def _on_transaction_inventory(self, peer: Peer, keys: List[bytes]) -> None:
+		now = monotonic()
+		wanted = []
+
+		for key in keys:
+			peer.known_transactions.add(key)
+
+			if key in self._seen_transactions:
+				self.stats['duplicate_transactions'] += 1
+			elif self._requested_transactions.request(key, now):
+				wanted.append(key)
+
+		if wanted:
+			self._send(peer, MSG_GET_TX, b''.join(wanted))
+
+	async def _on_transactions(self, peer: Peer, payload: bytes) -> None:
+		if len(payload) % serialization.TX_SIZE:
+			raise ValueError('malformed transactions')
+
+		received: List[Tuple[bytes, bytes, Transaction]] = []
+
+		for offset in range(0, len(payload), serialization.TX_SIZE):
+			data = payload[offset:offset + serialization.TX_SIZE]
+			key = transaction_id(data)
+			self._requested_transactions.pop(key)
+			peer.known_transactions.add(key)
+
+			if key in self._seen_transactions:
+				self.stats['duplicate_transactions'] += 1
+				continue
+
+			self._seen_transactions.add(key)
+			received.append((key, data, Transaction.decode(data)))
+
+		if not received:
+			return
+
+		results = await self._chain(self.blockchain.receive_transactions, [transaction for _, _, transaction in received])
+
+		for (key, data, _), accepted in zip(received, results):
+			if accepted:
+				self.stats['transactions_accepted'] += 1
+				self._remember_transaction(key, data)
+
+	# Анонсы
+
+	def _remember_transaction(self, key: bytes, data: bytes) -> None:
+		"""
+		Запоминание транзакции для ответа на GET_TX и постановка ее анонса в очередь
+		"""
+		if len(self._transactions) >= self._transactions_size:
+			self._transactions.pop(next(iter(self._transactions)))
+
+		self._transactions[key] = data
+		self._announcements.append(key)
+
+	def announce_transactions(self, transactions: List[Transaction]) -> None:
+		"""
+		Анонс транзакций, принятых блокчейном этого узла
+
+		:param transactions: Транзакции
+		"""
+		for transaction in transactions:
+			data = transaction.encode()
+			key = transaction_id(data)
+			self._seen_transactions.add(key)
+			self._remember_transaction(key, data)
+
+	async def announce_block(self, block: Block) -> None:
+		"""
+		Анонс блока, добавленного в цепь этого узла (например, добытого)
+
+		:param block: Блок
+		"""
+		await self._chain(self._index_chain)
+		self._accepted(block)
+
+	async def _announce_loop(self) -> None:
+		"""
+		Периодическая отправка анонсов транзакций пачками
+		"""
+		while True:
+			await asyncio.sleep(self.announce_interval)
+
+			if not self._announcements:
+				continue
+
+			keys, self._announcements = self._announcements, []
+
+			for peer in list(self.peers):
+				fresh = [key for key in keys if key not in peer.known_transactions]
+
+				for key in fresh:
+					peer.known_transactions.add(key)
+
+				if fresh:
+					self._send(peer, MSG_INV_TX, b''.join(fresh))
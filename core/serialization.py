@@ -0,0 +1,467 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+Компактный двоичный формат транзакций и блоков.
+
+Все целые числа записываются в порядке big-endian.
+
+Транзакция (218 байт, фиксированный размер):
+ + версия формата (1 байт)
+ + публичный ключ отправителя (64 байта)
+ + публичный ключ получателя (64 байта)
+ + сумма в базовых единицах (8 байт)
+ + комиссия в базовых единицах (8 байт)
+ + метка времени в микросекундах от эпохи Unix (8 байт)
+ + флаги (1 байт, бит 0 - транзакция подписана)
+ + сигнатура (64 байта, нули для неподписанной транзакции)
+
+Подписываются первые 153 байта транзакции (все до флагов).
+
+Блок - заголовок и транзакции:
+ + версия формата (1 байт)
+ + индекс (8 байт)
+ + хеш предыдущего блока (32 байта)
+ + метка времени в микросекундах (8 байт)
+ + корень дерева Меркла транзакций (32 байта, см. core.merkle)
+ + длина мета-данных (4 байта) и мета-данные
+ + nonce (8 байт)
+ + количество транзакций (4 байта) и транзакции
+
+Хеш блока - SHA-256 заголовка (все до количества транзакций): размер
+хешируемых данных не зависит от количества транзакций, а транзакции
+входят в хеш через корень дерева Меркла. Nonce - последнее поле
+заголовка, поэтому при добыче остальная часть заголовка сериализуется
+один раз.
+"""
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, ROUND_HALF_EVEN
+from typing import List, Optional, Tuple, Union
+import struct
+
+TRANSACTION_FORMAT_VERSION = 1
+BLOCK_FORMAT_VERSION = 2
+
+# Количество базовых единиц в одной монете
+BASE_UNITS = 10 ** 8
+_BASE_EXPONENT = 8
+
+TX_PAYLOAD = struct.Struct('>B64s64sqqq')
+TX_SIGNATURE = struct.Struct('>B64s')
+TX_SIZE = TX_PAYLOAD.size + TX_SIGNATURE.size
+BLOCK_HEADER = struct.Struct('>BQ32sq32s')
+COUNT = struct.Struct('>I')
+NONCE = struct.Struct('>Q')
+
+_FLAG_SIGNED = 0x01
+_EMPTY_SIGNATURE = bytes(64)
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Теги типов значений в мета-данных
+_TAG_NONE = 0
+_TAG_FALSE = 1
+_TAG_TRUE = 2
+_TAG_INT = 3
+_TAG_FLOAT = 4
+_TAG_STR = 5
+_TAG_BYTES = 6
+_TAG_LIST = 7
+_TAG_DICT = 8
+_FLOAT = struct.Struct('>d')
+
+# Разобранная транзакция: отправитель, получатель, сумма, комиссия, метка времени, сигнатура
+TransactionFields = Tuple[bytes, bytes, int, int, int, Optional[bytes]]
+
+
+def to_base_units(amount: Union[int, float, str, Decimal]) -> int:
+	"""
+	Перевод суммы в монетах в целое число базовых единиц.
+
+	Целые числа, строки и Decimal переводятся точно; float - по его
+	кратчайшему десятичному представлению (0.1 -> 10000000). Доли базовой
+	единицы округляются до ближайшего целого.
+
+	:param amount: Сумма в монетах
+
+	:return: Сумма в базовых единицах
+	"""
+	if isinstance(amount, int):
+		return amount * BASE_UNITS
+
+	if isinstance(amount, float):
+		amount = repr(amount)
+
+	return int(Decimal(amount).scaleb(_BASE_EXPONENT).to_integral_value(rounding=ROUND_HALF_EVEN))
+
+
+def from_base_units(units: int) -> Decimal:
+	"""
+	Перевод суммы в базовых единицах в монеты (точно, без потери знаков)
+
+	:param units: Сумма в базовых единицах
+
+	:return: Сумма в монетах
+	"""
+	return Decimal(units).scaleb(-_BASE_EXPONENT)
+
+
+def format_amount(units: int) -> str:
+	"""
+	Сумма в базовых единицах в виде строки монет с фиксированной точкой
+
+	:param units: Сумма в базовых единицах
+
+	:return: Строка (например, '0.00000001', а не '1E-8')
+	"""
+	return f'{from_base_units(units):f}'
+
+
+def datetime_to_micros(moment: datetime) -> int:
+	"""
+	Метка времени в микросекундах от эпохи Unix.
+
+	Время без часового пояса записывается как есть, время с часовым
+	поясом предварительно переводится в UTC.
+
+	:param moment: Метка времени
+
+	:return: Количество микросекунд
+	"""
+	if moment.tzinfo is not None:
+		moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+	return (moment - _EPOCH) // _MICROSECOND
+
+
+def micros_to_datetime(micros: int) -> datetime:
+	"""
+	Метка времени из микросекунд от эпохи Unix
+
+	:param micros: Количество микросекунд
+
+	:return: Метка времени (без часового пояса)
+	"""
+	return _EPOCH + timedelta(microseconds=micros)
+
+
+def encode_transaction_payload(sender: bytes, recipient: bytes, amount: int, fee: int, timestamp: int) -> bytes:
+	"""
+	Подписываемая часть транзакции
+
+	:param sender: Публичный ключ отправителя (64 байта)
+	:param recipient: Публичный ключ получателя (64 байта)
+	:param amount: Сумма в базовых единицах
+	:param fee: Комиссия в базовых единицах
+	:param timestamp: Метка времени в микросекундах
+
+	:return: 153 байта
+	"""
+	if len(sender) != 64 or len(recipient) != 64:
+		raise ValueError('public keys must be 64 raw bytes')
+
+	return TX_PAYLOAD.pack(TRANSACTION_FORMAT_VERSION, sender, recipient, amount, fee, timestamp)
+
+
+def encode_transaction(payload: bytes, signature: Optional[bytes]) -> bytes:
+	"""
+	Полная транзакция: подписываемая часть, флаги и сигнатура
+
+	:param payload: Подписываемая часть транзакции
+	:param signature: Сигнатура (64 байта) или None
+
+	:return: 218 байт
+	"""
+	if signature is None:
+		return payload + TX_SIGNATURE.pack(0, _EMPTY_SIGNATURE)
+
+	if len(signature) != 64:
+		raise ValueError('signature must be 64 raw bytes')
+
+	return payload + TX_SIGNATURE.pack(_FLAG_SIGNED, signature)
+
+
+def decode_transaction(data: bytes, offset: int=0) -> TransactionFields:
+	"""
+	Разбор транзакции
+
+	:param data: Байты
+	:param offset: Смещение транзакции в данных
+
+	:return: Кортеж (отправитель, получатель, сумма, комиссия, метка времени, сигнатура)
+	"""
+	version, sender, recipient, amount, fee, timestamp = TX_PAYLOAD.unpack_from(data, offset)
+
+	if version != TRANSACTION_FORMAT_VERSION:
+		raise ValueError(f'unsupported transaction format version: {version}')
+
+	flags, signature = TX_SIGNATURE.unpack_from(data, offset + TX_PAYLOAD.size)
+
+	return sender, recipient, amount, fee, timestamp, signature if flags & _FLAG_SIGNED else None
+
+
+def _encode_value(value, out: list) -> None:
+	"""
+	Детерминированная запись значения мета-данных
+
+	:param value: Значение
+	:param out: Список, в который дописываются байты
+	"""
+	if value is None:
+		out.append(bytes((_TAG_NONE,)))
+	elif value is True or value is False:
+		out.append(bytes((_TAG_TRUE if value else _TAG_FALSE,)))
+	elif isinstance(value, int):
+		raw = value.to_bytes((value.bit_length() + 8) // 8, 'big', signed=True)
+		out.append(bytes((_TAG_INT,)) + COUNT.pack(len(raw)) + raw)
+	elif isinstance(value, float):
+		out.append(bytes((_TAG_FLOAT,)) + _FLOAT.pack(value))
+	elif isinstance(value, str):
+		raw = value.encode()
+		out.append(bytes((_TAG_STR,)) + COUNT.pack(len(raw)) + raw)
+	elif isinstance(value, (bytes, bytearray)):
+		out.append(bytes((_TAG_BYTES,)) + COUNT.pack(len(value)) + bytes(value))
+	elif isinstance(value, (list, tuple)):
+		out.append(bytes((_TAG_LIST,)) + COUNT.pack(len(value)))
+
+		for item in value:
+			_encode_value(item, out)
+	elif isinstance(value, dict):
+		items = []
+
+		for key, item in value.items():
+			if not isinstance(key, str):
+				raise TypeError(f'metadata keys must be strings, got {type(key).__name__}')
+
+			items.append((key.encode(), item))
+
+		items.sort(key=lambda pair: pair[0])
+		out.append(bytes((_TAG_DICT,)) + COUNT.pack(len(items)))
+
+		for key, item in items:
+			out.append(COUNT.pack(len(key)) + key)
+			_encode_value(item, out)
+	else:
+		raise TypeError(f'unsupported metadata value type: {type(value).__name__}')
+
+
+def _decode_value(data: bytes, offset: int) -> Tuple[object, int]:
+	"""
+	Разбор значения мета-данных
+
+	:param data: Байты
+	:param offset: Смещение значения
+
+	:return: Кортеж (значение, смещение после значения)
+	"""
+	tag = data[offset]
+	offset += 1
+
+	if tag == _TAG_NONE:
+		return None, offset
+	if tag in (_TAG_FALSE, _TAG_TRUE):
+		return tag == _TAG_TRUE, offset
+	if tag == _TAG_FLOAT:
+		return _FLOAT.unpack_from(data, offset)[0], offset + _FLOAT.size
+
+	(length,) = COUNT.unpack_from(data, offset)
+	offset += COUNT.size
+
+	if tag == _TAG_INT:
+		return int.from_bytes(data[offset:offset + length], 'big', signed=True), offset + length
+	if tag == _TAG_STR:
+		return bytes(data[offset:offset + length]).decode(), offset + length
+	if tag == _TAG_BYTES:
+		return bytes(data[offset:offset + length]), offset + length
+	if tag == _TAG_LIST:
+		items = []
+
+		for _ in range(length):
+			item, offset = _decode_value(data, offset)
+			items.append(item)
+
+		return items, offset
+	if tag == _TAG_DICT:
+		result = {}
+
+		for _ in range(length):
+			(key_length,) = COUNT.unpack_from(data, offset)
+			offset += COUNT.size
+			key = bytes(data[offset:offset + key_length]).decode()
+			result[key], offset = _decode_value(data, offset + key_length)
+
+		return result, offset
+
+	raise ValueError(f'unknown metadata tag: {tag}')
+
+
+def encode_metadata(metadata) -> bytes:
+	"""
+	Детерминированная запись мета-данных блока.
+
+	Поддерживаются None, bool, int, float, str, bytes, списки и словари со
+	строковыми ключами (ключи записываются в отсортированном порядке).
+
+	:param metadata: Мета-данные
+
+	:return: Байты
+	"""
+	out: list = []
+	_encode_value(metadata, out)
+
+	return b''.join(out)
+
+
+def decode_metadata(data: bytes):
+	"""
+	Разбор мета-данных блока
+
+	:param data: Байты
+
+	:return: Мета-данные
+	"""
+	value, _ = _decode_value(data, 0)
+
+	return value
+
+
+def encode_header_prefix(index: int, previous_hash: bytes, timestamp: int, merkle_root: bytes, metadata) -> bytes:
+	"""
+	Заголовок блока без nonce
+
+	:param index: Индекс блока
+	:param previous_hash: Хеш предыдущего блока (32 байта)
+	:param timestamp: Метка времени в микросекундах
+	:param merkle_root: Корень дерева Меркла транзакций (32 байта)
+	:param metadata: Мета-данные
+
+	:return: Байты
+	"""
+	if len(previous_hash) != 32:
+		raise ValueError('previous hash must be 32 bytes')
+
+	if len(merkle_root) != 32:
+		raise ValueError('merkle root must be 32 bytes')
+
+	metadata = encode_metadata(metadata)
+
+	return b''.join((BLOCK_HEADER.pack(BLOCK_FORMAT_VERSION, index, previous_hash, timestamp, merkle_root),
+					COUNT.pack(len(metadata)), metadata))
+
+
+def encode_nonce(nonce: int) -> bytes:
+	"""
+	Запись nonce (последнее поле заголовка блока)
+
+	:param nonce: Nonce
+
+	:return: 8 байт
+	"""
+	return NONCE.pack(nonce)
+
+
+def encode_block_body(transactions: List[bytes]) -> bytes:
+	"""
+	Транзакции блока (записываются после заголовка)
+
+	:param transactions: Сериализованные транзакции
+
+	:return: Байты
+	"""
+	return b''.join((COUNT.pack(len(transactions)), *transactions))
+
+
+def _header_size(data: bytes) -> int:
+	"""
+	Размер заголовка блока (с nonce)
+
+	:param data: Байты блока
+
+	:return: Размер в байтах
+	"""
+	version = data[0]
+
+	if version != BLOCK_FORMAT_VERSION:
+		raise ValueError(f'unsupported block format version: {version}')
+
+	(metadata_length,) = COUNT.unpack_from(data, BLOCK_HEADER.size)
+
+	return BLOCK_HEADER.size + COUNT.size + metadata_length + NONCE.size
+
+
+def block_header(data: bytes) -> bytes:
+	"""
+	Заголовок сериализованного блока - данные, по которым вычисляется хеш
+
+	:param data: Байты блока
+
+	:return: Байты заголовка
+	"""
+	return bytes(data[:_header_size(data)])
+
+
+def block_transactions(data: bytes) -> List[bytes]:
+	"""
+	Сериализованные транзакции блока без их разбора
+
+	:param data: Байты блока
+
+	:return: Список транзакций
+	"""
+	offset = _header_size(data)
+	(count,) = COUNT.unpack_from(data, offset)
+	offset += COUNT.size
+
+	if len(data) < offset + count * TX_SIZE:
+		raise ValueError('block is truncated')
+
+	return [bytes(data[offset + i * TX_SIZE:offset + (i + 1) * TX_SIZE]) for i in range(count)]
+
+
+def decode_header(data: bytes) -> Tuple[int, bytes, int, bytes, object, int, int]:
+	"""
+	Разбор заголовка блока (например, полученного без транзакций)
+
+	:param data: Байты заголовка или всего блока
+
+	:return: Кортеж (индекс, хеш предыдущего блока, метка времени, корень дерева Меркла,
+		мета-данные, nonce, размер заголовка)
+	"""
+	size = _header_size(data)
+	_, index, previous_hash, timestamp, merkle_root = BLOCK_HEADER.unpack_from(data, 0)
+	metadata = decode_metadata(data[BLOCK_HEADER.size + COUNT.size:size - NONCE.size])
+	(nonce,) = NONCE.unpack_from(data, size - NONCE.size)
+
+	return index, previous_hash, timestamp, merkle_root, metadata, nonce, size
+
+
+def decode_block(data: bytes) -> Tuple[int, bytes, int, bytes, object, List[TransactionFields], int]:
+	"""
+	Разбор блока
+
+	:param data: Байты блока
+
+	:return: Кортеж (индекс, хеш предыдущего блока, метка времени, корень дерева Меркла,
+		мета-данные, транзакции, nonce)
+	"""
+	index, previous_hash, timestamp, merkle_root, metadata, nonce, offset = decode_header(data)
+	(count,) = COUNT.unpack_from(data, offset)
+	offset += COUNT.size
+	transactions = [decode_transaction(data, offset + i * TX_SIZE) for i in range(count)]
+
+	return index, previous_hash, timestamp, merkle_root, metadata, transactions, nonce
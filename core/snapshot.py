@@ -0,0 +1,161 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+from hashlib import sha256
+from typing import Iterator, List, Optional, Tuple
+import os
+import re
+import struct
+import zlib
+from core import serialization
+
+SNAPSHOT_FORMAT_VERSION = 3
+
+# Заголовок файла снимка: сигнатура формата, версия, высота блока и хеш состояния
+SNAPSHOT_HEADER = struct.Struct('>4sBQ32s')
+_MAGIC = b'CPNS'
+_FILE_NAME = re.compile(r'^snapshot-(\d+)\.bin$')
+
+
+def state_hash(image: bytes) -> bytes:
+	"""
+	Хеш состояния
+
+	:param image: Сериализованное состояние
+
+	:return: SHA-256 (32 байта)
+	"""
+	return sha256(image).digest()
+
+
+class SnapshotStore:
+	"""
+	Снимки состояния блокчейна на диске.
+
+	Состояние (словарь из простых значений) сериализуется детерминированно
+	(см. core.serialization.encode_metadata), сжимается zlib и
+	записывается вместе с высотой блока и хешем состояния. Файл сначала
+	пишется во временный и затем атомарно переименовывается, поэтому
+	сбой во время записи не портит уже сохраненные снимки.
+
+	При чтении хеш состояния сверяется с заголовком; поврежденные снимки
+	пропускаются. Хранятся только последние keep снимков.
+	"""
+	def __init__(self, directory: str, keep: int=2, level: int=6) -> None:
+		"""
+		Инициализация хранилища снимков
+
+		:param directory: Директория снимков
+		:param keep: Количество хранимых снимков
+		:param level: Уровень сжатия zlib
+		"""
+		os.makedirs(directory, exist_ok=True)
+
+		self.directory: str = directory
+		self.keep: int = keep
+		self.level: int = level
+
+	def _path(self, height: int) -> str:
+		return os.path.join(self.directory, f'snapshot-{height:012d}.bin')
+
+	def heights(self) -> List[int]:
+		"""
+		Высоты сохраненных снимков (по убыванию)
+
+		:return: Список высот
+		"""
+		heights = []
+
+		for name in os.listdir(self.directory):
+			match = _FILE_NAME.match(name)
+
+			if match:
+				heights.append(int(match.group(1)))
+
+		return sorted(heights, reverse=True)
+
+	def save(self, height: int, state: dict) -> bytes:
+		"""
+		Сохранение снимка состояния
+
+		:param height: Высота последнего блока, учтенного в состоянии
+		:param state: Состояние
+
+		:return: Хеш состояния
+		"""
+		image = serialization.encode_metadata(state)
+		digest = state_hash(image)
+		path = self._path(height)
+		temporary = path + '.tmp'
+
+		with open(temporary, 'wb') as file:
+			file.write(SNAPSHOT_HEADER.pack(_MAGIC, SNAPSHOT_FORMAT_VERSION, height, digest))
+			file.write(zlib.compress(image, self.level))
+			file.flush()
+			os.fsync(file.fileno())
+
+		os.replace(temporary, path)
+		self._prune()
+
+		return digest
+
+	def load(self, height: int) -> Optional[dict]:
+		"""
+		Загрузка снимка с проверкой хеша состояния
+
+		:param height: Высота снимка
+
+		:return: Состояние, либо None, если снимок отсутствует или поврежден
+		"""
+		try:
+			with open(self._path(height), 'rb') as file:
+				data = file.read()
+
+			magic, version, stored_height, digest = SNAPSHOT_HEADER.unpack_from(data)
+
+			if magic != _MAGIC or version != SNAPSHOT_FORMAT_VERSION or stored_height != height:
+				return None
+
+			image = zlib.decompress(data[SNAPSHOT_HEADER.size:])
+		except (OSError, struct.error, zlib.error):
+			return None
+
+		if state_hash(image) != digest:
+			return None
+
+		return serialization.decode_metadata(image)
+
+	def snapshots(self) -> Iterator[Tuple[int, dict]]:
+		"""
+		Целые снимки, начиная с самого нового
+
+		:return: Генератор кортежей (высота, состояние)
+		"""
+		for height in self.heights():
+			state = self.load(height)
+
+			if state is not None:
+				yield height, state
+
+	def _prune(self) -> None:
+		"""
+		Удаление старых снимков сверх заданного количества
+		"""
+		for height in self.heights()[self.keep:]:
+			os.remove(self._path(height))
@@ -0,0 +1,347 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+from collections import deque
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+from core.consensus import StakePool, stake_change
+from core.exceptions import BlockChainException, InsufficientFundsException, InvalidTransferException
+
+# Перевод внутри блока: отправитель, получатель, сумма, комиссия
+Transfer = Tuple[bytes, bytes, int, int]
+
+# Запись журнала: ключ счета, изменение баланса блоком и признак счета, созданного блоком
+JournalEntry = Tuple[bytes, int, bool]
+
+
+def transfer_debit(recipient: bytes, amount: int, fee: int) -> Tuple[int, int]:
+	"""
+	Средства отправителя, которые нужны для перевода
+
+	:param recipient: Получатель
+	:param amount: Сумма
+	:param fee: Комиссия
+
+	:return: Кортеж (сумма из доступного остатка, сумма из ставки): перевод
+		и блокировка в ставке тратят доступный остаток, снятие ставки -
+		только комиссию из него
+	"""
+	change = stake_change(recipient, amount)
+
+	if change < 0:
+		return fee, -change
+
+	return amount + fee, 0
+
+
+class AccountState:
+	"""
+	Состояние счетов: баланс по сырым байтам публичного ключа.
+
+	Баланс счета и общий баланс всех счетов читаются за O(1). Блоки
+	применяются атомарно: сначала все переводы блока проверяются на
+	копии затронутых счетов, и только если средств хватает на все, новые
+	балансы записываются в состояние. Для каждого примененного блока
+	сохраняется журнал изменений балансов и ставок, поэтому последние блоки
+	можно отменить (например, при смене ветки цепи) без пересчета с нуля.
+	Журнал хранит изменения, а не прежние значения: изменения вне блоков
+	(set_balance, credit) переживают отмену блока.
+
+	Средства транзакций, ожидающих в мемпуле, резервируются: они остаются
+	на балансе до применения блока, но не входят в доступный остаток.
+	Так же блокируются ставки валидаторов (см. core.consensus): ставка
+	меняется транзакциями ставки в блоках и отменяется вместе с блоком.
+
+	Все суммы - целые числа базовых единиц (см. core.serialization),
+	поэтому балансы и общий итог не накапливают ошибок округления.
+	"""
+	def __init__(self, journal_depth: int=100) -> None:
+		"""
+		Инициализация пустого состояния
+
+		:param journal_depth: Количество последних блоков, которые можно отменить
+		"""
+		self._balances: Dict[bytes, int] = {}
+		self._reserved: Dict[bytes, int] = {}
+		self._unlocking: Dict[bytes, int] = {}
+		self._journals: Deque[Tuple[int, List[JournalEntry], List[Tuple[bytes, int]]]] = deque(maxlen=journal_depth)
+		self.stakes: StakePool = StakePool()
+		self.total: int = 0
+
+	def balance(self, key: bytes) -> int:
+		"""
+		Баланс счета
+
+		:param key: Публичный ключ
+
+		:return: Баланс (0 для неизвестного счета)
+		"""
+		return self._balances.get(key, 0)
+
+	def available(self, key: bytes) -> int:
+		"""
+		Доступный остаток: баланс без средств, зарезервированных транзакциями
+		мемпула и заблокированных в ставке
+
+		:param key: Публичный ключ
+
+		:return: Доступный остаток
+		"""
+		return self._balances.get(key, 0) - self._reserved.get(key, 0) - self.stakes.stake_of(key)
+
+	def set_balance(self, key: bytes, value: int) -> None:
+		"""
+		Установка баланса счета вне блоков (начальный баланс кошелька и т.п.).
+		Изменение не попадает в журнал и не отменяется.
+
+		:param key: Публичный ключ
+		:param value: Новый баланс
+		"""
+		self.total += value - self._balances.get(key, 0)
+		self._balances[key] = value
+
+	def credit(self, key: bytes, amount: int) -> None:
+		"""
+		Зачисление средств на счет вне блоков
+
+		:param key: Публичный ключ
+		:param amount: Сумма
+		"""
+		self.set_balance(key, self._balances.get(key, 0) + amount)
+
+	def reserve(self, key: bytes, amount: int, unlock: int=0) -> bool:
+		"""
+		Резервирование средств под транзакцию мемпула (см. transfer_debit)
+
+		:param key: Публичный ключ отправителя
+		:param amount: Сумма из доступного остатка
+		:param unlock: Сумма, снимаемая из ставки
+
+		:return: True, если доступного остатка и ставки хватило
+		"""
+		if self.available(key) < amount or self.stakes.stake_of(key) - self._unlocking.get(key, 0) < unlock:
+			return False
+
+		self._reserved[key] = self._reserved.get(key, 0) + amount
+
+		if unlock:
+			self._unlocking[key] = self._unlocking.get(key, 0) + unlock
+
+		return True
+
+	def release(self, key: bytes, amount: int, unlock: int=0) -> None:
+		"""
+		Снятие резерва (транзакция вошла в блок или покинула мемпул)
+
+		:param key: Публичный ключ отправителя
+		:param amount: Сумма из доступного остатка
+		:param unlock: Сумма, снимаемая из ставки
+		"""
+		for reserved, value in ((self._reserved, amount), (self._unlocking, unlock)):
+			rest = reserved.get(key, 0) - value
+
+			if rest > 0:
+				reserved[key] = rest
+			else:
+				reserved.pop(key, None)
+
+	def release_all(self) -> None:
+		"""
+		Снятие всех резервов (например, перед повторным резервированием
+		средств под мемпул после смены ветки цепи)
+		"""
+		self._reserved.clear()
+		self._unlocking.clear()
+
+	def lock(self, key: bytes, amount: int) -> bool:
+		"""
+		Блокировка средств в ставке вне блоков (например, при загрузке снимка).
+		Изменение не попадает в журнал и не отменяется.
+
+		:param key: Публичный ключ
+		:param amount: Сумма
+
+		:return: True, если доступного остатка хватило
+		"""
+		if amount <= 0 or self.available(key) < amount:
+			return False
+
+		self.stakes.stake(key, amount)
+
+		return True
+
+	def unlock(self, key: bytes, amount: int) -> None:
+		"""
+		Снятие блокировки средств вне блоков (не больше ставки)
+
+		:param key: Публичный ключ
+		:param amount: Сумма
+		"""
+		amount = min(amount, self.stakes.stake_of(key))
+
+		if amount > 0:
+			self.stakes.unstake(key, amount)
+
+	def locked(self, key: bytes) -> int:
+		"""
+		Средства счета, заблокированные в ставке
+
+		:param key: Публичный ключ
+
+		:return: Сумма
+		"""
+		return self.stakes.stake_of(key)
+
+	def apply_block(self, height: int, transfers: Iterable[Transfer], miner: Optional[bytes]=None,
+					reward: int=0) -> None:
+		"""
+		Атомарное применение блока: с отправителей списываются сумма и
+		комиссия, получателям зачисляется сумма, майнеру - награда.
+		Транзакция ставки (см. core.consensus.stake_change) вместо перевода
+		блокирует сумму в ставке отправителя или снимает ее оттуда; комиссия
+		списывается так же, как у перевода.
+
+		Если хотя бы одному отправителю не хватает средств (средства,
+		заблокированные в ставке, списать нельзя), снимается больше ставки
+		или сумма перевода не положительна, состояние не меняется.
+
+		:param height: Высота блока
+		:param transfers: Переводы блока
+		:param miner: Публичный ключ майнера (None - без награды)
+		:param reward: Награда майнеру
+
+		:raises InsufficientFundsException: Если у отправителя недостаточно средств или ставки
+		:raises InvalidTransferException: Если сумма перевода не положительна или комиссия отрицательна
+		"""
+		changes: Dict[bytes, int] = {}
+		stakes: Dict[bytes, int] = {}
+
+		def get(key: bytes) -> int:
+			return self._balances.get(key, 0) + changes.get(key, 0)
+
+		def locked(key: bytes) -> int:
+			return self.stakes.stake_of(key) + stakes.get(key, 0)
+
+		for position, (sender, recipient, amount, fee) in enumerate(transfers):
+			if amount <= 0 or fee < 0:
+				raise InvalidTransferException(f'invalid amount or fee of transaction {position} of block {height}')
+
+			debit, unlock = transfer_debit(recipient, amount, fee)
+
+			if get(sender) - locked(sender) < debit or locked(sender) < unlock:
+				raise InsufficientFundsException(f'insufficient funds for transaction {position} of block {height}')
+
+			change = stake_change(recipient, amount)
+
+			if change:
+				changes[sender] = changes.get(sender, 0) - fee
+				stakes[sender] = stakes.get(sender, 0) + change
+			else:
+				changes[sender] = changes.get(sender, 0) - debit
+				changes[recipient] = changes.get(recipient, 0) + amount
+
+		if miner is not None and reward:
+			changes[miner] = changes.get(miner, 0) + reward
+
+		journal = [(key, delta, key not in self._balances) for key, delta in changes.items()]
+		stake_journal = [(key, delta) for key, delta in stakes.items() if delta]
+		self._journals.append((height, journal, stake_journal))
+
+		for key, delta, _ in journal:
+			self._balances[key] = self._balances.get(key, 0) + delta
+			self.total += delta
+
+		self._change_stakes(stake_journal)
+
+	def _change_stakes(self, changes: Iterable[Tuple[bytes, int]]) -> None:
+		"""
+		Изменение ставок
+
+		:param changes: Пары (публичный ключ, изменение ставки)
+		"""
+		for key, delta in changes:
+			if delta > 0:
+				self.stakes.stake(key, delta)
+			else:
+				self.unlock(key, -delta)
+
+	@property
+	def height(self) -> Optional[int]:
+		"""
+		Высота последнего блока, который можно отменить
+
+		:return: Высота, либо None, если журнал пуст
+		"""
+		return self._journals[-1][0] if self._journals else None
+
+	@property
+	def revertible(self) -> int:
+		"""
+		Количество последних блоков, которые можно отменить по журналу
+
+		:return: Количество блоков
+		"""
+		return len(self._journals)
+
+	def revert_block(self) -> int:
+		"""
+		Отмена последнего примененного блока по журналу
+
+		:return: Высота отмененного блока
+
+		:raises BlockChainException: Если журнал пуст (блок слишком старый)
+		"""
+		if not self._journals:
+			raise BlockChainException('no block to revert in the state journal')
+
+		height, journal, stake_journal = self._journals.pop()
+
+		for key, delta, created in journal:
+			value = self._balances.get(key, 0) - delta
+			self.total -= delta
+
+			if created and value == 0:
+				self._balances.pop(key, None)
+			else:
+				self._balances[key] = value
+
+		self._change_stakes((key, -delta) for key, delta in stake_journal)
+
+		return height
+
+	def recompute_total(self) -> int:
+		"""
+		Полный пересчет общего баланса (для сверки с накопительным итогом)
+
+		:return: Сумма балансов всех счетов
+		"""
+		return sum(self._balances.values())
+
+	def accounts(self) -> Iterator[Tuple[bytes, int]]:
+		"""
+		Все счета
+
+		:return: Итератор пар (публичный ключ, баланс)
+		"""
+		return iter(self._balances.items())
+
+	def __contains__(self, key: bytes) -> bool:
+		return key in self._balances
+
+	def __len__(self) -> int:
+		return len(self._balances)
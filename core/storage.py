@@ -0,0 +1,293 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+from array import array
+from collections import OrderedDict
+from typing import Callable, Iterator, Optional
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+# Заголовок записи: длина данных и их контрольная сумма CRC32
+RECORD_HEADER = struct.Struct('<II')
+
+
+class BlockStore:
+	"""
+	Хранилище блоков на диске.
+
+	Блоки дописываются в конец файла сегмента (blocks.dat) в виде записей
+	"длина + CRC32 + данные". Смещения записей хранятся в отдельном индексе
+	(blocks.idx, по 8 байт на блок), поэтому блок с любой высотой читается
+	без загрузки всей истории: через mmap и с небольшим кешем последних
+	прочитанных блоков.
+
+	Хранилище ведет себя как список блоков: поддерживаются len(), индексы
+	(в том числе отрицательные), срезы, итерация и append(); truncate()
+	удаляет последние блоки.
+
+	При открытии существующего хранилища индекс сверяется с файлом
+	сегмента: недописанная после сбоя запись отбрасывается, а недостающие
+	смещения восстанавливаются просмотром заголовков записей.
+	"""
+	DATA_FILE = 'blocks.dat'
+	INDEX_FILE = 'blocks.idx'
+
+	def __init__(self, directory: str, encode: Callable[['Block'], bytes],
+				decode: Callable[[bytes], 'Block'], cache_size: int=256, fsync: bool=False) -> None:
+		"""
+		Открытие (или создание) хранилища
+
+		:param directory: Директория хранилища
+		:param encode: Функция сериализации блока в байты
+		:param decode: Функция десериализации блока из байтов
+		:param cache_size: Количество блоков в кеше прочитанных блоков
+		:param fsync: Сбрасывать ли данные на диск (os.fsync) после каждой записи
+		"""
+		os.makedirs(directory, exist_ok=True)
+
+		self.directory: str = directory
+		self.encode = encode
+		self.decode = decode
+		self.cache_size: int = cache_size
+		self.fsync: bool = fsync
+
+		self._data = open(os.path.join(directory, self.DATA_FILE), 'a+b')
+		self._index = open(os.path.join(directory, self.INDEX_FILE), 'a+b')
+		self._offsets = array('Q')
+		self._mmap: Optional[mmap.mmap] = None
+		self._cache: OrderedDict = OrderedDict()
+
+		self._load_index()
+
+	def _load_index(self) -> None:
+		"""
+		Загрузка индекса и его сверка с файлом сегмента.
+		"""
+		self._index.seek(0)
+		raw = self._index.read()
+		raw = raw[:len(raw) - len(raw) % self._offsets.itemsize]
+		self._offsets.frombytes(raw)
+
+		if sys.byteorder == 'big':
+			self._offsets.byteswap()
+
+		data_size = os.fstat(self._data.fileno()).st_size
+
+		# Отбрасываем смещения записей, которые не дописаны до конца
+		position = 0
+
+		while self._offsets:
+			end = self._record_end(self._offsets[-1])
+
+			if end is not None and end <= data_size:
+				position = end
+				break
+
+			self._offsets.pop()
+
+		# Дочитываем записи, которые попали в сегмент, но не в индекс
+		while position + RECORD_HEADER.size <= data_size:
+			end = self._record_end(position)
+
+			if end is None or end > data_size:
+				break
+
+			self._offsets.append(position)
+			position = end
+
+		if position < data_size:
+			# Недописанная запись после сбоя
+			self._data.truncate(position)
+
+		if len(raw) != len(self._offsets) * self._offsets.itemsize:
+			self._rewrite_index()
+
+	def _record_end(self, offset: int) -> Optional[int]:
+		"""
+		Смещение конца записи по ее заголовку
+
+		:param offset: Смещение записи
+
+		:return: Смещение конца записи, либо None, если заголовок не прочитан
+		"""
+		self._data.seek(offset)
+		header = self._data.read(RECORD_HEADER.size)
+
+		if len(header) < RECORD_HEADER.size:
+			return None
+
+		length, _ = RECORD_HEADER.unpack(header)
+
+		return offset + RECORD_HEADER.size + length
+
+	def _rewrite_index(self) -> None:
+		"""
+		Перезапись файла индекса по смещениям в памяти.
+		"""
+		offsets = array('Q', self._offsets)
+
+		if sys.byteorder == 'big':
+			offsets.byteswap()
+
+		self._index.truncate(0)
+		self._index.write(offsets.tobytes())
+		self._index.flush()
+
+	def append(self, block: 'Block') -> int:
+		"""
+		Добавление блока в конец хранилища
+
+		:param block: Блок
+
+		:return: Высота (индекс) добавленного блока
+		"""
+		payload = self.encode(block)
+		self._data.seek(0, os.SEEK_END)
+		offset = self._data.tell()
+		self._data.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)))
+		self._data.write(payload)
+		self._data.flush()
+
+		self._index.write(struct.pack('<Q', offset))
+		self._index.flush()
+
+		if self.fsync:
+			os.fsync(self._data.fileno())
+			os.fsync(self._index.fileno())
+
+		self._offsets.append(offset)
+		height = len(self._offsets) - 1
+		self._remember(height, block)
+
+		return height
+
+	def truncate(self, length: int) -> None:
+		"""
+		Удаление блоков с высотой length и выше (например, при смене ветки цепи)
+
+		:param length: Новое количество блоков
+		"""
+		if length >= len(self._offsets):
+			return
+
+		if self._mmap is not None:
+			# Отображение не должно выходить за конец укороченного файла
+			self._mmap.close()
+			self._mmap = None
+
+		self._data.truncate(self._offsets[length])
+		self._data.flush()
+		del self._offsets[length:]
+		self._rewrite_index()
+
+		if self.fsync:
+			os.fsync(self._data.fileno())
+			os.fsync(self._index.fileno())
+
+		for height in [height for height in self._cache if height >= length]:
+			del self._cache[height]
+
+	def _remember(self, height: int, block: 'Block') -> None:
+		"""
+		Сохранение блока в кеше прочитанных блоков
+
+		:param height: Высота блока
+		:param block: Блок
+		"""
+		self._cache[height] = block
+		self._cache.move_to_end(height)
+
+		if len(self._cache) > self.cache_size:
+			self._cache.popitem(last=False)
+
+	def _view(self, end: int) -> mmap.mmap:
+		"""
+		Отображение файла сегмента в память, покрывающее смещение end
+
+		:param end: Смещение, до которого должно доходить отображение
+
+		:return: Объект mmap
+		"""
+		if self._mmap is None or len(self._mmap) < end:
+			if self._mmap is not None:
+				self._mmap.close()
+
+			self._mmap = mmap.mmap(self._data.fileno(), 0, access=mmap.ACCESS_READ)
+
+		return self._mmap
+
+	def read_raw(self, height: int) -> bytes:
+		"""
+		Чтение сериализованного блока без десериализации
+
+		:param height: Высота блока
+
+		:return: Байты блока
+		"""
+		offset = self._offsets[height]
+		view = self._view(offset + RECORD_HEADER.size)
+		length, checksum = RECORD_HEADER.unpack_from(view, offset)
+		start = offset + RECORD_HEADER.size
+		view = self._view(start + length)
+		payload = view[start:start + length]
+
+		if zlib.crc32(payload) != checksum:
+			raise IOError(f'Block {height} is corrupted in {self.directory}')
+
+		return payload
+
+	def __getitem__(self, item):
+		if isinstance(item, slice):
+			return [self[i] for i in range(*item.indices(len(self)))]
+
+		height = item + len(self) if item < 0 else item
+
+		if not 0 <= height < len(self):
+			raise IndexError('block index out of range')
+
+		block = self._cache.get(height)
+
+		if block is None:
+			block = self.decode(self.read_raw(height))
+			self._remember(height, block)
+		else:
+			self._cache.move_to_end(height)
+
+		return block
+
+	def __len__(self) -> int:
+		return len(self._offsets)
+
+	def __iter__(self) -> Iterator['Block']:
+		for height in range(len(self)):
+			yield self[height]
+
+	def close(self) -> None:
+		"""
+		Закрытие файлов хранилища
+		"""
+		if self._mmap is not None:
+			self._mmap.close()
+			self._mmap = None
+
+		self._data.close()
+		self._index.close()
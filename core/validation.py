@@ -0,0 +1,401 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+from collections import deque
+from dataclasses import dataclass
+from hashlib import sha256
+from typing import Callable, List, Optional, Tuple
+import json
+import os
+from core import merkle, serialization
+from core.crypto import get_backend
+from core.difficulty import check_proof
+
+# Ошибка в пачке блоков: индекс блока и причина
+Failure = Tuple[int, str]
+
+
+@dataclass
+class ValidationResult:
+	"""
+	Результат проверки цепи.
+
+	 + valid - цепь валидна
+	 + checked - количество проверенных блоков
+	 + failed_index - индекс первого невалидного блока (None, если цепь валидна)
+	 + reason - причина ошибки
+	"""
+	valid: bool
+	checked: int = 0
+	failed_index: Optional[int] = None
+	reason: Optional[str] = None
+
+	def __bool__(self) -> bool:
+		return self.valid
+
+
+def _reward_allowed(metadata, max_reward: int) -> bool:
+	"""
+	Проверка награды из мета-данных блока: целое число базовых единиц от 0
+	до max_reward (дробная награда старых блоков считается суммой в монетах)
+
+	:param metadata: Мета-данные блока
+	:param max_reward: Наибольшая награда
+
+	:return: True, если награда допустима
+	"""
+	reward = metadata.get('reward', 0) if isinstance(metadata, dict) else 0
+
+	if isinstance(reward, float):
+		reward = serialization.to_base_units(reward)
+
+	return isinstance(reward, int) and 0 <= reward <= max_reward
+
+
+def _check_chunk(start: int, blocks: List[bytes], verify_signatures: bool=True,
+				backend: str='auto', max_reward: Optional[int]=None) -> Tuple[Optional[Failure], bytes, bytes]:
+	"""
+	Проверка пачки идущих подряд блоков (в том числе в процессе-воркере).
+
+	Для каждого блока проверяются индекс, связь с предыдущим блоком пачки,
+	доказательство работы (по сложности из мета-данных блока), награда,
+	суммы и комиссии, отсутствие повторов транзакций и сигнатуры транзакций. Связь первого блока пачки с предыдущей пачкой проверяет
+	вызывающий код.
+
+	:param start: Индекс первого блока пачки
+	:param blocks: Сериализованные блоки
+	:param verify_signatures: Проверять ли сигнатуры транзакций
+	:param backend: Имя криптографического бэкенда
+	:param max_reward: Наибольшая награда за блок в базовых единицах (None - не проверяется)
+
+	:return: Кортеж (первая ошибка или None, предыдущий хеш первого блока, хеш последнего блока)
+	"""
+	crypto = get_backend(backend) if verify_signatures else None
+	first_previous_hash = previous_hash = None
+
+	for offset, data in enumerate(blocks):
+		height = start + offset
+
+		try:
+			index, block_previous_hash, _, merkle_root, metadata, transactions, _ = serialization.decode_block(data)
+		except (ValueError, IndexError) as e:
+			return (height, f'malformed block: {e}'), first_previous_hash, previous_hash
+
+		if first_previous_hash is None:
+			first_previous_hash = block_previous_hash
+
+		if index != height:
+			return (height, f'unexpected block index {index}'), first_previous_hash, previous_hash
+
+		if previous_hash is not None and block_previous_hash != previous_hash:
+			return (height, 'previous hash mismatch'), first_previous_hash, previous_hash
+
+		if merkle.merkle_root(serialization.block_transactions(data)) != merkle_root:
+			return (height, 'merkle root mismatch'), first_previous_hash, previous_hash
+
+		digest = sha256(serialization.block_header(data)).digest()
+
+		if not check_proof(digest, metadata):
+			return (height, 'proof of work does not meet the block target'), first_previous_hash, previous_hash
+
+		if max_reward is not None and not _reward_allowed(metadata, max_reward):
+			return (height, 'invalid block reward'), first_previous_hash, previous_hash
+
+		signatures = set()
+
+		for position, (_, _, amount, fee, _, signature) in enumerate(transactions):
+			if amount <= 0 or fee < 0:
+				return (height, f'invalid amount or fee of transaction {position}'), first_previous_hash, previous_hash
+
+			if signature in signatures:
+				return (height, f'duplicate transaction {position}'), first_previous_hash, previous_hash
+
+			signatures.add(signature)
+
+		if crypto is not None:
+			for position, (sender, recipient, amount, fee, timestamp, signature) in enumerate(transactions):
+				payload = serialization.encode_transaction_payload(sender, recipient, amount, fee, timestamp)
+
+				if signature is None or not crypto.verify(sender, signature, payload):
+					return (height, f'invalid signature of transaction {position}'), first_previous_hash, previous_hash
+
+		previous_hash = digest
+
+	return None, first_previous_hash, previous_hash
+
+
+def check_block(data: bytes, height: int, previous_hash: bytes, max_reward: Optional[int]=None) -> Optional[str]:
+	"""
+	Проверка одного нового блока перед добавлением в цепь: индекс, связь с
+	последним блоком цепи, доказательство работы, награда, суммы и
+	повторы транзакций. Сигнатуры транзакций проверяет вызывающий код
+	(например, SignatureVerifier с кешем).
+
+	:param data: Сериализованный блок
+	:param height: Ожидаемый индекс блока
+	:param previous_hash: Хеш последнего блока цепи
+	:param max_reward: Наибольшая награда за блок в базовых единицах (None - не проверяется)
+
+	:return: Причина ошибки, либо None, если блок подходит
+	"""
+	failure, first_previous_hash, _ = _check_chunk(height, [data], verify_signatures=False, max_reward=max_reward)
+
+	if failure is not None:
+		return failure[1]
+
+	if first_previous_hash != previous_hash:
+		return 'previous hash mismatch'
+
+	return None
+
+
+class ChainValidator:
+	"""
+	Проверка цепи блоков.
+
+	Блоки проверяются пачками: при нескольких процессах пачки хешируются и
+	проверяются параллельно, связь между пачками сверяется по хешам их
+	крайних блоков. Проверка останавливается на первой ошибке, а еще не
+	начатые пачки отменяются.
+
+	После успешной проверки запоминается контрольная точка (высота и хеш
+	последнего проверенного блока). Повторная проверка начинается с нее,
+	если блок на этой высоте не изменился. При заданном пути контрольная
+	точка сохраняется на диск и переживает перезапуск.
+	"""
+	def __init__(self, workers: int=1, chunk_size: int=256, verify_signatures: bool=True,
+				backend: str='auto', checkpoint_path: Optional[str]=None, max_reward: Optional[int]=None) -> None:
+		"""
+		Инициализация проверяющего
+
+		:param workers: Количество процессов (1 - проверка в текущем процессе)
+		:param chunk_size: Количество блоков в одной пачке
+		:param verify_signatures: Проверять ли сигнатуры транзакций
+		:param backend: Имя криптографического бэкенда
+		:param checkpoint_path: Файл контрольной точки (None - только в памяти)
+		:param max_reward: Наибольшая награда за блок в базовых единицах (None - не проверяется)
+		"""
+		self.workers: int = workers or os.cpu_count() or 1
+		self.chunk_size: int = chunk_size
+		self.verify_signatures: bool = verify_signatures
+		self.backend: str = backend
+		self.checkpoint_path: Optional[str] = checkpoint_path
+		self.max_reward: Optional[int] = max_reward
+		self.checkpoint: Optional[Tuple[int, bytes]] = self._load_checkpoint()
+		self._executor: Optional['ProcessPoolExecutor'] = None
+
+	def _load_checkpoint(self) -> Optional[Tuple[int, bytes]]:
+		"""
+		Загрузка контрольной точки с диска
+
+		:return: Кортеж (высота, хеш блока), либо None
+		"""
+		if self.checkpoint_path is None or not os.path.exists(self.checkpoint_path):
+			return None
+
+		try:
+			with open(self.checkpoint_path) as file:
+				data = json.load(file)
+
+			return int(data['height']), bytes.fromhex(data['hash'])
+		except (OSError, ValueError, KeyError):
+			return None
+
+	def set_checkpoint(self, height: int, block_hash: bytes) -> None:
+		"""
+		Установка контрольной точки (и ее сохранение на диск, если задан путь)
+
+		:param height: Высота проверенного блока
+		:param block_hash: Хеш этого блока
+		"""
+		self.checkpoint = (height, block_hash)
+
+		if self.checkpoint_path is not None:
+			temporary = self.checkpoint_path + '.tmp'
+
+			with open(temporary, 'w') as file:
+				json.dump({'height': height, 'hash': block_hash.hex()}, file)
+
+			os.replace(temporary, self.checkpoint_path)
+
+	def reset_checkpoint(self) -> None:
+		"""
+		Сброс контрольной точки: следующая проверка будет полной
+		"""
+		self.checkpoint = None
+
+		if self.checkpoint_path is not None and os.path.exists(self.checkpoint_path):
+			os.remove(self.checkpoint_path)
+
+	@staticmethod
+	def _raw(chain, height: int) -> bytes:
+		"""
+		Сериализованный блок цепи (из хранилища - без десериализации)
+
+		:param chain: Цепь блоков (список или BlockStore)
+		:param height: Высота блока
+
+		:return: Байты блока
+		"""
+		if hasattr(chain, 'read_raw'):
+			return chain.read_raw(height)
+
+		return chain[height].encode()
+
+	def _start(self, chain) -> Tuple[int, Optional[bytes]]:
+		"""
+		Высота, с которой начинается проверка, и ожидаемый хеш предыдущего блока
+
+		:param chain: Цепь блоков
+
+		:return: Кортеж (высота, хеш предыдущего блока или None)
+		"""
+		if self.checkpoint is not None:
+			height, block_hash = self.checkpoint
+
+			if height < len(chain) and sha256(serialization.block_header(self._raw(chain, height))).digest() == block_hash:
+				return height + 1, block_hash
+
+		return 0, None
+
+	def validate(self, chain, full: bool=False,
+				consensus: Optional[Callable[[int], Optional[str]]]=None) -> ValidationResult:
+		"""
+		Проверка цепи блоков.
+
+		Доказательство работы в пачках проверяется по цели из мета-данных
+		самого блока. Правила, зависящие от предыдущих блоков (ожидаемая цель,
+		выбранный валидатор), проверяет функция consensus: она вызывается в
+		текущем процессе для каждого блока пачки, прошедшей проверку.
+
+		:param chain: Цепь блоков (список или BlockStore)
+		:param full: Проверить всю цепь, не используя контрольную точку
+		:param consensus: Проверка правил консенсуса блока по высоте,
+			возвращает причину ошибки или None (см. BlockChain.validate_chain)
+
+		:return: Результат проверки
+		"""
+		start, previous_hash = (0, None) if full else self._start(chain)
+		ranges = [(begin, min(begin + self.chunk_size, len(chain))) for begin in range(start, len(chain), self.chunk_size)]
+		checked = 0
+		last_hash = previous_hash
+
+		for begin, failure, first_previous_hash, chunk_last_hash in self._run(chain, ranges):
+			# Genesis-блок ссылается на пустой хеш, остальные пачки - на последний блок предыдущей
+			expected = bytes(32) if begin == 0 else last_hash
+
+			if first_previous_hash is not None and first_previous_hash != expected:
+				failure = (begin, 'previous hash mismatch')
+
+			if failure is None and consensus is not None:
+				failure = self._check_consensus(consensus, max(begin, 1), min(begin + self.chunk_size, len(chain)))
+
+			if failure is not None:
+				return ValidationResult(False, checked + failure[0] - begin, *failure)
+
+			checked += min(begin + self.chunk_size, len(chain)) - begin
+			last_hash = chunk_last_hash
+
+		if len(chain) and checked:
+			self.set_checkpoint(len(chain) - 1, last_hash)
+
+		return ValidationResult(True, checked)
+
+	@staticmethod
+	def _check_consensus(consensus: Callable[[int], Optional[str]], begin: int, end: int) -> Optional[Failure]:
+		"""
+		Проверка правил консенсуса блоков пачки (genesis-блок не проверяется)
+
+		:param consensus: Проверка блока по высоте
+		:param begin: Высота первого блока
+		:param end: Высота после последнего блока
+
+		:return: Первая ошибка, либо None
+		"""
+		for height in range(begin, end):
+			reason = consensus(height)
+
+			if reason is not None:
+				return height, reason
+
+		return None
+
+	def _run(self, chain, ranges: List[Tuple[int, int]]):
+		"""
+		Проверка пачек блоков по порядку (параллельно, если задано несколько процессов)
+
+		:param chain: Цепь блоков
+		:param ranges: Диапазоны высот пачек
+
+		:return: Генератор кортежей (начало пачки, ошибка, предыдущий хеш первого блока, хеш последнего блока)
+		"""
+		if self.workers <= 1 or len(ranges) <= 1:
+			for begin, end in ranges:
+				blocks = [self._raw(chain, height) for height in range(begin, end)]
+				yield (begin, *_check_chunk(begin, blocks, self.verify_signatures, self.backend, self.max_reward))
+
+			return
+
+		executor = self._get_executor()
+		pending = deque()
+		ranges = iter(ranges)
+
+		def submit() -> None:
+			item = next(ranges, None)
+
+			if item is not None:
+				begin, end = item
+				blocks = [self._raw(chain, height) for height in range(begin, end)]
+				pending.append((begin, executor.submit(_check_chunk, begin, blocks, self.verify_signatures, self.backend,
+														self.max_reward)))
+
+		# В работе держим не больше двух пачек на процесс, чтобы не читать всю цепь в память
+		for _ in range(self.workers * 2):
+			submit()
+
+		try:
+			while pending:
+				begin, future = pending.popleft()
+				submit()
+				yield (begin, *future.result())
+		finally:
+			# При ошибке в одной из пачек остальные не нужны
+			for _, future in pending:
+				future.cancel()
+
+	def _get_executor(self) -> 'ProcessPoolExecutor':
+		"""
+		Получение пула процессов (создается при первом обращении)
+
+		:return: Пул процессов
+		"""
+		if self._executor is None:
+			from concurrent.futures import ProcessPoolExecutor
+
+			self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+		return self._executor
+
+	def shutdown(self) -> None:
+		"""
+		Остановка пула процессов
+		"""
+		if self._executor is not None:
+			self._executor.shutdown(wait=True)
+			self._executor = None
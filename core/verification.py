@@ -0,0 +1,216 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+from hashlib import sha256
+from time import perf_counter
+from typing import Dict, Iterable, List, Optional, Tuple
+import os
+from core.crypto import get_backend
+
+# Задание на проверку: публичный ключ, сигнатура, подписанные данные
+VerificationJob = Tuple[bytes, bytes, bytes]
+
+
+def _verify_chunk(jobs: List[VerificationJob], backend: str='auto') -> List[bool]:
+	"""
+	Проверка пачки сигнатур (в том числе в процессе-воркере).
+
+	:param jobs: Задания на проверку
+	:param backend: Имя криптографического бэкенда
+
+	:return: Результаты проверки в том же порядке
+	"""
+	crypto = get_backend(backend)
+
+	return [crypto.verify(*job) for job in jobs]
+
+
+class SignatureVerifier:
+	"""
+	Проверка ECDSA-сигнатур транзакций.
+
+	Проверка в python-ecdsa медленная и загружает процессор, поэтому пачки
+	транзакций проверяются параллельно в пуле процессов. Хеши успешно
+	проверенных сигнатур кешируются, и одна и та же транзакция никогда не
+	проверяется дважды.
+	"""
+	def __init__(self, workers: int=1, chunk_size: int=64, max_cache_size: int=100000,
+				backend: str='auto') -> None:
+		"""
+		Инициализация проверяющего
+
+		:param workers: Количество процессов для пакетной проверки (1 - в текущем процессе)
+		:param chunk_size: Количество сигнатур в одной пачке для процесса-воркера
+		:param max_cache_size: Максимальное количество хешей в кеше проверенных сигнатур
+		:param backend: Имя криптографического бэкенда
+		"""
+		self.workers: int = workers or os.cpu_count() or 1
+		self.backend: str = backend
+		self.chunk_size: int = chunk_size
+		self.max_cache_size: int = max_cache_size
+		self._executor: Optional['ProcessPoolExecutor'] = None
+		self._verified: Dict[bytes, None] = {}
+		self.verified_count: int = 0
+		self.rejected_count: int = 0
+		self.cache_hits: int = 0
+		self.verification_time: float = 0.0
+
+	@staticmethod
+	def job(transaction: 'Transaction') -> Optional[VerificationJob]:
+		"""
+		Задание на проверку сигнатуры транзакции.
+
+		:param transaction: Транзакция
+
+		:return: Кортеж (ключ, сигнатура, данные), либо None для неподписанной транзакции
+		"""
+		if transaction.signature is None:
+			return None
+
+		return transaction.sender_wallet, transaction.signature, transaction.to_bytes()
+
+	@staticmethod
+	def _cache_key(job: VerificationJob) -> bytes:
+		return sha256(b''.join(job)).digest()
+
+	def _remember(self, cache_key: bytes) -> None:
+		"""
+		Сохранение хеша проверенной сигнатуры (самые старые вытесняются).
+
+		:param cache_key: Хеш задания на проверку
+		"""
+		if len(self._verified) >= self.max_cache_size:
+			self._verified.pop(next(iter(self._verified)))
+
+		self._verified[cache_key] = None
+
+	def is_verified(self, transaction: 'Transaction') -> bool:
+		"""
+		Проверка наличия сигнатуры транзакции в кеше проверенных.
+
+		:param transaction: Транзакция
+
+		:return: True, если сигнатура уже была успешно проверена
+		"""
+		job = self.job(transaction)
+
+		return job is not None and self._cache_key(job) in self._verified
+
+	def verify(self, transaction: 'Transaction') -> bool:
+		"""
+		Проверка сигнатуры одной транзакции в текущем процессе.
+
+		:param transaction: Транзакция
+
+		:return: True, если сигнатура верна
+		"""
+		return self.verify_batch([transaction])[0]
+
+	def verify_batch(self, transactions: Iterable['Transaction']) -> List[bool]:
+		"""
+		Пакетная проверка сигнатур.
+
+		Транзакции из кеша не проверяются повторно. Остальные делятся на пачки
+		и проверяются в пуле процессов (если их больше одной пачки и
+		задано больше одного процесса).
+
+		:param transactions: Транзакции
+
+		:return: Результаты проверки в том же порядке
+		"""
+		transactions = list(transactions)
+		results: List[bool] = [False] * len(transactions)
+		pending: List[Tuple[int, bytes, VerificationJob]] = []
+
+		for i, transaction in enumerate(transactions):
+			job = self.job(transaction)
+
+			if job is None:
+				continue
+
+			cache_key = self._cache_key(job)
+
+			if cache_key in self._verified:
+				self.cache_hits += 1
+				results[i] = True
+			else:
+				pending.append((i, cache_key, job))
+
+		if not pending:
+			return results
+
+		start = perf_counter()
+		jobs = [job for _, _, job in pending]
+
+		if self.workers > 1 and len(jobs) > self.chunk_size:
+			chunks = [jobs[i:i + self.chunk_size] for i in range(0, len(jobs), self.chunk_size)]
+			backends = [self.backend] * len(chunks)
+			verdicts = [verdict for chunk in self._get_executor().map(_verify_chunk, chunks, backends) for verdict in chunk]
+		else:
+			verdicts = _verify_chunk(jobs, self.backend)
+
+		self.verification_time += perf_counter() - start
+
+		for (i, cache_key, _), verdict in zip(pending, verdicts):
+			results[i] = verdict
+
+			if verdict:
+				self.verified_count += 1
+				self._remember(cache_key)
+			else:
+				self.rejected_count += 1
+
+		return results
+
+	def stats(self) -> dict:
+		"""
+		Статистика проверки сигнатур.
+
+		:return: Словарь с количеством проверок, отказов, попаданий в кеш
+			и пропускной способностью (проверок в секунду)
+		"""
+		checked = self.verified_count + self.rejected_count
+
+		return {
+			'verified': self.verified_count,
+			'rejected': self.rejected_count,
+			'cache_hits': self.cache_hits,
+			'verifications_per_second': checked / self.verification_time if self.verification_time else 0.0,
+		}
+
+	def _get_executor(self) -> 'ProcessPoolExecutor':
+		"""
+		Получение пула процессов (создается при первом обращении)
+
+		:return: Пул процессов
+		"""
+		if self._executor is None:
+			from concurrent.futures import ProcessPoolExecutor
+
+			self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+		return self._executor
+
+	def shutdown(self) -> None:
+		"""
+		Остановка пула процессов
+		"""
+		if self._executor is not None:
+			self._executor.shutdown(wait=True)
+			self._executor = None
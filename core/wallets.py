@@ -0,0 +1,126 @@
+#!venv/bin/python3
+"""CryPro-N Coin BlockChain
+Простой блокчейн для криптовалюты $CPNC, написанный на Python
+Copyright (C) 2024  Alexeev Bronislav
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+"""
+from typing import Dict, Iterator, List, Optional
+from core.state import AccountState
+
+
+def key_bytes(public_key) -> bytes:
+	"""
+	Получение сырых байтов публичного ключа.
+
+	:param public_key: Публичный ключ (ecdsa.VerifyingKey или байты)
+
+	:return: Сырые байты ключа
+	"""
+	if isinstance(public_key, (bytes, bytearray)):
+		return bytes(public_key)
+
+	return public_key.to_string()
+
+
+class WalletRegistry:
+	"""
+	Реестр кошельков блокчейна.
+
+	Кошельки индексируются по сырым байтам публичного ключа и по имени
+	владельца, поэтому поиск кошелька выполняется за O(1), а не перебором.
+	Порядок итерации совпадает с порядком регистрации кошельков.
+
+	Балансы зарегистрированных кошельков хранятся в состоянии счетов
+	(см. core.state.AccountState), там же ведется их общий баланс.
+	"""
+	def __init__(self, state: Optional[AccountState]=None) -> None:
+		"""
+		Инициализация пустого реестра
+
+		:param state: Состояние счетов (по умолчанию - новое пустое)
+		"""
+		self._by_key: Dict[bytes, 'Wallet'] = {}
+		self._by_name: Dict[str, List['Wallet']] = {}
+		self.state: AccountState = state if state is not None else AccountState()
+
+	@property
+	def total_balance(self) -> int:
+		"""
+		Общий баланс счетов
+
+		:return: Сумма балансов (в базовых единицах)
+		"""
+		return self.state.total
+
+	def add(self, wallet: 'Wallet') -> None:
+		"""
+		Регистрация кошелька в реестре.
+
+		Баланс кошелька, созданного вне блокчейна, зачисляется на его счет
+		в состоянии, и дальше кошелёк читает баланс из состояния.
+
+		:param wallet: Кошелёк
+		"""
+		self._by_key[wallet.public_key_bytes] = wallet
+		self._by_name.setdefault(wallet.name, []).append(wallet)
+		wallet.attach(self.state)
+
+	# Совместимость с кодом, который работал со списком кошельков
+	append = add
+
+	def get(self, public_key) -> Optional['Wallet']:
+		"""
+		Получение кошелька по публичному ключу.
+
+		:param public_key: Публичный ключ (ecdsa.VerifyingKey или байты)
+
+		:return: Кошелёк, либо None
+		"""
+		return self._by_key.get(key_bytes(public_key))
+
+	def find_by_name(self, name: str) -> List['Wallet']:
+		"""
+		Получение всех кошельков владельца с указанным именем.
+
+		:param name: Имя владельца
+
+		:return: Список кошельков (возможно, пустой)
+		"""
+		return list(self._by_name.get(name, ()))
+
+	def get_by_name(self, name: str) -> Optional['Wallet']:
+		"""
+		Получение первого зарегистрированного кошелька владельца.
+
+		:param name: Имя владельца
+
+		:return: Кошелёк, либо None
+		"""
+		wallets = self._by_name.get(name)
+
+		return wallets[0] if wallets else None
+
+	def __contains__(self, item) -> bool:
+		if hasattr(item, 'public_key_bytes'):
+			item = item.public_key_bytes
+
+		return key_bytes(item) in self._by_key
+
+	def __iter__(self) -> Iterator['Wallet']:
+		return iter(self._by_key.values())
+
+	def __len__(self) -> int:
+		return len(self._by_key)
@@ -23,6 +23,7 @@ License along with this library; if not, write to the Free Software
 Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
 """
 from blockchain import BlockChainConfig, BlockChain, ConsensusAlgorithm
+from core.serialization import from_base_units, to_base_units
 from decimal import Decimal
 
 config = BlockChainConfig(
@@ -38,12 +39,12 @@ config = BlockChainConfig(
 
 blockchain = BlockChain(config)
 
-wallet1 = blockchain.create_wallet('Alice', blockchain.max_supply // 4)
-wallet2 = blockchain.create_wallet('Bob', 0.0)
+wallet1 = blockchain.create_wallet('Alice', from_base_units(blockchain.max_supply) // 4)
+wallet2 = blockchain.create_wallet('Bob', 0)
 
 blockchain.mine_block(wallet1)
 
-tx1 = wallet1.send_transaction(wallet2, 9.5, blockchain.transaction_fee)
+tx1 = wallet1.send_transaction(wallet2, Decimal('9.5'), from_base_units(blockchain.transaction_fee))
 
 if tx1:
 	blockchain.pending_transaction(tx1)
@@ -59,15 +60,15 @@ print(f'Текущий отстаток монет в сети: {info["current_r
 print(f'Текущее общее количество монет во всех кошельках: {info["total_wallets_balance"]}')
 print(f'Отношение текущего отстатка монет в сети к общему количеству монет во всех кошельках: {info["remaining_supply_percentage"]}')
 print(f'Сложность майнинга и награда майнинга: {blockchain.config.difficulty}/{blockchain.config.mining_reward}')
-print(f'Комиссия за транзакцию: {blockchain.transaction_fee}')
+print(f'Комиссия за транзакцию: {from_base_units(blockchain.transaction_fee)}')
 print(f'Рост инфляции: {blockchain.inflation_rate}')
 print(f'Цепь: {blockchain.validate_chain()}')
-print(f'Максимальный порог: {blockchain.economic_model.get_max_threshold()}')
-print(f'Минимальный порог: {blockchain.economic_model.get_min_threshold()}')
+print(f'Максимальный порог: {from_base_units(round(blockchain.economic_model.get_max_threshold()))}')
+print(f'Минимальный порог: {from_base_units(round(blockchain.economic_model.get_min_threshold()))}')
 
-print(f'Монеты: {blockchain.remaining_supply}')
-blockchain.remaining_supply += 45
-print(f'Монеты: {blockchain.remaining_supply}')
+print(f'Монеты: {from_base_units(blockchain.remaining_supply)}')
+blockchain.remaining_supply += to_base_units(45)
+print(f'Монеты: {from_base_units(blockchain.remaining_supply)}')
 blockchain.economic_influence()
-print(f'Монеты: {blockchain.remaining_supply}')
+print(f'Монеты: {from_base_units(blockchain.remaining_supply)}')
 print(f'Рост инфляции: {blockchain.inflation_rate}')
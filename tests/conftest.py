@@ -0,0 +1,76 @@
+"""
+Общие фикстуры тестов.
+
+Тесты запускаются из корня репозитория: python -m pytest -q
+"""
+from datetime import datetime
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blockchain import Block, BlockChain, BlockChainConfig
+
+# Метка времени genesis-блока: у цепей одной "сети" в тестах она общая
+GENESIS_TIME = datetime(2024, 1, 1)
+
+
+def make_config(**options) -> BlockChainConfig:
+	"""
+	Конфигурация тестовой цепи: без файлов лога и с легкой добычей
+
+	:param options: Параметры, отличающиеся от умолчаний
+
+	:return: Конфигурация
+	"""
+	settings = dict(coin_name='TEST', max_supply=10.0 ** 6, difficulty=1, log_dir=None, genesis_time=GENESIS_TIME)
+	settings.update(options)
+
+	return BlockChainConfig(**settings)
+
+
+def share_wallets(source: BlockChain, target: BlockChain) -> None:
+	"""
+	Регистрация кошельков одной цепи в другой с теми же ключами и балансами
+
+	:param source: Цепь с кошельками
+	:param target: Цепь, в которой они регистрируются
+	"""
+	for wallet in source.wallets:
+		target.register_wallet(type(wallet).restore(wallet.name, wallet.balance_units, wallet.private_key_bytes,
+													wallet.public_key_bytes))
+
+
+def next_block(blockchain: BlockChain, transactions, miner, **metadata) -> Block:
+	"""
+	Добытый блок, продолжающий цепь, но не добавленный в нее (как блок от
+	другого узла сети)
+
+	:param blockchain: Блокчейн
+	:param transactions: Транзакции блока
+	:param miner: Кошелёк майнера
+	:param metadata: Мета-данные, заменяющие подготовленные блокчейном
+
+	:return: Блок
+	"""
+	fields = {'account': miner.public_key_bytes.hex(), 'action': 'mine', 'target': blockchain.next_target(),
+			'reward': blockchain.mining_reward}
+	fields.update(metadata)
+	block = Block(len(blockchain.chain), list(transactions), blockchain.chain[-1].hash, fields)
+	blockchain.seal_block(block, wallet=miner)
+
+	return block
+
+
+@pytest.fixture
+def blockchain() -> BlockChain:
+	chain = BlockChain(make_config())
+	yield chain
+	chain.close()
+
+
+@pytest.fixture
+def wallets(blockchain):
+	return blockchain.create_wallet('alice', 100), blockchain.create_wallet('bob', 100)
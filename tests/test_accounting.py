@@ -0,0 +1,29 @@
+"""
+Накопительные итоги по транзакциям цепи (core.accounting).
+"""
+from blockchain import BlockChain
+from core.accounting import SupplyAccounting
+
+from conftest import make_config
+
+
+def test_running_totals_match_a_full_recompute():
+	blockchain = BlockChain(make_config(debug_accounting=True))
+	alice, bob = blockchain.create_wallet('alice', 100), blockchain.create_wallet('bob', 100)
+
+	for amount in range(1, 4):
+		assert blockchain.pending_transaction(alice.send_transaction(bob, amount, 1))
+
+	blockchain.mine_block(bob)
+
+	assert blockchain.accounting.as_dict() == SupplyAccounting.recompute(blockchain.chain).as_dict()
+	assert blockchain.accounting.transactions_count > 0
+	blockchain.check_accounting()
+	blockchain.close()
+
+
+def test_wallet_totals_follow_balance_changes(blockchain, wallets):
+	alice, bob = wallets
+	blockchain.pending_transaction(alice.send_transaction(bob, 2.5, 1))
+
+	assert blockchain.wallets.total_balance == sum(wallet.balance_units for wallet in blockchain.wallets) == 200 * 10 ** 8
@@ -0,0 +1,79 @@
+"""
+Кеш хеша блока и его сброс при изменении блока.
+"""
+from hashlib import sha256
+
+import pytest
+
+from blockchain import Block
+
+from conftest import next_block
+
+
+def fresh_hash(block: Block) -> bytes:
+	return sha256(block.header()).digest()
+
+
+@pytest.fixture
+def block(blockchain, wallets):
+	alice, bob = wallets
+
+	return next_block(blockchain, [alice.send_transaction(bob, 1, 1), bob.send_transaction(alice, 2, 1)], bob)
+
+
+def test_hash_is_cached(block):
+	Block.reset_hash_cache_info()
+	first = block.hash
+
+	assert block.hash is first
+	assert Block.hash_cache_info() == {'hits': 1, 'misses': 1}
+
+
+@pytest.mark.parametrize('change', [
+	lambda block: setattr(block, 'nonce', block.nonce + 1),
+	lambda block: setattr(block, 'index', block.index + 1),
+	lambda block: setattr(block, 'previous_hash', bytes(32)),
+	lambda block: block.metadata.update(reward=1),
+	lambda block: block.metadata.pop('target'),
+	lambda block: block.transactions.pop(),
+	lambda block: block.transactions.reverse(),
+])
+def test_change_invalidates_the_cached_hash(block, change):
+	cached = block.hash
+	change(block)
+
+	assert block.hash != cached
+	assert block.hash == fresh_hash(block)
+
+
+def test_appended_transaction_updates_the_merkle_root(block, wallets):
+	alice, bob = wallets
+	block.merkle_root
+	cached = block.hash
+	block.transactions.append(bob.send_transaction(alice, 1, 1))
+	rebuilt = Block(block.index, list(block.transactions), block.previous_hash, dict(block.metadata), block.timestamp,
+					block.nonce)
+
+	assert block.hash != cached
+	assert block.merkle_root == rebuilt.merkle_root
+	assert block.hash == rebuilt.hash == fresh_hash(block)
+
+
+def test_block_does_not_share_containers_with_the_caller(wallets):
+	alice, bob = wallets
+	transactions, metadata = [alice.send_transaction(bob, 1, 1)], {'reward': 1}
+	block = Block(1, transactions, bytes(32), metadata)
+	cached = block.hash
+	transactions.append(bob.send_transaction(alice, 1, 1))
+	metadata['reward'] = 2
+
+	assert block.hash == cached
+
+
+def test_chain_stays_valid_after_several_transfers(blockchain, wallets):
+	alice, bob = wallets
+
+	for amount in (1, 2, 3):
+		blockchain.pending_transaction(alice.send_transaction(bob, amount, 1))
+
+	assert blockchain.validate_chain()
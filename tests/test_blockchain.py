@@ -0,0 +1,93 @@
+"""
+Прием блоков от других узлов (BlockChain.accept_block): награда за блок и повторы транзакций.
+"""
+from blockchain import BlockChain
+from core.difficulty import MAX_TARGET
+from core.forks import BlockStatus
+from core.validation import check_block
+
+from conftest import make_config, next_block, share_wallets
+
+
+def network():
+	first = BlockChain(make_config())
+	first.create_wallet('alice', 100)
+	first.create_wallet('bob', 100)
+	second = BlockChain(make_config())
+	share_wallets(first, second)
+
+	return first, second
+
+
+def test_expected_reward_is_accepted():
+	first, second = network()
+	alice, bob = first.get_wallet_by_name('alice'), first.get_wallet_by_name('bob')
+
+	for _ in range(3):
+		assert first.pending_transaction(alice.send_transaction(bob, 1, 1))
+		assert first.mine_block(bob)
+		assert second.accept_block(first.chain[-1]) == BlockStatus.EXTENDED
+
+	assert second.chain[-1].hash == first.chain[-1].hash
+	assert second.mining_reward == first.mining_reward == first.next_reward()
+
+
+def test_inflated_reward_is_rejected():
+	first, second = network()
+	alice, bob = first.get_wallet_by_name('alice'), first.get_wallet_by_name('bob')
+	supply, balance = second.remaining_supply, second.get_wallet(bob.public_key_bytes).balance_units
+	block = next_block(second, [alice.send_transaction(bob, 1, 1)], bob, reward=10 ** 20)
+
+	assert second.accept_block(block) == BlockStatus.INVALID
+	assert second.remaining_supply == supply
+	assert second.get_wallet(bob.public_key_bytes).balance_units == balance
+
+	block = next_block(second, [alice.send_transaction(bob, 1, 1)], bob, reward=second.next_reward() + 1)
+	assert second.accept_block(block) == BlockStatus.INVALID
+
+
+def test_reward_above_the_base_reward_fails_the_block_check(blockchain, wallets):
+	alice, bob = wallets
+	block = next_block(blockchain, [alice.send_transaction(bob, 1, 1)], bob,
+						reward=blockchain.economic_model.base_mining_reward + 1)
+
+	assert check_block(block.encode(), block.index, block.previous_hash,
+						blockchain.economic_model.base_mining_reward) == 'invalid block reward'
+
+
+def test_side_branch_with_inflated_reward_does_not_reorganize():
+	first, second = network()
+	alice, bob = first.get_wallet_by_name('alice'), first.get_wallet_by_name('bob')
+	assert first.pending_transaction(alice.send_transaction(bob, 1, 1))
+	assert first.mine_block(bob)
+	tip = first.chain[-1].hash
+
+	fork = next_block(second, [alice.send_transaction(bob, 2, 1)], alice)
+	assert second.accept_block(fork) == BlockStatus.EXTENDED
+	# Награда в пределах базовой проходит проверку блока и отвергается только при смене цепи
+	inflated = next_block(second, [alice.send_transaction(bob, 3, 1)], alice, reward=second.next_reward() + 1)
+
+	assert first.accept_block(fork) == BlockStatus.SIDE
+	assert first.accept_block(inflated) == BlockStatus.INVALID
+	assert first.chain[-1].hash == tip
+	assert first.remaining_supply > 0
+
+
+def test_easier_target_is_rejected(blockchain, wallets):
+	alice, bob = wallets
+	block = next_block(blockchain, [alice.send_transaction(bob, 1, 1)], bob, target=MAX_TARGET)
+
+	assert blockchain.accept_block(block) == BlockStatus.INVALID
+	assert len(blockchain.chain) == 1
+
+
+def test_confirmed_transaction_cannot_be_replayed_in_a_block(blockchain, wallets):
+	alice, bob = wallets
+	transaction = alice.send_transaction(bob, 1, 1)
+	assert blockchain.pending_transaction(transaction)
+	assert blockchain.mine_block(bob)
+	balance = alice.balance_units
+
+	assert blockchain.accept_block(next_block(blockchain, [transaction], bob)) == BlockStatus.INVALID
+	assert len(blockchain.chain) == 2
+	assert alice.balance_units == balance
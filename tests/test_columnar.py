@@ -0,0 +1,36 @@
+"""
+Колоночная таблица транзакций и компактные объекты транзакций (core.columnar).
+"""
+from blockchain import Block, Transaction
+from core.columnar import TransactionTable
+
+
+def test_table_round_trip(blockchain, wallets):
+	alice, bob = wallets
+	transactions = [alice.send_transaction(bob, amount, 1) for amount in range(1, 4)]
+	transactions.append(Transaction(bob.public_key_bytes, alice.public_key_bytes, 5, 0))
+	table = TransactionTable.from_transactions(transactions, Transaction.from_fields)
+
+	assert len(table) == len(transactions)
+	assert [t.encode() for t in table] == [t.encode() for t in transactions]
+	assert table[3].signature is None
+	assert table.total_amount() == sum(t.amount for t in transactions)
+	assert table.total_fees() == 3 * 10 ** 8
+
+
+def test_table_from_block_bytes(blockchain, wallets):
+	alice, bob = wallets
+	transactions = [alice.send_transaction(bob, 1, 1), bob.send_transaction(alice, 2, 0)]
+	block = Block(1, transactions, blockchain.chain[-1].hash, {'account': bob.public_key_bytes.hex(), 'action': 'mine'})
+	table = TransactionTable.from_block_bytes(block.encode())
+
+	assert [table.fields(i)[5] for i in range(len(table))] == [t.signature for t in block.transactions]
+	assert block.transaction_table().total_amount() == table.total_amount() == 3 * 10 ** 8
+	assert 0 < table.nbytes() <= sum(len(t.encode()) for t in block.transactions)
+
+
+def test_transactions_have_no_instance_dict(wallets):
+	alice, bob = wallets
+
+	assert not hasattr(alice.send_transaction(bob, 1, 1), '__dict__')
+	assert not hasattr(alice, '__dict__')
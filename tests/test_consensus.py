@@ -0,0 +1,243 @@
+"""
+Алгоритмы консенсуса и ставки валидаторов (core.consensus).
+"""
+from collections import Counter
+import random
+
+import pytest
+
+from blockchain import Block, BlockChain, ConsensusAlgorithm
+from core.consensus import STAKE_ACCOUNT, UNSTAKE_ACCOUNT, FenwickTree, ProofOfStake, ProofOfWork, StakePool, get_engine
+from core.exceptions import InsufficientFundsException
+from core.forks import BlockStatus
+from core.state import AccountState
+
+from conftest import make_config, share_wallets
+
+
+def proof_of_stake() -> BlockChain:
+	return BlockChain(make_config(consensus_algorithm=ConsensusAlgorithm.PROOF_OF_STAKE))
+
+
+def produce(blockchain: BlockChain, sender, recipient) -> Block:
+	assert blockchain.pending_transaction(sender.send_transaction(recipient, 1, 1))
+	assert blockchain.mine_block(blockchain.get_wallet(blockchain.next_validator()))
+
+	return blockchain.chain[-1]
+
+
+def stake_block(blockchain: BlockChain, transactions, validator) -> Block:
+	block = Block(len(blockchain.chain), list(transactions), blockchain.chain[-1].hash,
+				{'account': validator.public_key_bytes.hex(), 'action': 'stake', 'reward': blockchain.next_reward()})
+	blockchain.seal_block(block, wallet=validator)
+
+	return block
+
+
+def test_fenwick_tree_matches_linear_scan():
+	rng = random.Random(1)
+	weights = [rng.randint(0, 10) for _ in range(37)]
+	tree = FenwickTree(weights)
+
+	for _ in range(200):
+		index, delta = rng.randrange(len(weights)), rng.randint(0, 5)
+		weights[index] += delta
+		tree.add(index, delta)
+		value = rng.randrange(sum(weights))
+		expected = next(i for i in range(len(weights)) if sum(weights[:i + 1]) > value)
+
+		assert tree.find(value) == expected
+		assert tree.total == sum(weights)
+
+
+def test_selection_is_weighted_by_stake():
+	pool = StakePool()
+	pool.stake(b'a', 10)
+	pool.stake(b'b', 30)
+	pool.stake(b'c', 60)
+	picks = Counter(pool.select(i.to_bytes(4, 'big')) for i in range(20000))
+
+	assert picks[b'c'] > picks[b'b'] > picks[b'a'] > 1500
+
+	pool.unstake(b'c', 60)
+	assert b'c' not in {pool.select(i.to_bytes(4, 'big')) for i in range(1000)}
+	assert pool.total == 40
+
+
+def test_selection_does_not_depend_on_stake_order():
+	first, second = StakePool(), StakePool()
+
+	for key, stake in ((b'a', 10), (b'b', 30), (b'c', 60)):
+		first.stake(key, stake)
+
+	for key, stake in ((b'c', 60), (b'a', 10), (b'b', 30)):
+		second.stake(key, stake)
+
+	assert all(first.select(bytes([i])) == second.select(bytes([i])) for i in range(256))
+
+
+def test_unstake_more_than_staked_is_rejected():
+	pool = StakePool()
+	pool.stake(b'a', 10)
+
+	with pytest.raises(ValueError):
+		pool.unstake(b'a', 11)
+
+	assert pool.select(b'') == b'a'
+	assert StakePool().select(b'') is None
+
+
+def test_engine_follows_config(blockchain):
+	assert isinstance(blockchain.consensus, ProofOfWork)
+	assert isinstance(get_engine(proof_of_stake()), ProofOfStake)
+
+
+def test_stake_locks_available_balance():
+	blockchain = proof_of_stake()
+	alice, bob = blockchain.create_wallet('alice', 100), blockchain.create_wallet('bob', 100)
+
+	assert blockchain.stake(alice, 40, 1)
+	assert not blockchain.stake(alice, 60, 1)
+	assert blockchain.stakes.total == 0
+	assert blockchain.mine_block(bob)
+	assert (alice.balance, alice.available_balance) == (99, 59)
+	assert blockchain.stakes.stake_of(alice.public_key_bytes) == 40 * 10 ** 8
+
+	assert blockchain.unstake(alice, 40, 1)
+	assert not blockchain.unstake(alice, 1, 1)
+	assert blockchain.mine_block(alice)
+	assert alice.balance == alice.available_balance
+	assert blockchain.stakes.total == 0
+
+
+def test_stake_transactions_are_reverted_with_the_block():
+	accounts = AccountState()
+	accounts.set_balance(b'a' * 64, 50)
+	accounts.apply_block(1, [(b'a' * 64, STAKE_ACCOUNT, 40, 1)])
+	assert (accounts.balance(b'a' * 64), accounts.locked(b'a' * 64), accounts.available(b'a' * 64)) == (49, 40, 9)
+
+	with pytest.raises(InsufficientFundsException):
+		accounts.apply_block(2, [(b'a' * 64, UNSTAKE_ACCOUNT, 41, 1)])
+
+	accounts.apply_block(2, [(b'a' * 64, UNSTAKE_ACCOUNT, 40, 1)])
+	assert (accounts.balance(b'a' * 64), accounts.locked(b'a' * 64)) == (48, 0)
+
+	accounts.revert_block()
+	assert accounts.locked(b'a' * 64) == 40
+	accounts.revert_block()
+	assert (accounts.balance(b'a' * 64), accounts.locked(b'a' * 64), accounts.total) == (50, 0, 50)
+	assert b'a' * 64 not in accounts.stakes.validators() and STAKE_ACCOUNT not in accounts
+
+
+def test_only_the_selected_validator_produces_blocks():
+	blockchain = proof_of_stake()
+	alice, bob = blockchain.create_wallet('alice', 100), blockchain.create_wallet('bob', 100)
+
+	blockchain.stake(alice, 10)
+	blockchain.stake(bob, 30)
+	assert blockchain.mine_block(alice)
+	assert blockchain.pending_transaction(alice.send_transaction(bob, 1, 1))
+	other = alice if blockchain.next_validator() == bob.public_key_bytes else bob
+
+	assert not blockchain.mine_block(other)
+	assert blockchain.mine_block(blockchain.get_wallet(blockchain.next_validator()))
+	assert blockchain.chain[-1].nonce == 0
+
+
+def test_validator_does_not_depend_on_the_previous_block():
+	first = proof_of_stake()
+	alice, bob = first.create_wallet('alice', 100), first.create_wallet('bob', 100)
+	second = proof_of_stake()
+	share_wallets(first, second)
+
+	for blockchain, producer in ((first, alice), (second, bob)):
+		blockchain.stake(blockchain.get_wallet(alice.public_key_bytes), 10)
+		blockchain.stake(blockchain.get_wallet(bob.public_key_bytes), 30)
+		assert blockchain.mine_block(blockchain.get_wallet(producer.public_key_bytes))
+
+	assert first.chain[-1].hash != second.chain[-1].hash
+	assert first.next_validator() == second.next_validator() is not None
+
+
+def test_peer_accepts_blocks_of_selected_validators_only():
+	first = proof_of_stake()
+	alice, bob = first.create_wallet('alice', 100), first.create_wallet('bob', 100)
+	second = proof_of_stake()
+	share_wallets(first, second)
+
+	first.stake(alice, 10)
+	first.stake(bob, 30)
+	assert first.mine_block(alice)
+	assert second.accept_block(first.chain[-1]) == BlockStatus.EXTENDED
+	assert second.stakes.total == first.stakes.total
+
+	for _ in range(5):
+		assert second.accept_block(produce(first, alice, bob)) == BlockStatus.EXTENDED
+
+	other = alice if first.next_validator() == bob.public_key_bytes else bob
+	assert second.accept_block(stake_block(first, [alice.send_transaction(bob, 1, 1)], other)) == BlockStatus.INVALID
+
+	selected = first.get_wallet(first.next_validator())
+	unsigned = Block(len(first.chain), [alice.send_transaction(bob, 1, 1)], first.chain[-1].hash,
+					{'account': selected.public_key_bytes.hex(), 'action': 'stake', 'reward': first.next_reward()})
+	unsigned.metadata['signature'] = other.sign_data(ProofOfStake.signed_data(unsigned))
+	assert second.accept_block(unsigned) == BlockStatus.INVALID
+
+
+def test_stakes_are_restored_from_the_chain(tmp_path):
+	config = make_config(consensus_algorithm=ConsensusAlgorithm.PROOF_OF_STAKE, storage_path=str(tmp_path))
+	blockchain = BlockChain(config)
+	alice, bob = blockchain.create_wallet('alice', 100), blockchain.create_wallet('bob', 100)
+	blockchain.stake(alice, 10)
+	assert blockchain.mine_block(bob)
+
+	for _ in range(3):
+		produce(blockchain, bob, alice)
+
+	assert blockchain.stake(bob, 50)
+	produce(blockchain, bob, alice)
+
+	for _ in range(3):
+		produce(blockchain, bob, alice)
+
+	stakes = list(blockchain.stakes.validators())
+	blockchain.close()
+
+	restored = BlockChain(config)
+	assert list(restored.stakes.validators()) == stakes
+	assert restored.validate_chain(full=True)
+	restored.close()
+
+
+def test_locked_funds_cannot_be_spent_by_a_block():
+	accounts = AccountState()
+	accounts.set_balance(b'a' * 64, 50)
+	assert accounts.lock(b'a' * 64, 40)
+
+	with pytest.raises(InsufficientFundsException):
+		accounts.apply_block(1, [(b'a' * 64, b'b' * 64, 11, 0)])
+
+	accounts.apply_block(1, [(b'a' * 64, b'b' * 64, 10, 0)])
+	assert accounts.available(b'a' * 64) == 0
+
+
+def test_received_block_cannot_spend_staked_funds():
+	first = proof_of_stake()
+	alice, bob = first.create_wallet('alice', 60), first.create_wallet('bob', 100)
+	second = proof_of_stake()
+	share_wallets(first, second)
+	# Кошелёк проверяет доступный остаток, поэтому перевод подписан до блокировки ставки
+	spend, transfer = alice.send_transaction(bob, 45, 1), alice.send_transaction(bob, 9, 1)
+
+	first.stake(alice, 40, 1)
+	first.stake(bob, 10)
+	assert first.mine_block(bob)
+	assert second.accept_block(first.chain[-1]) == BlockStatus.EXTENDED
+
+	validator = first.get_wallet(first.next_validator())
+	assert second.accept_block(stake_block(first, [spend], validator)) == BlockStatus.INVALID
+	assert second.get_wallet(alice.public_key_bytes).available_balance == 19
+
+	assert second.accept_block(stake_block(first, [transfer], validator)) == BlockStatus.EXTENDED
+	staker = second.get_wallet(alice.public_key_bytes)
+	assert staker.balance - staker.available_balance == 40
@@ -0,0 +1,59 @@
+"""
+Криптографические бэкенды (core.crypto).
+"""
+import pytest
+
+from blockchain import Wallet
+from core.crypto import CURVE_ORDER, available_backends, get_backend, is_canonical
+
+
+@pytest.mark.parametrize('name', available_backends())
+def test_sign_verify_round_trip(name):
+	crypto = get_backend(name)
+	private_key, public_key = crypto.generate_key_pair()
+	signature = crypto.sign(private_key, b'payload')
+
+	assert crypto.verify(public_key, signature, b'payload')
+	assert not crypto.verify(public_key, signature, b'other payload')
+	assert crypto.public_key_bytes(crypto.load_private_key(crypto.private_key_bytes(private_key))) == public_key
+
+
+@pytest.mark.parametrize('name', available_backends())
+def test_signatures_are_canonical(name):
+	crypto = get_backend(name)
+	private_key, public_key = crypto.generate_key_pair()
+
+	for i in range(16):
+		signature = crypto.sign(private_key, bytes([i]))
+		malleated = signature[:32] + (CURVE_ORDER - int.from_bytes(signature[32:], 'big')).to_bytes(32, 'big')
+
+		assert is_canonical(signature)
+		assert not crypto.verify(public_key, malleated, bytes([i]))
+
+
+def test_backends_are_interchangeable():
+	names = available_backends()
+	private_key, public_key = get_backend(names[0]).generate_key_pair()
+	signature = get_backend(names[0]).sign(private_key, b'data')
+
+	for name in names:
+		assert get_backend(name).verify(public_key, signature, b'data')
+
+
+@pytest.mark.parametrize('signer', available_backends())
+@pytest.mark.parametrize('verifier', available_backends())
+def test_backends_verify_each_other(signer, verifier):
+	crypto = get_backend(signer)
+	private_key, public_key = crypto.generate_key_pair()
+	signature = crypto.sign(private_key, b'payload')
+
+	assert get_backend(verifier).verify(public_key, signature, b'payload')
+
+
+@pytest.mark.parametrize('name', available_backends())
+def test_wallet_signs_with_its_backend(name):
+	alice, bob = Wallet('alice', 10, backend=get_backend(name)), Wallet('bob', 0)
+	transaction = alice.send_transaction(bob, 1, 1)
+
+	assert all(get_backend(other).verify(alice.public_key_bytes, transaction.signature, transaction.to_bytes())
+			for other in available_backends())
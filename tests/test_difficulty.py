@@ -0,0 +1,67 @@
+"""
+Цель доказательства работы и ее пересчет (core.difficulty).
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+from core.difficulty import (MAX_ADJUSTMENT, MAX_TARGET, Retargeter, block_target, check_proof, difficulty_target,
+							target_bytes, target_work, work_target)
+
+from conftest import GENESIS_TIME
+
+Header = namedtuple('Header', 'index timestamp metadata')
+
+
+def blocks(count: int, seconds: float, target: int) -> list:
+	return [Header(i, GENESIS_TIME + timedelta(seconds=seconds * i), {'target': target}) for i in range(count + 1)]
+
+
+def test_difficulty_target_matches_legacy_work():
+	assert difficulty_target(0) == MAX_TARGET
+	assert target_work(difficulty_target(1)) == 256
+	assert target_work(difficulty_target(2)) == 256 ** 2
+	assert target_work(work_target(1000)) == 1000
+
+
+def test_block_target_and_proof():
+	target = difficulty_target(1)
+
+	assert block_target({'target': target}) == target
+	assert block_target({'difficulty': 1}) == target
+	assert check_proof(target_bytes(target), {'target': target})
+	assert not check_proof(target_bytes(target + 1), {'target': target})
+
+
+def test_constant_target_without_window():
+	retarget = Retargeter(1, 0, difficulty_target(1))
+
+	assert retarget.next_target(blocks(10, 0.01, difficulty_target(3))) == difficulty_target(1)
+
+
+def test_target_tracks_block_interval():
+	initial = difficulty_target(1)
+	retarget = Retargeter(1, 4, initial)
+
+	assert retarget.next_target(blocks(4, 1, initial)) == initial
+	assert target_work(retarget.next_target(blocks(4, 0.5, initial))) == 2 * target_work(initial)
+	assert target_work(retarget.next_target(blocks(4, 2, initial))) == target_work(initial) // 2
+
+
+def test_adjustment_is_bounded():
+	initial = difficulty_target(1)
+	retarget = Retargeter(1, 4, initial)
+
+	assert target_work(retarget.next_target(blocks(4, 0, initial))) == MAX_ADJUSTMENT * target_work(initial)
+	assert target_work(retarget.next_target(blocks(4, 1000, initial))) == target_work(initial) // MAX_ADJUSTMENT
+
+
+def test_mined_block_meets_the_retargeted_target(blockchain, wallets, capsys):
+	alice, bob = wallets
+	assert blockchain.pending_transaction(alice.send_transaction(bob, 1, 1))
+	assert blockchain.mine_block(bob)
+
+	block = blockchain.chain[-1]
+	assert block.metadata['target'] == difficulty_target(1)
+	assert block.hash <= target_bytes(block.metadata['target'])
+	assert f'target {target_bytes(difficulty_target(1)).hex()}' in capsys.readouterr().out
+	assert not hasattr(blockchain, 'difficulty')
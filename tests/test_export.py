@@ -0,0 +1,90 @@
+"""
+Потоковый обход цепи и выгрузка в NDJSON и CSV (core.export).
+"""
+import csv
+from datetime import timedelta
+from decimal import Decimal
+import io
+import json
+
+import pytest
+
+from core.export import BLOCK_FIELDS, TRANSACTION_FIELDS, export_blocks, export_transactions
+
+
+@pytest.fixture
+def transactions(blockchain, wallets):
+	alice, bob = wallets
+	sent = []
+
+	for amount in ('0.5', 1, 2):
+		sent.append(alice.send_transaction(bob, amount, '0.00000001'))
+		sent.append(bob.send_transaction(alice, 1, 0))
+		assert blockchain.submit_transactions(sent[-2:])
+		assert blockchain.mine_block(bob)
+
+	return sent
+
+
+def test_iteration_by_height_and_time(blockchain, transactions):
+	chain = list(blockchain.chain)
+
+	assert [block.index for block in blockchain.iter_blocks()] == list(range(len(chain)))
+	assert [block.index for block in blockchain.iter_blocks(start=1, stop=3)] == [1, 2]
+	assert [block.index for block in blockchain.iter_blocks(since=chain[2].timestamp)] == [2, 3]
+	assert [block.index for block in blockchain.iter_blocks(until=chain[1].timestamp + timedelta(microseconds=1))] == [0, 1]
+
+
+def test_iteration_by_address(blockchain, wallets, transactions):
+	alice, _ = wallets
+
+	everything = [(height, position) for height, position, _ in blockchain.iter_transactions()]
+	assert len(everything) == len(transactions)
+
+	sent = [transaction.signature for _, _, transaction in blockchain.iter_transactions(address=alice.public_key_bytes)]
+	assert sorted(sent) == sorted(transaction.signature for transaction in transactions)
+	assert len(list(blockchain.iter_transactions(start=2, address=alice.public_key_bytes))) == 4
+
+
+def test_ndjson_blocks(blockchain, transactions):
+	out = io.StringIO()
+
+	assert export_blocks(blockchain, out, chunk_size=2) == len(blockchain.chain)
+
+	records = [json.loads(line) for line in out.getvalue().splitlines()]
+	assert [record['hash'] for record in records] == [block.hash.hex() for block in blockchain.chain]
+	assert records[1]['transactions'][0]['amount'] == '0.50000000'
+	assert records[1]['metadata']['reward'] == blockchain.chain[1].metadata['reward']
+
+
+def test_ndjson_block_summaries(blockchain, transactions):
+	out = io.StringIO()
+	export_blocks(blockchain, out, transactions=False, start=1)
+
+	assert [json.loads(line)['transactions'] for line in out.getvalue().splitlines()] == [2, 2, 2]
+
+
+def test_csv_transactions(blockchain, wallets, transactions):
+	alice, _ = wallets
+	out = io.StringIO(newline='')
+
+	assert export_transactions(blockchain, out, format='csv', chunk_size=4) == len(transactions)
+
+	rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+	assert tuple(rows[0]) == TRANSACTION_FIELDS
+	assert [row['signature'] for row in rows] == [t.signature.hex() for t in transactions]
+	assert sum(Decimal(row['amount']) for row in rows if row['sender'] == alice.public_key_bytes.hex()) == Decimal('3.5')
+
+
+def test_csv_blocks(blockchain, transactions):
+	out = io.StringIO(newline='')
+	export_blocks(blockchain, out, format='csv')
+	rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+
+	assert tuple(rows[0]) == BLOCK_FIELDS
+	assert json.loads(rows[-1]['metadata'])['account'] == blockchain.chain[-1].metadata['account']
+
+
+def test_unknown_format_is_rejected(blockchain):
+	with pytest.raises(ValueError):
+		export_blocks(blockchain, io.StringIO(), format='xml')
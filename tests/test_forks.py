@@ -0,0 +1,107 @@
+"""
+Выбор цепи по суммарной работе и смена активной цепи (core.forks).
+"""
+from blockchain import BlockChain
+from core.forks import BlockStatus, BlockTree, block_work
+
+from conftest import make_config, next_block, share_wallets
+
+
+def network():
+	first = BlockChain(make_config())
+	first.create_wallet('alice', 100)
+	first.create_wallet('bob', 100)
+	second = BlockChain(make_config())
+	share_wallets(first, second)
+
+	return first, second
+
+
+def mine(blockchain: BlockChain, count: int, amount: int=1) -> list:
+	alice, bob = blockchain.get_wallet_by_name('alice'), blockchain.get_wallet_by_name('bob')
+
+	for _ in range(count):
+		assert blockchain.pending_transaction(alice.send_transaction(bob, amount, 1))
+		assert blockchain.mine_block(bob)
+
+	return list(blockchain.chain)[-count:]
+
+
+def balances(blockchain: BlockChain) -> list:
+	return [wallet.balance_units for wallet in blockchain.wallets]
+
+
+def test_heavier_branch_reorganizes_the_chain():
+	first, second = network()
+	replaced = mine(first, 2)
+	branch = mine(second, 3, amount=2)
+
+	assert [first.accept_block(block) for block in branch] == [BlockStatus.SIDE, BlockStatus.SIDE,
+																BlockStatus.REORGANIZED]
+	assert first.chain[-1].hash == second.chain[-1].hash
+	assert balances(first) == balances(second)
+	assert first.total_mined_coins == second.total_mined_coins
+	assert first.validate_chain()
+
+	# Транзакции отмененных блоков возвращаются в мемпул
+	assert all(transaction in first.mempool for block in replaced for transaction in block.transactions)
+
+
+def test_nodes_converge_after_exchanging_branches():
+	first, second = network()
+	first_branch, second_branch = mine(first, 2), mine(second, 3, amount=2)
+
+	for block in first_branch:
+		second.accept_block(block)
+
+	for block in second_branch:
+		first.accept_block(block)
+
+	assert first.chain[-1].hash == second.chain[-1].hash
+	assert balances(first) == balances(second)
+
+	extension = mine(first, 1, amount=3)
+	assert second.accept_block(extension[0]) == BlockStatus.EXTENDED
+	assert balances(first) == balances(second)
+
+
+def test_equal_work_keeps_the_first_seen_chain():
+	first, second = network()
+	tip = mine(first, 2)[-1].hash
+	branch = mine(second, 2, amount=2)
+
+	assert [first.accept_block(block) for block in branch] == [BlockStatus.SIDE, BlockStatus.SIDE]
+	assert first.chain[-1].hash == tip
+
+
+def test_duplicate_and_orphan_blocks():
+	first, second = network()
+	block = mine(first, 1)[0]
+	parentless = next_block(first, [], first.get_wallet_by_name('bob'))
+	parentless.previous_hash = bytes(32)
+
+	assert second.accept_block(block) == BlockStatus.EXTENDED
+	assert second.accept_block(block) == BlockStatus.DUPLICATE
+	assert second.accept_block(parentless) == BlockStatus.ORPHAN
+
+
+def test_branch_beyond_the_depth_is_pruned(blockchain, wallets):
+	alice, bob = wallets
+	tree = BlockTree.from_chain(blockchain.chain, depth=2)
+	side = next_block(blockchain, [alice.send_transaction(bob, 1, 1)], bob)
+	tree.add(side)
+
+	for _ in range(2):
+		assert blockchain.pending_transaction(alice.send_transaction(bob, 2, 1))
+		assert blockchain.mine_block(bob)
+		tree.connect(blockchain.chain[-1])
+
+	assert tree.branch(side) == (0, [side])
+	assert tree.main_work(0) == sum(block_work(block) for block in blockchain.chain[1:])
+
+	assert blockchain.pending_transaction(alice.send_transaction(bob, 2, 1))
+	assert blockchain.mine_block(bob)
+	tree.connect(blockchain.chain[-1])
+
+	assert side.hash not in tree
+	assert tree.branch(side) is None
@@ -0,0 +1,100 @@
+"""
+Вторичные индексы цепи: блоки по хешу, транзакции по сигнатуре и адресу (core.indexes).
+"""
+import os
+
+from blockchain import BlockChain
+from core.indexes import ChainIndex
+
+from conftest import make_config
+
+
+def mine(blockchain: BlockChain, count: int) -> list:
+	alice, bob = blockchain.get_wallet_by_name('alice'), blockchain.get_wallet_by_name('bob')
+	transactions = []
+
+	for amount in range(1, count + 1):
+		transactions.append(alice.send_transaction(bob, amount, 1))
+		assert blockchain.pending_transaction(transactions[-1])
+		assert blockchain.mine_block(bob)
+
+	return transactions
+
+
+def persistent(tmp_path) -> BlockChain:
+	blockchain = BlockChain(make_config(storage_path=str(tmp_path)))
+	# Без снимков состояния кошельки не сохраняются, после повторного открытия они новые
+	blockchain.create_wallet('alice', 100)
+	blockchain.create_wallet('bob', 100)
+
+	return blockchain
+
+
+def test_lookups(blockchain, wallets):
+	alice, bob = wallets
+	transactions = mine(blockchain, 3)
+
+	for block in blockchain.chain:
+		assert blockchain.get_block_by_hash(block.hash) is block
+
+	block, position = blockchain.get_transaction(transactions[1].signature)
+	assert block.index == 2 and block.transactions[position].signature == transactions[1].signature
+	assert blockchain.get_transaction(bytes(64)) is None
+	assert blockchain.get_block_by_hash(bytes(32)) is None
+
+	history = blockchain.get_address_transactions(alice.public_key_bytes)
+	assert [transaction.signature for _, transaction in history] == [t.signature for t in transactions]
+	assert [height for height, _ in blockchain.get_address_transactions(bob.public_key_bytes, offset=1, limit=1)] == [2]
+
+
+def test_index_matches_the_chain_after_removing_a_block(blockchain, wallets):
+	mine(blockchain, 3)
+	index = ChainIndex.open(blockchain.chain)
+	last = blockchain.chain[-1]
+	index.remove_block(last)
+
+	assert index.tip_hash == blockchain.chain[-2].hash
+	assert index.block_height(last.hash) is None
+	assert index.transaction_location(last.transactions[0].signature) is None
+	assert index.encode() == ChainIndex.open(blockchain.chain[:-1]).encode()
+
+
+def test_saved_index_round_trip(tmp_path, blockchain, wallets):
+	mine(blockchain, 3)
+	index = ChainIndex.open(blockchain.chain)
+	index.save(str(tmp_path / 'index.bin'))
+	loaded = ChainIndex.load(str(tmp_path / 'index.bin'))
+
+	assert loaded.encode() == index.encode()
+	assert loaded.tip_hash == blockchain.chain[-1].hash
+
+
+def test_damaged_index_file_is_ignored(tmp_path, blockchain, wallets):
+	mine(blockchain, 2)
+	path = str(tmp_path / 'index.bin')
+	ChainIndex.open(blockchain.chain).save(path)
+
+	with open(path, 'r+b') as file:
+		file.seek(-1, os.SEEK_END)
+		file.write(b'\xff')
+
+	assert ChainIndex.load(path) is None
+	assert ChainIndex.open(blockchain.chain, path).tip_hash == blockchain.chain[-1].hash
+
+
+def test_index_is_reopened_with_the_chain(tmp_path):
+	blockchain = persistent(tmp_path)
+	transactions = mine(blockchain, 2)
+	blockchain.close()
+
+	assert os.path.exists(str(tmp_path / 'index.bin'))
+
+	blockchain = persistent(tmp_path)
+	transactions += mine(blockchain, 1)
+
+	for height, transaction in enumerate(transactions, start=1):
+		block, position = blockchain.get_transaction(transaction.signature)
+		assert (block.index, position) == (height, 0)
+
+	assert ChainIndex.open(blockchain.chain).encode() == blockchain.indexes.encode()
+	blockchain.close()
@@ -0,0 +1,91 @@
+"""
+Отложенное и асинхронное логирование, импорт без побочных эффектов (core.logs).
+"""
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+
+from core.logs import LazyHex, configure_logging, shutdown_logging
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Collector(logging.Handler):
+	def __init__(self) -> None:
+		super().__init__()
+		self.lines = []
+
+	def emit(self, record: logging.LogRecord) -> None:
+		self.lines.append(self.format(record))
+
+
+def test_import_has_no_side_effects(tmp_path):
+	code = ('import sys, blockchain, logging\n'
+			'print(sorted(name for name in ("ecdsa", "cryptography", "multiprocessing") if name in sys.modules))\n'
+			'print([type(h).__name__ for h in logging.getLogger("blockchain").handlers])')
+	result = subprocess.run([sys.executable, '-c', code], cwd=str(tmp_path), capture_output=True, text=True,
+							env=dict(os.environ, PYTHONPATH=ROOT), check=True)
+
+	assert result.stdout.splitlines() == ['[]', "['NullHandler']"]
+	assert os.listdir(str(tmp_path)) == []
+
+
+class Probe:
+	"""Изменяемый аргумент лога, считающий свои преобразования в строку"""
+	def __init__(self) -> None:
+		self.calls = 0
+		self.value = 'before'
+
+	def __str__(self) -> str:
+		self.calls += 1
+		return self.value
+
+
+def test_lazy_arguments_format_only_when_emitted(monkeypatch):
+	assert str(LazyHex(b'\x00\xff')) == '00ff'
+
+	calls = []
+	monkeypatch.setattr(LazyHex, '__str__', lambda self: calls.append(self) or self.data.hex())
+	collector, probe, gate = Collector(), Probe(), threading.Event()
+	# Поток записи ждет, пока аргумент не изменится после вызова логгера
+	waiter = Collector()
+	waiter.emit = lambda record: gate.wait(5)
+	logger = configure_logging(logging.INFO, directory=None, handlers=[waiter, collector], name='test.logs')
+
+	try:
+		logger.debug('skipped %s %s', LazyHex(b'\x01'), probe)
+		assert calls == [] and probe.calls == 0
+
+		logger.info('block %s', LazyHex(b'\x01'))
+		logger.info('transaction %s', probe)
+		probe.value = 'after'
+		gate.set()
+	finally:
+		shutdown_logging()
+
+	assert calls
+	assert [line.split('] ')[1] for line in collector.lines] == ['block 01', 'transaction before']
+
+
+def test_structured_records_are_written_by_the_listener(tmp_path):
+	collector = Collector()
+	directory = str(tmp_path / 'logs')
+	logger = configure_logging(logging.INFO, directory=directory, structured=True, handlers=[collector], name='test.logs')
+
+	try:
+		logger.debug('skipped')
+		assert not os.path.exists(directory)
+
+		logger.info('block %s', LazyHex(b'\x01'), extra={'block': 5})
+	finally:
+		shutdown_logging()
+
+	entry = json.loads(collector.lines[0])
+	assert len(collector.lines) == 1
+	assert (entry['message'], entry['block'], entry['level']) == ('block 01', 5, 'INFO')
+
+	with open(os.path.join(directory, os.listdir(directory)[0])) as file:
+		assert json.loads(file.readline())['message'] == 'block 01'
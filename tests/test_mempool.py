@@ -0,0 +1,88 @@
+"""
+Мемпул и прием транзакций в него (core.mempool, BlockChain.pending_transaction).
+"""
+from copy import copy
+
+from core.configs import TransactionStatus
+from core.crypto import CURVE_ORDER
+from core.mempool import Mempool
+
+
+def test_select_orders_by_fee_then_arrival(wallets):
+	alice, bob = wallets
+	low = alice.send_transaction(bob, 1, 0.1)
+	high = alice.send_transaction(bob, 1, 2)
+	same = alice.send_transaction(bob, 1, 0.1)
+	pool = Mempool()
+
+	for transaction in (low, high, same):
+		assert pool.add(transaction)
+
+	assert pool.select() == [high, low, same]
+	assert pool.select(max_count=1) == [high]
+
+
+def test_duplicate_and_unsigned_are_rejected(wallets):
+	alice, bob = wallets
+	transaction = alice.send_transaction(bob, 1, 1)
+	pool = Mempool()
+
+	assert pool.add(transaction)
+	assert not pool.add(transaction)
+
+	transaction.signature = None
+	assert not pool.add(transaction)
+
+
+def test_full_pool_evicts_lowest_fee(wallets):
+	alice, bob = wallets
+	evicted = []
+	pool = Mempool(max_size=2, on_evict=evicted.append)
+	cheap, middle, rich = (alice.send_transaction(bob, 1, fee) for fee in (0.1, 0.5, 1))
+
+	assert pool.add(cheap) and pool.add(middle)
+	assert not pool.add(alice.send_transaction(bob, 1, 0.01))
+	assert pool.add(rich)
+	assert evicted == [cheap]
+	assert len(pool) == 2
+
+
+def test_block_takes_a_batch_from_the_mempool(blockchain, wallets):
+	alice, bob = wallets
+	blockchain.config.block_max_transactions = 2
+	transactions = [alice.send_transaction(bob, 1, fee) for fee in (0.1, 0.3, 0.2)]
+
+	for transaction in transactions:
+		assert blockchain.pending_transaction(transaction)
+
+	assert blockchain.mine_block(bob)
+	assert blockchain.chain[-1].transactions == [transactions[1], transactions[2]]
+	assert blockchain.pending_transactions == [transactions[0]]
+
+
+def test_confirmed_transaction_is_not_accepted_again(blockchain, wallets):
+	alice, bob = wallets
+	transaction = alice.send_transaction(bob, 10, 1)
+
+	assert blockchain.pending_transaction(transaction)
+	assert blockchain.mine_block(bob)
+
+	balances = alice.balance, bob.balance
+	replay = copy(transaction)
+	assert not blockchain.pending_transaction(replay)
+	assert replay.status == TransactionStatus.FAILED
+	assert alice.transactions_history[replay.signature.hex()]['status'] == TransactionStatus.FAILED
+	assert not blockchain.mine_block(bob)
+	assert (alice.balance, bob.balance) == balances
+
+
+def test_malleated_signature_is_rejected(blockchain, wallets):
+	alice, bob = wallets
+	transaction = alice.send_transaction(bob, 10, 1)
+	assert blockchain.pending_transaction(transaction)
+	assert blockchain.mine_block(bob)
+
+	replay = copy(transaction)
+	r, s = replay.signature[:32], int.from_bytes(replay.signature[32:], 'big')
+	replay.signature = r + (CURVE_ORDER - s).to_bytes(32, 'big')
+	assert not blockchain.pending_transaction(replay)
@@ -0,0 +1,71 @@
+"""
+Дерево Меркла транзакций блока и доказательства включения (core.merkle).
+"""
+import pytest
+
+from core.merkle import (EMPTY_ROOT, MerkleAccumulator, inclusion_proof, leaf_hash, merkle_levels, merkle_root,
+						verify_inclusion)
+
+from conftest import next_block
+
+LEAVES = [bytes([i]) * (i + 1) for i in range(17)]
+
+
+@pytest.mark.parametrize('count', range(18))
+def test_accumulator_matches_tree_levels(count):
+	leaves = LEAVES[:count]
+	root = merkle_levels([leaf_hash(data) for data in leaves])[-1][0] if leaves else EMPTY_ROOT
+
+	assert merkle_root(leaves) == root
+	assert len(MerkleAccumulator(leaves)) == count
+
+
+@pytest.mark.parametrize('count', [1, 2, 3, 7, 8, 17])
+def test_every_leaf_has_a_valid_proof(count):
+	leaves = LEAVES[:count]
+	levels = merkle_levels([leaf_hash(data) for data in leaves])
+	root = merkle_root(leaves)
+
+	for position, data in enumerate(leaves):
+		proof = inclusion_proof(levels, position)
+
+		assert len(proof) <= count.bit_length()
+		assert verify_inclusion(data, position, count, proof, root)
+
+
+def test_tampered_proofs_are_rejected():
+	leaves = LEAVES[:7]
+	levels = merkle_levels([leaf_hash(data) for data in leaves])
+	root = merkle_root(leaves)
+	proof = inclusion_proof(levels, 2)
+
+	assert not verify_inclusion(leaves[3], 2, 7, proof, root)
+	assert not verify_inclusion(leaves[2], 3, 7, proof, root)
+	assert not verify_inclusion(leaves[2], 2, 4, proof, root)
+	assert not verify_inclusion(leaves[2], 2, 7, proof[:-1], root)
+	assert not verify_inclusion(leaves[2], 2, 7, proof + [root], root)
+	assert not verify_inclusion(leaves[2], 2, 7, [bytes(32)] + proof[1:], root)
+	assert not verify_inclusion(leaves[2], 7, 7, proof, root)
+
+	with pytest.raises(IndexError):
+		inclusion_proof(levels, 7)
+
+
+def test_leaf_cannot_pose_as_an_inner_node():
+	levels = merkle_levels([leaf_hash(data) for data in LEAVES[:2]])
+
+	assert not verify_inclusion(levels[0][0] + levels[0][1], 0, 1, [], levels[-1][0])
+
+
+def test_block_transaction_proofs(blockchain, wallets):
+	alice, bob = wallets
+	transactions = [alice.send_transaction(bob, amount, 1) for amount in range(1, 6)]
+	block = next_block(blockchain, transactions, bob)
+
+	for position, transaction in enumerate(transactions):
+		proof = block.transaction_proof(position)
+
+		assert verify_inclusion(transaction.encode(), position, len(transactions), proof, block.merkle_root)
+
+	other = bob.send_transaction(alice, 1, 1)
+	assert not verify_inclusion(other.encode(), 0, len(transactions), block.transaction_proof(0), block.merkle_root)
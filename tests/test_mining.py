@@ -0,0 +1,68 @@
+"""
+Перебор nonce при добыче блока (core.mining).
+"""
+from hashlib import sha256
+
+from blockchain import Block, BlockChain
+from core import serialization
+from core.difficulty import difficulty_target, target_bytes
+from core.mining import ParallelMiner
+
+from conftest import make_config
+
+
+def test_parallel_search_finds_a_valid_nonce(blockchain, wallets):
+	alice, bob = wallets
+	block = Block(1, [alice.send_transaction(bob, 1, 1)], blockchain.chain[-1].hash, {'action': 'mine'})
+	target = difficulty_target(2)
+
+	with ParallelMiner(workers=2, check_interval=500) as miner:
+		block.mine(target, miner)
+
+	assert block.hash <= target_bytes(target)
+
+
+def test_search_starts_from_the_given_nonce(blockchain):
+	prefix = Block(1, [], blockchain.chain[-1].hash, {}).header_prefix()
+	target = difficulty_target(1)
+
+	with ParallelMiner(workers=2, check_interval=100) as miner:
+		nonce = miner.search(prefix, target, 1000)
+
+	assert nonce >= 1000
+	assert sha256(prefix + serialization.encode_nonce(nonce)).digest() <= target_bytes(target)
+
+
+def test_mine_block_uses_worker_processes():
+	blockchain = BlockChain(make_config(mining_workers=2))
+	alice = blockchain.create_wallet('alice', 100)
+	bob = blockchain.create_wallet('bob', 100)
+
+	try:
+		blockchain.pending_transaction(alice.send_transaction(bob, 1, 1))
+		blockchain.mine_block(bob)
+	finally:
+		blockchain.close()
+
+	assert blockchain.miner is not None
+	assert blockchain.chain[-1].hash <= target_bytes(difficulty_target(1))
+	assert blockchain.validate_chain()
+
+
+def test_midstate_hash_matches_the_full_header(blockchain, wallets):
+	alice, bob = wallets
+	block = Block(1, [alice.send_transaction(bob, 1, 1)], blockchain.chain[-1].hash, {'action': 'mine'}, nonce=42)
+	attempt = block.midstate()
+	attempt.update(serialization.encode_nonce(block.nonce))
+
+	assert attempt.digest() == block.hash == sha256(block.header_prefix() + serialization.encode_nonce(42)).digest()
+
+
+def test_local_mining_meets_the_target(blockchain, wallets):
+	alice, bob = wallets
+	block = Block(1, [alice.send_transaction(bob, 1, 1)], blockchain.chain[-1].hash, {'action': 'mine'})
+	target = difficulty_target(2)
+	block.mine(target)
+
+	assert block.hash <= target_bytes(target)
+	assert block.hash == sha256(block.header_prefix() + serialization.encode_nonce(block.nonce)).digest()
@@ -0,0 +1,104 @@
+"""
+Локальный узел с API JSON-RPC (core.node).
+"""
+import asyncio
+import json
+
+import pytest
+
+from blockchain import BlockChain, ConsensusAlgorithm
+from core.exceptions import RPCException
+from core.node import INVALID_PARAMS, METHOD_NOT_FOUND, PARSE_ERROR, NodeClient, NodeService, check_transaction_proof
+
+from conftest import make_config
+
+
+def run(blockchain, scenario):
+	"""Выполнение сценария с запущенным узлом и подключенным клиентом"""
+	async def main():
+		async with NodeService(blockchain) as service:
+			async with NodeClient(*service.address) as client:
+				return await scenario(service, client)
+
+	return asyncio.run(main())
+
+
+def test_transfer_mine_and_query(blockchain):
+	async def scenario(service, client):
+		alice = await client.call('create_wallet', name='alice', initial_balance='100')
+		bob = await client.call('create_wallet', name='bob', initial_balance='100')
+		sent = await client.call('send_transaction', sender=alice['public_key'], recipient=bob['public_key'],
+								amount='1.5', fee='0.5')
+		mined = await client.call('mine_block', public_key=bob['public_key'])
+
+		return (alice, sent, mined, await client.call('get_transaction', signature=sent['signature']),
+				await client.call('get_wallet', name='alice'), await client.call('get_chain_info'),
+				await client.call('get_transaction_proof', index=1, position=0))
+
+	alice, sent, mined, found, wallet, info, proof = run(blockchain, scenario)
+
+	assert sent['accepted'] and mined['mined'] and mined['index'] == 1
+	assert (found['block'], found['position'], found['amount']) == (1, 0, '1.50000000')
+	assert wallet['balance'] == '98.00000000' and wallet['public_key'] == alice['public_key']
+	assert (info['height'], info['tip']) == (1, mined['hash'])
+	assert check_transaction_proof(proof)
+	assert not check_transaction_proof(dict(proof, position=1))
+
+
+def test_forged_and_replayed_transactions_are_refused(blockchain, wallets):
+	alice, bob = wallets
+	transaction = alice.send_transaction(bob, 1, 1)
+	forged = bytearray(transaction.encode())
+	forged[-1] ^= 1
+
+	async def scenario(service, client):
+		results = [await client.call('submit_transaction', transaction=bytes(forged).hex()),
+					await client.call('submit_transaction', transaction=transaction.encode().hex())]
+		await client.call('mine_block', public_key=bob.public_key_bytes.hex())
+		results.append(await client.call('submit_transaction', transaction=transaction.encode().hex()))
+
+		return results
+
+	assert run(blockchain, scenario) == [False, True, False]
+
+
+def test_errors_are_reported_per_request(blockchain, wallets):
+	alice, _ = wallets
+
+	async def scenario(service, client):
+		return (await client.batch([('get_wallet', {'public_key': alice.public_key_bytes.hex()}),
+									('no_such_method', {}), ('get_block', {'index': 'first', 'unknown': 1})]),
+				json.loads(await service.handle(b'{')))
+
+	(wallet, missing, invalid), parse_error = run(blockchain, scenario)
+
+	assert wallet['name'] == 'alice'
+	assert isinstance(missing, RPCException) and missing.code == METHOD_NOT_FOUND
+	assert isinstance(invalid, RPCException) and invalid.code == INVALID_PARAMS
+	assert parse_error['error']['code'] == PARSE_ERROR
+
+
+def test_client_raises_on_error(blockchain):
+	async def scenario(service, client):
+		await client.call('get_transaction_proof', index=5, position=0)
+
+	with pytest.raises(RPCException):
+		run(blockchain, scenario)
+
+
+def test_stake_is_confirmed_by_a_block():
+	blockchain = BlockChain(make_config(consensus_algorithm=ConsensusAlgorithm.PROOF_OF_STAKE))
+	alice, bob = blockchain.create_wallet('alice', 100), blockchain.create_wallet('bob', 100)
+
+	async def scenario(service, client):
+		staked = await client.call('stake', public_key=alice.public_key_bytes.hex(), amount='10')
+		mined = await client.call('mine_block', public_key=bob.public_key_bytes.hex())
+
+		return staked, mined, await client.call('get_next_validator')
+
+	staked, mined, validator = run(blockchain, scenario)
+	blockchain.close()
+
+	assert staked['changed'] and staked['stake'] == '0.00000000'
+	assert mined['mined']
+	assert validator == {'public_key': alice.public_key_bytes.hex(), 'stake': '10.00000000', 'total_stake': '10.00000000'}
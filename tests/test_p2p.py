@@ -0,0 +1,85 @@
+"""
+Обмен блоками и транзакциями между узлами (core.p2p).
+"""
+import asyncio
+import os
+
+from blockchain import Block, BlockChain
+from core import p2p
+from core.node import NodeService
+from core.p2p import GossipNode
+
+from conftest import make_config, share_wallets
+
+
+async def until(condition, timeout: float=10.0) -> None:
+	"""Ожидание условия с опросом (узлы обмениваются сообщениями в фоне)"""
+	loop = asyncio.get_running_loop()
+	deadline = loop.time() + timeout
+
+	while not condition():
+		assert loop.time() < deadline, 'nodes did not converge in time'
+		await asyncio.sleep(0.01)
+
+
+def test_nodes_sync_and_relay():
+	first = BlockChain(make_config())
+	alice, bob = first.create_wallet('alice', 100), first.create_wallet('bob', 100)
+	second = BlockChain(make_config())
+	share_wallets(first, second)
+
+	# Блоки, добытые до соединения, второй узел получает по заголовкам
+	for amount in range(1, 4):
+		assert first.pending_transaction(alice.send_transaction(bob, amount, 1))
+		assert first.mine_block(bob)
+
+	async def main():
+		first_gossip, second_gossip = GossipNode(first), GossipNode(second)
+
+		async with NodeService(first, gossip=first_gossip) as first_node, \
+				NodeService(second, gossip=second_gossip) as second_node:
+			await second_gossip.connect('127.0.0.1', first_gossip.port)
+			await until(lambda: second.chain[-1].hash == first.chain[-1].hash)
+
+			result = await second_node.send_transaction(bob.public_key_bytes.hex(), alice.public_key_bytes.hex(), '2', '1')
+			assert result['accepted']
+			await until(lambda: len(first.mempool) == 1)
+
+			mined = await first_node.mine_block(alice.public_key_bytes.hex())
+			assert mined['mined']
+			await until(lambda: second.chain[-1].hash.hex() == mined['hash'])
+			await until(lambda: len(second.mempool) == 0)
+
+	asyncio.run(main())
+
+	assert [wallet.balance_units for wallet in first.wallets] == [wallet.balance_units for wallet in second.wallets]
+	first.close()
+	second.close()
+
+
+def test_lost_requests_expire():
+	requests = p2p._Requests(timeout=5.0)
+
+	assert requests.request(b'a', 0.0) and requests.request(b'b', 1.0)
+	assert not requests.request(b'a', 4.0)
+	assert requests.request(b'c', 5.5)
+	assert len(requests) == 2
+
+	assert requests.request(b'a', 5.5)
+	requests.expire(100.0)
+	assert len(requests) == 0
+
+
+def test_evicted_orphans_can_be_received_again(blockchain, monkeypatch):
+	monkeypatch.setattr(p2p, 'MAX_ORPHANS', 2)
+	gossip = GossipNode(blockchain)
+	parent = os.urandom(32)
+	orphans = [Block(5, [], parent if i < 2 else os.urandom(32), {'orphan': i}) for i in range(3)]
+
+	for orphan in orphans:
+		gossip._seen_blocks.add(orphan.hash)
+		gossip._add_orphan(orphan)
+
+	assert sum(len(children) for children in gossip._orphans.values()) == gossip._orphan_count == 2
+	assert orphans[0].hash not in gossip._seen_blocks
+	assert orphans[1].hash in gossip._seen_blocks and orphans[2].hash in gossip._seen_blocks
@@ -0,0 +1,107 @@
+"""
+Двоичный формат транзакций и блоков (core.serialization).
+"""
+from decimal import Decimal
+
+import pytest
+
+from blockchain import Block, Transaction
+from core import serialization
+
+from conftest import next_block
+
+
+def test_metadata_round_trip():
+	metadata = {'account': 'ab', 'reward': 10 ** 20, 'share': 0.25, 'flags': [True, False, None], 'key': b'\x00\xff',
+				'nested': {'b': 1, 'a': -1}}
+	data = serialization.encode_metadata(metadata)
+
+	assert serialization.decode_metadata(data) == metadata
+	assert serialization.encode_metadata(dict(reversed(list(metadata.items())))) == data
+
+
+def test_transaction_round_trip(wallets):
+	alice, bob = wallets
+	transaction = alice.send_transaction(bob, '0.00000001', 1)
+	data = transaction.encode()
+	decoded = Transaction.decode(data)
+
+	assert len(data) == serialization.TX_SIZE
+	assert decoded.encode() == data
+	assert decoded.signature == transaction.signature
+	assert (decoded.amount, decoded.fee, decoded.timestamp) == (1, serialization.BASE_UNITS, transaction.timestamp)
+	assert decoded.sender_wallet == alice.public_key_bytes and decoded.recipient_wallet == bob.public_key_bytes
+
+
+def test_unsigned_transaction_round_trip(wallets):
+	alice, bob = wallets
+	transaction = Transaction(alice.public_key_bytes, bob.public_key_bytes, 5, 0)
+
+	assert Transaction.decode(transaction.encode()).signature is None
+
+
+def test_block_round_trip(blockchain, wallets):
+	alice, bob = wallets
+	block = next_block(blockchain, [alice.send_transaction(bob, 1, 1), bob.send_transaction(alice, 2, 0)], bob)
+	decoded = Block.decode(block.encode())
+
+	assert decoded.hash == block.hash
+	assert decoded.encode() == block.encode()
+	assert decoded.metadata == block.metadata
+	assert [t.signature for t in decoded.transactions] == [t.signature for t in block.transactions]
+	assert serialization.block_header(block.encode()) == block.header()
+
+
+def test_block_with_foreign_transactions_is_rejected(blockchain, wallets):
+	alice, bob = wallets
+	block = next_block(blockchain, [alice.send_transaction(bob, 1, 1)], bob)
+	other = next_block(blockchain, [bob.send_transaction(alice, 1, 1)], bob)
+	data = block.header() + other.encode()[len(other.header()):]
+
+	with pytest.raises(ValueError):
+		Block.decode(data)
+
+
+def test_unknown_format_version_is_rejected(wallets):
+	alice, bob = wallets
+	data = bytearray(alice.send_transaction(bob, 1, 1).encode())
+	data[0] = serialization.TRANSACTION_FORMAT_VERSION + 1
+
+	with pytest.raises(ValueError):
+		Transaction.decode(bytes(data))
+
+
+@pytest.mark.parametrize('amount, units', [(1, 100000000), (0.1, 10000000), ('0.00000001', 1),
+											(Decimal('12.5'), 1250000000), ('0.000000015', 2), (0.3 - 0.1, 20000000)])
+def test_amounts_in_base_units(amount, units):
+	assert serialization.to_base_units(amount) == units
+
+
+def test_amounts_round_trip_without_loss():
+	for units in (1, 10 ** 8 - 1, 21 * 10 ** 14 + 1):
+		assert serialization.to_base_units(serialization.from_base_units(units)) == units
+
+	assert serialization.from_base_units(1) == Decimal('0.00000001')
+	assert serialization.from_base_units(10 ** 8) == 1
+
+
+def test_transaction_requires_integer_units(wallets):
+	alice, bob = wallets
+
+	with pytest.raises(TypeError):
+		Transaction(alice.public_key_bytes, bob.public_key_bytes, 0.5, 0)
+
+	with pytest.raises(ValueError):
+		Transaction(alice.public_key_bytes, bob.public_key_bytes, 0, 0)
+
+
+def test_wallet_balances_are_exact(blockchain, wallets):
+	alice, bob = wallets
+
+	for _ in range(10):
+		assert blockchain.pending_transaction(alice.send_transaction(bob, 0.1, '0.00000001'))
+
+	assert blockchain.mine_block(bob)
+	assert alice.balance == Decimal('98.99999990')
+	# Комиссии списываются с отправителя и никому не зачисляются
+	assert alice.balance_units + bob.balance_units == 200 * serialization.BASE_UNITS + blockchain.chain[-1].metadata['reward'] - 10
@@ -0,0 +1,115 @@
+"""
+Снимки состояния блокчейна (core.snapshot).
+"""
+import os
+
+import pytest
+
+from blockchain import BlockChain
+from core.snapshot import SnapshotStore
+
+from conftest import make_config
+
+STATE = {'height': 3, 'tip': b'\x01' * 32, 'wallets': [{'name': 'alice', 'balance': 100.0}]}
+
+
+def test_save_and_load(tmp_path):
+	store = SnapshotStore(str(tmp_path))
+	digest = store.save(3, STATE)
+
+	assert len(digest) == 32
+	assert store.load(3) == STATE
+	assert store.load(4) is None
+
+
+def test_only_the_latest_snapshots_are_kept(tmp_path):
+	store = SnapshotStore(str(tmp_path), keep=2)
+
+	for height in range(1, 5):
+		store.save(height, dict(STATE, height=height))
+
+	assert store.heights() == [4, 3]
+	assert [height for height, _ in store.snapshots()] == [4, 3]
+
+
+def test_corrupted_snapshot_is_skipped(tmp_path):
+	store = SnapshotStore(str(tmp_path))
+	store.save(1, dict(STATE, height=1))
+	store.save(2, dict(STATE, height=2))
+
+	with open(store._path(2), 'r+b') as file:
+		file.seek(-1, os.SEEK_END)
+		file.write(b'\x00')
+
+	assert store.load(2) is None
+	assert [state['height'] for _, state in store.snapshots()] == [1]
+
+
+def restorable(image: dict) -> dict:
+	"""Состояние без времени последнего обновления настроек (это часы узла, а не цепи)"""
+	image['supply'].pop('last_update_time')
+
+	return image
+
+
+def mine(blockchain: BlockChain, count: int) -> None:
+	alice, bob = blockchain.get_wallet_by_name('alice'), blockchain.get_wallet_by_name('bob')
+
+	for amount in range(1, count + 1):
+		assert blockchain.pending_transaction(alice.send_transaction(bob, amount, 1))
+		assert blockchain.mine_block(bob)
+
+
+@pytest.mark.parametrize('count', [4, 5])
+def test_restart_restores_state(tmp_path, count):
+	config = make_config(storage_path=str(tmp_path), snapshot_interval=2, snapshot_private_keys=True)
+	blockchain = BlockChain(config)
+	blockchain.create_wallet('alice', 100)
+	blockchain.create_wallet('bob', 100)
+	mine(blockchain, count)
+	confirmed = blockchain.chain[1].transactions[0]
+	image = restorable(blockchain.state_image())
+	blockchain.close()
+
+	# При нечетном количестве блоков последний применяется поверх снимка
+	blockchain = BlockChain(config)
+
+	assert blockchain.snapshots.heights()[0] == 4
+	assert restorable(blockchain.state_image()) == image
+	assert not blockchain.pending_transaction(confirmed)
+
+	mine(blockchain, 1)
+	assert blockchain.validate_chain()
+	blockchain.close()
+
+
+def test_private_keys_are_left_out_by_default(tmp_path):
+	config = make_config(storage_path=str(tmp_path), snapshot_interval=2)
+	blockchain = BlockChain(config)
+	alice, bob = blockchain.create_wallet('alice', 100), blockchain.create_wallet('bob', 100)
+	mine(blockchain, 2)
+	assert all('private_key' not in wallet for wallet in blockchain.state_image()['wallets'])
+	blockchain.close()
+
+	blockchain = BlockChain(config)
+	restored = blockchain.get_wallet_by_name('alice')
+	balance = restored.balance
+
+	with pytest.raises(ValueError, match='no private key'):
+		restored.send_transaction(bob, 1, 1)
+
+	assert restored.balance == balance
+
+	with pytest.raises(ValueError, match='does not match'):
+		restored.load_private_key(bob.private_key_bytes)
+
+	restored.load_private_key(alice.private_key_bytes)
+	assert blockchain.pending_transaction(restored.send_transaction(blockchain.get_wallet_by_name('bob'), 1, 1))
+	blockchain.close()
+
+
+def test_snapshot_requires_configuration(blockchain):
+	assert blockchain.snapshots is None
+
+	with pytest.raises(Exception, match='disabled'):
+		blockchain.save_snapshot()
@@ -0,0 +1,99 @@
+"""
+Состояние счетов (core.state) и его применение к блокам.
+"""
+import pytest
+
+from blockchain import Block, Transaction
+from core.serialization import to_base_units
+from core.exceptions import InsufficientFundsException, InvalidTransferException
+from core.state import AccountState
+
+A, B, M = b'a' * 64, b'b' * 64, b'm' * 64
+
+
+def state(**balances) -> AccountState:
+	accounts = AccountState(journal_depth=10)
+
+	for key, balance in balances.items():
+		accounts.set_balance(key.encode() * 64, balance)
+
+	return accounts
+
+
+def test_apply_and_revert_block():
+	accounts = state(a=100, b=0)
+	accounts.apply_block(1, [(A, B, 30, 5)], M, 10)
+
+	assert (accounts.balance(A), accounts.balance(B), accounts.balance(M)) == (65, 30, 10)
+	assert accounts.total == 105
+
+	assert accounts.revert_block() == 1
+	assert (accounts.balance(A), accounts.balance(B), accounts.balance(M)) == (100, 0, 0)
+	assert accounts.total == 100
+
+
+def test_revert_keeps_changes_made_outside_blocks():
+	accounts = state(a=100)
+	accounts.apply_block(1, [(A, B, 10, 1)], M, 5)
+	accounts.set_balance(b'c' * 64, 50)
+	accounts.credit(B, 7)
+
+	accounts.revert_block()
+	assert (accounts.balance(A), accounts.balance(B), accounts.balance(b'c' * 64)) == (100, 7, 50)
+	assert M not in accounts
+	assert accounts.total == accounts.recompute_total() == 157
+
+
+def test_block_application_is_atomic():
+	accounts = state(a=100, b=0)
+
+	with pytest.raises(InsufficientFundsException):
+		accounts.apply_block(1, [(A, B, 60, 0), (A, B, 60, 0)])
+
+	assert (accounts.balance(A), accounts.balance(B)) == (100, 0)
+	assert accounts.height is None
+
+
+@pytest.mark.parametrize('amount, fee', [(-50, 0), (0, 0), (10, -1)])
+def test_invalid_transfer_is_rejected(amount, fee):
+	accounts = state(a=100, b=100)
+
+	with pytest.raises(InvalidTransferException):
+		accounts.apply_block(1, [(A, B, amount, fee)])
+
+	assert (accounts.balance(A), accounts.balance(B)) == (100, 100)
+
+
+def test_reservations_reduce_available_balance():
+	accounts = state(a=100)
+
+	assert accounts.reserve(A, 70)
+	assert not accounts.reserve(A, 40)
+	assert accounts.available(A) == 30
+
+	accounts.release(A, 70)
+	assert accounts.available(A) == 100
+
+
+def test_negative_transaction_cannot_be_built(wallets):
+	alice, bob = wallets
+
+	with pytest.raises(ValueError):
+		Transaction(alice.public_key_bytes, bob.public_key_bytes, -to_base_units(50), 0)
+
+	with pytest.raises(ValueError):
+		alice.send_transaction(bob, 10, -1)
+
+
+def test_negative_transaction_is_rejected(blockchain, wallets):
+	alice, bob = wallets
+	transaction = alice.send_transaction(bob, 50, 1)
+	transaction.amount = -to_base_units(50)
+	transaction.sign(alice)
+
+	assert not blockchain.pending_transaction(transaction)
+
+	block = Block(len(blockchain.chain), [transaction], blockchain.chain[-1].hash, metadata={})
+	assert not blockchain.add_block(block)
+	assert len(blockchain.chain) == 1
+	assert (alice.balance, bob.balance) == (100, 100)
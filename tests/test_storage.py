@@ -0,0 +1,117 @@
+"""
+Хранилище блоков на диске (core.storage).
+"""
+import os
+
+import pytest
+
+from blockchain import Block, BlockChain
+from core.storage import RECORD_HEADER, BlockStore
+
+from conftest import make_config
+
+
+def open_store(directory, cache_size: int=256) -> BlockStore:
+	return BlockStore(str(directory), encode=Block.encode, decode=Block.decode, cache_size=cache_size)
+
+
+@pytest.fixture
+def blocks(blockchain, wallets):
+	alice, bob = wallets
+
+	for amount in range(1, 5):
+		assert blockchain.pending_transaction(alice.send_transaction(bob, amount, 1))
+		assert blockchain.mine_block(bob)
+
+	return list(blockchain.chain)
+
+
+def test_reopen_round_trip(tmp_path, blocks):
+	store = open_store(tmp_path)
+
+	for block in blocks:
+		store.append(block)
+
+	store.close()
+	store = open_store(tmp_path, cache_size=1)
+
+	assert len(store) == len(blocks)
+	assert [block.hash for block in store] == [block.hash for block in blocks]
+	assert store[-1].hash == blocks[-1].hash
+	assert [block.index for block in store[1:3]] == [1, 2]
+
+	with pytest.raises(IndexError):
+		store[len(blocks)]
+
+	store.close()
+
+
+def test_truncate_survives_reopen(tmp_path, blocks):
+	store = open_store(tmp_path)
+
+	for block in blocks:
+		store.append(block)
+
+	store.truncate(2)
+	store.append(blocks[2])
+	store.close()
+	store = open_store(tmp_path)
+
+	assert [block.hash for block in store] == [block.hash for block in blocks[:3]]
+	store.close()
+
+
+def test_torn_write_is_discarded(tmp_path, blocks):
+	store = open_store(tmp_path)
+
+	for block in blocks:
+		store.append(block)
+
+	store.close()
+	path = os.path.join(str(tmp_path), BlockStore.DATA_FILE)
+	os.truncate(path, os.path.getsize(path) - 1)
+	store = open_store(tmp_path)
+
+	assert len(store) == len(blocks) - 1
+	assert store[-1].hash == blocks[-2].hash
+
+	# Запись после восстановления дописывается за последним целым блоком
+	store.append(blocks[-1])
+	store.close()
+	store = open_store(tmp_path)
+
+	assert store[-1].hash == blocks[-1].hash
+	store.close()
+
+
+def test_corrupted_record_is_detected(tmp_path, blocks):
+	store = open_store(tmp_path)
+	store.append(blocks[0])
+	store.close()
+
+	with open(os.path.join(str(tmp_path), BlockStore.DATA_FILE), 'r+b') as data:
+		data.seek(RECORD_HEADER.size)
+		data.write(b'\xff')
+
+	store = open_store(tmp_path)
+
+	with pytest.raises(IOError):
+		store[0]
+
+	store.close()
+
+
+def test_blockchain_reopens_its_chain(tmp_path):
+	config = make_config(storage_path=str(tmp_path))
+	blockchain = BlockChain(config)
+	alice, bob = blockchain.create_wallet('alice', 100), blockchain.create_wallet('bob', 100)
+	assert blockchain.pending_transaction(alice.send_transaction(bob, 1, 1))
+	assert blockchain.mine_block(bob)
+	hashes = [block.hash for block in blockchain.chain]
+	blockchain.close()
+
+	blockchain = BlockChain(config)
+
+	assert [block.hash for block in blockchain.chain] == hashes
+	assert blockchain.accounting.transactions_count == 1
+	blockchain.close()
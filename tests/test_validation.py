@@ -0,0 +1,104 @@
+"""
+Проверка цепи (core.validation, BlockChain.validate_chain).
+"""
+from blockchain import Block, BlockChain, ConsensusAlgorithm, Transaction
+from core.difficulty import MAX_TARGET
+from core.validation import ChainValidator
+
+from conftest import make_config
+
+
+def mine(blockchain: BlockChain, sender, recipient, blocks: int) -> None:
+	for _ in range(blocks):
+		assert blockchain.pending_transaction(sender.send_transaction(recipient, 1, 1))
+		assert blockchain.mine_block(recipient)
+
+
+def mined_block(blockchain: BlockChain, transactions, metadata: dict, target: int) -> Block:
+	block = Block(len(blockchain.chain), transactions, blockchain.chain[-1].hash, metadata)
+	block.mine(target)
+
+	return block
+
+
+def test_valid_chain(blockchain, wallets):
+	mine(blockchain, *wallets, 3)
+
+	assert blockchain.validate_chain(full=True)
+
+
+def test_tampered_transaction_is_detected(blockchain, wallets):
+	mine(blockchain, *wallets, 3)
+	original = blockchain.chain[2].transactions[0]
+	forged = Transaction(original.sender_wallet, original.recipient_wallet, original.amount + 1, original.fee,
+						original.timestamp)
+	forged.signature = original.signature
+	blockchain.chain[2].transactions[0] = forged
+
+	result = ChainValidator().validate(blockchain.chain, full=True)
+
+	assert not result and result.failed_index == 2
+
+
+def test_checkpoint_skips_validated_blocks(blockchain, wallets):
+	mine(blockchain, *wallets, 3)
+	validator = ChainValidator()
+
+	assert validator.validate(blockchain.chain).checked == 4
+
+	mine(blockchain, *wallets, 1)
+	assert validator.validate(blockchain.chain).checked == 1
+
+
+def test_block_without_target_is_rejected(blockchain, wallets):
+	mine(blockchain, *wallets, 1)
+	alice, bob = wallets
+	block = mined_block(blockchain, [alice.send_transaction(bob, 1, 1)], {'account': bob.public_key_bytes.hex()}, MAX_TARGET)
+
+	assert blockchain.add_block(block)
+	assert not blockchain.validate_chain(full=True)
+	assert blockchain.validator.validate(blockchain.chain, True, blockchain._check_consensus).reason == 'missing proof of work target'
+
+
+def test_block_with_own_easy_target_is_rejected(blockchain, wallets):
+	mine(blockchain, *wallets, 1)
+	alice, bob = wallets
+	block = mined_block(blockchain, [alice.send_transaction(bob, 1, 1)], {'account': bob.public_key_bytes.hex(), 'target': MAX_TARGET}, MAX_TARGET)
+
+	assert blockchain.add_block(block)
+	assert not blockchain.validate_chain(full=True)
+
+
+def test_block_with_duplicate_transaction_is_rejected(blockchain, wallets):
+	alice, bob = wallets
+	transaction = alice.send_transaction(bob, 10, 1)
+	metadata = {'account': bob.public_key_bytes.hex(), 'target': blockchain.next_target()}
+	block = mined_block(blockchain, [transaction, transaction], metadata, blockchain.next_target())
+
+	assert blockchain.add_block(block)
+	assert ChainValidator().validate(blockchain.chain, full=True).reason == 'duplicate transaction 1'
+
+
+def test_proof_of_stake_chain_checks_the_producer():
+	blockchain = BlockChain(make_config(consensus_algorithm=ConsensusAlgorithm.PROOF_OF_STAKE))
+	alice, bob = blockchain.create_wallet('alice', 100), blockchain.create_wallet('bob', 100)
+	assert blockchain.stake(alice, 10)
+	assert blockchain.mine_block(bob)
+
+	for stake in (0, 20, 0, 0):
+		if stake:
+			assert blockchain.stake(bob, stake)
+
+		validator = blockchain.get_wallet(blockchain.next_validator())
+		assert blockchain.pending_transaction(alice.send_transaction(bob, 1, 1))
+		assert blockchain.mine_block(validator)
+
+	assert blockchain.validate_chain(full=True)
+
+	other = alice if blockchain.next_validator() == bob.public_key_bytes else bob
+	block = Block(len(blockchain.chain), [alice.send_transaction(bob, 1, 1)], blockchain.chain[-1].hash,
+				{'account': other.public_key_bytes.hex(), 'action': 'stake', 'reward': blockchain.mining_reward})
+	blockchain.seal_block(block, wallet=other)
+
+	assert blockchain.add_block(block)
+	assert not blockchain.validate_chain(full=True)
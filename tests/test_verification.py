@@ -0,0 +1,70 @@
+"""
+Пакетная проверка сигнатур транзакций (core.verification).
+"""
+from blockchain import Transaction
+from core.verification import SignatureVerifier
+
+
+def forged(transaction: Transaction) -> Transaction:
+	"""Транзакция с чужой сигнатурой и увеличенной суммой"""
+	copy = Transaction(transaction.sender_wallet, transaction.recipient_wallet, transaction.amount + 1,
+					transaction.fee, transaction.timestamp)
+	copy.signature = transaction.signature
+
+	return copy
+
+
+def test_batch_keeps_order_and_rejects_forgeries(wallets):
+	alice, bob = wallets
+	first, second = alice.send_transaction(bob, 1, 1), bob.send_transaction(alice, 2, 1)
+	unsigned = Transaction(alice.public_key_bytes, bob.public_key_bytes, 1, 0)
+	verifier = SignatureVerifier()
+
+	assert verifier.verify_batch([first, forged(first), unsigned, second]) == [True, False, False, True]
+	assert verifier.stats()['verified'] == 2
+	assert verifier.stats()['rejected'] == 1
+
+
+def test_verified_signatures_are_cached(wallets):
+	alice, bob = wallets
+	transaction = alice.send_transaction(bob, 1, 1)
+	verifier = SignatureVerifier()
+
+	assert not verifier.is_verified(transaction)
+	assert verifier.verify(transaction)
+	assert verifier.is_verified(transaction)
+	assert not verifier.is_verified(forged(transaction))
+
+	assert verifier.verify(transaction)
+	assert verifier.stats()['cache_hits'] == 1
+	assert verifier.stats()['verified'] == 1
+
+
+def test_cache_evicts_oldest_signatures(wallets):
+	alice, bob = wallets
+	transactions = [alice.send_transaction(bob, amount, 1) for amount in range(1, 4)]
+	verifier = SignatureVerifier(max_cache_size=2)
+
+	assert all(verifier.verify_batch(transactions))
+	assert [verifier.is_verified(t) for t in transactions] == [False, True, True]
+
+
+def test_process_pool_matches_local_verification(wallets):
+	alice, bob = wallets
+	transactions = [alice.send_transaction(bob, amount, 1) for amount in range(1, 6)]
+	transactions.insert(2, forged(transactions[0]))
+	verifier = SignatureVerifier(workers=2, chunk_size=2)
+
+	try:
+		assert verifier.verify_batch(transactions) == [True, True, False, True, True, True]
+	finally:
+		verifier.shutdown()
+
+
+def test_forged_transaction_is_not_accepted(blockchain, wallets):
+	alice, bob = wallets
+	transaction = alice.send_transaction(bob, 1, 1)
+
+	assert not blockchain.pending_transaction(forged(transaction))
+	assert blockchain.pending_transactions == []
+	assert blockchain.submit_transactions([transaction, forged(transaction)]) == [True, False]
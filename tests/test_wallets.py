@@ -0,0 +1,33 @@
+"""
+Реестр кошельков блокчейна (core.wallets).
+"""
+from blockchain import Wallet
+
+
+def test_lookup_by_key_and_name(blockchain, wallets):
+	alice, bob = wallets
+	other = blockchain.create_wallet('alice', 5)
+
+	assert blockchain.get_wallet(alice.public_key) is alice
+	assert blockchain.wallets.get(bob.public_key.to_string()) is bob
+	assert blockchain.get_wallet(bytes(64)) is None
+	assert blockchain.get_wallet_by_name('alice') is alice
+	assert blockchain.wallets.find_by_name('alice') == [alice, other]
+	assert blockchain.wallets.find_by_name('carol') == []
+
+
+def test_registration_order_and_membership(blockchain, wallets):
+	alice, bob = wallets
+	outsider = Wallet('carol', 0)
+
+	assert list(blockchain.wallets) == [alice, bob]
+	assert alice in blockchain.wallets and alice.public_key.to_string() in blockchain.wallets
+	assert outsider not in blockchain.wallets
+	assert len(blockchain.wallets) == 2
+
+
+def test_transfer_from_an_unregistered_wallet_fails(blockchain, wallets):
+	alice, bob = wallets
+	outsider = Wallet('carol', 50)
+
+	assert not blockchain.pending_transaction(outsider.send_transaction(bob, 1, 1))